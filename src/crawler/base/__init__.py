@@ -1,5 +1,5 @@
 from .base_crawler import BaseCrawler
-from .rate_limiter import RateLimiter
+from .rate_limiter import RateLimiter, HostBudget, get_host_budget
 from .proxy_pool import ProxyPool
 
-__all__ = ['BaseCrawler', 'RateLimiter', 'ProxyPool']
\ No newline at end of file
+__all__ = ['BaseCrawler', 'RateLimiter', 'HostBudget', 'get_host_budget', 'ProxyPool']
\ No newline at end of file
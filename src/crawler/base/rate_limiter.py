@@ -1,10 +1,13 @@
 import os
 import time
 import asyncio
+import logging
 import random
-from typing import Optional, List
+from typing import Dict, Optional, List
 from urllib.parse import urlparse
 
+logger = logging.getLogger(__name__)
+
 class RateLimiter:
     """
     令牌桶算法速率限制器
@@ -32,11 +35,65 @@ class RateLimiter:
             # 等待令牌补充
             wait_time = (tokens - self.tokens) / self.rate
             await asyncio.sleep(wait_time)
-            self.tokens = max(0, self.tokens - tokens)
+            # 等待期间补充的令牌已全部用掉
+            self.tokens = 0
+            self.last_update = time.time()
             return True
     
     async def wait(self, delay: Optional[float] = None):
         """等待指定时间"""
         if delay is None:
             delay = random.uniform(1, 3)  # 默认1-3秒随机延迟
-        await asyncio.sleep(delay)
\ No newline at end of file
+        await asyncio.sleep(delay)
+
+
+class HostBudget:
+    """
+    单个主机的请求预算：并发上限 + 令牌桶速率
+
+    用法：
+        budget = get_host_budget('www.douyin.com', rate=3, concurrency=4)
+        async with budget:
+            await session.get(url)
+    """
+    
+    def __init__(self, rate: int = 10, concurrency: int = 4):
+        self.rate = rate
+        self.concurrency = concurrency
+        self.limiter = RateLimiter(rate)
+        self.semaphore = asyncio.Semaphore(concurrency)
+    
+    async def __aenter__(self):
+        await self.semaphore.acquire()
+        try:
+            await self.limiter.acquire()
+        except BaseException:
+            self.semaphore.release()
+            raise
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.semaphore.release()
+
+
+_host_budgets: Dict[str, HostBudget] = {}
+
+
+def get_host_budget(host: str, rate: int = 10, concurrency: int = 4) -> HostBudget:
+    """
+    获取主机共享的请求预算
+
+    同一主机的所有爬取任务共用一个预算；rate 和 concurrency 只在首次创建时生效，
+    之后以不同参数获取时记录警告（同一主机的参数应只在一处定义）。
+    """
+    if '://' in host:
+        host = urlparse(host).netloc
+    budget = _host_budgets.get(host)
+    if budget is None:
+        budget = _host_budgets[host] = HostBudget(rate, concurrency)
+    elif (budget.rate, budget.concurrency) != (rate, concurrency):
+        logger.warning(
+            f"Host budget for {host} already exists with rate={budget.rate}, "
+            f"concurrency={budget.concurrency}; ignoring rate={rate}, concurrency={concurrency}"
+        )
+    return budget
@@ -0,0 +1,66 @@
+"""
+B站弹幕批量处理耗时基准测试
+
+单个视频的弹幕整批交给 BilibiliPipeline.process_danmaku_batch（按列清洗、
+批量验证、去重后写入JSONL），目标是10万条远低于1秒。
+
+用法:
+    python benchmarks/bench_bilibili_batch.py [数量]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+
+from src.crawler.bilibili.pipelines import BilibiliPipeline
+
+
+VIDEO_ID = 'BV1xx411c7mD'
+
+
+def sample_danmaku(i):
+    """与弹幕XML解析结果结构相近的弹幕数据"""
+    return {
+        'danmaku_id': str(1000000000000000 + i),
+        'content': '弹幕内容 {}'.format(i % 500),
+        'time': i * 0.05,
+        'mode': 1,
+        'fontsize': 25,
+        'color': 16777215,
+        'mid_hash': '{:08x}'.format(i % 5000),
+        'pool': 0,
+        'send_time': 1700000000 + i // 20,
+        'video_id': VIDEO_ID,
+    }
+
+
+def run(count, storage_path):
+    """处理一批弹幕，返回 (耗时, 处理结果)"""
+    pipeline = BilibiliPipeline()
+    pipeline.storage_path = Path(storage_path)
+    rows = [sample_danmaku(i) for i in range(count)]
+
+    start = time.perf_counter()
+    result = pipeline.process_danmaku_batch(rows)
+    return time.perf_counter() - start, result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        elapsed, result = run(count, os.path.join(tmp, 'bilibili'))
+        print('{} danmaku  {:.2f}s  {}'.format(count, elapsed, result))
+
+        # 第二批全部重复，只走去重
+        elapsed, result = run(count, os.path.join(tmp, 'bilibili'))
+        print('{} duplicates  {:.2f}s  {}'.format(count, elapsed, result))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+抖音数据模型内存/耗时基准测试
+
+对比 create_video_item_from_json（5个嵌套dataclass）和
+DouyinVideoRecord.from_json（单个扁平 __slots__ 对象）。
+
+用法:
+    python benchmarks/bench_douyin_items.py [数量]
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from douyin.items import DouyinVideoRecord, create_video_item_from_json
+
+
+def sample_aweme(i):
+    """与 aweme/detail 接口结构相近的视频JSON"""
+    return {
+        'aweme_id': str(7300000000000000000 + i),
+        'desc': '测试视频 {} #美食 #探店'.format(i),
+        'create_time': 1700000000 + i,
+        'statistics': {'digg_count': i, 'comment_count': i // 10, 'share_count': i // 100,
+                       'play_count': i * 10, 'collect_count': i // 20},
+        'author': {'uid': str(100000 + i % 1000), 'nickname': '作者{}'.format(i % 1000),
+                   'avatar_thumb': {'url_list': ['https://p3.douyinpic.com/avatar/{}.jpeg'.format(i % 1000)]},
+                   'signature': '签名', 'follower_count': 1000, 'following_count': 10,
+                   'aweme_count': 50, 'verification_type': 0},
+        'video': {'play_addr': {'url_list': ['https://v.douyin.com/play/{}.mp4'.format(i)]},
+                  'cover': {'url_list': ['https://p3.douyinpic.com/cover/{}.jpeg'.format(i)]},
+                  'duration': 15000, 'width': 1080, 'height': 1920,
+                  'bit_rate': [{'gear_name': 'normal_720', 'bit_rate': 1000000}] * 4},
+        'music': {'id': '1', 'title': '原声', 'author': '作者', 'play_url': {'url_list': ['https://x/1.mp3']}},
+        'text_extra': [{'hashtag_name': '美食'}, {'hashtag_name': '探店'}],
+        'cha_list': [{'cha_name': '美食'}],
+        'poi': {'poi_name': '北京'}
+    }
+
+
+def measure(name, build, payloads):
+    # 计时和内存分开测，tracemalloc 会显著拖慢构建
+    start = time.perf_counter()
+    items = [build(p) for p in payloads]
+    elapsed = time.perf_counter() - start
+    del items
+
+    tracemalloc.start()
+    items = [build(p) for p in payloads]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for item in items:
+        item.to_dict()
+    to_dict_elapsed = time.perf_counter() - start
+
+    print('{:<28} build {:>7.2f}s  to_dict {:>6.2f}s  memory {:>8.1f}MB  ({:.0f} B/item)'.format(
+        name, elapsed, to_dict_elapsed, current / 1024 / 1024, current / len(items)
+    ))
+    return items
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    payloads = [sample_aweme(i) for i in range(count)]
+    print('{} items'.format(count))
+
+    measure('create_video_item_from_json', create_video_item_from_json, payloads)
+    records = measure('DouyinVideoRecord.from_json', DouyinVideoRecord.from_json, payloads)
+
+    start = time.perf_counter()
+    rows = [record.to_row() for record in records]
+    print('{:<28} {:>7.2f}s for {} rows'.format('DouyinVideoRecord.to_row', time.perf_counter() - start, len(rows)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+_ROUTER_DATA 提取基准测试
+
+对比旧的整页正则 + json.loads 和 RouterDataExtractor。
+
+用法:
+    python benchmarks/bench_router_data.py                 # 合成页面
+    python benchmarks/bench_router_data.py page1.html ...  # 保存下来的真实页面
+"""
+
+import json
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from douyin.utils.router_data import RouterDataExtractor, orjson
+
+LEGACY_PATTERN = r'window\._ROUTER_DATA\s*=\s*(\{.*?\})\s*</script>'
+
+
+def legacy_extract_video(html):
+    """旧实现：正则截取后 json.loads，再扫描 loaderData"""
+    match = re.search(LEGACY_PATTERN, html, re.DOTALL)
+    if not match:
+        return None
+    loader_data = json.loads(match.group(1)).get('loaderData', {})
+    for key in loader_data.keys():
+        if 'video' in key.lower() and key != 'video_layout':
+            video_data = loader_data[key]
+            if 'videoInfoRes' in video_data:
+                info_res = video_data['videoInfoRes']
+                if 'item_list' in info_res and info_res['item_list']:
+                    return info_res['item_list'][0]
+            if 'item_list' in video_data and video_data['item_list']:
+                return video_data['item_list'][0]
+    return None
+
+
+def synthetic_page(comment_count=400, filler_kb=300):
+    """生成与抖音视频页结构相近的页面：大段前置脚本 + _ROUTER_DATA"""
+    comments = [
+        {'cid': str(i), 'text': '评论内容 {}'.format(i) * 3, 'digg_count': i,
+         'user': {'nickname': '用户{}'.format(i), 'avatar': 'https://p3.douyinpic.com/a/{}.jpeg'.format(i)}}
+        for i in range(comment_count)
+    ]
+    router_data = {
+        'loaderData': {
+            'video_layout': {'commonContext': {'isSpider': False}},
+            'video_(id)/page': {
+                'videoInfoRes': {
+                    'item_list': [{
+                        'aweme_id': '7300000000000000000',
+                        'desc': '测试视频 #话题',
+                        'statistics': {'digg_count': 100, 'comment_count': comment_count},
+                        'comments': comments
+                    }]
+                }
+            }
+        }
+    }
+    filler = '<script>var x = "{}";</script>\n'.format('a' * 1000) * filler_kb
+    return (
+        '<html><head>' + filler + '</head><body><div id="root"></div>'
+        '<script>window._ROUTER_DATA = ' + json.dumps(router_data, ensure_ascii=False)
+        + '</script></body></html>'
+    )
+
+
+def run(name, html, number=50):
+    extractor = RouterDataExtractor()
+    assert legacy_extract_video(html) == extractor.extract_video(html), '两种实现结果不一致'
+
+    legacy = timeit.timeit(lambda: legacy_extract_video(html), number=number) / number
+    current = timeit.timeit(lambda: extractor.extract_video(html), number=number) / number
+    print('{:<30} {:>8.0f}KB  legacy {:>8.2f}ms  router_data {:>8.2f}ms  x{:.1f}'.format(
+        name, len(html) / 1024, legacy * 1000, current * 1000, legacy / current if current else 0
+    ))
+
+
+def main():
+    print('JSON backend: {}'.format('orjson' if orjson is not None else 'json'))
+    paths = sys.argv[1:]
+    if paths:
+        for path in paths:
+            with open(path, 'r', encoding='utf-8') as f:
+                run(os.path.basename(path), f.read())
+    else:
+        run('synthetic (small)', synthetic_page(comment_count=50, filler_kb=50))
+        run('synthetic (medium)', synthetic_page(comment_count=400, filler_kb=300))
+        run('synthetic (large)', synthetic_page(comment_count=2000, filler_kb=800))
+
+
+if __name__ == '__main__':
+    main()
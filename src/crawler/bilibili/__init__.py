@@ -2,9 +2,10 @@
 B站爬虫包初始化文件
 """
 
-from .spider import BilibiliSpider, CrawlerConfig
+from .spider import BilibiliApiError, BilibiliSpider, CrawlerConfig
 
 __all__ = [
+    'BilibiliApiError',
     'BilibiliSpider',
     'CrawlerConfig'
 ]
@@ -14,6 +14,10 @@ from .spiders.danmaku_spider import BilibiliDanmakuSpider
 from .spiders.comment_spider import BilibiliCommentSpider
 from .spiders.user_spider import BilibiliUserSpider
 from .pipelines import BilibiliPipeline
+from .monitor import UserUpdateMonitor
+from .settings import MONITORING_CONFIG, CACHE_CONFIG, REQUEST_CONFIG
+from ..utils.cache import create_cache
+from ..utils.metrics import ITEMS, ERRORS, start_exporter
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +29,16 @@ class BilibiliCrawler:
     整合视频、弹幕、评论、用户爬虫功能
     """
     
+    platform = 'bilibili'
+    
+    # 统计项与指标类型的对应关系
+    _STAT_TYPES = {
+        'videos_crawled': 'video',
+        'danmakus_crawled': 'danmaku',
+        'comments_crawled': 'comment',
+        'users_crawled': 'user',
+    }
+    
     def __init__(self):
         self.video_spider = BilibiliVideoSpider()
         self.danmaku_spider = BilibiliDanmakuSpider()
@@ -32,6 +46,12 @@ class BilibiliCrawler:
         self.user_spider = BilibiliUserSpider()
         self.pipeline = BilibiliPipeline()
         
+        # 响应缓存（按 CACHE_CONFIG，未启用时为None）
+        self.cache = create_cache(CACHE_CONFIG, name='bilibili')
+        
+        # UP主更新检测（按用户保存最近投稿游标）
+        self.monitor = UserUpdateMonitor(self.user_spider)
+        
         self.stats = {
             'start_time': datetime.now().isoformat(),
             'videos_crawled': 0,
@@ -41,8 +61,54 @@ class BilibiliCrawler:
             'errors': 0
         }
         
+        self._exporter = None
+        
         logger.info("BilibiliCrawler initialized")
     
+    def _count(self, key: str, amount: int = 1):
+        """累加实例统计，并同步到全局指标"""
+        self.stats[key] += amount
+        if key == 'errors':
+            ERRORS.labels(platform=self.platform).inc(amount)
+        elif amount:
+            ITEMS.labels(platform=self.platform, type=self._STAT_TYPES[key]).inc(amount)
+    
+    async def _cached(self, kind: str, ident, fetch):
+        """
+        通过缓存获取数据
+        
+        Args:
+            kind: CACHE_CONFIG['cache_keys'] 中的键类型
+            ident: 键参数（BV号、MID等）
+            fetch: 未命中时调用的抓取函数
+        """
+        if self.cache is None:
+            return await fetch()
+        return await self.cache.get_or_fetch(self.cache.key(kind, ident), fetch)
+    
+    def start_metrics_exporter(self, path: str = None, port: int = None):
+        """
+        启动后台指标导出
+        
+        按 MONITORING_CONFIG 的 report_interval 定期输出Prometheus格式快照，
+        并根据 thresholds 产生告警
+        
+        Args:
+            path: 快照文件路径，默认 data/bilibili/metrics.prom
+            port: 本地HTTP端口，提供 /metrics
+        """
+        if self._exporter is None:
+            if path is None and port is None:
+                path = 'data/bilibili/metrics.prom'
+            self._exporter = start_exporter(MONITORING_CONFIG, path=path, port=port)
+        return self._exporter
+    
+    def stop_metrics_exporter(self):
+        """停止指标导出"""
+        if self._exporter:
+            self._exporter.stop()
+            self._exporter = None
+    
     async def crawl_video_full(self, bvid: str, aid: str = None) -> Dict:
         """
         完整爬取单个视频（包括视频信息、弹幕、评论）
@@ -68,46 +134,84 @@ class BilibiliCrawler:
         
         try:
             # 1. 爬取视频信息
-            video_info = await self.video_spider.crawl_video_detail(bvid, aid)
+            video_info = await self._cached(
+                'video_info', bvid,
+                lambda: self.video_spider.crawl_video_detail(bvid, aid)
+            )
             if video_info:
                 video_data['video_info'] = video_info
-                self.stats['videos_crawled'] += 1
+                self._count('videos_crawled')
                 
                 # 获取作者ID
                 author_id = video_info.get('author_id') or video_info.get('mid')
                 if author_id:
                     # 2. 爬取UP主信息
-                    author_info = await self.user_spider.crawl_user_info_by_mid(author_id)
+                    # 同一UP主的多个视频共享缓存的用户信息
+                    author_info = await self._cached(
+                        'user_info', author_id,
+                        lambda: self.user_spider.crawl_user_info_by_mid(author_id)
+                    )
                     if author_info:
                         video_data['author_info'] = author_info
-                        self.stats['users_crawled'] += 1
+                        self._count('users_crawled')
             
             # 3. 爬取弹幕
             aid_for_danmaku = aid or video_info.get('aid') if video_info else None
             cid = video_info.get('cid') if video_info else None
             
             if cid and aid_for_danmaku:
-                danmakus = await self.danmaku_spider.crawl_danmaku_by_cid(cid, str(aid_for_danmaku))
+                danmakus = await self._cached(
+                    'danmaku_list', cid,
+                    lambda: self.danmaku_spider.crawl_danmaku_by_cid(cid, str(aid_for_danmaku))
+                )
                 if danmakus:
                     video_data['danmakus'] = danmakus[:100]  # 限制弹幕数量
-                    self.stats['danmakus_crawled'] += len(video_data['danmakus'])
+                    self._count('danmakus_crawled', len(video_data['danmakus']))
             
             # 4. 爬取评论
             aid_for_comments = aid or video_info.get('aid') if video_info else None
             if aid_for_comments:
-                comments = await self.comment_spider.crawl_comments_by_aid(str(aid_for_comments), limit=50)
+                comments = await self._cached(
+                    'comment_list', aid_for_comments,
+                    lambda: self.comment_spider.crawl_comments_by_aid(str(aid_for_comments), limit=50)
+                )
                 if comments:
                     video_data['comments'] = comments
-                    self.stats['comments_crawled'] += len(comments)
+                    self._count('comments_crawled', len(comments))
             
             logger.info(f"[BilibiliCrawler] Full crawl completed for video: {bvid}")
             return video_data
             
         except Exception as e:
-            self.stats['errors'] += 1
+            self._count('errors')
             logger.error(f"[BilibiliCrawler] Error in full crawl for {bvid}: {str(e)}")
             return video_data
     
+    async def _crawl_videos_full(self, video_list: List[Dict]) -> List[Dict]:
+        """
+        并发完整爬取多个视频
+        
+        并发数受 REQUEST_CONFIG['concurrent_requests'] 限制，每个并发槽位
+        在两次爬取之间保持原有的延迟；同一UP主的信息请求会被合并。
+        
+        Args:
+            video_list: 含 bvid 的视频列表
+            
+        Returns:
+            按输入顺序排列的完整视频数据
+        """
+        semaphore = asyncio.Semaphore(max(1, REQUEST_CONFIG.get('concurrent_requests', 1)))
+        
+        async def crawl_one(bvid: str) -> Dict:
+            async with semaphore:
+                video_data = await self.crawl_video_full(bvid)
+                # 延迟避免触发反爬
+                await asyncio.sleep(3)
+                return video_data
+        
+        bvids = [video_info.get('bvid') for video_info in video_list if video_info.get('bvid')]
+        return list(await asyncio.gather(*[crawl_one(bvid) for bvid in bvids]))
+    
     async def crawl_videos_by_keyword(
         self,
         keyword: str,
@@ -146,24 +250,17 @@ class BilibiliCrawler:
             # 2. 根据选项决定是否完整爬取
             if full_crawl:
                 # 完整爬取（包括视频详情、弹幕、评论）
-                for video_info in search_results[:limit]:
-                    bvid = video_info.get('bvid')
-                    if bvid:
-                        full_video_data = await self.crawl_video_full(bvid)
-                        videos.append(full_video_data)
-                        
-                        # 延迟避免触发反爬
-                        await asyncio.sleep(3)
+                videos = await self._crawl_videos_full(search_results[:limit])
             else:
                 # 只爬取搜索结果
                 videos = search_results[:limit]
-                self.stats['videos_crawled'] += len(videos)
+                self._count('videos_crawled', len(videos))
             
             logger.info(f"[BilibiliCrawler] Completed crawling {len(videos)} videos for keyword: {keyword}")
             return videos
             
         except Exception as e:
-            self.stats['errors'] += 1
+            self._count('errors')
             logger.error(f"[BilibiliCrawler] Error crawling videos by keyword '{keyword}': {str(e)}")
             return []
     
@@ -205,24 +302,17 @@ class BilibiliCrawler:
             # 2. 根据选项决定是否完整爬取
             if full_crawl:
                 # 完整爬取每个视频
-                for video_info in user_videos[:limit]:
-                    bvid = video_info.get('bvid')
-                    if bvid:
-                        full_video_data = await self.crawl_video_full(bvid)
-                        videos.append(full_video_data)
-                        
-                        # 延迟避免触发反爬
-                        await asyncio.sleep(3)
+                videos = await self._crawl_videos_full(user_videos[:limit])
             else:
                 # 只爬取视频列表
                 videos = user_videos[:limit]
-                self.stats['videos_crawled'] += len(videos)
+                self._count('videos_crawled', len(videos))
             
             logger.info(f"[BilibiliCrawler] Completed crawling {len(videos)} videos for user: {mid}")
             return videos
             
         except Exception as e:
-            self.stats['errors'] += 1
+            self._count('errors')
             logger.error(f"[BilibiliCrawler] Error crawling videos for user {mid}: {str(e)}")
             return []
     
@@ -267,7 +357,7 @@ class BilibiliCrawler:
             return all_videos[:limit]
             
         except Exception as e:
-            self.stats['errors'] += 1
+            self._count('errors')
             logger.error(f"[BilibiliCrawler] Error crawling trending videos: {str(e)}")
             return []
     
@@ -279,6 +369,9 @@ class BilibiliCrawler:
         """
         监控UP主更新
         
+        首次监控时获取完整用户信息并建立投稿游标；之后只请求投稿列表第一页
+        （支持时使用条件请求），返回游标之后的新视频
+        
         Args:
             mid: UP主MID
             check_interval: 检查间隔（秒）
@@ -289,18 +382,62 @@ class BilibiliCrawler:
         logger.info(f"[BilibiliCrawler] Starting user monitoring: {mid}")
         
         try:
+            if mid in self.monitor.store:
+                result = await self.monitor.check_user(mid)
+                self.monitor.store.save()
+                
+                if result['new_videos']:
+                    self._count('videos_crawled', len(result['new_videos']))
+                
+                return {
+                    **result,
+                    'check_interval': check_interval
+                }
+            
             monitoring_info = await self.user_spider.monitor_user_updates(
                 mid=mid,
                 check_interval=check_interval
             )
             
+            if monitoring_info:
+                # 建立游标，后续检查走轻量路径
+                await self.monitor.check_user(mid)
+                self.monitor.store.save()
+            
             return monitoring_info
             
         except Exception as e:
-            self.stats['errors'] += 1
+            self._count('errors')
             logger.error(f"[BilibiliCrawler] Error monitoring user {mid}: {str(e)}")
             return {}
     
+    async def check_users_updates(self, mids: List[str]) -> Dict[str, Dict]:
+        """
+        批量检查多个UP主的新投稿
+        
+        每个UP主通常只需一次请求（未变化时为304），
+        并发数受 REQUEST_CONFIG['concurrent_requests'] 限制
+        
+        Args:
+            mids: UP主MID列表
+            
+        Returns:
+            {mid: 检查结果}
+        """
+        logger.info(f"[BilibiliCrawler] Checking updates for {len(mids)} users")
+        
+        results = await self.monitor.check_users(
+            mids,
+            concurrency=REQUEST_CONFIG.get('concurrent_requests', 2)
+        )
+        
+        new_count = sum(len(result['new_videos']) for result in results.values())
+        if new_count:
+            self._count('videos_crawled', new_count)
+        
+        logger.info(f"[BilibiliCrawler] Update check completed: {new_count} new videos")
+        return results
+    
     def get_stats(self) -> Dict:
         """
         获取爬虫统计信息
@@ -316,6 +453,8 @@ class BilibiliCrawler:
         return {
             **self.stats,
             'pipeline_stats': pipeline_stats,
+            'cache_stats': self.cache.get_stats() if self.cache else None,
+            'monitor_stats': self.monitor.get_stats(),
             'total_items': (
                 self.stats['videos_crawled'] +
                 self.stats['danmakus_crawled'] +
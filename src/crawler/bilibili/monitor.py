@@ -0,0 +1,242 @@
+"""
+B站UP主更新监控
+
+为每个UP主记录最近一次见到的投稿游标（aid / pubdate）以及
+接口返回的 ETag / Last-Modified。每次检查只请求投稿列表第一页，
+遇到已知视频即停止；服务端支持条件请求时未变化的用户只需一次304响应。
+"""
+
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from .spiders.user_spider import BilibiliUserSpider
+
+logger = logging.getLogger(__name__)
+
+
+class CursorStore:
+    """
+    UP主游标存储
+
+    以 JSON 文件持久化：{mid: {'last_aid', 'last_pubdate', 'etag',
+    'last_modified', 'last_check'}}
+    """
+
+    def __init__(self, path: str = 'data/bilibili/monitor_cursors.json'):
+        self.path = Path(path)
+        self._cursors: Dict[str, Dict] = {}
+        self._dirty = False
+        self.load()
+
+    def load(self):
+        """从文件加载游标"""
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._cursors = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Failed to load monitor cursors from {self.path}: {str(e)}")
+            self._cursors = {}
+
+    def save(self):
+        """原子地写回文件（无变化时跳过）"""
+        if not self._dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._cursors, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+    def get(self, mid: str) -> Optional[Dict]:
+        return self._cursors.get(str(mid))
+
+    def update(self, mid: str, **fields):
+        cursor = self._cursors.setdefault(str(mid), {})
+        cursor.update(fields)
+        self._dirty = True
+
+    def __contains__(self, mid) -> bool:
+        return str(mid) in self._cursors
+
+    def __len__(self) -> int:
+        return len(self._cursors)
+
+
+class UserUpdateMonitor:
+    """
+    基于游标的UP主更新检测
+
+    用法：
+        monitor = UserUpdateMonitor(user_spider)
+        results = await monitor.check_users(mids)
+        for mid, result in results.items():
+            if result['new_videos']:
+                ...
+    """
+
+    def __init__(
+        self,
+        user_spider: BilibiliUserSpider,
+        store: CursorStore = None,
+        page_size: int = 30,
+        max_pages: int = 3
+    ):
+        """
+        Args:
+            user_spider: 用户爬虫
+            store: 游标存储
+            page_size: 每页视频数
+            max_pages: 一次检查最多翻页数（两次检查之间投稿很多时）
+        """
+        self.user_spider = user_spider
+        self.store = store if store is not None else CursorStore()
+        self.page_size = page_size
+        self.max_pages = max_pages
+
+        self.stats = {
+            'checks': 0,
+            'requests': 0,
+            'not_modified': 0,
+            'new_videos': 0,
+            'errors': 0
+        }
+
+    async def check_user(self, mid: str) -> Dict:
+        """
+        检查单个UP主是否有新投稿
+
+        首次检查只记录游标，不把已有视频当作新视频。
+
+        Args:
+            mid: UP主MID
+
+        Returns:
+            {'mid', 'changed', 'new_videos', 'latest_video', 'last_check'}
+        """
+        mid = str(mid)
+        cursor = self.store.get(mid) or {}
+        known_aid = cursor.get('last_aid')
+        known_pubdate = cursor.get('last_pubdate', 0)
+
+        self.stats['checks'] += 1
+        result = {
+            'mid': mid,
+            'changed': False,
+            'new_videos': [],
+            'latest_video': None,
+            'last_check': datetime.now().isoformat()
+        }
+
+        new_raw: List[Dict] = []
+        etag = cursor.get('etag')
+        last_modified = cursor.get('last_modified')
+        first_page = None
+
+        try:
+            for page in range(1, self.max_pages + 1):
+                response = await self.user_spider.fetch_user_videos_page(
+                    mid,
+                    page=page,
+                    page_size=self.page_size,
+                    # 只有第一页使用条件请求
+                    etag=etag if page == 1 else None,
+                    last_modified=last_modified if page == 1 else None
+                )
+                self.stats['requests'] += 1
+
+                if response['status'] == 304:
+                    self.stats['not_modified'] += 1
+                    break
+
+                data = response['data']
+                if data is None:
+                    self.stats['errors'] += 1
+                    break
+
+                if page == 1:
+                    first_page = data
+                    etag = response['etag']
+                    last_modified = response['last_modified']
+
+                vlist = data.get('list', {}).get('vlist', []) or []
+                reached_known = False
+                for video in vlist:
+                    if known_aid is None:
+                        # 首次检查：只建立游标
+                        reached_known = True
+                        break
+                    if video.get('aid') == known_aid or video.get('created', 0) <= known_pubdate:
+                        reached_known = True
+                        break
+                    new_raw.append(video)
+
+                if reached_known or len(vlist) < self.page_size:
+                    break
+
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.error(f"Error checking updates for mid {mid}: {str(e)}")
+            return result
+
+        fields = {'last_check': result['last_check'], 'etag': etag, 'last_modified': last_modified}
+
+        if first_page is not None:
+            vlist = first_page.get('list', {}).get('vlist', []) or []
+            if vlist:
+                latest = vlist[0]
+                fields['last_aid'] = latest.get('aid')
+                fields['last_pubdate'] = latest.get('created', 0)
+                result['latest_video'] = self.user_spider._parse_user_videos(
+                    {'list': {'vlist': [latest]}}, mid
+                )[0]
+
+        if new_raw:
+            result['changed'] = True
+            result['new_videos'] = self.user_spider._parse_user_videos(
+                {'list': {'vlist': new_raw}}, mid
+            )
+            self.stats['new_videos'] += len(new_raw)
+            logger.info(f"Found {len(new_raw)} new videos for mid: {mid}")
+
+        self.store.update(mid, **fields)
+        return result
+
+    async def check_users(self, mids: Iterable[str], concurrency: int = 2) -> Dict[str, Dict]:
+        """
+        批量检查UP主更新
+
+        Args:
+            mids: UP主MID列表
+            concurrency: 并发数（请求速率另受爬虫速率限制器约束）
+
+        Returns:
+            {mid: check_user结果}
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def check_one(mid: str) -> Dict:
+            async with semaphore:
+                return await self.check_user(mid)
+
+        try:
+            results = await asyncio.gather(*[check_one(mid) for mid in mids])
+        finally:
+            self.store.save()
+
+        return {result['mid']: result for result in results}
+
+    def get_stats(self) -> Dict:
+        """获取监控统计"""
+        return {
+            **self.stats,
+            'tracked_users': len(self.store),
+            'requests_per_check': self.stats['requests'] / max(1, self.stats['checks'])
+        }
@@ -5,20 +5,152 @@ B站爬虫数据处理管道
 """
 
 import json
+import os
 import re
 import hashlib
+import time
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from functools import lru_cache
+from typing import Dict, List, Optional, Any, Iterable, Callable
 from pathlib import Path
 import logging
 
 from ..base.base_crawler import BaseCrawler
+from ..utils.metrics import PIPELINE_ITEMS
 from .settings import *
 from .items import *
 
+# 可选的高性能JSON库，未安装时使用标准库json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
 
+# 预编译的清洗/校验正则，避免逐字段重复编译
+_CONTROL_CHARS_RE = re.compile(r'[\x00-\x1f\x7f-\x9f]')
+_WHITESPACE_RE = re.compile(r'\s+')
+_SENSITIVE_PARAM_RE = re.compile(r'[?&](access_token|token|secret|key)=[^&]*')
+_BVID_RE = re.compile(r'^BV[1-9A-HJ-NP-Za-km-z]{9}$')
+
+# B站内容长度限制
+DANMAKU_MAX_LENGTH = 100
+COMMENT_MAX_LENGTH = 1000
+
+# 批量处理的JSONL文件所在子目录（位于 danmakus/、comments/ 下）
+BATCH_STORAGE_DIR = 'batches'
+
+# 批量写入JSONL时复用同一个编码器，避免每行重新构造
+_JSONL_ENCODER = json.JSONEncoder(ensure_ascii=False, default=str)
+
+
+def _dumps_line(row: Dict) -> bytes:
+    """序列化一行JSONL"""
+    if orjson is not None:
+        return orjson.dumps(row, default=str)
+    return _JSONL_ENCODER.encode(row).encode('utf-8')
+
+
+def _loads_line(line: bytes) -> Dict:
+    """反序列化一行JSONL"""
+    if orjson is not None:
+        return orjson.loads(line)
+    return json.loads(line)
+
+
+@lru_cache(maxsize=65536)
+def _format_timestamp(timestamp: int) -> Optional[str]:
+    """时间戳转ISO格式（带缓存，同一秒内的弹幕/评论只解析一次）"""
+    try:
+        return datetime.fromtimestamp(timestamp).isoformat()
+    except (OverflowError, OSError, ValueError):
+        return None
+
+
+def _clean_text_column(values: List[Any]) -> List[str]:
+    """
+    整列清洗文本
+
+    与 BilibiliPipeline._clean_text 结果一致；可打印且无连续空格的文本只做strip，
+    跳过正则替换
+    """
+    sub_control = _CONTROL_CHARS_RE.sub
+    sub_whitespace = _WHITESPACE_RE.sub
+    cleaned = []
+    append = cleaned.append
+
+    for value in values:
+        if not isinstance(value, str):
+            append('')
+            continue
+
+        value = value.strip()
+        if value.isprintable() and '  ' not in value:
+            append(value)
+        else:
+            append(sub_whitespace(' ', sub_control('', value)))
+
+    return cleaned
+
+
+def _clean_number_column(values: List[Any]) -> List[int]:
+    """整列清洗数值"""
+    cleaned = []
+    append = cleaned.append
+
+    for value in values:
+        if type(value) is int:
+            append(value)
+        elif value is None:
+            append(0)
+        elif isinstance(value, (int, float)):
+            append(int(value))
+        else:
+            try:
+                append(int(float(str(value))))
+            except (ValueError, TypeError):
+                append(0)
+
+    return cleaned
+
+
+def _clean_timestamp_column(values: List[Any]) -> List[Optional[str]]:
+    """整列清洗Unix时间戳"""
+    cleaned = []
+    append = cleaned.append
+
+    for value in values:
+        if not value:
+            append(None)
+            continue
+        try:
+            append(_format_timestamp(int(value)))
+        except (ValueError, TypeError):
+            append(None)
+
+    return cleaned
+
+
+def _clean_datetime_column(values: List[Any]) -> List[Optional[str]]:
+    """整列清洗时间（时间戳或ISO字符串）"""
+    cleaned = []
+    append = cleaned.append
+
+    for value in values:
+        if not value:
+            append(None)
+        elif isinstance(value, datetime):
+            append(value.isoformat())
+        elif type(value) is int or (isinstance(value, str) and value.isdigit()):
+            append(_format_timestamp(int(value)))
+        else:
+            append(value)
+
+    return cleaned
+
+
 class BilibiliPipeline:
     """
     B站爬虫数据处理管道
@@ -35,6 +167,9 @@ class BilibiliPipeline:
         self.error_count = 0
         self.stats = {}
         
+        # 批量存储文件中已有ID的内存索引
+        self._batch_ids: Dict[Path, set] = {}
+        
         # 初始化存储路径
         self.storage_path = Path('data/bilibili')
         self.storage_path.mkdir(parents=True, exist_ok=True)
@@ -70,7 +205,7 @@ class BilibiliPipeline:
             
             # 数据验证
             if not self._validate_video_data(cleaned_item):
-                self.error_count += 1
+                self._record_error('video')
                 logger.warning(f"Video data validation failed: {cleaned_item.get('video_id', 'unknown')}")
                 return False
             
@@ -80,6 +215,7 @@ class BilibiliPipeline:
             # 去重检查
             if self._is_duplicate_video(standardized_item):
                 logger.info(f"Video already exists: {standardized_item.get('video_id')}")
+                self._record_duplicate('video')
                 return True
             
             # 存储数据
@@ -93,7 +229,7 @@ class BilibiliPipeline:
             return True
             
         except Exception as e:
-            self.error_count += 1
+            self._record_error('video')
             logger.error(f"Error processing video data: {str(e)}")
             return False
     
@@ -113,7 +249,7 @@ class BilibiliPipeline:
             
             # 数据验证
             if not self._validate_danmaku_data(cleaned_item):
-                self.error_count += 1
+                self._record_error('danmaku')
                 logger.warning(f"Danmaku data validation failed: {cleaned_item.get('danmaku_id', 'unknown')}")
                 return False
             
@@ -123,6 +259,7 @@ class BilibiliPipeline:
             # 去重检查
             if self._is_duplicate_danmaku(standardized_item):
                 logger.info(f"Danmaku already exists: {standardized_item.get('danmaku_id')}")
+                self._record_duplicate('danmaku')
                 return True
             
             # 存储数据
@@ -136,7 +273,7 @@ class BilibiliPipeline:
             return True
             
         except Exception as e:
-            self.error_count += 1
+            self._record_error('danmaku')
             logger.error(f"Error processing danmaku data: {str(e)}")
             return False
     
@@ -156,7 +293,7 @@ class BilibiliPipeline:
             
             # 数据验证
             if not self._validate_comment_data(cleaned_item):
-                self.error_count += 1
+                self._record_error('comment')
                 logger.warning(f"Comment data validation failed: {cleaned_item.get('comment_id', 'unknown')}")
                 return False
             
@@ -166,6 +303,7 @@ class BilibiliPipeline:
             # 去重检查
             if self._is_duplicate_comment(standardized_item):
                 logger.info(f"Comment already exists: {standardized_item.get('comment_id')}")
+                self._record_duplicate('comment')
                 return True
             
             # 存储数据
@@ -179,7 +317,7 @@ class BilibiliPipeline:
             return True
             
         except Exception as e:
-            self.error_count += 1
+            self._record_error('comment')
             logger.error(f"Error processing comment data: {str(e)}")
             return False
     
@@ -199,7 +337,7 @@ class BilibiliPipeline:
             
             # 数据验证
             if not self._validate_user_data(cleaned_item):
-                self.error_count += 1
+                self._record_error('user')
                 logger.warning(f"User data validation failed: {cleaned_item.get('mid', 'unknown')}")
                 return False
             
@@ -209,6 +347,7 @@ class BilibiliPipeline:
             # 去重检查
             if self._is_duplicate_user(standardized_item):
                 logger.info(f"User already exists: {standardized_item.get('mid')}")
+                self._record_duplicate('user')
                 return True
             
             # 存储数据
@@ -222,10 +361,271 @@ class BilibiliPipeline:
             return True
             
         except Exception as e:
-            self.error_count += 1
+            self._record_error('user')
             logger.error(f"Error processing user data: {str(e)}")
             return False
-    
+
+    def process_danmaku_batch(self, danmaku_items: Iterable) -> Dict[str, int]:
+        """
+        批量处理弹幕数据
+
+        按列清洗、批量验证，并按视频写入JSONL文件，适合单个视频数万条弹幕的场景
+
+        Args:
+            danmaku_items: 弹幕数据项或字典的可迭代对象
+
+        Returns:
+            处理结果统计 {'total', 'processed', 'invalid', 'duplicates'}
+        """
+        return self._process_batch(
+            data_type='danmaku',
+            items=danmaku_items,
+            clean_columns=self._clean_danmaku_columns,
+            max_content_length=DANMAKU_MAX_LENGTH,
+            id_field='danmaku_id',
+            storage_dir='danmakus'
+        )
+
+    def process_comment_batch(self, comment_items: Iterable) -> Dict[str, int]:
+        """
+        批量处理评论数据
+
+        Args:
+            comment_items: 评论数据项或字典的可迭代对象
+
+        Returns:
+            处理结果统计 {'total', 'processed', 'invalid', 'duplicates'}
+        """
+        return self._process_batch(
+            data_type='comment',
+            items=comment_items,
+            clean_columns=self._clean_comment_columns,
+            max_content_length=COMMENT_MAX_LENGTH,
+            id_field='comment_id',
+            storage_dir='comments'
+        )
+
+    def _process_batch(
+        self,
+        data_type: str,
+        items: Iterable,
+        clean_columns: Callable[[List[Dict]], None],
+        max_content_length: int,
+        id_field: str,
+        storage_dir: str
+    ) -> Dict[str, int]:
+        """
+        批量处理的通用流程：转换 -> 按列清洗 -> 批量验证 -> 去重 -> 按视频存储
+        """
+        result = {'total': 0, 'processed': 0, 'invalid': 0, 'duplicates': 0}
+
+        try:
+            rows = [
+                item.to_dict() if hasattr(item, 'to_dict') else dict(item)
+                for item in items
+            ]
+            result['total'] = len(rows)
+            if not rows:
+                return result
+
+            # 按列清洗
+            clean_columns(rows)
+
+            # 批量验证
+            valid_rows = self._validate_batch(data_type, rows, max_content_length)
+            result['invalid'] = len(rows) - len(valid_rows)
+
+            # 批量标准化：整批共用一个爬取时间
+            crawl_time = datetime.now().isoformat()
+            for row in valid_rows:
+                row.setdefault('crawl_time', crawl_time)
+                row['version'] = '1.0'
+
+            # 按视频分组去重并存储
+            stored_rows = self._store_batch(storage_dir, id_field, valid_rows)
+            stored = len(stored_rows)
+            result['processed'] = stored
+            result['duplicates'] = len(valid_rows) - stored
+
+            self._update_stats_batch(data_type, stored_rows)
+            self.processed_count += stored
+            self.error_count += result['invalid']
+            if result['invalid']:
+                PIPELINE_ITEMS.labels(
+                    pipeline='bilibili', type=data_type, result='error'
+                ).inc(result['invalid'])
+            if result['duplicates']:
+                PIPELINE_ITEMS.labels(
+                    pipeline='bilibili', type=data_type, result='duplicate'
+                ).inc(result['duplicates'])
+
+            logger.info(
+                f"Processed {data_type} batch: {stored}/{result['total']} stored, "
+                f"{result['invalid']} invalid, {result['duplicates']} duplicates"
+            )
+            return result
+
+        except Exception as e:
+            self.error_count += result['total'] or 1
+            logger.error(f"Error processing {data_type} batch: {str(e)}")
+            return result
+
+    def _clean_danmaku_columns(self, rows: List[Dict]):
+        """按列清洗弹幕数据"""
+        self._clean_column(rows, 'content', _clean_text_column)
+
+        for field in ('time', 'mode', 'fontsize', 'color', 'pool'):
+            self._clean_column(rows, field, _clean_number_column)
+
+        self._clean_column(rows, 'send_time', _clean_timestamp_column, skip_empty=True)
+
+    def _clean_comment_columns(self, rows: List[Dict]):
+        """按列清洗评论数据"""
+        self._clean_column(rows, 'content', _clean_text_column)
+
+        for field in ('likes', 'rcount'):
+            self._clean_column(rows, field, _clean_number_column)
+
+        self._clean_column(rows, 'ctime', _clean_datetime_column, skip_empty=True)
+
+    @staticmethod
+    def _clean_column(
+        rows: List[Dict],
+        field: str,
+        cleaner: Callable[[List[Any]], List[Any]],
+        skip_empty: bool = False
+    ):
+        """
+        取出一列、整列清洗后写回
+
+        Args:
+            rows: 数据行
+            field: 字段名
+            cleaner: 整列清洗函数
+            skip_empty: 是否保留空值不清洗（与逐条处理时 `if data[field]` 的判断一致）
+        """
+        targets = [
+            row for row in rows
+            if field in row and (row[field] or not skip_empty)
+        ]
+        if not targets:
+            return
+
+        cleaned = cleaner([row[field] for row in targets])
+        for row, value in zip(targets, cleaned):
+            row[field] = value
+
+    def _validate_batch(
+        self,
+        data_type: str,
+        rows: List[Dict],
+        max_content_length: int
+    ) -> List[Dict]:
+        """
+        批量验证数据，返回通过验证的行
+
+        规则与 _validate_danmaku_data / _validate_comment_data 一致：必填字段非空，
+        超长内容截断
+        """
+        required_fields = VALIDATION_CONFIG[data_type]['required_fields']
+
+        # 逐列过滤必填字段
+        valid_rows = rows
+        for field in required_fields:
+            valid_rows = [row for row in valid_rows if row.get(field)]
+
+        for row in valid_rows:
+            content = row['content']
+            if not isinstance(content, str):
+                content = row['content'] = str(content)
+            if len(content) > max_content_length:
+                row['content'] = content[:max_content_length]
+
+        return valid_rows
+
+    def _store_batch(self, storage_dir: str, id_field: str, rows: List[Dict]) -> List[Dict]:
+        """
+        按视频分组，以JSONL格式追加存储
+
+        每个视频一个文件 `<storage_dir>/batches/<video_id>.jsonl`，与逐条处理的
+        `<storage_dir>/<id>.json` 分开存放；写入前根据JSONL中已有的ID去重，
+        并跳过已经逐条存储过的数据
+
+        Returns:
+            实际写入的数据行
+        """
+        groups: Dict[str, List[Dict]] = {}
+        for row in rows:
+            groups.setdefault(str(row.get('video_id')), []).append(row)
+
+        item_dir = self.storage_path / storage_dir
+        target_dir = item_dir / BATCH_STORAGE_DIR
+        target_dir.mkdir(parents=True, exist_ok=True)
+
+        # 逐条存储的ID每次调用只列一次目录，避免逐行stat
+        item_ids = self._list_item_ids(item_dir)
+
+        stored_rows = []
+        for video_id, group in groups.items():
+            batch_file = target_dir / f'{video_id}.jsonl'
+            seen = self._load_batch_ids(batch_file, id_field)
+
+            lines = []
+            for row in group:
+                item_id = row[id_field]
+                if item_id in seen:
+                    continue
+                if item_ids and str(item_id) in item_ids:
+                    seen.add(item_id)
+                    continue
+                seen.add(item_id)
+                lines.append(_dumps_line(row))
+                stored_rows.append(row)
+
+            if lines:
+                with open(batch_file, 'ab') as f:
+                    f.write(b'\n'.join(lines))
+                    f.write(b'\n')
+
+        return stored_rows
+
+    @staticmethod
+    def _list_item_ids(item_dir: Path) -> set:
+        """列出目录中逐条存储的 `<id>.json` 文件的ID"""
+        with os.scandir(item_dir) as entries:
+            return {
+                entry.name[:-5] for entry in entries
+                if entry.name.endswith('.json') and entry.is_file()
+            }
+
+    def _load_batch_ids(self, batch_file: Path, id_field: str) -> set:
+        """获取批量存储文件中已有的ID集合（首次从文件读取，之后使用内存索引）"""
+        if batch_file in self._batch_ids:
+            return self._batch_ids[batch_file]
+
+        ids = set()
+        if batch_file.exists():
+            with open(batch_file, 'rb') as f:
+                for line in f:
+                    if line.strip():
+                        ids.add(_loads_line(line).get(id_field))
+
+        self._batch_ids[batch_file] = ids
+        return ids
+
+    def _update_stats_batch(self, data_type: str, rows: List[Dict]):
+        """批量更新统计信息"""
+        if not rows:
+            return
+
+        stats = self._type_stats(data_type)
+        stats['count'] += len(rows)
+        stats['latest_update'] = time.time()
+        PIPELINE_ITEMS.labels(pipeline='bilibili', type=data_type, result='processed').inc(len(rows))
+
+        if data_type == 'comment':
+            stats['total_likes'] += sum(row.get('likes', 0) for row in rows)
+
     def _clean_video_data(self, video_item: BilibiliVideoItem) -> Dict:
         """
         清洗视频数据
@@ -371,10 +771,10 @@ class BilibiliPipeline:
         text = text.strip()
         
         # 移除控制字符
-        text = re.sub(r'[\x00-\x1f\x7f-\x9f]', '', text)
+        text = _CONTROL_CHARS_RE.sub('', text)
         
         # 规范化空白字符
-        text = re.sub(r'\s+', ' ', text)
+        text = _WHITESPACE_RE.sub(' ', text)
         
         return text
     
@@ -403,8 +803,7 @@ class BilibiliPipeline:
         try:
             # 如果是时间戳，转换为ISO格式
             if str(datetime_str).isdigit():
-                dt = datetime.fromtimestamp(int(datetime_str))
-                return dt.isoformat()
+                return _format_timestamp(int(datetime_str))
             else:
                 # 尝试直接返回ISO格式的时间字符串
                 return datetime_str
@@ -417,8 +816,7 @@ class BilibiliPipeline:
             return None
         
         try:
-            dt = datetime.fromtimestamp(int(timestamp))
-            return dt.isoformat()
+            return _format_timestamp(int(timestamp))
         except Exception:
             return None
     
@@ -435,7 +833,7 @@ class BilibiliPipeline:
             url = 'https:' + url
         
         # 移除查询参数中的敏感信息
-        url = re.sub(r'[?&](access_token|token|secret|key)=[^&]*', '', url)
+        url = _SENSITIVE_PARAM_RE.sub('', url)
         
         return url
     
@@ -465,8 +863,8 @@ class BilibiliPipeline:
         # 验证弹幕内容长度
         if 'content' in data and data['content']:
             content = str(data['content'])
-            if len(content) > 100:  # B站弹幕长度限制
-                data['content'] = content[:100]
+            if len(content) > DANMAKU_MAX_LENGTH:  # B站弹幕长度限制
+                data['content'] = content[:DANMAKU_MAX_LENGTH]
         
         return True
     
@@ -481,8 +879,8 @@ class BilibiliPipeline:
         # 验证评论内容长度
         if 'content' in data and data['content']:
             content = str(data['content'])
-            if len(content) > 1000:  # B站评论长度限制
-                data['content'] = content[:1000]
+            if len(content) > COMMENT_MAX_LENGTH:  # B站评论长度限制
+                data['content'] = content[:COMMENT_MAX_LENGTH]
         
         return True
     
@@ -502,8 +900,7 @@ class BilibiliPipeline:
             return False
         
         # BV号格式：BV1开头，后面包含数字和大写字母
-        pattern = r'^BV[1-9A-HJ-NP-Za-km-z]{9}$'
-        return re.match(pattern, bvid) is not None
+        return _BVID_RE.match(bvid) is not None
     
     def _standardize_video_data(self, data: Dict) -> Dict:
         """标准化视频数据"""
@@ -653,25 +1050,41 @@ class BilibiliPipeline:
         with open(user_file, 'w', encoding='utf-8') as f:
             json.dump(data, f, ensure_ascii=False, indent=2)
     
-    def _update_stats(self, data_type: str, data: Dict):
-        """更新统计信息"""
-        if data_type not in self.stats:
-            self.stats[data_type] = {
+    def _type_stats(self, data_type: str) -> Dict:
+        """获取（必要时创建）某类数据的统计"""
+        stats = self.stats.get(data_type)
+        if stats is None:
+            stats = self.stats[data_type] = {
                 'count': 0,
                 'total_likes': 0,
                 'total_plays': 0,
-                'latest_update': datetime.now().isoformat()
+                'latest_update': None
             }
-        
-        self.stats[data_type]['count'] += 1
-        self.stats[data_type]['latest_update'] = datetime.now().isoformat()
+        return stats
+    
+    def _record_error(self, data_type: str):
+        """记录处理失败"""
+        self.error_count += 1
+        PIPELINE_ITEMS.labels(pipeline='bilibili', type=data_type, result='error').inc()
+    
+    def _record_duplicate(self, data_type: str):
+        """记录重复数据"""
+        PIPELINE_ITEMS.labels(pipeline='bilibili', type=data_type, result='duplicate').inc()
+    
+    def _update_stats(self, data_type: str, data: Dict):
+        """更新统计信息"""
+        stats = self._type_stats(data_type)
+        stats['count'] += 1
+        # 只记录时间戳，导出统计时再格式化
+        stats['latest_update'] = time.time()
+        PIPELINE_ITEMS.labels(pipeline='bilibili', type=data_type, result='processed').inc()
         
         # 根据数据类型更新特定统计
         if data_type == 'video':
-            self.stats[data_type]['total_plays'] += data.get('play_count', 0)
-            self.stats[data_type]['total_likes'] += data.get('like_count', 0)
+            stats['total_plays'] += data.get('play_count', 0)
+            stats['total_likes'] += data.get('like_count', 0)
         elif data_type == 'comment':
-            self.stats[data_type]['total_likes'] += data.get('likes', 0)
+            stats['total_likes'] += data.get('likes', 0)
     
     def get_stats(self) -> Dict:
         """获取管道统计信息"""
@@ -679,7 +1092,16 @@ class BilibiliPipeline:
             'processed_count': self.processed_count,
             'error_count': self.error_count,
             'success_rate': self.processed_count / max(1, self.processed_count + self.error_count),
-            'stats': self.stats
+            'stats': {
+                data_type: {
+                    **stats,
+                    'latest_update': (
+                        datetime.fromtimestamp(stats['latest_update']).isoformat()
+                        if stats['latest_update'] else None
+                    )
+                }
+                for data_type, stats in self.stats.items()
+            }
         }
     
     def export_stats(self, filename: str = None):
@@ -700,23 +1122,26 @@ class BilibiliPipeline:
             # 清理指定类型的数据
             data_dir = self.storage_path / data_type
             if data_dir.exists():
-                for file in data_dir.glob('*.json'):
+                for file in data_dir.rglob('*.json*'):
                     file.unlink()
                 
                 # 清空统计
                 if data_type in self.stats:
                     del self.stats[data_type]
                 
+                self._batch_ids.clear()
+                
                 logger.info(f"Cleared {data_type} data")
         else:
             # 清理所有数据
             for data_dir in self.storage_path.iterdir():
                 if data_dir.is_dir():
-                    for file in data_dir.glob('*.json'):
+                    for file in data_dir.rglob('*.json*'):
                         file.unlink()
             
             # 清空统计
             self.stats.clear()
+            self._batch_ids.clear()
             
             logger.info("Cleared all data")
     
@@ -735,9 +1160,11 @@ class BilibiliPipeline:
                 dst_dir = backup_path / src_dir.name
                 dst_dir.mkdir(parents=True, exist_ok=True)
                 
-                for file in src_dir.glob('*.json'):
+                for file in src_dir.rglob('*.json*'):
                     import shutil
-                    shutil.copy2(file, dst_dir)
+                    file_dst_dir = dst_dir / file.parent.relative_to(src_dir)
+                    file_dst_dir.mkdir(parents=True, exist_ok=True)
+                    shutil.copy2(file, file_dst_dir)
         
         # 复制统计信息
         stats_file = backup_path / 'pipeline_stats.json'
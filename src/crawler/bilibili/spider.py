@@ -10,7 +10,9 @@ from typing import Dict, List, Optional, Any
 from datetime import datetime
 
 import aiohttp
-from tenacity import retry, stop_after_attempt, wait_exponential
+from tenacity import retry, retry_if_not_exception_type, stop_after_attempt, wait_exponential
+
+from .wbi import NAV_API, WBI_ERROR_CODES, WbiSigner, key_from_url
 
 
 @dataclass
@@ -20,6 +22,15 @@ class CrawlerConfig:
     retry_count: int = 3
     delay: float = 1.0
     proxy: Optional[str] = None
+    wbi_key_ttl: int = 3600
+
+
+class BilibiliApiError(Exception):
+    """接口返回非0错误码（不重试）"""
+    
+    def __init__(self, code: int, message: str):
+        super().__init__(f"API Error: {message}")
+        self.code = code
 
 
 class BilibiliSpider:
@@ -56,6 +67,8 @@ class BilibiliSpider:
             'Accept-Encoding': 'gzip, deflate, br',
             'Connection': 'keep-alive',
         }
+        # WBI签名（/x/space/wbi/* 接口需要）
+        self.wbi = WbiSigner(self._fetch_wbi_keys, ttl=self.config.wbi_key_ttl)
     
     async def __aenter__(self):
         """异步上下文管理器入口"""
@@ -102,15 +115,35 @@ class BilibiliSpider:
             return False
         return bool(re.match(r'^\d+$', str(mid)))
     
+    async def _fetch_wbi_keys(self):
+        """从nav接口取WBI的 img_key 和 sub_key（未登录时 code 为 -101，但仍返回 wbi_img）"""
+        async with self.session.get(NAV_API) as response:
+            response.raise_for_status()
+            data = await response.json()
+        
+        wbi_img = (data.get('data') or {}).get('wbi_img') or {}
+        if not wbi_img.get('img_url') or not wbi_img.get('sub_url'):
+            raise BilibiliApiError(data.get('code', -1), 'WBI keys not found in nav response')
+        return key_from_url(wbi_img['img_url']), key_from_url(wbi_img['sub_url'])
+    
+    async def _get_json(self, url: str, params: Optional[Dict]) -> Dict:
+        async with self.session.get(url, params=params) as response:
+            response.raise_for_status()
+            return await response.json()
+    
     @retry(
         stop=stop_after_attempt(3),
         wait=wait_exponential(multiplier=1, min=1, max=10),
+        retry=retry_if_not_exception_type(BilibiliApiError),
         reraise=True
     )
     async def _fetch(self, url: str, params: Optional[Dict] = None) -> Dict:
         """
         发送HTTP请求
         
+        /wbi/ 接口自动签名；返回签名错误时刷新key重签一次。
+        接口错误码不重试，只重试网络错误。
+        
         Args:
             url: 请求URL
             params: 请求参数
@@ -120,20 +153,27 @@ class BilibiliSpider:
             
         Raises:
             aiohttp.ClientError: 网络错误
+            BilibiliApiError: 接口返回错误码
         """
         if not self.session:
             raise RuntimeError("Session not initialized. Use async context manager.")
         
         await asyncio.sleep(self.config.delay)
         
-        async with self.session.get(url, params=params) as response:
-            response.raise_for_status()
-            data = await response.json()
-            
-            if data.get('code') != 0:
-                raise Exception(f"API Error: {data.get('message', 'Unknown error')}")
-            
-            return data.get('data', {})
+        signed = '/wbi/' in url
+        if signed:
+            data = await self._get_json(url, await self.wbi.sign(params or {}))
+            if data.get('code') in WBI_ERROR_CODES:
+                # key已轮换，刷新后重签一次
+                self.wbi.invalidate()
+                data = await self._get_json(url, await self.wbi.sign(params or {}))
+        else:
+            data = await self._get_json(url, params)
+        
+        if data.get('code') != 0:
+            raise BilibiliApiError(data.get('code'), data.get('message', 'Unknown error'))
+        
+        return data.get('data', {})
     
     async def fetch_video(self, bvid: str) -> Dict[str, Any]:
         """
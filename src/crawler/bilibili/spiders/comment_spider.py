@@ -10,8 +10,10 @@ import re
 from typing import Dict, List, Optional
 from datetime import datetime
 import logging
+from urllib.parse import urlparse
 
 from ...base.base_crawler import BaseCrawler, ParseError
+from ...utils.metrics import track_request
 
 logger = logging.getLogger(__name__)
 
@@ -359,13 +361,15 @@ class BilibiliCommentSpider(BaseCrawler):
                 headers=self._common_headers,
                 timeout=aiohttp.ClientTimeout(total=self.request_timeout)
             ) as session:
-                async with session.get(url, params=params) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return data.get('data', {})
-                    else:
-                        logger.warning(f"API request failed: {response.status}")
-                        return None
+                with track_request(self.platform, urlparse(url).path) as req:
+                    async with session.get(url, params=params) as response:
+                        if response.status == 200:
+                            data = await response.json()
+                            return data.get('data', {})
+                        else:
+                            req.fail()
+                            logger.warning(f"API request failed: {response.status}")
+                            return None
                         
         except ImportError:
             # 如果没有aiohttp，使用同步请求
@@ -10,8 +10,11 @@ import re
 from typing import Dict, List, Optional
 from datetime import datetime
 import logging
+from urllib.parse import urlparse
 
 from ...base.base_crawler import BaseCrawler, ParseError
+from ...utils.metrics import track_request
+from ...utils.singleflight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
@@ -63,6 +66,9 @@ class BilibiliUserSpider(BaseCrawler):
             **self.common_headers,
             'User-Agent': self.user_agents[0],
         }
+        
+        # 合并并发的相同API请求（同一UP主的多个视频同时爬取时）
+        self._flight = SingleFlight('bilibili_user')
     
     async def crawl_user_info_by_mid(self, mid: str) -> Optional[Dict]:
         """
@@ -233,6 +239,74 @@ class BilibiliUserSpider(BaseCrawler):
             logger.error(f"Error crawling user videos for mid {mid}: {str(e)}")
             return []
     
+    async def fetch_user_videos_page(
+        self,
+        mid: str,
+        page: int = 1,
+        page_size: int = 30,
+        etag: str = None,
+        last_modified: str = None
+    ) -> Dict:
+        """
+        条件请求获取用户投稿视频的一页（按发布时间倒序）
+        
+        带上次响应的 ETag / Last-Modified 时发送 If-None-Match / If-Modified-Since，
+        服务端返回304时不解析数据
+        
+        Args:
+            mid: 用户MID
+            page: 页码
+            page_size: 每页数量
+            etag: 上次响应的ETag
+            last_modified: 上次响应的Last-Modified
+            
+        Returns:
+            {'status': HTTP状态码, 'data': API数据或None,
+             'etag': 新ETag, 'last_modified': 新Last-Modified}
+        """
+        import aiohttp
+        
+        api_url = f"{self.space_api_base}/video"
+        params = {
+            'mid': mid,
+            'pn': page,
+            'ps': page_size,
+            'order': 'pubdate',
+            'jsonp': 'jsonp'
+        }
+        
+        headers = dict(self._common_headers)
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        
+        result = {'status': 0, 'data': None, 'etag': etag, 'last_modified': last_modified}
+        
+        await self.rate_limiter.acquire()
+        
+        async with aiohttp.ClientSession(
+            headers=headers,
+            timeout=aiohttp.ClientTimeout(total=self.request_timeout)
+        ) as session:
+            with track_request(self.platform, urlparse(api_url).path) as req:
+                async with session.get(api_url, params=params) as response:
+                    result['status'] = response.status
+                    
+                    if response.status == 304:
+                        return result
+                    
+                    if response.status != 200:
+                        req.fail()
+                        logger.warning(f"User videos request failed: {response.status}")
+                        return result
+                    
+                    result['etag'] = response.headers.get('ETag')
+                    result['last_modified'] = response.headers.get('Last-Modified')
+                    data = await response.json()
+                    result['data'] = data.get('data', {})
+                    return result
+    
     async def crawl_user_followers(
         self,
         mid: str,
@@ -445,6 +519,8 @@ class BilibiliUserSpider(BaseCrawler):
         """
         发起API请求
         
+        相同 (url, params) 的并发请求共享同一次请求的结果
+        
         Args:
             url: API URL
             params: 请求参数
@@ -452,6 +528,13 @@ class BilibiliUserSpider(BaseCrawler):
         Returns:
             API响应数据
         """
+        return await self._flight.do(
+            SingleFlight.make_key(url, params),
+            lambda: self._do_api_request(url, params)
+        )
+    
+    async def _do_api_request(self, url: str, params: Dict = None) -> Optional[Dict]:
+        """实际发起API请求"""
         try:
             import aiohttp
             
@@ -459,13 +542,15 @@ class BilibiliUserSpider(BaseCrawler):
                 headers=self._common_headers,
                 timeout=aiohttp.ClientTimeout(total=self.request_timeout)
             ) as session:
-                async with session.get(url, params=params) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return data.get('data', {})
-                    else:
-                        logger.warning(f"API request failed: {response.status}")
-                        return None
+                with track_request(self.platform, urlparse(url).path) as req:
+                    async with session.get(url, params=params) as response:
+                        if response.status == 200:
+                            data = await response.json()
+                            return data.get('data', {})
+                        else:
+                            req.fail()
+                            logger.warning(f"API request failed: {response.status}")
+                            return None
                         
         except ImportError:
             # 如果没有aiohttp，使用同步请求
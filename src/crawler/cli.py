@@ -16,6 +16,8 @@ sys.path.insert(0, str(project_root))
 
 from src.crawler.bilibili.bilibili_crawler import BilibiliCrawler
 from src.crawler.douyin.douyin_crawler_enhanced import DouyinCrawlerEnhanced
+from src.crawler.douyin.storage import DouyinStorage
+from src.crawler.utils.short_link import get_short_link_resolver, is_short_link
 
 
 async def crawl_bilibili(args):
@@ -27,7 +29,14 @@ async def crawl_bilibili(args):
             result = await crawler.crawl_video_full(args.bvid)
         elif args.url:
             import re
-            bvid_match = re.search(r'BV[a-zA-Z0-9]+', args.url)
+            
+            url = args.url
+            if is_short_link(url):
+                resolved = await get_short_link_resolver().resolve(url)
+                if resolved:
+                    url = resolved['url']
+            
+            bvid_match = re.search(r'BV[a-zA-Z0-9]+', url)
             if bvid_match:
                 result = await crawler.crawl_video_full(bvid_match.group())
             else:
@@ -40,18 +49,18 @@ async def crawl_bilibili(args):
             result = await crawler.crawl_user(args.mid)
         elif args.url:
             import re
-            import aiohttp
             
-            async with aiohttp.ClientSession() as session:
-                if 'b23.tv' in args.url:
-                    async with session.get(args.url, allow_redirects=True) as response:
-                        args.url = str(response.url)
-                
-                mid_match = re.search(r'/(\d+)', args.url)
-                if mid_match:
-                    result = await crawler.crawl_user(mid_match.group(1))
-                else:
-                    result = {'error': 'Invalid Bilibili user URL'}
+            url = args.url
+            if is_short_link(url):
+                resolved = await get_short_link_resolver().resolve(url)
+                if resolved:
+                    url = resolved['url']
+            
+            mid_match = re.search(r'/(\d+)', url)
+            if mid_match:
+                result = await crawler.crawl_user(mid_match.group(1))
+            else:
+                result = {'error': 'Invalid Bilibili user URL'}
         else:
             result = {'error': 'Please provide --mid or --url'}
             
@@ -69,7 +78,12 @@ async def crawl_bilibili(args):
 
 async def crawl_douyin(args):
     """抖音爬虫（增强版）"""
-    crawler = DouyinCrawlerEnhanced()
+    storage = None
+    if args.store:
+        storage = DouyinStorage()
+        await storage.start()
+    
+    crawler = DouyinCrawlerEnhanced(storage=storage)
     
     try:
         if args.type == 'video':
@@ -105,10 +119,15 @@ async def crawl_douyin(args):
             result = {'error': f'Unknown type: {args.type}'}
         
         result['stats'] = crawler.get_stats()
+        if storage is not None:
+            await storage.close()
+            result['storage'] = storage.get_stats()
         return result
         
     finally:
         await crawler.close()
+        if storage is not None:
+            await storage.close()
 
 
 async def crawl_xiaohongshu(args):
@@ -141,6 +160,14 @@ async def crawl_xiaohongshu(args):
         return {'error': f'Xiaohongshu crawler not available: {str(e)}'}
 
 
+async def run(handler, args):
+    """执行爬取并关闭共享的短链接解析器"""
+    try:
+        return await handler(args)
+    finally:
+        await get_short_link_resolver().close()
+
+
 async def auto_detect(args):
     """自动检测平台并爬取"""
     url = args.url
@@ -172,18 +199,20 @@ def main():
     parser.add_argument('--note-id', '-n', help='Xiaohongshu note ID')
     parser.add_argument('--keyword', '-k', help='Search keyword')
     parser.add_argument('--limit', '-l', type=int, default=20, help='Result limit')
+    parser.add_argument('--store', action='store_true',
+                        help='Persist Douyin videos to the sinks enabled in STORAGE_CONFIG')
     
     args = parser.parse_args()
     
     try:
         if args.platform == 'auto' and args.url:
-            result = asyncio.run(auto_detect(args))
+            result = asyncio.run(run(auto_detect, args))
         elif args.platform == 'bilibili':
-            result = asyncio.run(crawl_bilibili(args))
+            result = asyncio.run(run(crawl_bilibili, args))
         elif args.platform == 'douyin':
-            result = asyncio.run(crawl_douyin(args))
+            result = asyncio.run(run(crawl_douyin, args))
         elif args.platform == 'xiaohongshu':
-            result = asyncio.run(crawl_xiaohongshu(args))
+            result = asyncio.run(run(crawl_xiaohongshu, args))
         else:
             result = {'error': 'Please specify --platform and required parameters'}
         
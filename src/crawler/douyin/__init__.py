@@ -25,12 +25,16 @@ from .items import (
     DouyinVideoItem,
     DouyinCommentItem,
     DouyinUserItem,
-    DouyinChallengeItem
+    DouyinChallengeItem,
+    DouyinVideoRecord,
+    DouyinCommentRecord
 )
 
 __all__ = [
     "DouyinVideoItem",
     "DouyinCommentItem",
     "DouyinUserItem",
-    "DouyinChallengeItem"
+    "DouyinChallengeItem",
+    "DouyinVideoRecord",
+    "DouyinCommentRecord"
 ]
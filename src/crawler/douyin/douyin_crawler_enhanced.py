@@ -6,13 +6,22 @@
 """
 
 import asyncio
+import inspect
 import json
 import re
 import aiohttp
-from typing import Dict, List, Optional
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
 from datetime import datetime
 import logging
 
+from src.crawler.base.rate_limiter import get_host_budget
+from src.crawler.utils.comment_crawler import CommentCrawler, CommentPage
+from src.crawler.utils.metrics import ITEMS, ERRORS, track_request
+from src.crawler.utils.pacer import BLOCKED_STATUSES, get_pacer
+from src.crawler.utils.short_link import get_short_link_resolver
+from src.crawler.utils.singleflight import SingleFlight
+from src.crawler.douyin.utils.router_data import RouterDataExtractor, is_captcha_page
+from src.crawler.douyin.settings import RATE_LIMIT_CONFIG
 from src.crawler.douyin.items import DouyinVideoItem, DouyinStatistics, DouyinAuthor, DouyinVideoInfo
 
 logger = logging.getLogger(__name__)
@@ -32,12 +41,22 @@ class DouyinCrawlerEnhanced:
     name = 'douyin'
     platform = 'douyin'
     
+    # 统计项与指标类型的对应关系
+    _STAT_TYPES = {
+        'videos_crawled': 'video',
+        'comments_crawled': 'comment',
+        'users_crawled': 'user',
+    }
+    
     base_url = 'https://www.douyin.com'
     api_base = 'https://www.iesdouyin.com'
     
     rate_limit = 3
     request_timeout = 15
     
+    # 评论爬取的并发请求数（速率仍受主机预算限制）
+    comment_concurrency = 4
+    
     user_agents = [
         'Mozilla/5.0 (iPhone; CPU iPhone OS 17_2 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.0 Mobile/15E148 Safari/604.1',
         'Mozilla/5.0 (Linux; Android 14; 23127PN0CC Build/UKQ1.230917.001; wv) AppleWebKit/537.36 (KHTML, like Gecko) Version/4.0 Chrome/120.0.6099.43 Mobile Safari/537.36',
@@ -46,7 +65,6 @@ class DouyinCrawlerEnhanced:
     
     URL_PATTERNS = {
         'video': [
-            r'v\.douyin\.com/([a-zA-Z0-9]+)',
             r'douyin\.com/video/(\d+)',
             r'douyin\.com/note/(\d+)',
         ],
@@ -56,8 +74,13 @@ class DouyinCrawlerEnhanced:
         ]
     }
     
-    def __init__(self):
+    def __init__(self, storage=None):
+        """
+        Args:
+            storage: 存储阶段（如 DouyinStorage），爬到的视频会提交给它
+        """
         self._session = None
+        self.storage = storage
         self._cookie = None
         self._common_headers = {
             'Accept': 'application/json, text/plain, */*',
@@ -65,6 +88,18 @@ class DouyinCrawlerEnhanced:
             'Referer': 'https://www.douyin.com/',
         }
         
+        # 合并并发的相同用户请求
+        self._flight = SingleFlight('douyin_user')
+        
+        # 短链接解析（各平台共享，带磁盘缓存）
+        self.short_links = get_short_link_resolver()
+        
+        # _ROUTER_DATA 提取器（按页面布局缓存loaderData键）
+        self._router_data = RouterDataExtractor()
+        
+        # 页面请求节奏（与浏览器爬虫共享，按拦截情况自适应）
+        self.pacer = get_pacer(self.platform, RATE_LIMIT_CONFIG)
+        
         self.stats = {
             'videos_crawled': 0,
             'comments_crawled': 0,
@@ -127,32 +162,16 @@ class DouyinCrawlerEnhanced:
         """
         解析短链接，获取真实URL
         
+        使用进程内共享的短链接解析器（带磁盘缓存）。
+        
         Args:
             short_url: v.douyin.com短链接
             
         Returns:
             真实URL或None
         """
-        try:
-            session = await self._get_session()
-            
-            async with session.get(
-                short_url,
-                allow_redirects=False,
-                headers=self._common_headers
-            ) as response:
-                if response.status in [301, 302]:
-                    location = response.headers.get('Location', '')
-                    return location
-                elif response.status == 200:
-                    return str(response.url)
-                else:
-                    logger.warning(f"Short link resolution failed: {response.status}")
-                    return None
-                    
-        except Exception as e:
-            logger.error(f"Error resolving short link: {str(e)}")
-            return None
+        info = await self.short_links.resolve(short_url)
+        return info['url'] if info else None
     
     async def crawl_by_url(self, url: str) -> Optional[Dict]:
         """
@@ -169,17 +188,16 @@ class DouyinCrawlerEnhanced:
         parsed = self.parse_url(url)
         
         if parsed['type'] == 'short_link':
-            real_url = await self.resolve_short_link(url)
-            if real_url:
-                parsed = self.parse_url(real_url)
-                if parsed['type'] is None:
-                    video_id = self._extract_video_id_from_url(real_url)
-                    if video_id:
-                        parsed['type'] = 'video'
-                        parsed['id'] = video_id
+            info = await self.short_links.resolve(url)
+            if info and info['platform'] == self.platform:
+                parsed = {'type': info['type'], 'id': info['id'], 'url': info['url']}
+            elif info:
+                parsed = self.parse_url(info['url'])
         
         if parsed['type'] == 'video':
-            return await self.crawl_video(parsed['id'], url)
+            # 短链接已解析出ID时直接请求标准视频页
+            original_url = None if parsed['url'] != url else url
+            return await self.crawl_video(parsed['id'], original_url)
         elif parsed['type'] == 'user':
             return await self.crawl_user(parsed['id'])
         else:
@@ -221,70 +239,69 @@ class DouyinCrawlerEnhanced:
         """
         logger.info(f"[{self.platform}] Crawling video: {video_id}")
         
+        video_data, outcome = await self.fetch_video_json(video_id, original_url)
+        
+        if video_data:
+            result = self._parse_video_data(video_data, video_id)
+            if self.storage is not None:
+                await self.storage.put_json(video_data)
+            self._count('videos_crawled')
+            logger.info(f"Successfully crawled video: {video_id}")
+            return result
+        
+        logger.warning(f"Failed to extract video data: {video_id} ({outcome})")
+        self._count('errors')
+        return None
+    
+    async def fetch_video_json(self, video_id: str, original_url: str = None) -> Tuple[Optional[Dict], str]:
+        """
+        请求视频页并提取 aweme 原始JSON
+        
+        Args:
+            video_id: 视频ID
+            original_url: 原始URL
+            
+        Returns:
+            (视频JSON, 结果)，结果为 'ok'、'blocked'（403/429或验证码页）或 'failed'
+        """
         try:
             url = original_url or f"https://www.douyin.com/video/{video_id}"
             
             session = await self._get_session()
+            await self.pacer.wait()
             
-            async with session.get(
-                url,
-                headers={**self._common_headers, 'User-Agent': self.user_agents[2]}
-            ) as response:
-                if response.status != 200:
-                    logger.error(f"Video page request failed: {response.status}")
-                    return None
+            with track_request(self.platform, 'video_page') as req:
+                async with session.get(
+                    url,
+                    headers={**self._common_headers, 'User-Agent': self.user_agents[2]}
+                ) as response:
+                    self.pacer.observe(response.status)
+                    if response.status != 200:
+                        req.fail()
+                        logger.error(f"Video page request failed: {response.status}")
+                        return None, 'blocked' if response.status in BLOCKED_STATUSES else 'failed'
                 
-                html = await response.text()
+                    html = await response.text()
             
             video_data = self._extract_video_data(html)
-            
             if video_data:
-                result = self._parse_video_data(video_data, video_id)
-                self.stats['videos_crawled'] += 1
-                logger.info(f"Successfully crawled video: {video_id}")
-                return result
-            else:
-                logger.warning(f"Failed to extract video data: {video_id}")
-                self.stats['errors'] += 1
-                return None
+                return video_data, 'ok'
+            
+            if is_captcha_page(html):
+                self.pacer.blocked('captcha')
+                return None, 'blocked'
+            return None, 'failed'
                 
         except Exception as e:
             logger.error(f"Error crawling video {video_id}: {str(e)}")
-            self.stats['errors'] += 1
-            return None
+            return None, 'failed'
     
     def _extract_video_data(self, html: str) -> Optional[Dict]:
         """
         从HTML中提取视频数据
         """
         try:
-            import re
-            
-            pattern = r'window\._ROUTER_DATA\s*=\s*(\{.*?\})\s*</script>'
-            match = re.search(pattern, html, re.DOTALL)
-            
-            if not match:
-                return None
-            
-            json_str = match.group(1)
-            router_data = json.loads(json_str)
-            
-            loader_data = router_data.get('loaderData', {})
-            
-            for key in loader_data.keys():
-                if 'video' in key.lower() and key != 'video_layout':
-                    video_data = loader_data[key]
-                    
-                    if 'videoInfoRes' in video_data:
-                        info_res = video_data['videoInfoRes']
-                        if 'item_list' in info_res and info_res['item_list']:
-                            return info_res['item_list'][0]
-                    
-                    if 'item_list' in video_data and video_data['item_list']:
-                        return video_data['item_list'][0]
-            
-            return None
-            
+            return self._router_data.extract_video(html)
         except Exception as e:
             logger.error(f"Error extracting video data: {str(e)}")
             return None
@@ -336,44 +353,57 @@ class DouyinCrawlerEnhanced:
         """
         爬取用户信息
         
+        同一用户的并发请求共享同一次爬取
+        
         Args:
             user_id: 用户ID或用户名
             
         Returns:
             用户信息
         """
+        return await self._flight.do(('user', user_id), lambda: self._crawl_user(user_id))
+    
+    async def _crawl_user(self, user_id: str) -> Optional[Dict]:
+        """实际爬取用户信息"""
         logger.info(f"[{self.platform}] Crawling user: {user_id}")
         
         try:
             url = f"https://www.douyin.com/user/{user_id}"
             
             session = await self._get_session()
+            await self.pacer.wait()
             
-            async with session.get(
-                url,
-                headers={**self._common_headers, 'User-Agent': self.user_agents[2]}
-            ) as response:
-                if response.status != 200:
-                    logger.error(f"User page request failed: {response.status}")
-                    return None
+            with track_request(self.platform, 'user_page') as req:
+                async with session.get(
+                    url,
+                    headers={**self._common_headers, 'User-Agent': self.user_agents[2]}
+                ) as response:
+                    self.pacer.observe(response.status)
+                    if response.status != 200:
+                        req.fail()
+                        logger.error(f"User page request failed: {response.status}")
+                        return None
                 
-                html = await response.text()
+                    html = await response.text()
             
             user_data = self._extract_user_data(html)
             
+            if user_data is None and is_captcha_page(html):
+                self.pacer.blocked('captcha')
+            
             if user_data:
                 result = self._parse_user_data(user_data, user_id)
-                self.stats['users_crawled'] += 1
+                self._count('users_crawled')
                 logger.info(f"Successfully crawled user: {user_id}")
                 return result
             else:
                 logger.warning(f"Failed to extract user data: {user_id}")
-                self.stats['errors'] += 1
+                self._count('errors')
                 return None
                 
         except Exception as e:
             logger.error(f"Error crawling user {user_id}: {str(e)}")
-            self.stats['errors'] += 1
+            self._count('errors')
             return None
     
     def _extract_user_data(self, html: str) -> Optional[Dict]:
@@ -381,31 +411,7 @@ class DouyinCrawlerEnhanced:
         从HTML中提取用户数据
         """
         try:
-            import re
-            
-            pattern = r'window\._ROUTER_DATA\s*=\s*(\{.*?\})\s*</script>'
-            match = re.search(pattern, html, re.DOTALL)
-            
-            if not match:
-                return None
-            
-            json_str = match.group(1)
-            router_data = json.loads(json_str)
-            
-            loader_data = router_data.get('loaderData', {})
-            
-            for key in loader_data.keys():
-                if 'user' in key.lower():
-                    user_data = loader_data[key]
-                    
-                    if 'user' in user_data:
-                        return user_data['user']
-                    
-                    if 'userInfo' in user_data:
-                        return user_data['userInfo']
-            
-            return None
-            
+            return self._router_data.extract_user(html)
         except Exception as e:
             logger.error(f"Error extracting user data: {str(e)}")
             return None
@@ -435,64 +441,146 @@ class DouyinCrawlerEnhanced:
     async def crawl_comments(
         self,
         video_id: str,
-        limit: int = 100
+        limit: int = 100,
+        expand_replies: bool = True,
+        top_n: int = None,
+        sink: Callable[[List[Dict]], Any] = None
     ) -> List[Dict]:
         """
         爬取视频评论
         
+        一级评论翻页和回复展开并发进行，共用 api_base 主机的请求预算。
+        
         Args:
             video_id: 视频ID
-            limit: 最大评论数量
+            limit: 最大评论数量（含回复）
+            expand_replies: 是否展开回复
+            top_n: 只返回点赞数最高的N条，排名稳定后提前停止
+            sink: 每批评论到达时调用，用于流式写入管道
             
         Returns:
             评论列表
         """
         logger.info(f"[{self.platform}] Crawling comments for video: {video_id}")
         
-        results = []
-        cursor = 0
+        crawled = 0
         
-        while len(results) < limit:
-            try:
-                url = "https://www.iesdouyin.com/web/api/v2/comment/list/"
-                params = {
-                    'aweme_id': video_id,
-                    'cursor': cursor,
-                    'count': min(20, limit - len(results))
-                }
-                
-                session = await self._get_session()
-                
-                async with session.get(
-                    url,
-                    params=params,
-                    headers={**self._common_headers, 'User-Agent': self.user_agents[0]}
-                ) as response:
-                    if response.status != 200:
-                        break
-                    
-                    data = await response.json()
-                
-                comments = self._parse_comments(data)
-                
-                if not comments:
-                    break
-                
-                results.extend(comments)
-                
-                if not data.get('has_more'):
-                    break
-                
-                cursor = data.get('cursor', cursor + 20)
-                await asyncio.sleep(1)
-                
-            except Exception as e:
-                logger.error(f"Error crawling comments: {str(e)}")
-                break
+        async def count_batch(batch: List[Dict]):
+            nonlocal crawled
+            crawled += len(batch)
+            self._count('comments_crawled', len(batch))
+            if sink is not None:
+                outcome = sink(batch)
+                if inspect.isawaitable(outcome):
+                    await outcome
         
-        self.stats['comments_crawled'] += len(results)
-        logger.info(f"[{self.platform}] Comment crawling completed: {len(results)} comments")
-        return results[:limit]
+        crawler = self._comment_crawler(video_id, expand_replies)
+        results = await crawler.crawl(initial_cursor=0, limit=limit, top_n=top_n, sink=count_batch)
+        
+        logger.info(f"[{self.platform}] Comment crawling completed: {crawled} comments ({crawler.get_stats()})")
+        return results
+    
+    async def iter_comments(
+        self,
+        video_id: str,
+        limit: int = None,
+        expand_replies: bool = True
+    ) -> AsyncIterator[List[Dict]]:
+        """
+        流式爬取视频评论，按到达顺序返回评论批次
+        
+        Args:
+            video_id: 视频ID
+            limit: 最大评论数量（含回复）
+            expand_replies: 是否展开回复
+        """
+        crawler = self._comment_crawler(video_id, expand_replies)
+        batches = crawler.iter_batches(initial_cursor=0, limit=limit)
+        try:
+            async for batch in batches:
+                self._count('comments_crawled', len(batch))
+                yield batch
+        finally:
+            await batches.aclose()
+    
+    def _comment_crawler(self, video_id: str, expand_replies: bool) -> CommentCrawler:
+        """创建视频的评论爬取器"""
+        return CommentCrawler(
+            fetch_page=lambda cursor: self._fetch_comment_page(video_id, cursor),
+            fetch_replies=(
+                (lambda comment, cursor: self._fetch_comment_replies(video_id, comment, cursor))
+                if expand_replies else None
+            ),
+            budget=get_host_budget(self.api_base, rate=self.rate_limit, concurrency=self.comment_concurrency),
+            name=f'{self.platform}:{video_id}'
+        )
+    
+    async def _fetch_comment_page(self, video_id: str, cursor: int) -> Optional[CommentPage]:
+        """
+        请求一页一级评论
+        """
+        url = f"{self.api_base}/web/api/v2/comment/list/"
+        params = {
+            'aweme_id': video_id,
+            'cursor': cursor,
+            'count': 20
+        }
+        
+        data = await self._get_comment_json('comment_list', url, params)
+        if data is None:
+            return None
+        
+        comments = self._parse_comments(data)
+        return CommentPage(
+            comments=comments,
+            cursor=data.get('cursor', cursor + len(comments)),
+            has_more=bool(data.get('has_more')),
+            threads=[(comment, 0) for comment in comments if comment.get('reply_count')]
+        )
+    
+    async def _fetch_comment_replies(self, video_id: str, comment: Dict, cursor: int) -> Optional[CommentPage]:
+        """
+        请求一页楼层回复
+        """
+        url = f"{self.api_base}/web/api/v2/comment/list/reply/"
+        params = {
+            'item_id': video_id,
+            'comment_id': comment['platform_comment_id'],
+            'cursor': cursor,
+            'count': 20
+        }
+        
+        data = await self._get_comment_json('comment_reply', url, params)
+        if data is None:
+            return None
+        
+        replies = self._parse_comments(data)
+        for reply in replies:
+            reply['parent_comment_id'] = comment['platform_comment_id']
+        
+        return CommentPage(
+            comments=replies,
+            cursor=data.get('cursor', cursor + len(replies)),
+            has_more=bool(data.get('has_more'))
+        )
+    
+    async def _get_comment_json(self, endpoint: str, url: str, params: Dict) -> Optional[Dict]:
+        """发起评论接口请求（经共享节奏控制），非200返回None"""
+        session = await self._get_session()
+        await self.pacer.wait()
+        
+        with track_request(self.platform, endpoint) as req:
+            async with session.get(
+                url,
+                params=params,
+                headers={**self._common_headers, 'User-Agent': self.user_agents[0]}
+            ) as response:
+                self.pacer.observe(response.status)
+                if response.status != 200:
+                    req.fail()
+                    return None
+            
+                return await response.json()
     
     def _parse_comments(self, data: dict) -> List[Dict]:
         """
@@ -516,7 +604,8 @@ class DouyinCrawlerEnhanced:
                     'create_time': datetime.fromtimestamp(
                         comment_data.get('create_time', 0)
                     ).isoformat() if comment_data.get('create_time') else None,
-                    'ip_location': comment_data.get('ip_label', '')
+                    'ip_location': comment_data.get('ip_label', ''),
+                    'reply_count': comment_data.get('reply_comment_total', 0)
                 }
                 
                 comments.append(comment)
@@ -557,16 +646,20 @@ class DouyinCrawlerEnhanced:
                 }
                 
                 session = await self._get_session()
+                await self.pacer.wait()
                 
-                async with session.get(
-                    url,
-                    params=params,
-                    headers={**self._common_headers, 'User-Agent': self.user_agents[0]}
-                ) as response:
-                    if response.status != 200:
-                        break
+                with track_request(self.platform, 'aweme_post') as req:
+                    async with session.get(
+                        url,
+                        params=params,
+                        headers={**self._common_headers, 'User-Agent': self.user_agents[0]}
+                    ) as response:
+                        self.pacer.observe(response.status)
+                        if response.status != 200:
+                            req.fail()
+                            break
                     
-                    data = await response.json()
+                        data = await response.json()
                 
                 aweme_list = data.get('aweme_list', [])
                 
@@ -576,25 +669,33 @@ class DouyinCrawlerEnhanced:
                 for item in aweme_list:
                     video = self._parse_video_data(item, item.get('aweme_id', ''))
                     results.append(video)
+                    if self.storage is not None:
+                        await self.storage.put_json(item)
                 
                 max_cursor = data.get('max_cursor', 0)
                 
                 if not data.get('has_more'):
                     break
                 
-                await asyncio.sleep(2)
-                
             except Exception as e:
                 logger.error(f"Error crawling user videos: {str(e)}")
                 break
         
-        self.stats['videos_crawled'] += len(results)
+        self._count('videos_crawled', len(results))
         logger.info(f"[{self.platform}] User videos crawling completed: {len(results)} videos")
         return results[:limit]
     
+    def _count(self, key: str, amount: int = 1):
+        """累加实例统计，并同步到全局指标"""
+        self.stats[key] += amount
+        if key == 'errors':
+            ERRORS.labels(platform=self.platform).inc(amount)
+        elif amount:
+            ITEMS.labels(platform=self.platform, type=self._STAT_TYPES[key]).inc(amount)
+    
     def get_stats(self) -> Dict:
         """获取统计信息"""
-        return self.stats
+        return {**self.stats, 'pace': self.pacer.get_stats()}
 
 
 async def main():
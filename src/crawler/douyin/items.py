@@ -10,12 +10,18 @@
 - DouyinCommentItem: 评论数据
 - DouyinUserItem: 创作者信息
 - DouyinChallengeItem: 话题挑战
+
+以及用于批量入库的紧凑记录（扁平、__slots__、不可变）:
+- DouyinVideoRecord: 视频
+- DouyinCommentRecord: 评论
 """
 
+import time
 from dataclasses import dataclass, field
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 from datetime import datetime
 from enum import Enum
+from uuid import uuid4
 
 
 class DouyinEnum(Enum):
@@ -467,3 +473,221 @@ def create_video_item_from_json(json_data: Dict[str, Any]) -> Optional[DouyinVid
     except Exception as e:
         print(f"Error creating video item: {e}")
         return None
+
+
+# ============================================
+# 紧凑记录
+# ============================================
+
+# db/init.sql 中 platforms 表初始化数据里抖音的ID
+DOUYIN_PLATFORM_ID = 5
+
+# contents 表列顺序（与 ContentDAO.insert_content 一致）
+CONTENT_COLUMNS = (
+    "id", "platform_id", "platform_content_id", "title", "content",
+    "content_type", "author_id", "author_name", "author_avatar",
+    "view_count", "like_count", "comment_count", "share_count",
+    "collect_count", "images", "video_url", "cover_url",
+    "tags", "topics", "url", "published_at", "status"
+)
+
+
+def _first_url(node: Any) -> str:
+    """取 {"url_list": [...]} 的第一个地址"""
+    if isinstance(node, dict):
+        urls = node.get("url_list")
+        if urls:
+            return urls[0]
+    return ""
+
+
+@dataclass(frozen=True, slots=True)
+class DouyinVideoRecord:
+    """
+    抖音视频紧凑记录
+    
+    与 DouyinVideoItem 相比：一个视频只有一个对象（统计、作者、视频、
+    音乐字段摊平），使用 __slots__，不可变；修改用 dataclasses.replace。
+    """
+    
+    video_id: str = ""
+    desc: str = ""
+    create_time: int = 0
+    
+    # 统计
+    digg_count: int = 0
+    comment_count: int = 0
+    share_count: int = 0
+    play_count: int = 0
+    collect_count: int = 0
+    
+    # 作者
+    author_uid: str = ""
+    author_nickname: str = ""
+    author_avatar: str = ""
+    
+    # 视频内容
+    play_addr: str = ""
+    cover: str = ""
+    duration: int = 0
+    width: int = 0
+    height: int = 0
+    
+    music_title: str = ""
+    tags: Tuple[str, ...] = ()       # 话题标签名
+    topics: Tuple[str, ...] = ()     # 挑战名
+    poi_name: str = ""
+    
+    crawl_time: float = 0.0          # 爬取时间戳
+    
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> Optional["DouyinVideoRecord"]:
+        """
+        从 aweme JSON 单次构建记录
+        
+        只读取用到的字段，不展开 bit_rate、music 播放地址等子树。
+        
+        Returns:
+            记录，没有 aweme_id 时返回None
+        """
+        aweme_id = data.get("aweme_id")
+        if not aweme_id:
+            return None
+        
+        stats = data.get("statistics") or {}
+        author = data.get("author") or {}
+        video = data.get("video") or {}
+        music = data.get("music")
+        poi = data.get("poi")
+        
+        return cls(
+            str(aweme_id),
+            data.get("desc", ""),
+            data.get("create_time", 0),
+            stats.get("digg_count", 0),
+            stats.get("comment_count", 0),
+            stats.get("share_count", 0),
+            stats.get("play_count", 0),
+            stats.get("collect_count", 0),
+            str(author.get("uid", "")),
+            author.get("nickname", ""),
+            _first_url(author.get("avatar_thumb")),
+            _first_url(video.get("play_addr")),
+            _first_url(video.get("cover")),
+            video.get("duration", 0),
+            video.get("width", 0),
+            video.get("height", 0),
+            music.get("title", "") if music else "",
+            tuple(
+                extra["hashtag_name"] for extra in data.get("text_extra") or ()
+                if isinstance(extra, dict) and extra.get("hashtag_name")
+            ),
+            tuple(
+                cha["cha_name"] for cha in data.get("cha_list") or ()
+                if isinstance(cha, dict) and cha.get("cha_name")
+            ),
+            poi.get("poi_name", "") if poi else "",
+            time.time()
+        )
+    
+    @property
+    def url(self) -> str:
+        return f"https://www.douyin.com/video/{self.video_id}"
+    
+    def to_row(self, content_id: str = None, platform_id: int = DOUYIN_PLATFORM_ID) -> tuple:
+        """
+        按 contents 表列顺序（CONTENT_COLUMNS）输出一行
+        
+        Args:
+            content_id: 主键，默认生成UUID
+            platform_id: 平台ID
+        """
+        return (
+            content_id or str(uuid4()),
+            platform_id,
+            self.video_id,
+            self.desc[:500],
+            self.desc,
+            "video",
+            self.author_uid,
+            self.author_nickname,
+            self.author_avatar,
+            self.play_count,
+            self.digg_count,
+            self.comment_count,
+            self.share_count,
+            self.collect_count,
+            [],
+            self.play_addr,
+            self.cover,
+            list(self.tags),
+            list(self.topics),
+            self.url,
+            datetime.fromtimestamp(self.create_time) if self.create_time else None,
+            "active"
+        )
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为扁平字典（值直接引用，不复制）"""
+        return {name: getattr(self, name) for name in self.__slots__}
+    
+    def validate(self) -> bool:
+        """验证数据完整性"""
+        return bool(self.video_id and self.desc)
+
+
+@dataclass(frozen=True, slots=True)
+class DouyinCommentRecord:
+    """抖音评论紧凑记录（评论用户字段摊平）"""
+    
+    comment_id: str = ""
+    aweme_id: str = ""
+    text: str = ""
+    create_time: int = 0
+    digg_count: int = 0
+    reply_comment_total: int = 0
+    reply_to_comment_id: str = ""
+    user_uid: str = ""
+    user_nickname: str = ""
+    user_avatar: str = ""
+    ip_label: str = ""
+    crawl_time: float = 0.0
+    
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> Optional["DouyinCommentRecord"]:
+        """
+        从评论接口的单条评论JSON构建记录
+        
+        Returns:
+            记录，没有 cid 时返回None
+        """
+        cid = data.get("cid")
+        if not cid:
+            return None
+        
+        user = data.get("user") or {}
+        # 一级评论的 reply_id 为 "0"
+        reply_id = data.get("reply_id")
+        
+        return cls(
+            str(cid),
+            str(data.get("aweme_id", "")),
+            data.get("text", ""),
+            data.get("create_time", 0),
+            data.get("digg_count", 0),
+            data.get("reply_comment_total", 0),
+            str(reply_id) if reply_id and reply_id != "0" else "",
+            str(user.get("uid", "")),
+            user.get("nickname", ""),
+            _first_url(user.get("avatar_thumb")),
+            data.get("ip_label", ""),
+            time.time()
+        )
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为扁平字典（值直接引用，不复制）"""
+        return {name: getattr(self, name) for name in self.__slots__}
+    
+    def validate(self) -> bool:
+        """验证数据完整性"""
+        return bool(self.comment_id and self.text)
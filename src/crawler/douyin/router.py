@@ -0,0 +1,301 @@
+"""
+抖音爬取路由
+
+> 🔀 先走便宜的HTTP路径，失败或被拦截的ID再批量交给浏览器
+> 开发者: 智宝 (AI助手)
+
+功能:
+- 每个ID先用 DouyinCrawlerEnhanced（aiohttp + HTML解析）尝试
+- 失败的ID攒批后交给 DouyinVideoSpider 的浏览器上下文池
+- 按端点（video / note）记录各路径的衰减成功率，HTTP持续失败时直接走浏览器，
+  并定期试探HTTP是否恢复
+- 浏览器按需启动，统计两条路径的请求数和耗时
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from ..utils.pacer import get_pacer
+from .douyin_crawler_enhanced import DouyinCrawlerEnhanced
+from .items import DouyinVideoRecord
+from .settings import RATE_LIMIT_CONFIG, ROUTER_CONFIG
+
+logger = logging.getLogger("douyin.router")
+
+
+class PathScore:
+    """指数衰减的成功率，初始为1（先假设便宜的路径可用）"""
+
+    def __init__(self, decay: float):
+        self.decay = decay
+        self.value = 1.0
+        self.samples = 0
+
+    def record(self, success: bool):
+        self.value = self.decay * self.value + (1 - self.decay) * (1.0 if success else 0.0)
+        self.samples += 1
+
+
+def has_aweme(data: Optional[Dict]) -> bool:
+    """是否为可构建记录的 aweme JSON（与 DouyinVideoRecord.from_json 的判断一致）"""
+    return bool(data) and bool(data.get("aweme_id"))
+
+
+class DouyinRouter:
+    """
+    抖音视频爬取路由
+
+    用法:
+        router = DouyinRouter()
+        records = await router.crawl_videos(video_ids)
+        print(router.get_cost_report())
+        await router.close()
+    """
+
+    def __init__(
+        self,
+        http_crawler: DouyinCrawlerEnhanced = None,
+        spider_factory=None,
+        config: Dict[str, Any] = None,
+        storage=None
+    ):
+        """
+        Args:
+            http_crawler: HTTP路径爬虫，默认新建
+            spider_factory: 创建浏览器爬虫的可调用对象，默认 DouyinVideoSpider
+            config: 路由配置，默认 ROUTER_CONFIG
+            storage: 存储阶段（如 DouyinStorage），爬到的记录会提交给它
+        """
+        self.http = http_crawler or DouyinCrawlerEnhanced()
+        self.spider_factory = spider_factory
+        self.config = {**ROUTER_CONFIG, **(config or {})}
+        self.storage = storage
+
+        self.spider = None
+        self._spider_lock = asyncio.Lock()
+        self._http_semaphore = asyncio.Semaphore(self.config["http_concurrency"])
+
+        self._scores: Dict[Tuple[str, str], PathScore] = {}
+        self._skipped_http: Dict[str, int] = {}
+
+        # 等待浏览器处理的 (endpoint, id, future)
+        self._pending: List[Tuple[str, str, asyncio.Future]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self._batch_tasks: set = set()
+        self._batch_lock = asyncio.Lock()
+
+        self.cost = {
+            "http_requests": 0,
+            "http_seconds": 0.0,
+            "http_blocked": 0,
+            "browser_requests": 0,
+            "browser_batches": 0,
+            "browser_busy_seconds": 0.0,
+            "browser_startup_seconds": 0.0,
+            "browser_uptime_seconds": 0.0,
+            "escalations": 0,
+            "direct_to_browser": 0
+        }
+        self._browser_started_at: Optional[float] = None
+
+    # ---------- 评分 ----------
+
+    def _score(self, endpoint: str, path: str) -> PathScore:
+        key = (endpoint, path)
+        score = self._scores.get(key)
+        if score is None:
+            score = self._scores[key] = PathScore(self.config["score_decay"])
+        return score
+
+    def _use_http(self, endpoint: str) -> bool:
+        """HTTP成功率过低时跳过，但每 probe_every 次仍试探一次"""
+        if self._score(endpoint, "http").value >= self.config["min_http_score"]:
+            return True
+
+        skipped = self._skipped_http.get(endpoint, 0) + 1
+        if skipped >= self.config["probe_every"]:
+            self._skipped_http[endpoint] = 0
+            return True
+
+        self._skipped_http[endpoint] = skipped
+        return False
+
+    # ---------- 对外接口 ----------
+
+    async def crawl_video(self, video_id: str, endpoint: str = "video") -> Optional[DouyinVideoRecord]:
+        """
+        爬取单个视频
+
+        Args:
+            video_id: 视频ID
+            endpoint: 页面类型，video 或 note（图文）
+
+        Returns:
+            视频记录，两条路径都失败返回None
+        """
+        attempted, data = await self._crawl_http(video_id, endpoint)
+        if not data:
+            self.cost["escalations" if attempted else "direct_to_browser"] += 1
+            data = await self._escalate(video_id, endpoint)
+            if not data:
+                return None
+
+        record = DouyinVideoRecord.from_json(data)
+        if record is not None and self.storage is not None:
+            await self.storage.put(record)
+        return record
+
+    async def crawl_videos(self, video_ids: Iterable[str], endpoint: str = "video") -> Dict[str, Optional[DouyinVideoRecord]]:
+        """
+        批量爬取视频
+
+        Returns:
+            {视频ID: 视频记录或None}
+        """
+        unique = list(dict.fromkeys(video_ids))
+        results = await asyncio.gather(*[self.crawl_video(video_id, endpoint) for video_id in unique])
+        return dict(zip(unique, results))
+
+    # ---------- HTTP路径 ----------
+
+    async def _crawl_http(self, video_id: str, endpoint: str) -> Tuple[bool, Optional[Dict]]:
+        """
+        尝试HTTP路径
+
+        拿到并发名额后才判断是否走HTTP，让排队中的请求能用上前面请求的结果。
+
+        Returns:
+            (是否实际请求了HTTP, 视频JSON)
+        """
+        url = f"https://www.douyin.com/{endpoint}/{video_id}"
+
+        async with self._http_semaphore:
+            if not self._use_http(endpoint):
+                return False, None
+
+            start = time.monotonic()
+            data, outcome = await self.http.fetch_video_json(video_id, url)
+            self.cost["http_seconds"] += time.monotonic() - start
+        
+        if not has_aweme(data):
+            data = None
+
+        self.cost["http_requests"] += 1
+        if outcome == "blocked":
+            self.cost["http_blocked"] += 1
+        self._score(endpoint, "http").record(data is not None)
+        return True, data
+
+    # ---------- 浏览器路径 ----------
+
+    async def _escalate(self, video_id: str, endpoint: str) -> Optional[Dict]:
+        """放入待升级队列，攒满一批或等待超时后交给浏览器"""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((endpoint, video_id, future))
+
+        if len(self._pending) >= self.config["escalation_batch"]:
+            self._dispatch()
+        elif self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.ensure_future(self._flush_later())
+
+        return await future
+
+    def _dispatch(self):
+        """把当前待升级的ID作为一批交给浏览器"""
+        batch, self._pending = self._pending, []
+        task = asyncio.ensure_future(self._run_batch(batch))
+        self._batch_tasks.add(task)
+        task.add_done_callback(self._batch_tasks.discard)
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.config["escalation_wait"])
+        if self._pending:
+            self._dispatch()
+
+    async def _ensure_spider(self):
+        """首次升级时才启动浏览器"""
+        async with self._spider_lock:
+            if self.spider is not None:
+                return self.spider
+
+            if self.spider_factory is None:
+                from .spiders.video_spider import DouyinVideoSpider
+                self.spider_factory = DouyinVideoSpider
+
+            start = time.monotonic()
+            spider = self.spider_factory()
+            await spider.start()
+            self.cost["browser_startup_seconds"] += time.monotonic() - start
+            self._browser_started_at = time.monotonic()
+            self.spider = spider
+            logger.info("浏览器路径已启动")
+            return spider
+
+    async def _run_batch(self, batch: List[Tuple[str, str, asyncio.Future]]):
+        """浏览器处理一批ID（批次之间串行，批内并发数由上下文池决定）"""
+        async with self._batch_lock:
+            try:
+                spider = await self._ensure_spider()
+            except Exception as e:
+                logger.error(f"浏览器启动失败: {e}")
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_result(None)
+                return
+
+            logger.info(f"浏览器处理 {len(batch)} 个升级ID")
+            start = time.monotonic()
+
+            async def fetch(endpoint: str, video_id: str, future: asyncio.Future):
+                try:
+                    data = await spider.fetch_video_json(f"https://www.douyin.com/{endpoint}/{video_id}")
+                except Exception as e:
+                    logger.error(f"浏览器爬取失败 {video_id}: {e}")
+                    data = None
+                # 没有 aweme 数据的页面同样记为失败
+                if not has_aweme(data):
+                    data = None
+                self.cost["browser_requests"] += 1
+                self._score(endpoint, "browser").record(data is not None)
+                if not future.done():
+                    future.set_result(data)
+
+            await asyncio.gather(*[fetch(*entry) for entry in batch])
+
+            self.cost["browser_batches"] += 1
+            self.cost["browser_busy_seconds"] += time.monotonic() - start
+
+    async def close(self):
+        """关闭浏览器和HTTP会话"""
+        if self._flush_task and not self._flush_task.done():
+            await self._flush_task
+        if self._batch_tasks:
+            await asyncio.gather(*list(self._batch_tasks), return_exceptions=True)
+        if self.spider is not None:
+            await self.spider.close()
+            self.cost["browser_uptime_seconds"] += time.monotonic() - self._browser_started_at
+            self.spider = None
+        await self.http.close()
+
+    # ---------- 统计 ----------
+
+    def get_cost_report(self) -> Dict[str, Any]:
+        """两条路径的请求数、耗时和各端点成功率"""
+        uptime = self.cost["browser_uptime_seconds"]
+        if self.spider is not None and self._browser_started_at is not None:
+            uptime += time.monotonic() - self._browser_started_at
+
+        total = self.cost["http_requests"] + self.cost["browser_requests"]
+        return {
+            **self.cost,
+            "browser_uptime_seconds": uptime,
+            "browser_minutes": uptime / 60,
+            "browser_share": self.cost["browser_requests"] / total if total else 0.0,
+            "pace_delay": get_pacer("douyin", RATE_LIMIT_CONFIG).delay,
+            "scores": {
+                f"{endpoint}:{path}": {"success_rate": round(score.value, 3), "samples": score.samples}
+                for (endpoint, path), score in self._scores.items()
+            }
+        }
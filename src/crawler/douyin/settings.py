@@ -69,8 +69,6 @@ BROWSER_CONFIG = {
 # ========== 速率限制配置 ==========
 RATE_LIMIT_CONFIG = {
     "enabled": True,                     # 启用速率限制
-    "delay_min": 2,                      # 最小延迟(秒)
-    "delay_max": 5,                      # 最大延迟(秒)
     "max_concurrent": 2,                 # 最大并发数（抖音反爬严格）
     "burst_size": 3,                     # 突发请求数
     "refill_rate": 1.0,                  # 恢复速率(请求/秒)
@@ -103,7 +101,8 @@ PLAYWRIGHT_CONFIG = {
     "scroll_wait": 2000,                # 滚动等待时间(毫秒)
     "max_scroll": 10,                   # 最大滚动次数
     "screenshot_on_error": True,        # 错误时截图
-    "trace_enabled": False              # 是否启用追踪
+    "trace_enabled": False,             # 是否启用追踪
+    "context_max_navigations": 50       # 上下文使用次数上限，超过后重建
 }
 
 
@@ -114,7 +113,12 @@ EXTRACT_CONFIG = {
     "video_wait_timeout": 10000,        # 视频加载超时(毫秒)
     "comment_scroll_count": 5,          # 评论滚动次数
     "user_video_max": 20,               # 用户视频最大数
-    "challenge_video_max": 50            # 话题视频最大数
+    "challenge_video_max": 50,           # 话题视频最大数
+    "fast_mode": True,                   # 快速模式：拦截重资源并直接捕获接口JSON
+    "blocked_resources": ["image", "media", "font", "stylesheet"],  # 快速模式拦截的资源类型
+    "detail_api_pattern": "/aweme/v1/web/aweme/detail/",  # 视频详情接口
+    "post_api_pattern": "/aweme/v1/web/aweme/post/",      # 用户作品列表接口
+    "capture_timeout": 15                # 等待接口响应超时(秒)
 }
 
 
@@ -196,7 +200,19 @@ PERFORMANCE_CONFIG = {
     "cache_ttl": 3600,                   # 缓存过期时间(秒)
     "batch_size": 100,                   # 批处理大小
     "async_processing": True,             # 异步处理
-    "max_queue_size": 1000               # 最大队列大小
+    "max_queue_size": 1000,              # 最大队列大小
+    "flush_interval": 5.0                # 不满一批时最长等待(秒)
+}
+
+
+# ========== 路由配置 ==========
+ROUTER_CONFIG = {
+    "http_concurrency": 4,               # HTTP路径并发数
+    "escalation_batch": 10,              # 攒够多少个失败ID再交给浏览器
+    "escalation_wait": 2.0,              # 攒批最长等待(秒)
+    "score_decay": 0.9,                  # 路径成功率的衰减系数
+    "min_http_score": 0.2,               # HTTP成功率低于此值时直接走浏览器
+    "probe_every": 10                    # 跳过HTTP时每N次仍试探一次HTTP
 }
 
 
@@ -250,7 +266,7 @@ def override_from_env():
     
     # 速率限制
     if os.getenv("DOUYIN_DELAY_MIN"):
-        RATE_LIMIT_CONFIG["delay_min"] = float(os.getenv("DOUYIN_DELAY_MIN"))
+        RATE_LIMIT_CONFIG["min_delay"] = float(os.getenv("DOUYIN_DELAY_MIN"))
     if os.getenv("DOUYIN_MAX_CONCURRENT"):
         RATE_LIMIT_CONFIG["max_concurrent"] = int(os.getenv("DOUYIN_MAX_CONCURRENT"))
     
@@ -304,8 +320,8 @@ def validate_config() -> List[str]:
     if RATE_LIMIT_CONFIG["max_concurrent"] < 1:
         errors.append("max_concurrent must be at least 1")
     
-    if RATE_LIMIT_CONFIG["delay_min"] < 0:
-        errors.append("delay_min must be non-negative")
+    if RATE_LIMIT_CONFIG["min_delay"] < 0:
+        errors.append("min_delay must be non-negative")
     
     return errors
 
@@ -6,9 +6,11 @@
 """
 
 from .video_spider import DouyinVideoSpider, crawl_single_video, crawl_user_videos
+from .browser_pool import BrowserContextPool
 
 __all__ = [
     "DouyinVideoSpider",
+    "BrowserContextPool",
     "crawl_single_video",
     "crawl_user_videos"
 ]
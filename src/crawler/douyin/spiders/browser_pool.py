@@ -0,0 +1,189 @@
+"""
+Playwright浏览器上下文池
+
+> 🧩 一个浏览器进程，多个隔离的BrowserContext
+> 开发者: 智宝 (AI助手)
+
+功能:
+- 在同一个浏览器进程中创建N个隔离的BrowserContext，每个上下文一个Page
+- 并发任务通过 lease() 租用页面，用完归还
+- 上下文导航K次后或页面崩溃时自动重建
+"""
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from playwright.async_api import Browser, BrowserContext, Page
+
+logger = logging.getLogger("douyin.browser_pool")
+
+
+class _PoolSlot:
+    """池中的一个上下文槽位"""
+
+    def __init__(self, index: int):
+        self.index = index
+        self.context: Optional[BrowserContext] = None
+        self.page: Optional[Page] = None
+        self.navigations = 0
+        self.crashed = False
+
+    def mark_crashed(self, *_):
+        self.crashed = True
+
+
+class BrowserContextPool:
+    """
+    浏览器上下文池
+
+    用法:
+        pool = BrowserContextPool(browser, size=2, context_options={...})
+        await pool.start()
+        async with pool.lease() as page:
+            await page.goto(url)
+        await pool.close()
+    """
+
+    def __init__(
+        self,
+        browser: Browser,
+        size: int = 2,
+        max_navigations: int = 50,
+        context_options: Dict[str, Any] = None,
+        page_timeout: int = None,
+        navigation_timeout: int = None,
+        setup_page: Callable[[Page], Awaitable[None]] = None
+    ):
+        """
+        Args:
+            browser: 已启动的浏览器
+            size: 上下文数量（最大并发页面数）
+            max_navigations: 单个上下文最多使用次数，超过后重建
+            context_options: browser.new_context 参数
+            page_timeout: 页面默认超时(毫秒)
+            navigation_timeout: 导航默认超时(毫秒)
+            setup_page: 新页面创建后的初始化回调
+        """
+        self.browser = browser
+        self.size = max(1, size)
+        self.max_navigations = max(1, max_navigations)
+        self.context_options = context_options or {}
+        self.page_timeout = page_timeout
+        self.navigation_timeout = navigation_timeout
+        self.setup_page = setup_page
+
+        self._slots: List[_PoolSlot] = []
+        self._idle: Optional[asyncio.Queue] = None
+        self._closed = False
+
+        self.stats = {
+            "leases": 0,
+            "recycled": 0,
+            "crashes": 0
+        }
+
+    async def start(self):
+        """创建全部上下文"""
+        self._idle = asyncio.Queue()
+        for index in range(self.size):
+            slot = _PoolSlot(index)
+            await self._open_slot(slot)
+            self._slots.append(slot)
+            self._idle.put_nowait(slot)
+
+        logger.info(f"浏览器上下文池已启动: {self.size} 个上下文")
+
+    async def _open_slot(self, slot: _PoolSlot):
+        """为槽位创建新的上下文和页面"""
+        slot.context = await self.browser.new_context(**self.context_options)
+        slot.page = await slot.context.new_page()
+        slot.navigations = 0
+        slot.crashed = False
+
+        slot.page.on("crash", slot.mark_crashed)
+
+        if self.page_timeout:
+            slot.page.set_default_timeout(self.page_timeout)
+        if self.navigation_timeout:
+            slot.page.set_default_navigation_timeout(self.navigation_timeout)
+
+        if self.setup_page:
+            await self.setup_page(slot.page)
+
+    async def _close_slot(self, slot: _PoolSlot):
+        """关闭槽位的上下文（忽略已崩溃上下文的关闭错误）"""
+        try:
+            if slot.context:
+                await slot.context.close()
+        except Exception as e:
+            logger.debug(f"关闭上下文 {slot.index} 时出错: {e}")
+        finally:
+            slot.context = None
+            slot.page = None
+
+    async def _recycle(self, slot: _PoolSlot):
+        """重建槽位"""
+        if slot.crashed:
+            self.stats["crashes"] += 1
+            logger.warning(f"上下文 {slot.index} 崩溃，正在重建")
+        else:
+            logger.debug(f"上下文 {slot.index} 已使用 {slot.navigations} 次，正在重建")
+
+        self.stats["recycled"] += 1
+        await self._close_slot(slot)
+        await self._open_slot(slot)
+
+    @asynccontextmanager
+    async def lease(self) -> AsyncIterator[Page]:
+        """
+        租用一个页面
+
+        没有空闲页面时等待；退出时归还，必要时重建上下文。
+        """
+        if self._idle is None or self._closed:
+            raise RuntimeError("Browser context pool is not running")
+
+        slot = await self._idle.get()
+        self.stats["leases"] += 1
+
+        try:
+            if slot.crashed or slot.page is None or slot.page.is_closed():
+                slot.crashed = True
+                await self._recycle(slot)
+
+            yield slot.page
+
+        except Exception:
+            # 页面已关闭说明上下文不可用
+            if slot.page is None or slot.page.is_closed():
+                slot.crashed = True
+            raise
+
+        finally:
+            slot.navigations += 1
+            try:
+                if not self._closed and (slot.crashed or slot.navigations >= self.max_navigations):
+                    await self._recycle(slot)
+            except Exception as e:
+                logger.error(f"重建上下文 {slot.index} 失败: {e}")
+                slot.crashed = True
+            finally:
+                self._idle.put_nowait(slot)
+
+    async def close(self):
+        """关闭全部上下文"""
+        self._closed = True
+        for slot in self._slots:
+            await self._close_slot(slot)
+        self._slots.clear()
+        logger.info("浏览器上下文池已关闭")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取池统计信息"""
+        return {
+            **self.stats,
+            "size": self.size,
+            "idle": self._idle.qsize() if self._idle else 0
+        }
@@ -0,0 +1,106 @@
+"""
+Playwright网络拦截
+
+> 🚦 拦截重资源、捕获aweme接口JSON
+> 开发者: 智宝 (AI助手)
+
+功能:
+- 通过 page.route 拦截图片、媒体、字体、样式表请求
+- 通过 page.on("response") 捕获 aweme/detail、aweme/post 接口返回的JSON
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+
+from playwright.async_api import Page, Response, Route
+
+logger = logging.getLogger("douyin.interceptor")
+
+
+async def block_resources(page: Page, resource_types: Iterable[str]):
+    """
+    拦截指定类型的资源请求
+
+    Args:
+        page: 页面
+        resource_types: 要拦截的资源类型，如 image、media、font、stylesheet
+    """
+    blocked = frozenset(resource_types)
+
+    async def handle_route(route: Route):
+        if route.request.resource_type in blocked:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    await page.route("**/*", handle_route)
+
+
+class ResponseCapture:
+    """
+    捕获URL匹配的接口响应JSON
+
+    用法:
+        async with ResponseCapture(page, ["/aweme/detail/"]) as capture:
+            await page.goto(url, wait_until="commit")
+            payload = await capture.next(timeout=15)
+    """
+
+    def __init__(self, page: Page, url_patterns: Iterable[str]):
+        self.page = page
+        self.url_patterns = tuple(url_patterns)
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+        self.captured = 0
+
+    def _matches(self, url: str) -> bool:
+        return any(pattern in url for pattern in self.url_patterns)
+
+    def _on_response(self, response: Response):
+        if response.status != 200 or not self._matches(response.url):
+            return
+        # 事件回调是同步的，读取响应体放到任务中
+        self._tasks.append(asyncio.ensure_future(self._read(response)))
+
+    async def _read(self, response: Response):
+        try:
+            payload = await response.json()
+        except Exception as e:
+            logger.debug(f"读取接口响应失败: {response.url} - {e}")
+            return
+        self.captured += 1
+        self.queue.put_nowait({"url": response.url, "data": payload})
+
+    async def __aenter__(self) -> "ResponseCapture":
+        self.page.on("response", self._on_response)
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.page.remove_listener("response", self._on_response)
+        for task in self._tasks:
+            if not task.done():
+                task.cancel()
+        self._tasks.clear()
+
+    async def next(self, timeout: float) -> Optional[Dict[str, Any]]:
+        """
+        等待下一个捕获的响应
+
+        Args:
+            timeout: 超时(秒)
+
+        Returns:
+            {"url": 接口URL, "data": JSON}，超时返回None
+        """
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def drain(self) -> List[Dict[str, Any]]:
+        """取出当前已捕获的全部响应"""
+        items = []
+        while not self.queue.empty():
+            items.append(self.queue.get_nowait())
+        return items
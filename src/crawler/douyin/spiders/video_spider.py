@@ -21,22 +21,30 @@
 import asyncio
 import json
 import re
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, AsyncIterator
 from datetime import datetime
 from playwright.async_api import async_playwright, Page, Browser
 import logging
 
+from ...utils.pacer import get_pacer
 from ..items import DouyinVideoItem, create_video_item_from_json
 from ..settings import (
+    BROWSER_CONFIG,
     PLAYWRIGHT_CONFIG,
     RATE_LIMIT_CONFIG,
     DEFAULT_HEADERS,
     EXTRACT_CONFIG
 )
+from .browser_pool import BrowserContextPool
+from .interceptor import ResponseCapture, block_resources
+from ..utils.router_data import is_captcha_page
 
 
 logger = logging.getLogger("douyin.video_spider")
 
+# 翻页时连续未收到作品列表响应的最大次数
+PAGER_MAX_STALLS = 2
+
 
 class DouyinVideoSpider:
     """
@@ -44,12 +52,31 @@ class DouyinVideoSpider:
     
     使用Playwright访问抖音页面，从渲染后的页面中提取视频数据。
     完全绕过API签名限制，模拟真实用户行为。
+    
+    一个浏览器进程内维护多个隔离的上下文（数量为 RATE_LIMIT_CONFIG["max_concurrent"]），
+    并发的爬取调用各自租用一个页面。
+    
+    快速模式下拦截图片、媒体、字体和样式表，直接捕获 aweme/detail、aweme/post
+    接口的JSON，收到数据即返回。
     """
     
-    def __init__(self):
-        """初始化爬虫"""
+    def __init__(self, pool_size: int = None, fast_mode: bool = None):
+        """
+        初始化爬虫
+        
+        Args:
+            pool_size: 上下文池大小，默认且最大为 RATE_LIMIT_CONFIG["max_concurrent"]
+            fast_mode: 是否启用快速模式，默认取 EXTRACT_CONFIG["fast_mode"]
+        """
+        max_concurrent = RATE_LIMIT_CONFIG["max_concurrent"]
+        self.pool_size = min(pool_size or max_concurrent, max_concurrent)
+        self.fast_mode = EXTRACT_CONFIG["fast_mode"] if fast_mode is None else fast_mode
+        
+        # 导航节奏，与HTTP爬虫共享
+        self.pacer = get_pacer("douyin", RATE_LIMIT_CONFIG)
+        
         self.browser: Optional[Browser] = None
-        self.page: Optional[Page] = None
+        self.pool: Optional[BrowserContextPool] = None
         self.playwright = None
         self.stats = {
             "success": 0,
@@ -79,17 +106,22 @@ class DouyinVideoSpider:
                 slow_mo=PLAYWRIGHT_CONFIG["slow_mo"]
             )
             
-            # 创建新页面
-            self.page = await self.browser.new_page(
-                viewport=PLAYWRIGHT_CONFIG["viewport"],
-                user_agent=PLAYWRIGHT_CONFIG["user_agent"],
-                locale=PLAYWRIGHT_CONFIG["locale"],
-                timezone_id=PLAYWRIGHT_CONFIG["timezone"]
+            # 创建上下文池
+            self.pool = BrowserContextPool(
+                self.browser,
+                size=self.pool_size,
+                max_navigations=PLAYWRIGHT_CONFIG["context_max_navigations"],
+                context_options={
+                    "viewport": BROWSER_CONFIG["viewport"],
+                    "user_agent": BROWSER_CONFIG["user_agent"],
+                    "locale": BROWSER_CONFIG["locale"],
+                    "timezone_id": BROWSER_CONFIG["timezone"]
+                },
+                page_timeout=PLAYWRIGHT_CONFIG["timeout"],
+                navigation_timeout=PLAYWRIGHT_CONFIG["navigation_timeout"],
+                setup_page=self._setup_fast_page if self.fast_mode else None
             )
-            
-            # 设置默认超时
-            self.page.set_default_timeout(PLAYWRIGHT_CONFIG["timeout"])
-            self.page.set_default_navigation_timeout(PLAYWRIGHT_CONFIG["navigation_timeout"])
+            await self.pool.start()
             
             logger.info("浏览器启动成功")
             
@@ -102,8 +134,8 @@ class DouyinVideoSpider:
         logger.info("关闭浏览器...")
         
         try:
-            if self.page:
-                await self.page.close()
+            if self.pool:
+                await self.pool.close()
             if self.browser:
                 await self.browser.close()
             if self.playwright:
@@ -128,14 +160,7 @@ class DouyinVideoSpider:
         logger.info(f"开始爬取视频: {url}")
         
         try:
-            # 访问页面
-            await self._navigate_with_retry(url)
-            
-            # 等待视频加载
-            await self._wait_for_video()
-            
-            # 提取JSON数据
-            json_data = await self._extract_json_data()
+            json_data = await self.fetch_video_json(url)
             
             if not json_data:
                 logger.error("无法提取JSON数据")
@@ -159,6 +184,50 @@ class DouyinVideoSpider:
             self.stats["failed"] += 1
             return None
     
+    async def fetch_video_json(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        租用页面打开视频页，返回 aweme 原始JSON
+        
+        Args:
+            url: 视频URL
+            
+        Returns:
+            视频JSON数据，提取失败返回None
+        """
+        async with self.pool.lease() as page:
+            if self.fast_mode:
+                # 直接捕获详情接口JSON
+                data = await self._capture_video_detail(page, url)
+            else:
+                # 访问页面
+                await self._navigate_with_retry(page, url)
+                
+                # 等待视频加载
+                await self._wait_for_video(page)
+                
+                # 提取JSON数据
+                data = await self._extract_json_data(page)
+            
+            if data:
+                self.pacer.success()
+            else:
+                await self._check_captcha(page)
+            return data
+    
+    async def crawl_videos_by_urls(self, urls: List[str]) -> List[Optional[DouyinVideoItem]]:
+        """
+        并发爬取多个视频
+        
+        并发数等于上下文池大小
+        
+        Args:
+            urls: 视频URL列表
+            
+        Returns:
+            与输入顺序一致的视频对象列表，失败项为None
+        """
+        return list(await asyncio.gather(*[self.crawl_video_by_url(url) for url in urls]))
+    
     async def crawl_video_list_by_user(self, user_url: str, max_count: int = 20) -> List[DouyinVideoItem]:
         """
         从创作者主页爬取视频列表
@@ -174,35 +243,7 @@ class DouyinVideoSpider:
         logger.info(f"开始爬取用户视频列表: {user_url}")
         
         try:
-            videos = []
-            
-            # 访问用户主页
-            await self._navigate_with_retry(user_url)
-            
-            # 等待页面加载
-            await self.page.wait_for_selector("div[data-e2e='user-post-list']", timeout=10000)
-            
-            # 滚动加载更多视频
-            scroll_count = 0
-            while len(videos) < max_count and scroll_count < EXTRACT_CONFIG["user_video_max"]:
-                # 提取当前页面的视频数据
-                json_data = await self._extract_json_data()
-                
-                if json_data and "aweme_list" in json_data:
-                    for video_data in json_data["aweme_list"]:
-                        video_item = create_video_item_from_json(video_data)
-                        if video_item and video_item.validate():
-                            videos.append(video_item)
-                            logger.debug(f"提取视频: {video_item.video_id}")
-                            
-                            if len(videos) >= max_count:
-                                break
-                
-                # 滚动到底部加载更多
-                await self._scroll_to_bottom()
-                await asyncio.sleep(2)
-                
-                scroll_count += 1
+            videos = [video async for video in self.iter_video_list_by_user(user_url, max_count)]
             
             self.stats["success"] += 1
             logger.info(f"用户视频列表爬取完成，共 {len(videos)} 个视频")
@@ -213,22 +254,102 @@ class DouyinVideoSpider:
             self.stats["failed"] += 1
             return []
     
-    async def _navigate_with_retry(self, url: str, max_retries: int = 3):
+    async def iter_video_list_by_user(
+        self,
+        user_url: str,
+        max_count: int = 20
+    ) -> AsyncIterator[DouyinVideoItem]:
+        """
+        逐个产出创作者主页的视频（事件驱动翻页）
+        
+        每次滚动后只等待下一个 aweme/post 响应，不做固定延迟；
+        达到 max_count、接口返回 has_more 为假或连续超时未收到响应时结束。
+        
+        Args:
+            user_url: 用户主页URL
+            max_count: 最大视频数量
+            
+        Yields:
+            DouyinVideoItem对象
+        """
+        seen_ids = set()
+        count = 0
+        has_more = True
+        stalls = 0
+        
+        async with self.pool.lease() as page:
+            async with ResponseCapture(page, [EXTRACT_CONFIG["post_api_pattern"]]) as capture:
+                # 访问用户主页
+                await self._navigate_with_retry(
+                    page, user_url,
+                    wait_until="domcontentloaded",
+                    human_delay=not self.fast_mode
+                )
+                
+                while count < max_count and has_more:
+                    # 先消费已捕获的响应，没有时再滚动触发下一页
+                    payload = capture.drain()
+                    if not payload:
+                        await self._scroll_to_end(page)
+                        next_payload = await capture.next(timeout=EXTRACT_CONFIG["capture_timeout"])
+                        if next_payload is None:
+                            stalls += 1
+                            logger.debug(f"等待作品列表响应超时 ({stalls}/{PAGER_MAX_STALLS})")
+                            if stalls >= PAGER_MAX_STALLS:
+                                break
+                            continue
+                        payload = [next_payload]
+                    
+                    stalls = 0
+                    for response in payload:
+                        data = response["data"]
+                        has_more = bool(data.get("has_more"))
+                        
+                        for video_data in data.get("aweme_list") or []:
+                            video_item = create_video_item_from_json(video_data)
+                            if not video_item or not video_item.validate():
+                                continue
+                            if video_item.video_id in seen_ids:
+                                continue
+                            
+                            seen_ids.add(video_item.video_id)
+                            count += 1
+                            logger.debug(f"提取视频: {video_item.video_id}")
+                            yield video_item
+                            
+                            if count >= max_count:
+                                return
+    
+    async def _navigate_with_retry(
+        self,
+        page: Page,
+        url: str,
+        max_retries: int = 3,
+        wait_until: str = "networkidle",
+        human_delay: bool = True
+    ):
         """
         带重试的页面导航
         
         Args:
+            page: 租用的页面
             url: 目标URL
             max_retries: 最大重试次数
+            wait_until: 导航完成条件
+            human_delay: 导航后是否随机延迟模拟人类
         """
         for attempt in range(max_retries):
             try:
                 logger.debug(f"导航到: {url} (尝试 {attempt + 1}/{max_retries})")
                 
-                await self.page.goto(url, wait_until="networkidle", timeout=30000)
+                await self.pacer.wait()
+                response = await page.goto(url, wait_until=wait_until, timeout=30000)
+                if response is not None and response.status != 200:
+                    self.pacer.observe(response.status)
                 
                 # 随机延迟，模拟人类
-                await asyncio.sleep(2 + attempt)
+                if human_delay:
+                    await asyncio.sleep(2 + attempt)
                 
                 return
                 
@@ -240,11 +361,52 @@ class DouyinVideoSpider:
                 else:
                     await asyncio.sleep(5)
     
-    async def _wait_for_video(self):
+    async def _check_captcha(self, page: Page):
+        """提取失败时检查是否落到验证码页，是则放慢节奏"""
+        try:
+            html = await page.content()
+        except Exception as e:
+            logger.debug(f"读取页面内容失败: {e}")
+            return
+        if is_captcha_page(html):
+            logger.warning("检测到验证码页面")
+            self.pacer.blocked("captcha")
+    
+    async def _setup_fast_page(self, page: Page):
+        """快速模式页面初始化：拦截重资源"""
+        await block_resources(page, EXTRACT_CONFIG["blocked_resources"])
+    
+    async def _capture_video_detail(self, page: Page, url: str) -> Optional[Dict[str, Any]]:
+        """
+        快速模式：捕获视频详情接口JSON
+        
+        导航只等到响应开始（commit），收到 aweme/detail 响应即返回；
+        超时未捕获时退回到从页面脚本提取
+        
+        Args:
+            page: 租用的页面
+            url: 视频URL
+            
+        Returns:
+            视频JSON数据
+        """
+        async with ResponseCapture(page, [EXTRACT_CONFIG["detail_api_pattern"]]) as capture:
+            await self._navigate_with_retry(page, url, wait_until="commit", human_delay=False)
+            
+            payload = await capture.next(timeout=EXTRACT_CONFIG["capture_timeout"])
+            if payload and payload["data"].get("aweme_detail"):
+                logger.debug(f"捕获详情接口数据: {payload['url']}")
+                return payload["data"]["aweme_detail"]
+        
+        logger.debug("未捕获到详情接口数据，从页面提取")
+        await page.wait_for_load_state("domcontentloaded")
+        return await self._extract_json_data(page)
+    
+    async def _wait_for_video(self, page: Page):
         """等待视频元素加载"""
         try:
             # 等待视频元素出现
-            await self.page.wait_for_selector(
+            await page.wait_for_selector(
                 PLAYWRIGHT_CONFIG["wait_selector"],
                 timeout=PLAYWRIGHT_CONFIG["video_wait_timeout"]
             )
@@ -257,7 +419,7 @@ class DouyinVideoSpider:
         except Exception as e:
             logger.warning(f"等待视频元素超时: {e}")
     
-    async def _extract_json_data(self) -> Optional[Dict[str, Any]]:
+    async def _extract_json_data(self, page: Page) -> Optional[Dict[str, Any]]:
         """
         从页面提取JSON数据
         
@@ -265,7 +427,7 @@ class DouyinVideoSpider:
         """
         try:
             # 方法1: 从script标签提取
-            script_element = await self.page.query_selector(EXTRACT_CONFIG["json_selector"])
+            script_element = await page.query_selector(EXTRACT_CONFIG["json_selector"])
             
             if script_element:
                 json_str = await script_element.inner_text()
@@ -286,7 +448,7 @@ class DouyinVideoSpider:
                     return data
             
             # 方法2: 从window对象提取
-            window_data = await self.page.evaluate("""
+            window_data = await page.evaluate("""
                 () => {
                     // 尝试从window对象获取数据
                     if (window.__INITIAL_STATE__) {
@@ -310,39 +472,19 @@ class DouyinVideoSpider:
             logger.error(f"提取JSON数据时出错: {e}")
             return None
     
-    async def _scroll_to_bottom(self):
-        """滚动到页面底部"""
+    async def _scroll_to_end(self, page: Page):
+        """直接滚动到页面底部，触发下一页加载"""
         try:
-            # 平滑滚动
-            await self.page.evaluate("""
-                async () => {
-                    await new Promise((resolve) => {
-                        let totalHeight = 0;
-                        const distance = 100;
-                        const timer = setInterval(() => {
-                            const scrollHeight = document.body.scrollHeight;
-                            window.scrollBy(0, distance);
-                            totalHeight += distance;
-                            
-                            if (totalHeight >= scrollHeight) {
-                                clearInterval(timer);
-                                resolve();
-                            }
-                        }, 100);
-                    });
-                }
-            """)
-            
-            logger.debug("滚动到底部完成")
-            
+            await page.evaluate("() => window.scrollTo(0, document.body.scrollHeight)")
         except Exception as e:
             logger.warning(f"滚动失败: {e}")
     
-    async def take_screenshot(self, filename: str = None):
+    async def take_screenshot(self, page: Page, filename: str = None):
         """
         截图（用于调试）
         
         Args:
+            page: 要截图的页面
             filename: 截图文件名
         """
         try:
@@ -350,7 +492,7 @@ class DouyinVideoSpider:
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 filename = f"douyin_screenshot_{timestamp}.png"
             
-            await self.page.screenshot(path=filename)
+            await page.screenshot(path=filename)
             logger.info(f"截图已保存: {filename}")
             
         except Exception as e:
@@ -360,6 +502,8 @@ class DouyinVideoSpider:
         """获取爬虫统计信息"""
         return {
             **self.stats,
+            "pool": self.pool.get_stats() if self.pool else None,
+            "pace": self.pacer.get_stats(),
             "success_rate": (
                 self.stats["success"] / self.stats["total"] * 100
                 if self.stats["total"] > 0 else 0
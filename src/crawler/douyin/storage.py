@@ -0,0 +1,428 @@
+"""
+抖音数据存储
+
+> 💾 爬虫结果入队，按批写入 STORAGE_CONFIG 中启用的存储
+> 开发者: 智宝 (AI助手)
+
+功能:
+- 有界异步队列（PERFORMANCE_CONFIG["max_queue_size"]），队列满时反压爬虫
+- 攒满 batch_size 条或等待 flush_interval 秒后批量写入文件/MongoDB/PostgreSQL
+- TTL缓存记录已写入视频的统计指纹，cache_ttl 内未变化的视频不重复写入
+- 每个存储单独记录失败：写入失败的数据只对该存储保留，下次写入时重试，
+  已写入成功的存储不受影响
+- 队列深度、写入/跳过/失败数量通过指标导出
+"""
+
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from ..utils.cache import MemoryCache
+from ..utils.metrics import PIPELINE_ITEMS, get_registry
+from .items import CONTENT_COLUMNS, DouyinVideoRecord
+from .settings import PERFORMANCE_CONFIG, STORAGE_CONFIG
+
+try:
+    import asyncpg
+except ImportError:
+    asyncpg = None
+
+try:
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from pymongo import UpdateOne
+except ImportError:
+    AsyncIOMotorClient = None
+    UpdateOne = None
+
+logger = logging.getLogger("douyin.storage")
+
+QUEUE_DEPTH = get_registry().gauge(
+    'storage_queue_depth',
+    'Number of items waiting in a storage queue',
+    ('platform',)
+)
+
+# 队列结束标记
+_DONE = object()
+
+# 去重缓存最多记录的视频数
+SKIP_CACHE_SIZE = 100000
+
+# contents 表中的 JSONB 列；asyncpg 默认的 json/jsonb 编码只接受字符串
+JSONB_COLUMNS = ("images", "tags", "topics")
+_JSONB_INDEXES = tuple(CONTENT_COLUMNS.index(column) for column in JSONB_COLUMNS)
+
+# 与 ContentDAO.insert_content 相同的 upsert
+UPSERT_CONTENT_SQL = (
+    f"INSERT INTO contents ({', '.join(CONTENT_COLUMNS)}) "
+    f"VALUES ({', '.join(f'${i}' for i in range(1, len(CONTENT_COLUMNS) + 1))}) "
+    "ON CONFLICT (platform_id, platform_content_id) DO UPDATE SET "
+    "title = EXCLUDED.title, content = EXCLUDED.content, "
+    "view_count = EXCLUDED.view_count, like_count = EXCLUDED.like_count, "
+    "comment_count = EXCLUDED.comment_count, share_count = EXCLUDED.share_count, "
+    "collect_count = EXCLUDED.collect_count, updated_at = CURRENT_TIMESTAMP"
+)
+
+
+def postgres_row(record: DouyinVideoRecord) -> tuple:
+    """contents 表的一行参数，JSONB 列序列化为JSON字符串"""
+    row = list(record.to_row())
+    for index in _JSONB_INDEXES:
+        row[index] = json.dumps(row[index], ensure_ascii=False)
+    return tuple(row)
+
+
+def fingerprint(record: DouyinVideoRecord) -> tuple:
+    """判断视频是否变化的指纹：文案和各项统计"""
+    return (
+        record.desc, record.digg_count, record.comment_count,
+        record.share_count, record.play_count, record.collect_count
+    )
+
+
+class FileSink:
+    """按天写入 JSON Lines 文件"""
+
+    name = "file"
+
+    def __init__(self, file_dir: Path):
+        self.file_dir = Path(file_dir)
+
+    async def open(self):
+        self.file_dir.mkdir(parents=True, exist_ok=True)
+
+    def _append(self, records: List[DouyinVideoRecord]):
+        path = self.file_dir / f"videos_{datetime.now().strftime('%Y%m%d')}.jsonl"
+        lines = [json.dumps(record.to_dict(), ensure_ascii=False) + "\n" for record in records]
+        with open(path, "a", encoding="utf-8") as f:
+            f.writelines(lines)
+
+    async def write(self, records: List[DouyinVideoRecord]):
+        await asyncio.to_thread(self._append, records)
+
+    async def close(self):
+        pass
+
+
+class MongoSink:
+    """按 video_id upsert 到 MongoDB 集合"""
+
+    name = "mongodb"
+
+    def __init__(self, uri: str, database: str, collection: str):
+        self.uri = uri
+        self.database = database
+        self.collection_name = collection
+        self._client = None
+        self._collection = None
+
+    async def open(self):
+        if AsyncIOMotorClient is None:
+            raise ImportError("motor is required for MongoDB storage")
+        self._client = AsyncIOMotorClient(self.uri)
+        self._collection = self._client[self.database][self.collection_name]
+        await self._collection.create_index("video_id", unique=True)
+
+    async def write(self, records: List[DouyinVideoRecord]):
+        await self._collection.bulk_write(
+            [
+                UpdateOne({"video_id": record.video_id}, {"$set": record.to_dict()}, upsert=True)
+                for record in records
+            ],
+            ordered=False
+        )
+
+    async def close(self):
+        if self._client:
+            self._client.close()
+
+
+class PostgresSink:
+    """批量 upsert 到 contents 表"""
+
+    name = "postgres"
+
+    def __init__(self, uri: str):
+        self.uri = uri
+        self._pool = None
+
+    async def open(self):
+        if asyncpg is None:
+            raise ImportError("asyncpg is required for PostgreSQL storage")
+        self._pool = await asyncpg.create_pool(self.uri, min_size=1, max_size=4)
+
+    async def write(self, records: List[DouyinVideoRecord]):
+        async with self._pool.acquire() as conn:
+            await conn.executemany(UPSERT_CONTENT_SQL, [postgres_row(record) for record in records])
+
+    async def close(self):
+        if self._pool:
+            await self._pool.close()
+
+
+def create_sinks(config: Dict[str, Any]) -> List:
+    """根据 STORAGE_CONFIG 创建启用的存储"""
+    sinks = []
+    if config.get("enable_file"):
+        sinks.append(FileSink(config["file_dir"]))
+    if config.get("enable_mongodb"):
+        sinks.append(MongoSink(config["mongodb_uri"], config["mongodb_db"], config["mongodb_collection"]))
+    if config.get("enable_postgres"):
+        sinks.append(PostgresSink(config["postgres_uri"]))
+    return sinks
+
+
+class DouyinStorage:
+    """
+    抖音存储阶段
+
+    用法:
+        storage = DouyinStorage()
+        await storage.start()
+        crawler = DouyinCrawlerEnhanced(storage=storage)
+        ...
+        await storage.close()   # 写入剩余数据
+    """
+
+    def __init__(
+        self,
+        sinks: List = None,
+        performance: Dict[str, Any] = None,
+        storage: Dict[str, Any] = None
+    ):
+        """
+        Args:
+            sinks: 存储列表，默认按 STORAGE_CONFIG 创建
+            performance: 队列配置，默认 PERFORMANCE_CONFIG
+            storage: 存储配置，默认 STORAGE_CONFIG
+        """
+        self.config = {**PERFORMANCE_CONFIG, **(performance or {})}
+        self.sinks = sinks if sinks is not None else create_sinks({**STORAGE_CONFIG, **(storage or {})})
+
+        self.batch_size = self.config["batch_size"]
+        self.flush_interval = self.config["flush_interval"]
+
+        self.skip_cache = (
+            MemoryCache(max_size=SKIP_CACHE_SIZE, ttl=self.config["cache_ttl"])
+            if self.config["enable_cache"] else None
+        )
+
+        self.queue: Optional[asyncio.Queue] = None
+        self._buffer: List[DouyinVideoRecord] = []
+        # 存储名 -> 写入失败待重试的记录
+        self._retry: Dict[str, List[DouyinVideoRecord]] = {}
+        self._worker: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+        self._closed = False
+        self._depth = QUEUE_DEPTH.labels(platform="douyin")
+
+        self.stats = {
+            "queued": 0,
+            "stored": 0,
+            "skipped": 0,
+            "failed": 0,
+            "dropped": 0,
+            "batches": 0,
+            "flush_seconds": 0.0
+        }
+        self.sink_stats: Dict[str, Dict[str, int]] = {}
+
+    async def start(self):
+        """打开存储并启动写入任务；打开失败的存储会被停用"""
+        opened = []
+        for sink in self.sinks:
+            try:
+                await sink.open()
+                opened.append(sink)
+            except Exception as e:
+                logger.error(f"存储 {sink.name} 打开失败，已停用: {e}")
+        self.sinks = opened
+        for sink in self.sinks:
+            self._sink_stats(sink)
+        logger.info(f"抖音存储已启动: {[sink.name for sink in self.sinks]}")
+
+        if self.config["async_processing"]:
+            self.queue = asyncio.Queue(maxsize=self.config["max_queue_size"])
+            self._worker = asyncio.ensure_future(self._run())
+
+    def _unchanged(self, record: DouyinVideoRecord) -> bool:
+        if self.skip_cache is None:
+            return False
+        return self.skip_cache.get(record.video_id) == fingerprint(record)
+
+    async def put(self, record: DouyinVideoRecord):
+        """
+        提交一条视频记录
+
+        未变化的视频直接跳过；异步模式下队列满时等待。
+        """
+        if record is None or not record.video_id:
+            return
+
+        if self._unchanged(record):
+            self.stats["skipped"] += 1
+            PIPELINE_ITEMS.labels(pipeline="douyin_storage", type="video", result="skipped").inc()
+            return
+
+        self.stats["queued"] += 1
+        if self.queue is not None:
+            await self.queue.put(record)
+            self._depth.set(self.queue.qsize())
+            return
+
+        self._buffer.append(record)
+        if len(self._buffer) >= self.batch_size:
+            await self.flush()
+
+    async def put_many(self, records: Iterable[DouyinVideoRecord]):
+        """批量提交"""
+        for record in records:
+            await self.put(record)
+
+    async def put_json(self, data: Dict[str, Any]):
+        """从 aweme 原始JSON构建记录并提交"""
+        await self.put(DouyinVideoRecord.from_json(data))
+
+    async def _run(self):
+        """从队列攒批：满 batch_size 条或等待 flush_interval 秒后写入"""
+        while True:
+            record = await self.queue.get()
+            done = record is _DONE
+            if not done:
+                self._buffer.append(record)
+            deadline = time.monotonic() + self.flush_interval
+
+            while not done and len(self._buffer) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    record = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if record is _DONE:
+                    done = True
+                else:
+                    self._buffer.append(record)
+
+            self._depth.set(self.queue.qsize())
+            await self.flush()
+            if done:
+                return
+
+    def _sink_stats(self, sink) -> Dict[str, int]:
+        """单个存储的写入统计：written 写入成功、failed 写入失败（含重试）、dropped 放弃重试的条数"""
+        return self.sink_stats.setdefault(sink.name, {"written": 0, "failed": 0, "dropped": 0})
+
+    def _pending(self, sink, batch: List[DouyinVideoRecord]) -> List[DouyinVideoRecord]:
+        """该存储本次要写入的记录：上次失败待重试的加上本批（同一视频取最新）"""
+        retry = self._retry.pop(sink.name, None)
+        if not retry:
+            return batch
+        return list({record.video_id: record for record in retry + batch}.values())
+
+    def _keep_for_retry(self, sink, records: List[DouyinVideoRecord]):
+        """保留写入失败的记录等下次重试，超过 max_queue_size 条时丢弃最早的"""
+        limit = self.config["max_queue_size"]
+        if len(records) > limit:
+            self._drop(sink, len(records) - limit)
+            records = records[-limit:]
+        self._retry[sink.name] = records
+
+    def _drop(self, sink, count: int):
+        """放弃重试的记录"""
+        self.stats["dropped"] += count
+        self._sink_stats(sink)["dropped"] += count
+        PIPELINE_ITEMS.labels(pipeline="douyin_storage", type="video", result="dropped").inc(count)
+        logger.error(f"存储 {sink.name} 放弃重试 {count} 条")
+
+    async def flush(self):
+        """把缓冲区写入全部存储，并重试各存储上次失败的记录"""
+        async with self._flush_lock:
+            if not self._buffer and not any(self._retry.values()):
+                return
+
+            # 同一批内重复的视频只保留最新一条
+            batch = list({record.video_id: record for record in self._buffer}.values())
+            self._buffer = []
+
+            writes = [(sink, self._pending(sink, batch)) for sink in self.sinks]
+            writes = [(sink, records) for sink, records in writes if records]
+
+            start = time.monotonic()
+            results = await asyncio.gather(
+                *[sink.write(records) for sink, records in writes],
+                return_exceptions=True
+            )
+            self.stats["flush_seconds"] += time.monotonic() - start
+            if batch:
+                self.stats["batches"] += 1
+
+            failed = False
+            for (sink, records), result in zip(writes, results):
+                sink_stats = self._sink_stats(sink)
+                if isinstance(result, Exception):
+                    failed = True
+                    sink_stats["failed"] += len(records)
+                    logger.error(f"存储 {sink.name} 写入 {len(records)} 条失败，下次重试: {result}")
+                    self._keep_for_retry(sink, records)
+                else:
+                    sink_stats["written"] += len(records)
+
+            if not batch:
+                return
+
+            if failed:
+                self.stats["failed"] += len(batch)
+                PIPELINE_ITEMS.labels(pipeline="douyin_storage", type="video", result="failed").inc(len(batch))
+                return
+
+            # 全部存储写入成功后才记入去重缓存，失败的视频下次还会写入
+            if self.skip_cache is not None:
+                for record in batch:
+                    self.skip_cache.set(record.video_id, fingerprint(record))
+
+            self.stats["stored"] += len(batch)
+            PIPELINE_ITEMS.labels(pipeline="douyin_storage", type="video", result="stored").inc(len(batch))
+            logger.debug(f"批量写入 {len(batch)} 条视频")
+
+    async def close(self):
+        """等待队列写完，关闭存储（可重复调用）"""
+        if self._closed:
+            return
+        self._closed = True
+
+        if self._worker is not None:
+            await self.queue.put(_DONE)
+            await self._worker
+            self._worker = None
+            self._depth.set(0)
+
+        await self.flush()
+
+        # 关闭前再重试一次，仍失败的放弃
+        await self.flush()
+        for sink in self.sinks:
+            records = self._retry.pop(sink.name, None)
+            if records:
+                self._drop(sink, len(records))
+
+        for sink in self.sinks:
+            try:
+                await sink.close()
+            except Exception as e:
+                logger.warning(f"关闭存储 {sink.name} 失败: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取存储统计"""
+        return {
+            **self.stats,
+            "queue_depth": self.queue.qsize() if self.queue is not None else len(self._buffer),
+            "retry_pending": {name: len(records) for name, records in self._retry.items() if records},
+            "sinks": [sink.name for sink in self.sinks],
+            "sink_stats": self.sink_stats
+        }
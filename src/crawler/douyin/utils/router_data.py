@@ -0,0 +1,179 @@
+"""
+抖音页面 _ROUTER_DATA 提取
+
+> ⚡ 定位 window._ROUTER_DATA 并直接解码，不再对整页HTML跑正则
+> 开发者: 智宝 (AI助手)
+
+功能:
+- str.find 定位标记，从第一个 { 开始用 JSONDecoder.raw_decode 解码
+- 安装了 orjson 时优先用 orjson 解析 <script> 内的片段
+- 按页面布局缓存 loaderData 中命中的键，下次直接取
+"""
+
+import json
+import logging
+from typing import Any, Callable, Dict, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger("douyin.router_data")
+
+ROUTER_DATA_MARKER = "window._ROUTER_DATA"
+SCRIPT_END = "</script>"
+
+# 验证码/风控中间页的特征
+CAPTCHA_MARKERS = ("verify.zijieapi.com", "captcha", "验证码中间页", "verifycenter")
+
+_decoder = json.JSONDecoder()
+
+
+def extract_router_data(html: str) -> Optional[Dict[str, Any]]:
+    """
+    从页面HTML中解析 window._ROUTER_DATA
+
+    Args:
+        html: 页面HTML
+
+    Returns:
+        _ROUTER_DATA 对象，页面中没有或解析失败返回None
+    """
+    marker = html.find(ROUTER_DATA_MARKER)
+    if marker < 0:
+        return None
+
+    start = html.find("{", marker + len(ROUTER_DATA_MARKER))
+    if start < 0:
+        return None
+
+    # 标记和 { 之间只允许出现空白和 =
+    if html[marker + len(ROUTER_DATA_MARKER):start].strip() != "=":
+        return None
+
+    if orjson is not None:
+        end = html.find(SCRIPT_END, start)
+        if end > 0:
+            try:
+                return orjson.loads(html[start:end].rstrip().rstrip(";"))
+            except orjson.JSONDecodeError:
+                # 片段后面还有其它语句，交给 raw_decode
+                pass
+
+    try:
+        data, _ = _decoder.raw_decode(html, start)
+    except ValueError as e:
+        logger.debug(f"解析 _ROUTER_DATA 失败: {e}")
+        return None
+
+    return data if isinstance(data, dict) else None
+
+
+def is_captcha_page(html: str) -> bool:
+    """页面是否为验证码/风控中间页（没有 _ROUTER_DATA 且含验证码特征）"""
+    if ROUTER_DATA_MARKER in html:
+        return False
+    head = html[:20000]
+    return any(marker in head for marker in CAPTCHA_MARKERS)
+
+
+def _pick_video(entry: Dict) -> Optional[Dict]:
+    info_res = entry.get("videoInfoRes")
+    if isinstance(info_res, dict) and info_res.get("item_list"):
+        return info_res["item_list"][0]
+    if entry.get("item_list"):
+        return entry["item_list"][0]
+    return None
+
+
+def _pick_user(entry: Dict) -> Optional[Dict]:
+    if "user" in entry:
+        return entry["user"]
+    if "userInfo" in entry:
+        return entry["userInfo"]
+    return None
+
+
+def _is_video_key(key: str) -> bool:
+    return "video" in key.lower() and key != "video_layout"
+
+
+def _is_user_key(key: str) -> bool:
+    return "user" in key.lower()
+
+
+class RouterDataExtractor:
+    """
+    _ROUTER_DATA 提取器
+
+    loaderData 的键随页面布局变化（如 "video_(id)/page"、"user_(id)/page"），
+    同一种布局第一次扫描命中后记住键名，后续页面直接按键读取，
+    读不到时再退回全量扫描。
+
+    用法:
+        extractor = RouterDataExtractor()
+        aweme = extractor.extract_video(html)
+        user = extractor.extract_user(html)
+    """
+
+    def __init__(self):
+        self._layout_keys: Dict[str, str] = {}
+        self.stats = {
+            "pages": 0,
+            "missing": 0,
+            "key_hits": 0,
+            "key_scans": 0
+        }
+
+    def extract_video(self, html: str) -> Optional[Dict]:
+        """提取视频页的 aweme 数据"""
+        return self._extract(html, "video", _is_video_key, _pick_video)
+
+    def extract_user(self, html: str) -> Optional[Dict]:
+        """提取用户页的用户数据"""
+        return self._extract(html, "user", _is_user_key, _pick_user)
+
+    def _extract(
+        self,
+        html: str,
+        layout: str,
+        key_filter: Callable[[str], bool],
+        picker: Callable[[Dict], Optional[Dict]]
+    ) -> Optional[Dict]:
+        self.stats["pages"] += 1
+
+        router_data = extract_router_data(html)
+        if router_data is None:
+            self.stats["missing"] += 1
+            return None
+
+        loader_data = router_data.get("loaderData") or {}
+
+        cached_key = self._layout_keys.get(layout)
+        if cached_key is not None:
+            entry = loader_data.get(cached_key)
+            if isinstance(entry, dict):
+                result = picker(entry)
+                if result is not None:
+                    self.stats["key_hits"] += 1
+                    return result
+
+        self.stats["key_scans"] += 1
+        for key, entry in loader_data.items():
+            if not key_filter(key) or not isinstance(entry, dict):
+                continue
+            result = picker(entry)
+            if result is not None:
+                self._layout_keys[layout] = key
+                return result
+
+        return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取提取统计"""
+        return {
+            **self.stats,
+            "layout_keys": dict(self._layout_keys),
+            "backend": "orjson" if orjson is not None else "json"
+        }
@@ -0,0 +1,96 @@
+"""
+B站UP主更新监控单元测试
+"""
+
+import pytest
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+
+from src.crawler.bilibili.monitor import CursorStore, UserUpdateMonitor
+
+
+class FakeUserSpider:
+    """按预设页面返回投稿列表的用户爬虫"""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.calls = []
+
+    async def fetch_user_videos_page(self, mid, page=1, page_size=30, etag=None, last_modified=None):
+        self.calls.append((mid, page, etag))
+        if etag and etag == self.pages.get('etag'):
+            return {'status': 304, 'data': None, 'etag': etag, 'last_modified': None}
+        vlist = self.pages['videos'][(page - 1) * page_size:page * page_size]
+        return {
+            'status': 200,
+            'data': {'list': {'vlist': vlist}},
+            'etag': self.pages.get('etag'),
+            'last_modified': None
+        }
+
+    def _parse_user_videos(self, data, mid):
+        return [{'aid': v['aid'], 'mid': mid} for v in data['list']['vlist']]
+
+
+def make_videos(aids):
+    return [{'aid': aid, 'created': 1700000000 + aid} for aid in sorted(aids, reverse=True)]
+
+
+class TestUserUpdateMonitor:
+    """UP主更新监控测试类"""
+
+    @pytest.fixture
+    def store(self, tmp_path):
+        return CursorStore(str(tmp_path / 'cursors.json'))
+
+    @pytest.mark.asyncio
+    async def test_first_check_only_sets_cursor(self, store):
+        """测试首次检查只建立游标"""
+        spider = FakeUserSpider({'videos': make_videos(range(1, 11))})
+        monitor = UserUpdateMonitor(spider, store, page_size=5)
+
+        result = await monitor.check_user('1')
+
+        assert result['new_videos'] == []
+        assert store.get('1')['last_aid'] == 10
+        assert len(spider.calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_new_videos_stop_at_known_cursor(self, store):
+        """测试只返回游标之后的新视频"""
+        spider = FakeUserSpider({'videos': make_videos(range(1, 11))})
+        monitor = UserUpdateMonitor(spider, store, page_size=5)
+        await monitor.check_user('1')
+
+        spider.pages['videos'] = make_videos(range(1, 14))
+        result = await monitor.check_user('1')
+
+        assert [v['aid'] for v in result['new_videos']] == [13, 12, 11]
+        assert store.get('1')['last_aid'] == 13
+        assert len(spider.calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_not_modified(self, store):
+        """测试304时不解析数据"""
+        spider = FakeUserSpider({'videos': make_videos(range(1, 4)), 'etag': 'W/"abc"'})
+        monitor = UserUpdateMonitor(spider, store)
+        await monitor.check_user('1')
+
+        result = await monitor.check_user('1')
+
+        assert result['changed'] is False
+        assert spider.calls[-1][2] == 'W/"abc"'
+        assert monitor.get_stats()['not_modified'] == 1
+
+    @pytest.mark.asyncio
+    async def test_cursor_persisted(self, store, tmp_path):
+        """测试游标持久化"""
+        spider = FakeUserSpider({'videos': make_videos(range(1, 4))})
+        monitor = UserUpdateMonitor(spider, store)
+        await monitor.check_users(['1', '2'])
+
+        reloaded = CursorStore(str(tmp_path / 'cursors.json'))
+        assert reloaded.get('1')['last_aid'] == 3
+        assert '2' in reloaded
@@ -0,0 +1,168 @@
+"""
+B站数据管道批量处理单元测试
+"""
+
+import json
+import time
+
+import pytest
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+
+from src.crawler.bilibili.pipelines import (
+    BATCH_STORAGE_DIR, COMMENT_MAX_LENGTH, DANMAKU_MAX_LENGTH, BilibiliPipeline
+)
+
+
+VIDEO_ID = 'BV1xx411c7mD'
+
+
+def danmaku(danmaku_id, content='弹幕', **fields):
+    return {'danmaku_id': danmaku_id, 'content': content, 'video_id': VIDEO_ID, **fields}
+
+
+def comment(comment_id, content='评论', **fields):
+    return {
+        'comment_id': comment_id, 'content': content, 'author': 'up',
+        'video_id': VIDEO_ID, **fields
+    }
+
+
+def read_batch(pipeline, storage_dir):
+    batch_file = pipeline.storage_path / storage_dir / BATCH_STORAGE_DIR / f'{VIDEO_ID}.jsonl'
+    with open(batch_file, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+@pytest.fixture
+def pipeline(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    pipeline = BilibiliPipeline()
+    pipeline.storage_path = tmp_path / 'bilibili'
+    return pipeline
+
+
+class TestBilibiliPipelineBatch:
+    """批量处理测试类"""
+
+    def test_text_cleaning_matches_clean_text(self, pipeline):
+        """测试整列清洗与逐条的 _clean_text 结果一致"""
+        texts = ['  普通弹幕  ', 'a\x00b\x1fc', 'x   y\tz\n', '　全角　空格', 'ok', 123, None]
+        rows = [danmaku(f'd{index}', text) for index, text in enumerate(texts)]
+
+        pipeline._clean_danmaku_columns(rows)
+
+        assert [row['content'] for row in rows] == [pipeline._clean_text(text) for text in texts]
+
+    def test_number_and_time_cleaning(self, pipeline):
+        """测试数值和时间列的清洗与逐条处理一致"""
+        rows = [
+            comment('c1', likes='12', rcount=None, ctime=1700000000),
+            comment('c2', likes=3.7, rcount='bad', ctime=''),
+        ]
+
+        pipeline._clean_comment_columns(rows)
+
+        assert [(row['likes'], row['rcount']) for row in rows] == [(12, 0), (3, 0)]
+        assert rows[0]['ctime'] == pipeline._clean_datetime(1700000000)
+        assert rows[1]['ctime'] == ''
+
+    def test_validation_rejects_and_truncates(self, pipeline):
+        """测试缺少必填字段的记为无效，超长内容被截断"""
+        result = pipeline.process_danmaku_batch([
+            danmaku('d1', 'x' * (DANMAKU_MAX_LENGTH + 20)),
+            danmaku('d2', '   '),
+            danmaku('', 'no id'),
+            {'danmaku_id': 'd3', 'content': 'no video'},
+        ])
+
+        assert result == {'total': 4, 'processed': 1, 'invalid': 3, 'duplicates': 0}
+        stored = read_batch(pipeline, 'danmakus')
+        assert [row['danmaku_id'] for row in stored] == ['d1']
+        assert len(stored[0]['content']) == DANMAKU_MAX_LENGTH
+        assert pipeline.error_count == 3
+
+    def test_comment_validation(self, pipeline):
+        """测试评论缺少作者时无效，超长内容按评论上限截断"""
+        result = pipeline.process_comment_batch([
+            comment('c1', 'y' * (COMMENT_MAX_LENGTH + 1)),
+            comment('c2', author=''),
+        ])
+
+        assert result['processed'] == 1 and result['invalid'] == 1
+        assert len(read_batch(pipeline, 'comments')[0]['content']) == COMMENT_MAX_LENGTH
+
+    def test_dedup_across_batches(self, pipeline):
+        """测试同一视频的两批数据去重，重新创建管道后仍按文件中的ID去重"""
+        first = pipeline.process_danmaku_batch([danmaku('d1'), danmaku('d2'), danmaku('d2')])
+        second = pipeline.process_danmaku_batch([danmaku('d2'), danmaku('d3')])
+
+        assert (first['processed'], first['duplicates']) == (2, 1)
+        assert (second['processed'], second['duplicates']) == (1, 1)
+
+        reopened = BilibiliPipeline()
+        reopened.storage_path = pipeline.storage_path
+        third = reopened.process_danmaku_batch([danmaku('d1'), danmaku('d4')])
+
+        assert (third['processed'], third['duplicates']) == (1, 1)
+        assert [row['danmaku_id'] for row in read_batch(pipeline, 'danmakus')] == ['d1', 'd2', 'd3', 'd4']
+
+    def test_batches_stored_apart_from_items(self, pipeline):
+        """测试JSONL写入单独的子目录，已逐条存储的数据不再重复写入"""
+        pipeline._store_comment_data(comment('c1'))
+
+        result = pipeline.process_comment_batch([comment('c1'), comment('c2')])
+
+        assert (result['processed'], result['duplicates']) == (1, 1)
+        assert [row['comment_id'] for row in read_batch(pipeline, 'comments')] == ['c2']
+        comment_dir = pipeline.storage_path / 'comments'
+        assert sorted(path.name for path in comment_dir.glob('*.json*')) == ['c1.json']
+
+    def test_clear_data_removes_batches(self, pipeline):
+        """测试清理数据时一并删除批量文件和去重索引"""
+        pipeline.process_danmaku_batch([danmaku('d1')])
+        pipeline.clear_data('danmakus')
+
+        result = pipeline.process_danmaku_batch([danmaku('d1')])
+        assert result['processed'] == 1
+        assert len(read_batch(pipeline, 'danmakus')) == 1
+
+    def test_item_dir_listed_once(self, pipeline, monkeypatch):
+        """测试去重只列一次逐条存储的目录，不逐行检查文件"""
+        for index in range(3):
+            pipeline._store_danmaku_data(danmaku(f'd{index}'))
+
+        scans, stats = [], []
+        real_scandir = os.scandir
+        path_type = type(pipeline.storage_path)
+        real_exists = path_type.exists
+        monkeypatch.setattr(os, 'scandir', lambda path: scans.append(path) or real_scandir(path))
+        monkeypatch.setattr(path_type, 'exists', lambda path: stats.append(path) or real_exists(path))
+
+        result = pipeline.process_danmaku_batch([danmaku(f'd{index}') for index in range(1000)])
+
+        assert (result['processed'], result['duplicates']) == (997, 3)
+        assert len(scans) == 1
+        assert len(stats) < 10
+
+    def test_100k_danmaku_under_a_second(self, pipeline):
+        """测试单个视频10万条弹幕批量处理在1秒内完成"""
+        for index in range(1000):
+            pipeline._store_danmaku_data(danmaku(f'x{index}'))
+        rows = [
+            danmaku(
+                str(10 ** 15 + index), f'弹幕内容 {index % 500}',
+                time=index * 0.05, mode=1, fontsize=25, color=16777215, pool=0,
+                send_time=1700000000 + index // 20
+            )
+            for index in range(100000)
+        ]
+
+        start = time.perf_counter()
+        result = pipeline.process_danmaku_batch(rows)
+        elapsed = time.perf_counter() - start
+
+        assert result['processed'] == 100000
+        assert elapsed < 1.0, f'100k danmaku took {elapsed:.2f}s'
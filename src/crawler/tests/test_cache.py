@@ -0,0 +1,113 @@
+"""
+响应缓存单元测试
+"""
+
+import asyncio
+
+import pytest
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.cache import MemoryCache, FileCache, ResponseCache, create_cache
+
+
+class TestMemoryCache:
+    """内存缓存测试类"""
+
+    def test_lru_eviction(self):
+        """测试超过容量时淘汰最久未使用的键"""
+        cache = ResponseCache(MemoryCache(max_size=2, ttl=60))
+        cache.set('a', 1)
+        cache.set('b', 2)
+        assert cache.get('a') == 1
+        cache.set('c', 3)
+
+        assert cache.get('b') is None
+        assert cache.get('a') == 1
+        assert cache.get('c') == 3
+
+    def test_ttl_expiry(self):
+        """测试过期"""
+        cache = ResponseCache(MemoryCache(max_size=10, ttl=60))
+        cache.set('a', 1, ttl=-1)
+        assert cache.get('a') is None
+
+
+class TestFileCache:
+    """磁盘缓存测试类"""
+
+    def test_roundtrip_and_expiry(self, tmp_path):
+        """测试写入读取和过期"""
+        backend = FileCache(cache_dir=str(tmp_path), ttl=60)
+        cache = ResponseCache(backend)
+        cache.set('user_1', {'name': '测试'})
+        cache.set('user_2', {'name': 'old'}, ttl=-1)
+
+        assert cache.get('user_1') == {'name': '测试'}
+        assert cache.get('user_2') is None
+        assert len(backend) == 1
+
+
+class TestResponseCache:
+    """缓存前端测试类"""
+
+    def test_key_templates(self):
+        """测试键模板"""
+        cache = create_cache({
+            'type': 'memory',
+            'cache_keys': {'user_info': 'user_{}'}
+        })
+        assert cache.key('user_info', 42) == 'user_42'
+        assert cache.key('unknown', 'x') == 'unknown_x'
+
+    def test_disabled(self):
+        """测试未启用缓存"""
+        assert create_cache({'enabled': False}) is None
+
+    @pytest.mark.asyncio
+    async def test_get_or_fetch_single_flight(self):
+        """测试并发请求同一个键只抓取一次"""
+        cache = ResponseCache(MemoryCache(), name='test')
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {'mid': 1}
+
+        results = await asyncio.gather(*[cache.get_or_fetch('user_1', fetch) for _ in range(5)])
+        assert results == [{'mid': 1}] * 5
+        assert calls == 1
+
+        assert await cache.get_or_fetch('user_1', fetch) == {'mid': 1}
+        assert calls == 1
+
+        stats = cache.get_stats()
+        assert stats['misses'] == 1
+        assert stats['coalesced'] == 4
+        assert stats['hits'] == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_fetch_not_cached(self):
+        """测试抓取失败不写入缓存，并把异常传给所有等待者"""
+        cache = ResponseCache(MemoryCache(), name='test')
+
+        async def fetch_none():
+            return None
+
+        assert await cache.get_or_fetch('k', fetch_none) is None
+        assert cache.get('k', 'missing') == 'missing'
+
+        async def fetch_error():
+            await asyncio.sleep(0.01)
+            raise RuntimeError('boom')
+
+        results = await asyncio.gather(
+            cache.get_or_fetch('k', fetch_error),
+            cache.get_or_fetch('k', fetch_error),
+            return_exceptions=True
+        )
+        assert all(isinstance(r, RuntimeError) for r in results)
@@ -0,0 +1,123 @@
+"""
+并发评论爬取单元测试
+"""
+
+import asyncio
+
+import pytest
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.comment_crawler import CommentCrawler, CommentPage
+
+
+class FakeCommentApi:
+    """模拟评论接口：pages 页一级评论，每页 per_page 条，每条 replies 条回复"""
+
+    def __init__(self, pages=5, per_page=20, replies=0, reply_page=10, delay=0.0):
+        self.pages = pages
+        self.per_page = per_page
+        self.replies = replies
+        self.reply_page = reply_page
+        self.delay = delay
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+
+    async def _enter(self):
+        self.calls += 1
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(self.delay)
+        self.active -= 1
+
+    async def fetch_page(self, cursor):
+        await self._enter()
+        start = cursor // self.per_page
+        comments = [
+            {'platform_comment_id': f'c{i}', 'like_count': 1000 - i, 'reply_count': self.replies}
+            for i in range(cursor, cursor + self.per_page)
+        ]
+        return CommentPage(
+            comments=comments,
+            cursor=cursor + self.per_page,
+            has_more=start + 1 < self.pages,
+            threads=[(c, 0) for c in comments if c['reply_count']]
+        )
+
+    async def fetch_replies(self, comment, cursor):
+        await self._enter()
+        end = min(cursor + self.reply_page, self.replies)
+        replies = [
+            {'platform_comment_id': f"{comment['platform_comment_id']}-r{i}", 'like_count': 0,
+             'parent_comment_id': comment['platform_comment_id']}
+            for i in range(cursor, end)
+        ]
+        return CommentPage(comments=replies, cursor=end, has_more=end < self.replies)
+
+
+class TestCommentCrawler:
+    """评论爬取器测试类"""
+
+    @pytest.mark.asyncio
+    async def test_pages_and_replies(self):
+        """测试翻页并展开全部回复"""
+        api = FakeCommentApi(pages=3, per_page=5, replies=12)
+        crawler = CommentCrawler(api.fetch_page, api.fetch_replies, budget=asyncio.Semaphore(4))
+        results = await crawler.crawl(initial_cursor=0)
+
+        top_level = [c for c in results if 'parent_comment_id' not in c]
+        replies = [c for c in results if 'parent_comment_id' in c]
+        assert len(top_level) == 15
+        assert len(replies) == 15 * 12
+        assert len({c['platform_comment_id'] for c in results}) == len(results)
+        assert crawler.get_stats()['threads'] == 15
+
+    @pytest.mark.asyncio
+    async def test_budget_limits_concurrency(self):
+        """测试并发请求数不超过预算"""
+        api = FakeCommentApi(pages=4, per_page=10, replies=5, delay=0.001)
+        crawler = CommentCrawler(api.fetch_page, api.fetch_replies, budget=asyncio.Semaphore(3))
+        await crawler.crawl(initial_cursor=0)
+        assert 1 < api.max_active <= 3
+
+    @pytest.mark.asyncio
+    async def test_limit_and_sink(self):
+        """测试数量上限和流式输出"""
+        api = FakeCommentApi(pages=100, per_page=20)
+        batches = []
+        crawler = CommentCrawler(api.fetch_page, budget=asyncio.Semaphore(2))
+        results = await crawler.crawl(initial_cursor=0, limit=50, sink=batches.append)
+
+        assert len(results) == 50
+        assert [len(b) for b in batches] == [20, 20, 10]
+        assert api.calls < 10
+
+    @pytest.mark.asyncio
+    async def test_top_n_early_stop(self):
+        """测试Top-N排名稳定后提前停止"""
+        api = FakeCommentApi(pages=100, per_page=20, replies=3)
+        crawler = CommentCrawler(api.fetch_page, api.fetch_replies, budget=asyncio.Semaphore(4))
+        top = await crawler.crawl(initial_cursor=0, top_n=10, stale_pages=2)
+
+        assert [c['like_count'] for c in top] == list(range(1000, 990, -1))
+        assert crawler.get_stats()['pages'] == 3
+        # 只展开进入Top-N的楼层
+        assert crawler.get_stats()['threads'] == 10
+
+    @pytest.mark.asyncio
+    async def test_fetch_error_stops_thread(self):
+        """测试请求异常不影响其它楼层"""
+        api = FakeCommentApi(pages=1, per_page=3, replies=2)
+
+        async def flaky_replies(comment, cursor):
+            if comment['platform_comment_id'] == 'c1':
+                raise RuntimeError('boom')
+            return await api.fetch_replies(comment, cursor)
+
+        crawler = CommentCrawler(api.fetch_page, flaky_replies, budget=asyncio.Semaphore(2))
+        results = await crawler.crawl(initial_cursor=0)
+        assert len(results) == 3 + 2 * 2
+        assert crawler.get_stats()['errors'] == 1
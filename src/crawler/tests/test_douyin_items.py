@@ -0,0 +1,82 @@
+"""
+抖音紧凑记录单元测试
+"""
+
+import dataclasses
+
+import pytest
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from douyin.items import (
+    CONTENT_COLUMNS, DouyinCommentRecord, DouyinVideoRecord, create_video_item_from_json
+)
+
+AWEME = {
+    'aweme_id': 7300000000000000001,
+    'desc': '测试视频 #美食',
+    'create_time': 1700000000,
+    'statistics': {'digg_count': 10, 'comment_count': 2, 'share_count': 1, 'play_count': 100, 'collect_count': 3},
+    'author': {'uid': 42, 'nickname': '作者', 'avatar_thumb': {'url_list': ['https://a/1.jpeg']}},
+    'video': {'play_addr': {'url_list': ['https://v/1.mp4']}, 'cover': {'url_list': []}, 'duration': 15000},
+    'music': None,
+    'text_extra': [{'hashtag_name': '美食'}, {'user_id': '1'}],
+    'cha_list': [{'cha_name': '美食挑战'}],
+}
+
+
+class TestDouyinVideoRecord:
+    """视频记录测试类"""
+
+    def test_from_json(self):
+        """测试构建并与旧模型一致"""
+        record = DouyinVideoRecord.from_json(AWEME)
+        item = create_video_item_from_json({**AWEME, 'music': {}, 'video': {**AWEME['video'], 'cover': {}}})
+
+        assert record.video_id == '7300000000000000001'
+        assert record.digg_count == item.statistics.digg_count
+        assert record.author_avatar == item.author.avatar_thumb
+        assert record.play_addr == item.video.play_addr
+        assert record.cover == ''
+        assert record.tags == ('美食',)
+        assert record.topics == ('美食挑战',)
+        assert DouyinVideoRecord.from_json({'desc': 'x'}) is None
+
+    def test_slots_and_frozen(self):
+        """测试没有 __dict__ 且不可修改"""
+        record = DouyinVideoRecord.from_json(AWEME)
+        assert not hasattr(record, '__dict__')
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            record.digg_count = 1
+        assert dataclasses.replace(record, digg_count=1).digg_count == 1
+
+    def test_to_row(self):
+        """测试按 contents 表列顺序输出"""
+        row = dict(zip(CONTENT_COLUMNS, DouyinVideoRecord.from_json(AWEME).to_row(content_id='uuid')))
+
+        assert len(row) == len(CONTENT_COLUMNS)
+        assert row['id'] == 'uuid'
+        assert row['platform_content_id'] == '7300000000000000001'
+        assert row['content_type'] == 'video'
+        assert row['view_count'] == 100
+        assert row['like_count'] == 10
+        assert row['tags'] == ['美食']
+        assert row['url'] == 'https://www.douyin.com/video/7300000000000000001'
+        assert row['published_at'].year == 2023
+        assert row['status'] == 'active'
+
+
+class TestDouyinCommentRecord:
+    """评论记录测试类"""
+
+    def test_from_json(self):
+        """测试构建"""
+        record = DouyinCommentRecord.from_json({
+            'cid': 1, 'aweme_id': 2, 'text': '好', 'reply_id': '0',
+            'user': {'uid': 3, 'nickname': 'u', 'avatar_thumb': {'url_list': ['https://a']}}
+        })
+        assert record.comment_id == '1'
+        assert record.reply_to_comment_id == ''
+        assert record.to_dict()['user_avatar'] == 'https://a'
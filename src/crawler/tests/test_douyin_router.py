@@ -0,0 +1,145 @@
+"""
+抖音爬取路由单元测试
+"""
+
+import asyncio
+
+import pytest
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+
+from src.crawler.douyin.router import DouyinRouter
+
+
+def aweme(video_id):
+    return {'aweme_id': video_id, 'desc': f'video {video_id}', 'statistics': {'digg_count': 1}}
+
+
+class FakeHttpCrawler:
+    """按预设结果返回的HTTP路径"""
+
+    def __init__(self, ok=(), blocked=()):
+        self.ok = set(ok)
+        self.blocked = set(blocked)
+        self.calls = []
+        self.closed = False
+
+    async def fetch_video_json(self, video_id, url):
+        self.calls.append(video_id)
+        await asyncio.sleep(0)
+        if video_id in self.ok:
+            return aweme(video_id), 'ok'
+        return None, 'blocked' if video_id in self.blocked else 'failed'
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeSpider:
+    """浏览器路径，记录每次请求；empty 中的ID返回没有 aweme 的页面数据"""
+
+    def __init__(self, empty=()):
+        self.empty = set(empty)
+        self.urls = []
+        self.started = False
+        self.closed = False
+
+    async def start(self):
+        self.started = True
+
+    async def fetch_video_json(self, url):
+        self.urls.append(url)
+        video_id = url.rsplit('/', 1)[-1]
+        if video_id in self.empty:
+            return {'status_code': 0}
+        return aweme(video_id)
+
+    async def close(self):
+        self.closed = True
+
+
+def make_router(http, empty=(), **config):
+    spiders = []
+
+    def factory():
+        spider = FakeSpider(empty)
+        spiders.append(spider)
+        return spider
+
+    config = {'escalation_wait': 0.01, 'http_concurrency': 4, **config}
+    return DouyinRouter(http_crawler=http, spider_factory=factory, config=config), spiders
+
+
+class TestDouyinRouter:
+    """抖音路由测试类"""
+
+    @pytest.mark.asyncio
+    async def test_failed_ids_escalated_in_batches(self):
+        """测试HTTP失败的ID攒批交给同一个浏览器"""
+        http = FakeHttpCrawler(ok={'a'}, blocked={'b'})
+        router, spiders = make_router(http, escalation_batch=2)
+
+        records = await router.crawl_videos(['a', 'b', 'c', 'd'])
+        await router.close()
+
+        assert {video_id: record.video_id for video_id, record in records.items()} == {
+            'a': 'a', 'b': 'b', 'c': 'c', 'd': 'd'
+        }
+        assert len(spiders) == 1 and spiders[0].closed
+        assert sorted(url.rsplit('/', 1)[-1] for url in spiders[0].urls) == ['b', 'c', 'd']
+
+        report = router.get_cost_report()
+        assert report['http_requests'] == 4
+        assert report['http_blocked'] == 1
+        assert report['escalations'] == 3
+        assert report['browser_requests'] == 3
+        assert report['browser_batches'] == 2
+        assert report['browser_share'] == 3 / 7
+        assert http.closed
+
+    @pytest.mark.asyncio
+    async def test_browser_not_started_when_http_succeeds(self):
+        """测试HTTP全部成功时不启动浏览器"""
+        router, spiders = make_router(FakeHttpCrawler(ok={'a', 'b'}))
+
+        await router.crawl_videos(['a', 'b'])
+        await router.close()
+
+        assert spiders == []
+        assert router.get_cost_report()['browser_requests'] == 0
+
+    @pytest.mark.asyncio
+    async def test_low_http_score_skips_http_and_probes(self):
+        """测试HTTP成功率过低后直接走浏览器，每 probe_every 次仍试探HTTP"""
+        http = FakeHttpCrawler()
+        router, _ = make_router(
+            http, http_concurrency=1, escalation_batch=1,
+            score_decay=0.5, min_http_score=0.2, probe_every=3
+        )
+
+        for index in range(9):
+            await router.crawl_video(f'v{index}')
+        await router.close()
+
+        # 两次失败后成功率降到 0.25，第三次降到 0.125 之后开始跳过
+        assert http.calls == ['v0', 'v1', 'v2', 'v5', 'v8']
+        report = router.get_cost_report()
+        assert report['direct_to_browser'] == 4
+        assert report['escalations'] == 5
+        assert report['scores']['video:http']['samples'] == 5
+        assert report['scores']['video:browser']['success_rate'] == 1.0
+
+    @pytest.mark.asyncio
+    async def test_browser_result_without_aweme_is_failure(self):
+        """测试浏览器拿到没有 aweme 数据的页面时记为失败"""
+        router, _ = make_router(FakeHttpCrawler(), empty={'x'}, escalation_batch=1, score_decay=0.5)
+
+        assert await router.crawl_video('x') is None
+        assert (await router.crawl_video('y')).video_id == 'y'
+        await router.close()
+
+        score = router.get_cost_report()['scores']['video:browser']
+        # 1.0 -> 失败 0.5 -> 成功 0.75
+        assert score == {'success_rate': 0.75, 'samples': 2}
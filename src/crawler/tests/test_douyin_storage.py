@@ -0,0 +1,191 @@
+"""
+抖音存储阶段单元测试
+"""
+
+import asyncio
+import dataclasses
+import json
+
+import pytest
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+
+from src.crawler.douyin.items import CONTENT_COLUMNS, DouyinVideoRecord
+from src.crawler.douyin.storage import JSONB_COLUMNS, DouyinStorage, FileSink, postgres_row
+
+
+class ListSink:
+    """记录每次写入的批次"""
+
+    name = 'list'
+
+    def __init__(self, fail=False, name='list'):
+        self.batches = []
+        self.fail = fail
+        self.name = name
+        self.closed = False
+
+    async def open(self):
+        pass
+
+    async def write(self, records):
+        if self.fail:
+            raise RuntimeError('write failed')
+        self.batches.append([record.video_id for record in records])
+
+    async def close(self):
+        self.closed = True
+
+
+def make_record(video_id, digg_count=0):
+    return DouyinVideoRecord(video_id=video_id, desc='视频', digg_count=digg_count)
+
+
+def config(**overrides):
+    return {
+        'enable_cache': True,
+        'cache_ttl': 3600,
+        'batch_size': 3,
+        'async_processing': True,
+        'max_queue_size': 10,
+        'flush_interval': 0.05,
+        **overrides
+    }
+
+
+class TestDouyinStorage:
+    """存储阶段测试类"""
+
+    @pytest.mark.asyncio
+    async def test_flushes_full_batches_and_remainder(self):
+        """测试满批写入，关闭时写入剩余数据"""
+        sink = ListSink()
+        storage = DouyinStorage(sinks=[sink], performance=config())
+        await storage.start()
+
+        await storage.put_many(make_record(str(i)) for i in range(7))
+        await storage.close()
+
+        assert [len(batch) for batch in sink.batches] == [3, 3, 1]
+        assert storage.get_stats()['stored'] == 7
+        assert sink.closed
+
+    @pytest.mark.asyncio
+    async def test_flush_interval_writes_partial_batch(self):
+        """测试不满一批时超时写入"""
+        sink = ListSink()
+        storage = DouyinStorage(sinks=[sink], performance=config())
+        await storage.start()
+
+        await storage.put(make_record('1'))
+        await asyncio.sleep(0.15)
+        assert sink.batches == [['1']]
+        await storage.close()
+
+    @pytest.mark.asyncio
+    async def test_unchanged_videos_are_skipped(self):
+        """测试统计未变化的视频不重复写入，变化后重新写入"""
+        sink = ListSink()
+        storage = DouyinStorage(sinks=[sink], performance=config(async_processing=False, batch_size=1))
+        await storage.start()
+
+        record = make_record('1', digg_count=5)
+        await storage.put(record)
+        await storage.put(record)
+        await storage.put(dataclasses.replace(record, digg_count=6))
+        await storage.close()
+
+        assert sink.batches == [['1'], ['1']]
+        assert storage.get_stats()['skipped'] == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_is_not_cached(self):
+        """测试写入失败的视频不记入去重缓存"""
+        storage = DouyinStorage(sinks=[ListSink(fail=True)], performance=config(async_processing=False, batch_size=1))
+        await storage.start()
+
+        record = make_record('1')
+        await storage.put(record)
+        await storage.put(record)
+        await storage.close()
+
+        stats = storage.get_stats()
+        assert stats['failed'] == 2
+        assert stats['skipped'] == 0
+
+    @pytest.mark.asyncio
+    async def test_file_sink_writes_json_lines(self, tmp_path):
+        """测试文件存储按行写入JSON"""
+        storage = DouyinStorage(sinks=[FileSink(tmp_path)], performance=config())
+        await storage.start()
+        await storage.put_json({'aweme_id': 7300000000000000001, 'desc': '测试', 'text_extra': [{'hashtag_name': '美食'}]})
+        await storage.close()
+
+        files = list(tmp_path.glob('videos_*.jsonl'))
+        assert len(files) == 1
+        row = json.loads(files[0].read_text(encoding='utf-8'))
+        assert row['video_id'] == '7300000000000000001'
+        assert row['tags'] == ['美食']
+
+    @pytest.mark.asyncio
+    async def test_failing_sink_retried_without_rewriting_others(self):
+        """测试一个存储失败时只对它重试，其它存储不重复写入"""
+        good, flaky = ListSink(name='good'), ListSink(fail=True, name='flaky')
+        storage = DouyinStorage(sinks=[good, flaky], performance=config(async_processing=False, batch_size=2))
+        await storage.start()
+
+        await storage.put_many([make_record('1'), make_record('2')])
+        assert storage.get_stats()['retry_pending'] == {'flaky': 2}
+
+        flaky.fail = False
+        await storage.put_many([make_record('2', digg_count=1), make_record('3')])
+        await storage.close()
+
+        assert good.batches == [['1', '2'], ['2', '3']]
+        assert flaky.batches == [['1', '2', '3']]
+        stats = storage.get_stats()
+        assert stats['sink_stats'] == {
+            'good': {'written': 4, 'failed': 0, 'dropped': 0},
+            'flaky': {'written': 3, 'failed': 2, 'dropped': 0},
+        }
+        assert stats['retry_pending'] == {}
+        assert stats['dropped'] == 0
+
+    @pytest.mark.asyncio
+    async def test_retry_dropped_on_close(self):
+        """测试关闭时仍写入失败的记录被放弃并计数"""
+        storage = DouyinStorage(
+            sinks=[ListSink(fail=True)],
+            performance=config(async_processing=False, batch_size=5, max_queue_size=2)
+        )
+        await storage.start()
+
+        await storage.put_many(make_record(str(i)) for i in range(3))
+        await storage.close()
+
+        stats = storage.get_stats()
+        assert stats['failed'] == 3
+        assert stats['dropped'] == 3
+        assert stats['sink_stats']['list']['dropped'] == 3
+
+
+class TestPostgresRow:
+    """PostgreSQL 参数测试类"""
+
+    def test_jsonb_columns_are_json_strings(self):
+        """测试 JSONB 列以JSON字符串传入，其它列类型不变"""
+        record = DouyinVideoRecord(
+            video_id='7300000000000000001', desc='视频', tags=('美食', '探店'),
+            topics=('话题',), create_time=1700000000
+        )
+        row = dict(zip(CONTENT_COLUMNS, postgres_row(record)))
+
+        for column in JSONB_COLUMNS:
+            assert isinstance(row[column], str)
+        assert json.loads(row['tags']) == ['美食', '探店']
+        assert json.loads(row['topics']) == ['话题']
+        assert json.loads(row['images']) == []
+        assert isinstance(row['like_count'], int)
+        assert row['published_at'].year == 2023
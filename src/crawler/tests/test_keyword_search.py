@@ -0,0 +1,115 @@
+"""
+多关键词搜索单元测试
+"""
+
+import asyncio
+
+import pytest
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.keyword_search import KeywordSearchEngine, SearchPage
+
+
+class FakeSearch:
+    """按关键词返回预设的笔记ID分页，记录请求顺序"""
+
+    def __init__(self, pages, fail=()):
+        self.pages = pages
+        self.fail = set(fail)
+        self.calls = []
+
+    async def fetch_page(self, keyword, page, page_size):
+        self.calls.append((keyword, page))
+        await asyncio.sleep(0.01)
+        if keyword in self.fail:
+            raise RuntimeError('search failed')
+        pages = self.pages.get(keyword, [])
+        if page > len(pages):
+            return SearchPage(items=[])
+        return SearchPage(items=pages[page - 1], has_more=page < len(pages))
+
+    @staticmethod
+    def parse_items(items):
+        return [{'platform_content_id': note_id} for note_id in items]
+
+
+def ids(notes):
+    return [note['platform_content_id'] for note in notes]
+
+
+class TestKeywordSearchEngine:
+    """关键词搜索测试类"""
+
+    @pytest.mark.asyncio
+    async def test_next_page_requested_before_parsing(self):
+        """测试解析当前页时下一页已发出请求"""
+        search = FakeSearch({'a': [['1', '2'], ['3'], ['4']]})
+        seen_at_parse = []
+
+        def parse_items(items):
+            seen_at_parse.append(list(search.calls))
+            return search.parse_items(items)
+
+        engine = KeywordSearchEngine(search.fetch_page, parse_items)
+        results = await engine.crawl(['a'])
+
+        assert ids(results['a']) == ['1', '2', '3', '4']
+        assert seen_at_parse[0] == [('a', 1), ('a', 2)]
+        assert seen_at_parse[1] == [('a', 1), ('a', 2), ('a', 3)]
+
+    @pytest.mark.asyncio
+    async def test_dedup_across_keywords(self):
+        """测试同一笔记只输出一次，重复的记录到各关键词下"""
+        search = FakeSearch({'a': [['1', '2']], 'b': [['2', '3']]})
+        engine = KeywordSearchEngine(search.fetch_page, search.parse_items, keyword_concurrency=1)
+
+        batches = [batch async for batch in engine.iter_batches(['a', 'b', 'a'])]
+        assert [(b.keyword, ids(b.notes), b.duplicates) for b in batches] == [
+            ('a', ['1', '2'], []),
+            ('b', ['3'], ['2']),
+        ]
+        assert engine.note_keywords['2'] == ['a', 'b']
+
+    @pytest.mark.asyncio
+    async def test_crawl_returns_duplicates_per_keyword(self):
+        """测试汇总结果中重复笔记出现在每个关键词下"""
+        search = FakeSearch({'a': [['1', '2']], 'b': [['2', '3']]})
+        engine = KeywordSearchEngine(search.fetch_page, search.parse_items, keyword_concurrency=1)
+
+        results = await engine.crawl(['a', 'b'])
+        assert ids(results['b']) == ['3', '2']
+        assert results['b'][1] is results['a'][1]
+        assert engine.get_stats()['duplicates'] == 1
+
+    @pytest.mark.asyncio
+    async def test_limit_stops_paging(self):
+        """测试达到数量上限后不再请求后续页"""
+        search = FakeSearch({'a': [['1', '2'], ['3', '4'], ['5', '6']]})
+        engine = KeywordSearchEngine(search.fetch_page, search.parse_items)
+
+        results = await engine.crawl(['a'], limit=3)
+        assert ids(results['a']) == ['1', '2', '3']
+        assert ('a', 3) not in search.calls
+
+    @pytest.mark.asyncio
+    async def test_keywords_interleave_on_shared_budget(self):
+        """测试多个关键词在共享预算下交替翻页"""
+        search = FakeSearch({'a': [['a1'], ['a2']], 'b': [['b1'], ['b2']]})
+        engine = KeywordSearchEngine(search.fetch_page, search.parse_items, budget=asyncio.Semaphore(1))
+
+        await engine.crawl(['a', 'b'])
+        assert search.calls[:2] == [('a', 1), ('b', 1)]
+        assert sorted(search.calls) == [('a', 1), ('a', 2), ('b', 1), ('b', 2)]
+
+    @pytest.mark.asyncio
+    async def test_failed_keyword_does_not_stop_others(self):
+        """测试单个关键词失败不影响其它关键词"""
+        search = FakeSearch({'b': [['1']]}, fail={'a'})
+        engine = KeywordSearchEngine(search.fetch_page, search.parse_items)
+
+        results = await engine.crawl(['a', 'b'])
+        assert results == {'a': [], 'b': [{'platform_content_id': '1'}]}
+        assert engine.get_stats()['errors'] == 1
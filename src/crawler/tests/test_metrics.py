@@ -0,0 +1,152 @@
+"""
+指标收集单元测试
+"""
+
+import threading
+import urllib.request
+
+import pytest
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.metrics import MetricsRegistry, MetricsExporter, ThresholdAlerter, track_request, get_registry
+
+
+class TestMetricsRegistry:
+    """指标注册表测试类"""
+
+    @pytest.fixture
+    def registry(self):
+        return MetricsRegistry()
+
+    def test_counter_across_threads(self, registry):
+        """测试多线程自增汇总"""
+        counter = registry.counter('test_total', 'test', ('kind',))
+        child = counter.labels(kind='a')
+
+        def worker():
+            for _ in range(1000):
+                child.inc()
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert child.value == 8000
+
+    def test_counter_rejects_negative(self, registry):
+        """测试计数器不允许减少"""
+        counter = registry.counter('test_total', 'test')
+        with pytest.raises(ValueError):
+            counter.inc(-1)
+
+    def test_labels_mismatch(self, registry):
+        """测试标签不匹配"""
+        counter = registry.counter('test_total', 'test', ('kind',))
+        with pytest.raises(ValueError):
+            counter.labels(other='a')
+
+    def test_register_same_name(self, registry):
+        """测试重复注册返回同一实例"""
+        a = registry.counter('test_total', 'test')
+        b = registry.counter('test_total', 'test')
+        assert a is b
+        with pytest.raises(ValueError):
+            registry.gauge('test_total', 'test')
+
+    def test_render_prometheus(self, registry):
+        """测试Prometheus文本格式"""
+        registry.counter('req_total', 'requests', ('status',)).labels(status='ok').inc(3)
+        registry.gauge('queue_depth', 'depth').set(2.5)
+        hist = registry.histogram('latency_seconds', 'latency', buckets=(0.1, 1.0))
+        hist.observe(0.05)
+        hist.observe(0.5)
+        hist.observe(5)
+
+        text = registry.render_prometheus()
+
+        assert '# TYPE req_total counter' in text
+        assert 'req_total{status="ok"} 3' in text
+        assert 'queue_depth 2.5' in text
+        assert 'latency_seconds_bucket{le="0.1"} 1' in text
+        assert 'latency_seconds_bucket{le="1"} 2' in text
+        assert 'latency_seconds_bucket{le="+Inf"} 3' in text
+        assert 'latency_seconds_count 3' in text
+
+
+class TestThresholdAlerter:
+    """阈值告警测试类"""
+
+    def test_alerts_on_window_delta(self):
+        """测试按评估窗口的增量告警"""
+        registry = get_registry()
+        alerts_fired = []
+        alerter = ThresholdAlerter(
+            {'success_rate': 0.8, 'error_rate': 0.2},
+            on_alert=lambda platform, name, value, threshold: alerts_fired.append((platform, name))
+        )
+        alerter.evaluate()
+
+        for _ in range(5):
+            with track_request('test_platform', 'api') as req:
+                req.fail()
+        for _ in range(5):
+            with track_request('test_platform', 'api'):
+                pass
+
+        alerts = alerter.evaluate()
+        names = {a['alert'] for a in alerts if a['platform'] == 'test_platform'}
+        assert names == {'success_rate', 'error_rate'}
+        assert ('test_platform', 'success_rate') in alerts_fired
+
+        # 下一窗口全部成功，告警恢复
+        for _ in range(10):
+            with track_request('test_platform', 'api'):
+                pass
+        alerts = alerter.evaluate()
+        assert not [a for a in alerts if a['platform'] == 'test_platform']
+        active = registry.get('crawler_alert_active').labels(platform='test_platform', alert='success_rate')
+        assert active.value == 0
+
+    def test_exception_counts_as_error(self):
+        """测试异常记为失败请求"""
+        requests = get_registry().get('crawler_requests_total')
+        child = requests.labels(platform='test_platform', endpoint='boom', status='error')
+        before = child.value
+
+        with pytest.raises(RuntimeError):
+            with track_request('test_platform', 'boom'):
+                raise RuntimeError('boom')
+
+        assert child.value == before + 1
+
+
+class TestMetricsExporter:
+    """指标导出测试类"""
+
+    def test_write_snapshot(self, tmp_path):
+        """测试快照文件写入"""
+        registry = MetricsRegistry()
+        registry.counter('items_total', 'items').inc(7)
+        path = tmp_path / 'metrics.prom'
+
+        MetricsExporter(registry, path=str(path)).write_snapshot()
+
+        assert 'items_total 7' in path.read_text(encoding='utf-8')
+
+    def test_http_endpoint(self):
+        """测试HTTP端点"""
+        registry = MetricsRegistry()
+        registry.counter('items_total', 'items').inc(1)
+        exporter = MetricsExporter(registry, interval=3600, port=0).start()
+        try:
+            url = f'http://127.0.0.1:{exporter.server_port}/metrics'
+            with urllib.request.urlopen(url, timeout=5) as response:
+                body = response.read().decode('utf-8')
+            assert 'items_total 1' in body
+        finally:
+            exporter.stop()
@@ -0,0 +1,113 @@
+"""
+自适应节奏控制单元测试
+"""
+
+import asyncio
+import time
+
+import pytest
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.pacer import AdaptivePacer, get_pacer
+
+
+CONFIG = {
+    'burst_size': 3,
+    'refill_rate': 1.0,
+    'adaptive_increase': 1.1,
+    'adaptive_decrease': 0.5,
+    'min_delay': 1.0,
+    'max_delay': 10.0,
+}
+
+
+class TestAdaptivePacer:
+    """节奏控制测试类"""
+
+    def test_blocked_widens_delay_up_to_max(self):
+        """测试被拦截时放慢，且不超过 max_delay"""
+        pacer = AdaptivePacer('test', CONFIG)
+        assert pacer.delay == 1.0
+
+        pacer.observe(429)
+        assert pacer.delay == 2.0
+        assert pacer.tokens == 0
+
+        pacer.blocked('captcha')
+        assert pacer.delay == 4.0
+
+        for _ in range(5):
+            pacer.observe(403)
+        assert pacer.delay == 10.0
+
+    def test_sustained_success_tightens_delay(self):
+        """测试连续成功后加快，且不低于 min_delay"""
+        pacer = AdaptivePacer('test', CONFIG)
+        pacer.blocked()
+        pacer.blocked()
+
+        for _ in range(2):
+            pacer.success()
+        assert pacer.delay == 4.0
+
+        pacer.success()
+        assert pacer.delay == pytest.approx(4.0 / 1.1)
+
+        for _ in range(300):
+            pacer.observe(200)
+        assert pacer.delay == 1.0
+
+    def test_other_statuses_do_not_change_pace(self):
+        """测试404等状态不影响节奏"""
+        pacer = AdaptivePacer('test', CONFIG)
+        pacer.observe(404)
+        pacer.observe(500)
+        assert pacer.delay == 1.0
+        assert pacer.stats['blocks'] == 0
+
+    def test_history_and_stats(self):
+        """测试间隔调整历史可导出"""
+        pacer = AdaptivePacer('test', CONFIG)
+        pacer.observe(429)
+        pacer.blocked('captcha')
+
+        stats = pacer.get_stats()
+        assert stats['delay'] == 4.0
+        assert [entry['reason'] for entry in stats['history']] == ['init', '429', 'captcha']
+        assert stats['blocks'] == 2
+
+    def test_non_adaptive_keeps_delay(self):
+        """测试关闭自适应时间隔固定"""
+        pacer = AdaptivePacer('test', {**CONFIG, 'adaptive': False})
+        pacer.blocked()
+        assert pacer.delay == 1.0
+
+    def test_get_pacer_is_shared(self):
+        """测试同一平台共享实例"""
+        assert get_pacer('test_shared', CONFIG) is get_pacer('test_shared')
+
+    @pytest.mark.asyncio
+    async def test_wait_allows_burst_then_paces(self):
+        """测试先放行 burst_size 个请求，之后按间隔等待"""
+        pacer = AdaptivePacer('test', {**CONFIG, 'refill_rate': 20.0, 'min_delay': 0.05})
+
+        start = time.monotonic()
+        for _ in range(3):
+            await pacer.wait()
+        assert time.monotonic() - start < 0.04
+
+        await pacer.wait()
+        assert time.monotonic() - start >= 0.045
+
+    @pytest.mark.asyncio
+    async def test_disabled_never_waits(self):
+        """测试关闭时不等待"""
+        pacer = AdaptivePacer('test', {**CONFIG, 'enabled': False})
+        start = time.monotonic()
+        for _ in range(10):
+            await pacer.wait()
+        assert time.monotonic() - start < 0.05
+        assert pacer.stats['requests'] == 10
@@ -0,0 +1,78 @@
+"""
+抖音 _ROUTER_DATA 提取单元测试
+"""
+
+import json
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from douyin.utils.router_data import RouterDataExtractor, extract_router_data
+
+
+def make_page(loader_data, suffix=''):
+    return (
+        '<html><head><script>var a = "}</script>";</script></head><body>'
+        '<script>window._ROUTER_DATA = ' + json.dumps({'loaderData': loader_data}, ensure_ascii=False)
+        + suffix + '</script></body></html>'
+    )
+
+
+VIDEO_LOADER = {
+    'video_layout': {'item_list': [{'aweme_id': 'layout'}]},
+    'video_(id)/page': {'videoInfoRes': {'item_list': [{'aweme_id': '123', 'desc': '含有</script>的描述'}]}}
+}
+
+
+class TestExtractRouterData:
+    """_ROUTER_DATA 解析测试类"""
+
+    def test_extract(self):
+        """测试解析，字符串中的 } 和 </script> 不影响结果"""
+        data = extract_router_data(make_page(VIDEO_LOADER))
+        assert data['loaderData'] == VIDEO_LOADER
+
+    def test_trailing_statement(self):
+        """测试对象后面还有其它语句"""
+        data = extract_router_data(make_page(VIDEO_LOADER, suffix='; window.foo = 1;'))
+        assert data['loaderData'] == VIDEO_LOADER
+
+    def test_missing_or_broken(self):
+        """测试没有标记或JSON不完整"""
+        assert extract_router_data('<html></html>') is None
+        assert extract_router_data('<script>window._ROUTER_DATA = {"a": </script>') is None
+        assert extract_router_data('<script>window._ROUTER_DATA_V2 = {}</script>') is None
+
+
+class TestRouterDataExtractor:
+    """提取器测试类"""
+
+    def test_extract_video_skips_layout(self):
+        """测试跳过 video_layout 并缓存命中的键"""
+        extractor = RouterDataExtractor()
+        html = make_page(VIDEO_LOADER)
+
+        assert extractor.extract_video(html)['aweme_id'] == '123'
+        assert extractor.extract_video(html)['aweme_id'] == '123'
+
+        stats = extractor.get_stats()
+        assert stats['key_scans'] == 1
+        assert stats['key_hits'] == 1
+        assert stats['layout_keys'] == {'video': 'video_(id)/page'}
+
+    def test_layout_change_rescans(self):
+        """测试缓存的键失效后重新扫描"""
+        extractor = RouterDataExtractor()
+        extractor.extract_video(make_page(VIDEO_LOADER))
+
+        note_page = make_page({'note_video_(id)/page': {'item_list': [{'aweme_id': '456'}]}})
+        assert extractor.extract_video(note_page)['aweme_id'] == '456'
+        assert extractor.get_stats()['layout_keys']['video'] == 'note_video_(id)/page'
+
+    def test_extract_user(self):
+        """测试用户数据"""
+        extractor = RouterDataExtractor()
+        html = make_page({'user_(id)/page': {'user': {'uid': '1', 'nickname': '测试'}}})
+        assert extractor.extract_user(html) == {'uid': '1', 'nickname': '测试'}
+        assert extractor.extract_video(html) is None
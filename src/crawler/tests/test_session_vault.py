@@ -0,0 +1,179 @@
+"""
+会话保险箱单元测试
+"""
+
+import threading
+import time
+
+import pytest
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+pytest.importorskip('cryptography')
+
+from utils.session_vault import SessionVault, normalize_cookies
+
+
+@pytest.fixture
+def vault(tmp_path):
+    return SessionVault(tmp_path / 'sessions')
+
+
+class TestNormalizeCookies:
+    """cookie格式转换测试类"""
+
+    def test_dict_and_header_string(self):
+        """测试字典和Cookie头字符串"""
+        from_dict = normalize_cookies({'a1': 'x', 'web_session': 'y'}, domain='.xiaohongshu.com')
+        from_header = normalize_cookies('a1=x; web_session=y', domain='.xiaohongshu.com')
+        assert from_dict == from_header
+        assert from_dict[0] == {'name': 'a1', 'value': 'x', 'domain': '.xiaohongshu.com', 'path': '/'}
+
+    def test_selenium_and_cdp_lists(self):
+        """测试Selenium的expiry和CDP的expires，-1表示会话cookie"""
+        cookies = normalize_cookies([
+            {'name': 'a', 'value': '1', 'domain': '.a.com', 'expiry': 2000000000, 'httpOnly': True},
+            {'name': 'b', 'value': '2', 'expires': -1},
+        ])
+        assert cookies[0]['expires'] == 2000000000.0
+        assert cookies[0]['httpOnly'] is True
+        assert 'expires' not in cookies[1]
+
+
+class TestSessionVault:
+    """会话保险箱测试类"""
+
+    def test_save_and_load_roundtrip(self, vault):
+        """测试保存后可读取，且文件中没有明文cookie"""
+        vault.save('xiaohongshu', {'web_session': 'secret-token'}, account='alice', user_agent='UA')
+
+        session = vault.load('xiaohongshu', 'alice')
+        assert session.cookie_dict() == {'web_session': 'secret-token'}
+        assert session.cookie_header() == 'web_session=secret-token'
+        assert session.user_agent == 'UA'
+
+        raw = (vault.vault_dir / 'xiaohongshu' / 'alice.session').read_bytes()
+        assert b'secret-token' not in raw
+
+    def test_shared_across_instances(self, tmp_path):
+        """测试同一目录的另一个实例（另一个进程）可以读取"""
+        SessionVault(tmp_path).save('xiaohongshu', {'a1': 'x'})
+        assert SessionVault(tmp_path).load('xiaohongshu').cookie_dict() == {'a1': 'x'}
+
+    def test_expiry_from_login_cookie(self, vault):
+        """测试过期时间取登录态cookie的过期时间"""
+        now = time.time()
+        session = vault.save(
+            'xiaohongshu',
+            [
+                {'name': 'web_session', 'value': 'y', 'expires': now + 100},
+                {'name': 'tracker', 'value': 'z', 'expires': now + 10},
+            ],
+            expiry_cookies=('web_session',)
+        )
+        assert session.expires_at == pytest.approx(now + 100, abs=1)
+
+    def test_expired_session_is_not_returned(self, vault):
+        """测试过期会话不再返回"""
+        vault.save('xiaohongshu', [{'name': 'web_session', 'value': 'y', 'expires': time.time() - 1}])
+        assert vault.load('xiaohongshu') is None
+        assert vault.get('xiaohongshu') is None
+        assert len(vault.sessions('xiaohongshu')) == 1
+
+    def test_get_prefers_validated(self, vault):
+        """测试未指定账号时优先取已验证的会话"""
+        vault.save('xiaohongshu', {'a1': 'guest'}, account='guest', validated=False)
+        vault.save('xiaohongshu', {'a1': 'user'}, account='user')
+        assert vault.get('xiaohongshu').account == 'user'
+        assert vault.get('xiaohongshu', include_unvalidated=True).account == 'user'
+
+        vault.invalidate('xiaohongshu', 'user')
+        assert vault.get('xiaohongshu', include_unvalidated=True).account == 'guest'
+
+    def test_get_skips_unvalidated_by_default(self, vault):
+        """测试默认不返回未验证的游客会话"""
+        vault.save('xiaohongshu', {'a1': 'guest'}, account='guest', validated=False)
+
+        assert vault.get('xiaohongshu') is None
+        assert vault.get('xiaohongshu', 'guest') is None
+        assert vault.get('xiaohongshu', 'guest', include_unvalidated=True).account == 'guest'
+
+        vault.mark_validated('xiaohongshu', 'guest')
+        assert vault.get('xiaohongshu').account == 'guest'
+
+    def test_mark_validated(self, vault):
+        """测试记录验证时间"""
+        vault.save('xiaohongshu', {'a1': 'x'}, validated=False)
+        assert vault.load('xiaohongshu').validated_at is None
+
+        vault.mark_validated('xiaohongshu')
+        assert vault.load('xiaohongshu').validated_at is not None
+        assert vault.mark_validated('xiaohongshu', 'missing') is None
+
+    def test_wrong_key_is_treated_as_missing(self, tmp_path):
+        """测试密钥不对时视为没有会话"""
+        from cryptography.fernet import Fernet
+
+        SessionVault(tmp_path, key=Fernet.generate_key()).save('xiaohongshu', {'a1': 'x'})
+        assert SessionVault(tmp_path, key=Fernet.generate_key()).load('xiaohongshu') is None
+
+
+class TestVaultKey:
+    """保险箱密钥测试类"""
+
+    def test_concurrent_creation_shares_key(self, tmp_path, monkeypatch):
+        """测试多个实例同时启动时使用同一个密钥"""
+        monkeypatch.delenv('CRAWLER_VAULT_KEY', raising=False)
+        barrier = threading.Barrier(8)
+        keys = []
+
+        def open_vault():
+            barrier.wait()
+            keys.append(SessionVault(tmp_path)._load_or_create_key())
+
+        threads = [threading.Thread(target=open_vault) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(set(keys)) == 1
+        assert (tmp_path / 'vault.key').read_bytes() == keys[0]
+        assert sorted(path.name for path in tmp_path.iterdir()) == ['vault.key']
+
+    def test_lost_creation_race_reads_winner(self, tmp_path, monkeypatch):
+        """测试放置密钥时已被其它进程创建，改为读取已有的密钥"""
+        monkeypatch.delenv('CRAWLER_VAULT_KEY', raising=False)
+        from cryptography.fernet import Fernet
+
+        winner = Fernet.generate_key()
+        real_link = os.link
+
+        def link_after_winner(src, dst):
+            with open(dst, 'wb') as f:
+                f.write(winner)
+            real_link(src, dst)
+
+        monkeypatch.setattr(os, 'link', link_after_winner)
+
+        vault = SessionVault(tmp_path)
+        assert vault._load_or_create_key() == winner
+        vault.save('xiaohongshu', {'a1': 'x'})
+        assert SessionVault(tmp_path, key=winner).load('xiaohongshu').cookie_dict() == {'a1': 'x'}
+
+    def test_empty_key_file_is_reread(self, tmp_path, monkeypatch):
+        """测试读到空的密钥文件时稍后重读"""
+        monkeypatch.delenv('CRAWLER_VAULT_KEY', raising=False)
+        from cryptography.fernet import Fernet
+
+        key = Fernet.generate_key()
+        key_file = tmp_path / 'vault.key'
+        key_file.write_bytes(b'')
+        timer = threading.Timer(0.1, key_file.write_bytes, (key,))
+        timer.start()
+        try:
+            assert SessionVault(tmp_path)._load_or_create_key() == key
+        finally:
+            timer.cancel()
@@ -0,0 +1,127 @@
+"""
+短链接解析单元测试
+"""
+
+import asyncio
+
+import pytest
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.cache import MemoryCache
+from utils.short_link import ShortLinkResolver, is_short_link, match_id
+
+
+class RedirectMapResolver(ShortLinkResolver):
+    """按跳转表应答的解析器：{url: (status, location)}"""
+
+    def __init__(self, redirects, head_status=None, **kwargs):
+        super().__init__(cache=MemoryCache(), **kwargs)
+        self.redirects = redirects
+        self.head_status = head_status
+        self.calls = []
+
+    async def _request(self, method, url):
+        self.calls.append((method, url))
+        await asyncio.sleep(0.001)
+        if method == 'HEAD' and self.head_status:
+            return self.head_status, None
+        return self.redirects.get(url, (404, None))
+
+
+class TestMatchId:
+    """落地地址识别测试类"""
+
+    def test_platforms(self):
+        """测试各平台地址"""
+        assert match_id('https://www.iesdouyin.com/share/video/7300000000000000000/?region=CN')['id'] == '7300000000000000000'
+        assert match_id('https://www.douyin.com/user/MS4wLjABAAAA-x_y')['type'] == 'user'
+        assert match_id('https://www.xiaohongshu.com/discovery/item/65a1b2c3d4e5f60718293a4b?xsec=1')['type'] == 'note'
+        assert match_id('https://space.bilibili.com/12345')['id'] == '12345'
+        assert match_id('https://m.bilibili.com/video/BV1xx411c7mD')['id'] == 'BV1xx411c7mD'
+        assert match_id('https://example.com/') is None
+
+    def test_is_short_link(self):
+        """测试短链接识别"""
+        assert is_short_link('https://v.douyin.com/abc/')
+        assert is_short_link('b23.tv/xyz')
+        assert not is_short_link('https://www.douyin.com/video/1')
+
+
+class TestShortLinkResolver:
+    """短链接解析器测试类"""
+
+    @pytest.mark.asyncio
+    async def test_stops_at_first_recognizable_hop(self):
+        """测试在第一个可识别的跳转处停止"""
+        resolver = RedirectMapResolver({
+            'https://v.douyin.com/abc/': (302, 'https://www.iesdouyin.com/share/video/7300000000000000000/'),
+            'https://www.iesdouyin.com/share/video/7300000000000000000/': (302, 'https://www.douyin.com/video/1'),
+        })
+        info = await resolver.resolve('https://v.douyin.com/abc/')
+
+        assert info['platform'] == 'douyin'
+        assert info['id'] == '7300000000000000000'
+        assert resolver.calls == [('HEAD', 'https://v.douyin.com/abc/')]
+
+    @pytest.mark.asyncio
+    async def test_head_fallback_to_get(self):
+        """测试HEAD不可用时改用GET"""
+        resolver = RedirectMapResolver(
+            {'https://b23.tv/xyz': (302, 'https://space.bilibili.com/42?share=1')},
+            head_status=405
+        )
+        info = await resolver.resolve('https://b23.tv/xyz')
+        assert info['type'] == 'user' and info['id'] == '42'
+        assert [method for method, _ in resolver.calls] == ['HEAD', 'GET']
+
+    @pytest.mark.asyncio
+    async def test_batch_dedup_and_cache(self):
+        """测试批量解析去重，后续命中缓存"""
+        redirects = {
+            f'https://xhslink.com/{i}': (301, f'https://www.xiaohongshu.com/discovery/item/{i:024d}')
+            for i in range(50)
+        }
+        resolver = RedirectMapResolver(redirects, concurrency=8)
+        urls = [f'https://xhslink.com/{i % 50}' for i in range(500)]
+
+        results = await resolver.resolve_many(urls)
+        assert len(results) == 50
+        assert len(resolver.calls) == 50
+        assert results['https://xhslink.com/7']['id'] == f'{7:024d}'
+
+        # 协议和结尾斜杠不同也命中缓存
+        info = await resolver.resolve('http://xhslink.com/7/')
+        assert info['id'] == f'{7:024d}'
+        assert len(resolver.calls) == 50
+        assert resolver.get_stats()['cache_hits'] == 1
+
+    @pytest.mark.asyncio
+    async def test_failure_not_cached(self):
+        """测试解析失败不写入缓存"""
+        resolver = RedirectMapResolver({})
+        assert await resolver.resolve('https://v.douyin.com/missing/') is None
+        assert await resolver.resolve('https://v.douyin.com/missing/') is None
+        assert resolver.get_stats()['failed'] == 2
+
+    @pytest.mark.asyncio
+    async def test_unrecognized_target_cached_briefly(self):
+        """测试短链接服务直接返回200页面（如验证码）时只短时间缓存"""
+        resolver = RedirectMapResolver({'https://v.douyin.com/captcha/': (200, None)}, unrecognized_ttl=0.05)
+
+        info = await resolver.resolve('https://v.douyin.com/captcha/')
+        assert info == {'platform': None, 'type': None, 'id': None, 'url': 'https://v.douyin.com/captcha/'}
+        await resolver.resolve('https://v.douyin.com/captcha/')
+        assert len(resolver.calls) == 1
+
+        await asyncio.sleep(0.1)
+        resolver.redirects['https://v.douyin.com/captcha/'] = (
+            302, 'https://www.iesdouyin.com/share/video/7300000000000000000/'
+        )
+        info = await resolver.resolve('https://v.douyin.com/captcha/')
+        assert info['id'] == '7300000000000000000'
+
+        stats = resolver.get_stats()
+        assert (stats['unrecognized'], stats['resolved'], stats['cache_hits']) == (1, 1, 1)
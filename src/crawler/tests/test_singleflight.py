@@ -0,0 +1,88 @@
+"""
+请求合并单元测试
+"""
+
+import asyncio
+
+import pytest
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.singleflight import SingleFlight
+
+
+class TestSingleFlight:
+    """请求合并测试类"""
+
+    def test_make_key_ignores_param_order(self):
+        """测试参数顺序不影响合并键"""
+        a = SingleFlight.make_key('/x/space/acc/info', {'mid': 1, 'jsonp': 'jsonp'})
+        b = SingleFlight.make_key('/x/space/acc/info', {'jsonp': 'jsonp', 'mid': '1'})
+        assert a == b
+        assert a != SingleFlight.make_key('/x/space/acc/info', {'mid': 2, 'jsonp': 'jsonp'})
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_request(self):
+        """测试并发相同请求只执行一次"""
+        flight = SingleFlight('test')
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {'mid': 1}
+
+        key = SingleFlight.make_key('/x/space/acc/info', {'mid': 1})
+        results = await asyncio.gather(*[flight.do(key, fetch) for _ in range(10)])
+
+        assert calls == 1
+        assert all(r == {'mid': 1} for r in results)
+        assert flight.get_stats()['shared'] == 9
+
+        # 请求完成后不再合并
+        await flight.do(key, fetch)
+        assert calls == 2
+
+    @pytest.mark.asyncio
+    async def test_exception_propagates_to_waiters(self):
+        """测试异常传给所有等待者"""
+        flight = SingleFlight('test')
+
+        async def fetch():
+            await asyncio.sleep(0.01)
+            raise ConnectionError('reset')
+
+        results = await asyncio.gather(
+            *[flight.do('k', fetch) for _ in range(3)],
+            return_exceptions=True
+        )
+        assert all(isinstance(r, ConnectionError) for r in results)
+        assert not flight.in_flight('k')
+
+    @pytest.mark.asyncio
+    async def test_leader_cancellation_not_passed_to_waiters(self):
+        """测试发起请求的调用方被取消时，等待者重新发起一次请求而不是被取消"""
+        flight = SingleFlight('test')
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.02)
+            return calls
+
+        leader = asyncio.ensure_future(flight.do('k', fetch))
+        await asyncio.sleep(0)
+        waiters = [asyncio.ensure_future(flight.do('k', fetch)) for _ in range(3)]
+        await asyncio.sleep(0.005)
+
+        leader.cancel()
+        results = await asyncio.gather(*waiters)
+
+        assert leader.cancelled()
+        assert results == [2, 2, 2]
+        assert calls == 2
+        assert not flight.in_flight('k')
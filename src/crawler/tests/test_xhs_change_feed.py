@@ -0,0 +1,77 @@
+"""
+小红书用户变更流单元测试
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+
+from src.crawler.xiaohongshu.change_feed import ChangeFeed
+
+
+def note(note_id, title='t', liked=0, comments=0):
+    return {'note_id': note_id, 'title': title, 'liked_count': liked, 'comment_count': comments}
+
+
+class TestChangeFeed:
+    """用户变更流测试类"""
+
+    def test_first_check_is_baseline(self, tmp_path):
+        """测试首次检查所有笔记都是新笔记，没有增量"""
+        feed = ChangeFeed(tmp_path / 'feed.db')
+        change = feed.diff('u1', {'fans_count': 100}, [note('a'), note('b')])
+
+        assert change.first_seen
+        assert [n['note_id'] for n in change.new_notes] == ['a', 'b']
+        assert change.user_deltas == {} and change.note_deltas == {}
+
+    def test_only_new_notes_and_deltas(self, tmp_path):
+        """测试再次检查只输出新笔记和变化的计数"""
+        feed = ChangeFeed(tmp_path / 'feed.db')
+        feed.diff('u1', {'fans_count': 100, 'follows_count': 5}, [note('a', liked=10), note('b', liked=3)])
+
+        change = feed.diff(
+            'u1', {'fans_count': '1.2万', 'follows_count': 5},
+            [note('c'), note('a', liked=15, comments=2), note('b', liked=3)]
+        )
+        assert not change.first_seen
+        assert [n['note_id'] for n in change.new_notes] == ['c']
+        assert change.user_deltas == {'fans_count': 11900}
+        assert change.note_deltas == {'a': {'liked_count': 5, 'comment_count': 2}}
+        assert change.edited_note_ids == []
+
+    def test_unchanged_user(self, tmp_path):
+        """测试没有变化时 changed 为False"""
+        feed = ChangeFeed(tmp_path / 'feed.db')
+        feed.diff('u1', {'fans_count': 1}, [note('a', liked=1)])
+
+        change = feed.diff('u1', {'fans_count': 1}, [note('a', liked=1)])
+        assert not change.changed
+        assert feed.get_stats()['unchanged_users'] == 1
+
+    def test_edited_note(self, tmp_path):
+        """测试内容字段变化记为已编辑，不作为新笔记"""
+        feed = ChangeFeed(tmp_path / 'feed.db')
+        feed.diff('u1', None, [note('a', title='old')])
+
+        change = feed.diff('u1', None, [note('a', title='new')])
+        assert change.edited_note_ids == ['a']
+        assert change.new_notes == []
+
+    def test_missing_counters_kept(self, tmp_path):
+        """测试本次缺失的计数不产生增量，下次仍与保留的值比较"""
+        feed = ChangeFeed(tmp_path / 'feed.db')
+        feed.diff('u1', {'fans_count': 10}, [])
+        assert feed.diff('u1', None, []).user_deltas == {}
+        assert feed.diff('u1', {'fans_count': 12}, []).user_deltas == {'fans_count': 2}
+
+    def test_state_persists(self, tmp_path):
+        """测试重新打开后继续按上次状态比较"""
+        feed = ChangeFeed(tmp_path / 'feed.db')
+        feed.diff('u1', {'fans_count': 1}, [note('a')])
+        feed.close()
+
+        feed = ChangeFeed(tmp_path / 'feed.db')
+        change = feed.diff('u1', {'fans_count': 1}, [note('a'), note('b')])
+        assert [n['note_id'] for n in change.new_notes] == ['b']
+        assert feed.last_checked('u1') is not None
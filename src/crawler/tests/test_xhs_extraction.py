@@ -0,0 +1,146 @@
+"""
+小红书字段提取单元测试
+"""
+
+import json
+
+import pytest
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+
+from src.crawler.xiaohongshu.extraction import (
+    NOTE_FIELDS, USER_FIELDS, Field, FieldExtractor, parse_count
+)
+
+
+class FakeSelectorList:
+    def __init__(self, values):
+        self.values = values
+
+    def getall(self):
+        return list(self.values)
+
+
+class FakeResponse:
+    """按查询返回预设结果，并记录每个查询的执行次数"""
+
+    def __init__(self, text='', css=None, xpath=None, url='https://www.xiaohongshu.com/explore/abc'):
+        self.text = text
+        self.url = url
+        self._results = {'css': css or {}, 'xpath': xpath or {}}
+        self.calls = []
+
+    def css(self, query):
+        self.calls.append(('css', query))
+        return FakeSelectorList(self._results['css'].get(query, []))
+
+    def xpath(self, query):
+        self.calls.append(('xpath', query))
+        return FakeSelectorList(self._results['xpath'].get(query, []))
+
+
+def state_page(state):
+    text = json.dumps(state, ensure_ascii=False).replace('"__undefined__"', 'undefined')
+    return f'<html><script>window.__INITIAL_STATE__={text}</script></html>'
+
+
+NOTE_STATE = {
+    'note': {
+        'noteDetailMap': {
+            'abc': {
+                'note': {
+                    'title': ' 秋天的穿搭 ',
+                    'desc': '正文',
+                    'user': {'nickname': '小红', 'userId': 'u1'},
+                    'time': 1700000000000,
+                    'interactInfo': {'likedCount': '1.2万', 'commentCount': '10+', 'shareCount': '__undefined__'},
+                    'tagList': [{'name': '穿搭'}, {'name': '秋天'}],
+                    'imageList': [{'urlDefault': 'https://img/1.jpg'}, {'urlDefault': 'data:bad'}],
+                }
+            }
+        }
+    }
+}
+
+
+class TestFieldExtractor:
+    """字段提取测试类"""
+
+    def test_state_is_tried_before_selectors(self):
+        """测试优先从 __INITIAL_STATE__ 取值，状态缺失的字段再用选择器"""
+        extractor = FieldExtractor('note', NOTE_FIELDS)
+        response = FakeResponse(
+            state_page(NOTE_STATE),
+            css={'span.share-count::text': ['  ', '3k'], 'h1.note-title::text': ['DOM标题']}
+        )
+
+        data = extractor.extract(response)
+        assert data['title'] == '秋天的穿搭'
+        assert data['author_id'] == 'u1'
+        assert data['likes'] == 12000
+        assert data['comments'] == 10
+        assert data['shares'] == 3000
+        assert data['tags'] == ['穿搭', '秋天']
+        assert data['images'] == ['https://img/1.jpg']
+        assert data['publish_time'].startswith('2023-11-1')
+        assert ('css', 'h1.note-title::text') not in response.calls
+
+    def test_selectors_memoized_per_response(self):
+        """测试多个字段共用的选择器在同一响应中只执行一次"""
+        extractor = FieldExtractor('user', USER_FIELDS)
+        response = FakeResponse(css={'div.user-stats span::text': ['5']})
+
+        data = extractor.extract(response)
+        assert data['followers'] == data['following'] == data['notes_count'] == 5
+        assert response.calls.count(('css', 'div.user-stats span::text')) == 1
+        assert response.calls.count(('css', 'meta[property="og:image"]::attr(content)')) == 1
+        assert data['username'] == ''
+        assert data['is_verified'] is False
+
+    def test_user_state_interactions(self):
+        """测试按条件从列表中取值"""
+        extractor = FieldExtractor('user', USER_FIELDS)
+        state = {'user': {'userPageData': {
+            'basicInfo': {'nickname': '小红', 'imageb': '//img/avatar.jpg'},
+            'interactions': [{'type': 'follows', 'count': '12'}, {'type': 'fans', 'count': '3.4万'}],
+        }}}
+
+        data = extractor.extract(FakeResponse(state_page(state)))
+        assert data['username'] == '小红'
+        assert data['avatar'] == 'https://img/avatar.jpg'
+        assert data['followers'] == 34000
+        assert data['following'] == 12
+
+    def test_xpath_selectors_and_many_fields_merge(self):
+        """测试XPath选择器，列表字段合并全部选择器的结果"""
+        extractor = FieldExtractor('test', (
+            Field('tags', selectors=('div.tags a::text', 'xpath://span[@class="tag"]/text()'), many=True),
+        ))
+        response = FakeResponse(
+            css={'div.tags a::text': ['a', 'b']},
+            xpath={'//span[@class="tag"]/text()': ['b', 'c']}
+        )
+        assert extractor.extract(response)['tags'] == ['a', 'b', 'c']
+
+    def test_hit_miss_stats_and_dead_sources(self):
+        """测试按来源统计命中次数，找出从不命中的备选"""
+        extractor = FieldExtractor('test', (
+            Field('title', state_paths=('note.title',), selectors=('h1::text', 'title::text'), default=''),
+        ))
+        for _ in range(3):
+            extractor.extract(FakeResponse(css={'title::text': ['标题']}))
+
+        stats = extractor.get_stats()['title']
+        assert stats['state:note.title'] == {'hit': 0, 'miss': 3}
+        assert stats['h1::text'] == {'hit': 0, 'miss': 3}
+        assert stats['title::text'] == {'hit': 3, 'miss': 0}
+        assert extractor.dead_sources(min_attempts=3) == [('title', 'state:note.title'), ('title', 'h1::text')]
+
+    @pytest.mark.parametrize('text, expected', [
+        ('1.2万', 12000), ('3.5k', 3500), ('10+', 10), ('1,234', 1234), (56, 56), ('赞', None),
+    ])
+    def test_parse_count(self, text, expected):
+        """测试数量解析"""
+        assert parse_count(text) == expected
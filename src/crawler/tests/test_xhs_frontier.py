@@ -0,0 +1,96 @@
+"""
+小红书URL调度队列单元测试
+"""
+
+import time
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+
+from src.crawler.xiaohongshu.frontier import (
+    MAX_FAILURES, UrlFrontier, engagement_priority, url_fingerprint
+)
+
+
+NOTE_A = 'https://www.xiaohongshu.com/explore/aaa'
+NOTE_B = 'https://www.xiaohongshu.com/explore/bbb'
+NOTE_C = 'https://www.xiaohongshu.com/explore/ccc'
+
+
+class TestUrlFrontier:
+    """URL调度队列测试类"""
+
+    def test_fingerprint_by_entity(self):
+        """测试同一实体的不同URL指纹相同"""
+        assert url_fingerprint(NOTE_A + '?xsec_token=1') == ('note', 'note:aaa')
+        assert url_fingerprint('https://www.xiaohongshu.com/discovery/item/aaa') == ('note', 'note:aaa')
+        assert url_fingerprint('https://www.xiaohongshu.com/user/profile/u1') == ('user', 'user:u1')
+        assert url_fingerprint('https://www.xiaohongshu.com/user/profile')[0] == 'page'
+
+    def test_dedup_and_priority_order(self, tmp_path):
+        """测试去重，按优先级取出，重复加入时提高优先级"""
+        frontier = UrlFrontier(tmp_path)
+        assert frontier.add_many([NOTE_A, NOTE_B, NOTE_A + '?x=1']) == 2
+        frontier.add(NOTE_C, priority=engagement_priority(likes=1000))
+        frontier.add(NOTE_B, priority=engagement_priority(likes=10))
+
+        assert [entry.url for entry in frontier.pop(10)] == [NOTE_C, NOTE_B, NOTE_A]
+        assert frontier.pop(10) == []
+        assert frontier.in_flight() == 3
+
+    def test_revisit_after_interval_and_backoff_when_unchanged(self, tmp_path):
+        """测试按实体类型重访，内容不变时间隔翻倍"""
+        frontier = UrlFrontier(tmp_path, revisit_intervals={'note': 100})
+        frontier.add(NOTE_A)
+        t0 = time.time()
+        assert len(frontier.pop(1, now=t0)) == 1
+
+        frontier.done(NOTE_A, content_hash='h1', now=t0)
+        assert frontier.pop(1, now=t0 + 99) == []
+        assert len(frontier.pop(1, now=t0 + 100)) == 1
+
+        frontier.done(NOTE_A, content_hash='h1', now=t0 + 100)
+        assert frontier.pop(1, now=t0 + 299) == []
+        entry, = frontier.pop(1, now=t0 + 300)
+        assert entry.fetch_count == 2
+
+        # 内容变化后恢复基础间隔
+        frontier.done(NOTE_A, content_hash='h2', now=t0 + 300)
+        assert len(frontier.pop(1, now=t0 + 400)) == 1
+
+    def test_new_urls_before_revisits(self, tmp_path):
+        """测试从未抓过的链接优先于到期重访"""
+        frontier = UrlFrontier(tmp_path, revisit_intervals={'note': 10})
+        frontier.add(NOTE_A, priority=100)
+        t0 = time.time()
+        frontier.pop(1, now=t0)
+        frontier.done(NOTE_A, now=t0)
+        frontier.add(NOTE_B, priority=1)
+
+        assert [entry.url for entry in frontier.pop(2, now=t0 + 50)] == [NOTE_B, NOTE_A]
+
+    def test_failures_back_off_then_give_up(self, tmp_path):
+        """测试失败后退避重试，超过次数不再抓取"""
+        frontier = UrlFrontier(tmp_path)
+        frontier.add(NOTE_A)
+        now = time.time()
+        for _ in range(MAX_FAILURES):
+            entry, = frontier.pop(1, now=now)
+            frontier.failed(entry.url, now=now)
+            assert frontier.pop(1, now=now) == []
+            now += 10 ** 6
+        assert frontier.pop(1, now=now) == []
+        assert frontier.get_stats()['failed'] == MAX_FAILURES
+
+    def test_resume_requeues_in_flight(self, tmp_path):
+        """测试重新打开时上次未完成的链接重新排队，已完成的不重复"""
+        frontier = UrlFrontier(tmp_path)
+        frontier.add_many([NOTE_A, NOTE_B])
+        frontier.pop(2)
+        frontier.done(NOTE_A)
+        frontier.close()
+
+        frontier = UrlFrontier(tmp_path)
+        assert frontier.add(NOTE_A) is False
+        assert [entry.url for entry in frontier.pop(10)] == [NOTE_B]
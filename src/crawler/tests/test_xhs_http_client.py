@@ -0,0 +1,206 @@
+"""
+小红书共享HTTP客户端单元测试
+"""
+
+import json
+import logging
+
+import pytest
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+
+from src.crawler.base.rate_limiter import get_host_budget
+from src.crawler.xiaohongshu.http_client import (
+    API_CONCURRENCY, API_RATE, ResponseTooLarge, RetryBudget, XhsHttpClient, XhsHttpError, get_api_budget
+)
+from src.crawler.xiaohongshu.signing import set_xhs_signer
+
+
+class FakeResponse:
+    def __init__(self, status=200, body=b'{}', content_length=None):
+        self.status = status
+        self.body = body
+        self.content_length = content_length
+        self.read_called = False
+
+    async def read(self):
+        self.read_called = True
+        return self.body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+
+class FakeSession:
+    """按顺序返回预设响应，记录请求"""
+
+    closed = False
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def request(self, method, url, **kwargs):
+        self.calls.append((method, url, kwargs))
+        return self.responses.pop(0)
+
+
+def make_client(responses, **kwargs):
+    client = XhsHttpClient(retry_backoff=0, **kwargs)
+    client._session = FakeSession(responses)
+    return client
+
+
+class TestRetryBudget:
+    """重试预算测试类"""
+
+    def test_withdraw_until_empty(self):
+        """测试令牌取完后不再允许重试"""
+        budget = RetryBudget(ratio=0.5, initial=2)
+        assert budget.withdraw() and budget.withdraw()
+        assert not budget.withdraw()
+
+        budget.deposit()
+        assert not budget.withdraw()
+        budget.deposit()
+        assert budget.withdraw()
+
+    def test_tokens_capped(self):
+        """测试令牌不超过上限"""
+        budget = RetryBudget(ratio=1, initial=0, max_tokens=3)
+        for _ in range(10):
+            budget.deposit()
+        assert budget.tokens == 3
+
+
+class TestXhsHttpClient:
+    """共享HTTP客户端测试类"""
+
+    @pytest.mark.asyncio
+    async def test_parses_json_from_bytes(self):
+        """测试直接从响应字节解析JSON，cookie按请求传入"""
+        client = make_client([FakeResponse(body=json.dumps({'data': {'ok': 1}}).encode())])
+
+        data = await client.get_json('https://edith.xiaohongshu.com/api/x', 'x', cookies={'a1': 'v'})
+        assert data == {'data': {'ok': 1}}
+        assert client._session.calls[0][2]['cookies'] == {'a1': 'v'}
+
+    @pytest.mark.asyncio
+    async def test_retries_server_errors(self):
+        """测试5xx退避重试后成功"""
+        client = make_client([FakeResponse(status=503), FakeResponse(status=502), FakeResponse(body=b'[1]')])
+
+        assert await client.get_json('https://a/x', 'x') == [1]
+        assert client.get_stats()['retries'] == 2
+
+    @pytest.mark.asyncio
+    async def test_client_errors_not_retried(self):
+        """测试4xx直接失败"""
+        client = make_client([FakeResponse(status=403), FakeResponse()])
+
+        with pytest.raises(XhsHttpError) as excinfo:
+            await client.get_json('https://a/x', 'x')
+        assert excinfo.value.status == 403
+        assert len(client._session.calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_retry_budget_per_endpoint(self):
+        """测试接口的重试令牌用完后不再重试，其它接口不受影响"""
+        client = make_client([FakeResponse(status=500)] * 3 + [FakeResponse(status=500), FakeResponse()])
+        client._budget('bad').tokens = 1
+
+        with pytest.raises(XhsHttpError):
+            await client.get_json('https://a/bad', 'bad')
+        assert len(client._session.calls) == 2
+        assert client.get_stats()['budget_exhausted'] == 1
+
+        assert await client.get_json('https://a/good', 'good') == {}
+
+    @pytest.mark.asyncio
+    async def test_response_size_limit(self):
+        """测试超过大小上限的响应被拒绝，声明长度超限时不读取响应体"""
+        declared = FakeResponse(content_length=100)
+        client = make_client([declared, FakeResponse(body=b'x' * 100)], max_response_bytes=10)
+
+        with pytest.raises(ResponseTooLarge):
+            await client.get_json('https://a/x', 'x')
+        assert not declared.read_called
+
+        with pytest.raises(ResponseTooLarge):
+            await client.get_json('https://a/x', 'x')
+        assert client.get_stats()['too_large'] == 2
+
+    @pytest.mark.asyncio
+    async def test_signer_headers_per_attempt(self):
+        """测试注册的签名函数每次发送前重新签名，cookie从请求头中取"""
+        signed = []
+
+        def signer(uri, data, cookies):
+            signed.append((uri, cookies))
+            return {'x-s': f'sig{len(signed)}'}
+
+        set_xhs_signer(signer)
+        try:
+            client = make_client([FakeResponse(status=500), FakeResponse()])
+            await client.get_json(
+                'https://edith.xiaohongshu.com/api/sns/web/v1/feed', 'feed',
+                params={'id': 'n1'}, headers={'Cookie': 'a1=v; web_session=s'}
+            )
+        finally:
+            set_xhs_signer(None)
+
+        assert signed[0] == ('/api/sns/web/v1/feed?id=n1', {'a1': 'v', 'web_session': 's'})
+        sent = [call[2]['headers'] for call in client._session.calls]
+        assert [headers['x-s'] for headers in sent] == ['sig1', 'sig2']
+        assert sent[0]['Cookie'] == 'a1=v; web_session=s'
+
+    @pytest.mark.asyncio
+    async def test_release_closes_after_last_user(self):
+        """测试最后一个使用者注销时才关闭连接池"""
+        closed = []
+
+        class ClosingSession(FakeSession):
+            async def close(self):
+                closed.append(True)
+                self.closed = True
+
+        client = XhsHttpClient()
+        client._session = ClosingSession([])
+        client.retain()
+        client.retain()
+
+        await client.release()
+        assert closed == []
+        await client.release()
+        assert closed == [True]
+
+
+class TestApiBudget:
+    """接口主机预算测试类"""
+
+    def test_spider_and_crawler_share_one_budget(self, tmp_path, monkeypatch):
+        """测试两个入口使用同一个按 API_RATE / API_CONCURRENCY 创建的预算"""
+        monkeypatch.chdir(tmp_path)
+        from src.crawler.xiaohongshu.spider import XiaohongshuSpider
+        from src.crawler.xiaohongshu.xiaohongshu_crawler import XiaohongshuCrawler
+
+        budget = get_api_budget()
+        assert XiaohongshuSpider()._budget() is budget
+        assert XiaohongshuCrawler()._api_budget() is budget
+        assert (budget.rate, budget.concurrency) == (API_RATE, API_CONCURRENCY)
+
+    def test_conflicting_budget_parameters_warn(self, caplog):
+        """测试以不同参数获取已有主机的预算时记录警告，仍返回已有预算"""
+        first = get_host_budget('conflict.example.com', rate=1, concurrency=1)
+
+        with caplog.at_level(logging.WARNING):
+            assert get_host_budget('https://conflict.example.com/api', rate=1, concurrency=1) is first
+            assert not caplog.records
+            assert get_host_budget('conflict.example.com', rate=5, concurrency=4) is first
+
+        assert 'conflict.example.com' in caplog.text
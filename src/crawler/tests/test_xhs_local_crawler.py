@@ -0,0 +1,338 @@
+"""
+小红书本地爬虫单元测试
+"""
+
+import json
+import shutil
+import subprocess
+import threading
+import time
+
+import pytest
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+
+pytest.importorskip('selenium')
+pytest.importorskip('webdriver_manager')
+
+import xiaohongshu_local_crawler as local_crawler
+
+
+class FakeDriver:
+    """按预设顺序返回 execute_script 结果的WebDriver"""
+
+    def __init__(self, name='driver', scripts=(), page_source=''):
+        self.name = name
+        self.scripts = list(scripts)
+        self.page_source = page_source
+        self.urls = []
+        self.quit_calls = 0
+
+    def get(self, url):
+        self.urls.append(url)
+
+    def execute_script(self, script):
+        value = self.scripts.pop(0) if self.scripts else None
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    def quit(self):
+        self.quit_calls += 1
+
+
+class FakePacer:
+    """不等待的 UserPacer"""
+
+    def wait(self):
+        pass
+
+    def record(self, ready):
+        pass
+
+
+class FakeClock:
+    """替换模块中的 time：sleep 只推进时钟并记录"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(round(seconds, 6))
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(local_crawler, 'time', clock)
+    return clock
+
+
+def ok_result(user_id):
+    return {'user_info': {'user_id': user_id, 'fans_count': 1}, 'notes': []}
+
+
+class TestWaitForUserState:
+    """等待页面数据就绪测试类"""
+
+    def test_returns_as_soon_as_ready_with_backoff(self, clock):
+        """测试轮询间隔指数增长，脚本出错时继续轮询，就绪后立即返回"""
+        driver = FakeDriver(scripts=[False, RuntimeError('navigating'), False, True])
+
+        ready, elapsed = local_crawler.wait_for_user_state(driver, timeout=15, first_interval=0.05, max_interval=1)
+
+        assert ready
+        assert clock.sleeps == [0.05, 0.1, 0.2]
+        assert elapsed == pytest.approx(0.35)
+        assert driver.scripts == []
+
+    def test_hard_cap(self, clock):
+        """测试间隔不超过 max_interval，总等待不超过 timeout"""
+        driver = FakeDriver(scripts=[False] * 100)
+
+        ready, elapsed = local_crawler.wait_for_user_state(driver, timeout=2, first_interval=0.1, max_interval=0.5)
+
+        assert not ready
+        assert clock.sleeps == [0.1, 0.2, 0.4, 0.5, 0.5, 0.3]
+        assert elapsed == pytest.approx(2)
+
+    def test_ready_on_first_check_does_not_sleep(self, clock):
+        """测试数据已就绪时不等待"""
+        assert local_crawler.wait_for_user_state(FakeDriver(scripts=[True])) == (True, 0)
+        assert clock.sleeps == []
+
+
+class TestUserPacer:
+    """用户间隔测试类"""
+
+    def test_speeds_up_and_backs_off_within_bounds(self):
+        """测试就绪时缩短间隔、未就绪时加倍，都不超出上下限"""
+        pacer = local_crawler.UserPacer(delay=4, min_delay=1, max_delay=10, speedup=0.5, backoff=2)
+
+        pacer.record(True)
+        assert pacer.delay == 2
+        pacer.record(True)
+        pacer.record(True)
+        assert pacer.delay == 1
+
+        for _ in range(5):
+            pacer.record(False)
+        assert pacer.delay == 10
+
+    def test_wait_jitter(self, clock):
+        """测试实际等待在间隔的 ±20% 之内"""
+        pacer = local_crawler.UserPacer(delay=5)
+        for _ in range(20):
+            pacer.wait()
+
+        assert all(4 <= seconds <= 6 for seconds in clock.sleeps)
+        assert len(set(clock.sleeps)) > 1
+
+
+USER_STATE = {
+    'userPageInfo': {
+        'userPageUser': {
+            'user_id': 'u1', 'nickname': '博主', 'desc': '简介',
+            'fans': '1.2万', 'follows': 10, 'interaction': '100', 'gender': 1,
+        },
+    },
+    'notes': [
+        {'model_type': 'note', 'note_card': {
+            'id': 'n1', 'display_title': '标题', 'type': 'video', 'liked_count': '5',
+            'cover': {'url_default': 'https://img/1.jpg'}, 'time': 1700000000,
+        }},
+        {'model_type': 'note', 'note_card': {'id': 'n2'}},
+        {'model_type': 'ad'},
+        None,
+    ],
+}
+
+
+class TestUserState:
+    """浏览器内提取和解析用户数据测试类"""
+
+    def test_parse_user_state(self):
+        """测试提取用户信息，只保留 note 类型的笔记，缺失字段取默认值"""
+        result = local_crawler.parse_user_state(USER_STATE)
+
+        assert result['user_info']['nickname'] == '博主'
+        assert result['user_info']['fans_count'] == '1.2万'
+        assert [note['note_id'] for note in result['notes']] == ['n1', 'n2']
+        assert result['notes'][0]['cover_url'] == 'https://img/1.jpg'
+        assert result['notes'][1] == {
+            'note_id': 'n2', 'title': '', 'desc': '', 'type': 'normal', 'liked_count': 0,
+            'collected_count': 0, 'comment_count': 0, 'cover_url': '', 'time': '',
+        }
+
+    def test_parse_empty_state(self):
+        """测试没有数据时返回空结果"""
+        result = local_crawler.parse_user_state({'userPageInfo': None, 'notes': None})
+        assert result['user_info'] is None and result['notes'] == []
+
+    def test_extract_user_state(self):
+        """测试解析浏览器返回的JSON，没有数据或脚本出错时返回None"""
+        payload = json.dumps(USER_STATE, ensure_ascii=False)
+
+        assert local_crawler.extract_user_state(FakeDriver(scripts=[payload])) == USER_STATE
+        assert local_crawler.extract_user_state(FakeDriver(scripts=[None])) is None
+        assert local_crawler.extract_user_state(FakeDriver(scripts=[RuntimeError('detached')])) is None
+
+    def test_crawl_user_data_uses_browser_state(self, clock, tmp_path):
+        """测试数据就绪后直接在浏览器内提取，不读取整页HTML"""
+        driver = FakeDriver(scripts=[False, True, json.dumps(USER_STATE)], page_source='<html>')
+
+        result, ready = local_crawler.crawl_user_data(driver, 'u1', dump_dir=tmp_path)
+
+        assert ready
+        assert driver.urls == ['https://www.xiaohongshu.com/user/profile/u1']
+        assert result['user_info']['user_id'] == 'u1'
+        assert list(tmp_path.iterdir()) == []
+
+    def test_crawl_user_data_dumps_unparseable_page(self, clock, tmp_path):
+        """测试提取和HTML解析都失败时保存HTML"""
+        driver = FakeDriver(scripts=[False] * 100, page_source='<html>blocked</html>')
+
+        result, ready = local_crawler.crawl_user_data(driver, 'u1', timeout=1, dump_dir=tmp_path)
+
+        assert not ready
+        assert result['user_info'] is None
+        assert (tmp_path / 'xiaohongshu_user_u1.html').read_text(encoding='utf-8') == '<html>blocked</html>'
+
+    @pytest.mark.skipif(shutil.which('node') is None, reason='node is not installed')
+    def test_extract_script_keeps_shared_objects_and_drops_cycles(self):
+        """测试提取脚本：解开Vue ref，共享对象每处都输出，只丢弃循环引用"""
+        script = """
+const shared = {url: 'https://img/1.jpg'};
+const card = {id: 'n1', cover: shared, image: shared, missing: undefined, ratio: NaN, fn() {}};
+card.self = card;
+const notes = [{_value: {model_type: 'note', note_card: card}}, undefined];
+const window = {__INITIAL_STATE__: {user: {_value: {
+    userPageInfo: {_value: {userPageUser: {user_id: 'u1', fans: Infinity}}},
+    notes: {_value: notes},
+}}}};
+console.log((function () {%s})());
+""" % local_crawler.EXTRACT_USER_STATE_JS
+
+        output = subprocess.run(['node', '-e', script], capture_output=True, text=True, check=True).stdout
+        state = json.loads(output)
+
+        card = state['notes'][0]['note_card']
+        assert card == {
+            'id': 'n1', 'cover': {'url': 'https://img/1.jpg'}, 'image': {'url': 'https://img/1.jpg'},
+            'missing': None, 'ratio': None,
+        }
+        assert state['notes'][1] is None
+        assert state['userPageInfo']['userPageUser'] == {'user_id': 'u1', 'fans': None}
+
+
+class TestLoadUserIds:
+    """用户ID文件测试类"""
+
+    def test_skips_comments_blanks_and_duplicates(self, tmp_path):
+        """测试忽略空行和注释，CSV只取第一列，重复ID只保留一次"""
+        path = tmp_path / 'ids.txt'
+        path.write_text('# creators\nu1\n\n  u2 , name\nu1\n#u3\nu4\n', encoding='utf-8')
+
+        assert local_crawler.load_user_ids(path) == ['u1', 'u2', 'u4']
+
+
+class TestResultWriter:
+    """结果输出和断点测试类"""
+
+    def test_checkpoint_resume(self, tmp_path):
+        """测试只有成功的用户记为已完成，重新打开后据此续抓"""
+        output, checkpoint = tmp_path / 'out.jsonl', tmp_path / 'out.checkpoint'
+
+        with local_crawler.ResultWriter(output, checkpoint) as writer:
+            assert writer.completed() == set()
+            writer.write('u1', ok_result('u1'), True)
+            writer.write('u2', {'user_info': None, 'notes': []}, False)
+        assert writer.counts == {'ok': 1, 'failed': 1}
+
+        with local_crawler.ResultWriter(output, checkpoint) as writer:
+            assert writer.completed() == {'u1'}
+            writer.write('u2', ok_result('u2'), True)
+            assert writer.completed() == {'u1', 'u2'}
+
+        rows = [json.loads(line) for line in output.read_text(encoding='utf-8').splitlines()]
+        assert [row['user_id'] for row in rows] == ['u1', 'u2']
+        assert rows[0]['ready'] is True
+
+    def test_ignores_malformed_checkpoint_lines(self, tmp_path):
+        """测试断点文件中写了一半的行被忽略"""
+        checkpoint = tmp_path / 'out.checkpoint'
+        checkpoint.write_text('u1\tok\nu2\tfailed\nu3\n', encoding='utf-8')
+
+        writer = local_crawler.ResultWriter(tmp_path / 'out.jsonl', checkpoint)
+        assert writer.completed() == {'u1'}
+
+
+class TestWorkerPool:
+    """多浏览器并行抓取测试类"""
+
+    def test_failed_restart_ends_worker_cleanly(self, tmp_path, monkeypatch):
+        """测试浏览器重启失败时该实例正常结束，其它实例抓完剩余用户"""
+        drivers = [FakeDriver('d0'), FakeDriver('d1')]
+        setups = []
+        restart_failed = threading.Event()
+
+        def setup_driver(headless=True):
+            setups.append(threading.current_thread().name)
+            if len(setups) > len(drivers):
+                restart_failed.set()
+                raise RuntimeError('chromedriver download failed')
+            return drivers[len(setups) - 1]
+
+        def crawl_user_data(driver, user_id, timeout=15.0):
+            if driver.name == 'd0':
+                raise RuntimeError('browser crashed')
+            # 等 d0 连续出错并重启失败后再继续，保证结果确定
+            restart_failed.wait(2)
+            return ok_result(user_id), True
+
+        thread_errors = []
+        monkeypatch.setattr(threading, 'excepthook', thread_errors.append)
+        monkeypatch.setattr(local_crawler, 'setup_driver', setup_driver)
+        monkeypatch.setattr(local_crawler, 'inject_cookies', lambda driver, cookie_data: None)
+        monkeypatch.setattr(local_crawler, 'crawl_user_data', crawl_user_data)
+        monkeypatch.setattr(local_crawler, 'UserPacer', FakePacer)
+
+        user_ids = [f'u{index}' for index in range(8)]
+        with local_crawler.ResultWriter(tmp_path / 'out.jsonl', tmp_path / 'out.checkpoint') as writer:
+            local_crawler.run_worker_pool(user_ids, {}, writer, workers=2)
+
+        assert thread_errors == []
+        assert len(setups) == 3
+        assert writer.counts == {'ok': 5, 'failed': local_crawler.MAX_WORKER_ERRORS}
+        assert all(driver.quit_calls >= 1 for driver in drivers)
+
+    def test_driver_install_serialized(self, monkeypatch):
+        """测试多个线程同时重启浏览器时驱动下载依次进行"""
+        active, peak = [0], [0]
+
+        class FakeManager:
+            def install(self):
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+                time.sleep(0.02)
+                active[0] -= 1
+                return '/tmp/chromedriver'
+
+        monkeypatch.setattr(local_crawler, 'ChromeDriverManager', FakeManager)
+        monkeypatch.setattr(local_crawler, 'Service', lambda path: path)
+        monkeypatch.setattr(local_crawler.webdriver, 'Chrome', lambda service, options: FakeDriver(service))
+
+        threads = [threading.Thread(target=local_crawler.setup_driver, args=(True,)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert peak[0] == 1
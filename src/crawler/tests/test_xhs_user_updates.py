@@ -0,0 +1,79 @@
+"""
+小红书用户更新检查单元测试
+"""
+
+import contextlib
+
+import pytest
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+
+from src.crawler.xiaohongshu.xiaohongshu_crawler import XiaohongshuCrawler
+
+
+def note(note_id, likes=0):
+    return {'platform_content_id': note_id, 'title': f'note {note_id}', 'like_count': likes}
+
+
+@pytest.fixture
+def crawler(tmp_path, monkeypatch):
+    """用户资料、笔记列表和详情都由内存数据应答的爬虫"""
+    monkeypatch.chdir(tmp_path)
+    crawler = XiaohongshuCrawler()
+    crawler.change_feed_path = str(tmp_path / 'change_feed.db')
+    crawler.listed = [note('a'), note('b')]
+    crawler.detail_calls = []
+
+    async def crawl_user(user_id):
+        return {'follower_count': 10}
+
+    async def crawl_user_notes(user_id):
+        return crawler.listed
+
+    async def crawl_note(note_id):
+        crawler.detail_calls.append(note_id)
+        return {**note(note_id), 'content': 'detail'}
+
+    crawler.crawl_user = crawl_user
+    crawler.crawl_user_notes = crawl_user_notes
+    crawler.crawl_note = crawl_note
+    # 测试不受接口主机的速率限制
+    crawler._api_budget = contextlib.nullcontext
+    yield crawler
+    if crawler._change_feed is not None:
+        crawler._change_feed.close()
+
+
+class TestCheckUserUpdates:
+    """用户更新检查测试类"""
+
+    @pytest.mark.asyncio
+    async def test_first_check_skips_details(self, crawler):
+        """测试首次检查只记录基线，不为列表中的笔记抓详情"""
+        change = await crawler.check_user_updates('u1')
+
+        assert change.first_seen
+        assert [n['platform_content_id'] for n in change.new_notes] == ['a', 'b']
+        assert crawler.detail_calls == []
+
+    @pytest.mark.asyncio
+    async def test_later_checks_fetch_only_new_notes(self, crawler):
+        """测试之后的检查只为新笔记抓详情"""
+        await crawler.check_user_updates('u1')
+        crawler.listed = [note('c'), note('a', likes=3), note('b')]
+
+        change = await crawler.check_user_updates('u1')
+
+        assert crawler.detail_calls == ['c']
+        assert change.new_notes[0]['content'] == 'detail'
+        assert change.note_deltas == {'a': {'like_count': 3}}
+
+    @pytest.mark.asyncio
+    async def test_first_check_details_opt_in(self, crawler):
+        """测试 fetch_first_seen=True 时首次检查也抓详情"""
+        changes = await crawler.check_users_updates(['u1'], fetch_first_seen=True)
+
+        assert sorted(crawler.detail_calls) == ['a', 'b']
+        assert all(n['content'] == 'detail' for n in changes['u1'].new_notes)
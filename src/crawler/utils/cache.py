@@ -0,0 +1,359 @@
+"""
+响应缓存
+
+按 CACHE_CONFIG 提供可插拔的缓存后端：
+- memory: 进程内 LRU + TTL
+- file: 本地磁盘，每个键一个JSON文件
+- redis: Redis（需要安装 redis）
+
+ResponseCache 在后端之上提供 get_or_fetch：命中直接返回，
+未命中时同一个键的并发请求只触发一次实际抓取。
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from .metrics import get_registry
+from .singleflight import SingleFlight
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+CACHE_REQUESTS = get_registry().counter(
+    'crawler_cache_requests_total',
+    'Cache lookups by result (hit, miss, coalesced)',
+    ('cache', 'result')
+)
+CACHE_SIZE = get_registry().gauge(
+    'crawler_cache_entries',
+    'Number of entries held by in-memory caches',
+    ('cache',)
+)
+
+# 区分“未命中”和“缓存了None”
+_MISSING = object()
+
+
+class CacheBackend:
+    """缓存后端基类"""
+
+    def __init__(self, ttl: float = 3600):
+        self.ttl = ttl
+
+    def get(self, key: str) -> Any:
+        """读取缓存，未命中返回 _MISSING"""
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: float = None):
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        return 0
+
+
+class MemoryCache(CacheBackend):
+    """
+    进程内 LRU + TTL 缓存
+
+    读取时把命中的键移到末尾，超过 max_size 时淘汰最久未使用的键；
+    过期的键在读取时惰性删除。
+    """
+
+    def __init__(self, max_size: int = 1000, ttl: float = 3600):
+        super().__init__(ttl)
+        self.max_size = max_size
+        self._data: 'OrderedDict[str, Tuple[float, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return _MISSING
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return _MISSING
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float = None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class FileCache(CacheBackend):
+    """
+    磁盘缓存
+
+    每个键保存为一个JSON文件（文件名为键的SHA1），只支持可JSON序列化的值。
+    """
+
+    def __init__(self, cache_dir: str = 'data/cache', ttl: float = 3600):
+        super().__init__(ttl)
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return self.cache_dir / f'{digest}.json'
+
+    def get(self, key: str) -> Any:
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return _MISSING
+
+        if entry.get('expires_at', 0) < time.time():
+            path.unlink(missing_ok=True)
+            return _MISSING
+
+        return entry.get('value')
+
+    def set(self, key: str, value: Any, ttl: float = None):
+        path = self._path(key)
+        entry = {
+            'key': key,
+            'expires_at': time.time() + (self.ttl if ttl is None else ttl),
+            'value': value
+        }
+        tmp_path = path.with_suffix('.tmp')
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False, default=str)
+            tmp_path.replace(path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"Failed to write cache entry {key}: {str(e)}")
+
+    def delete(self, key: str):
+        self._path(key).unlink(missing_ok=True)
+
+    def clear(self):
+        for path in self.cache_dir.glob('*.json'):
+            path.unlink(missing_ok=True)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.cache_dir.glob('*.json'))
+
+
+class RedisCache(CacheBackend):
+    """Redis缓存，值以JSON保存，过期交给Redis处理"""
+
+    def __init__(
+        self,
+        url: str = 'redis://localhost:6379/0',
+        ttl: float = 3600,
+        prefix: str = 'crawler:cache:'
+    ):
+        super().__init__(ttl)
+        if redis is None:
+            raise ImportError("redis is required for the redis cache backend")
+        self.prefix = prefix
+        self._client = redis.from_url(url)
+
+    def get(self, key: str) -> Any:
+        raw = self._client.get(self.prefix + key)
+        if raw is None:
+            return _MISSING
+        return json.loads(raw)
+
+    def set(self, key: str, value: Any, ttl: float = None):
+        ttl = self.ttl if ttl is None else ttl
+        self._client.set(
+            self.prefix + key,
+            json.dumps(value, ensure_ascii=False, default=str),
+            ex=max(1, int(ttl))
+        )
+
+    def delete(self, key: str):
+        self._client.delete(self.prefix + key)
+
+    def clear(self):
+        for key in self._client.scan_iter(match=self.prefix + '*'):
+            self._client.delete(key)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self._client.scan_iter(match=self.prefix + '*'))
+
+
+class ResponseCache:
+    """
+    带键模板、命中率统计和并发去重的缓存
+
+    用法：
+        cache = create_cache(CACHE_CONFIG, name='bilibili')
+        info = await cache.get_or_fetch(
+            cache.key('user_info', mid),
+            lambda: spider.crawl_user_info_by_mid(mid)
+        )
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend,
+        key_templates: Dict[str, str] = None,
+        name: str = 'default'
+    ):
+        self.backend = backend
+        self.key_templates = key_templates or {}
+        self.name = name
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._flight = SingleFlight(f'cache_{name}')
+
+        self._hit_counter = CACHE_REQUESTS.labels(cache=name, result='hit')
+        self._miss_counter = CACHE_REQUESTS.labels(cache=name, result='miss')
+        self._coalesced_counter = CACHE_REQUESTS.labels(cache=name, result='coalesced')
+
+    def key(self, kind: str, *args) -> str:
+        """按 cache_keys 模板生成缓存键，未配置模板时使用 kind_参数"""
+        template = self.key_templates.get(kind)
+        if template is None:
+            template = kind + '_{}' * max(1, len(args))
+        return template.format(*args)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self.backend.get(key)
+        if value is _MISSING:
+            self.misses += 1
+            self._miss_counter.inc()
+            return default
+        self.hits += 1
+        self._hit_counter.inc()
+        return value
+
+    def set(self, key: str, value: Any, ttl: float = None):
+        self.backend.set(key, value, ttl)
+        self._update_size()
+
+    def delete(self, key: str):
+        self.backend.delete(key)
+        self._update_size()
+
+    def clear(self):
+        self.backend.clear()
+        self._update_size()
+
+    async def get_or_fetch(
+        self,
+        key: str,
+        fetch: Callable[[], Awaitable[Any]],
+        ttl: float = None
+    ) -> Any:
+        """
+        读取缓存，未命中时调用 fetch 抓取并写入
+
+        同一个键正在抓取时，后来的调用等待同一次抓取的结果。
+        fetch 返回 None（抓取失败）时不写入缓存。
+        """
+        value = self.backend.get(key)
+        if value is not _MISSING:
+            self.hits += 1
+            self._hit_counter.inc()
+            return value
+
+        if self._flight.in_flight(key):
+            self.coalesced += 1
+            self._coalesced_counter.inc()
+        else:
+            self.misses += 1
+            self._miss_counter.inc()
+
+        async def fetch_and_store():
+            result = await fetch()
+            if result is not None:
+                self.set(key, result, ttl)
+            return result
+
+        return await self._flight.do(key, fetch_and_store)
+
+    def _update_size(self):
+        if isinstance(self.backend, MemoryCache):
+            CACHE_SIZE.labels(cache=self.name).set(len(self.backend))
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses + self.coalesced
+        return (self.hits + self.coalesced) / total if total else 0.0
+
+    def get_stats(self) -> Dict:
+        """获取缓存统计"""
+        return {
+            'backend': type(self.backend).__name__,
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'hit_rate': self.hit_rate
+        }
+
+
+def create_cache(config: Dict, name: str = 'default') -> Optional[ResponseCache]:
+    """
+    根据缓存配置创建缓存
+
+    Args:
+        config: 形如 bilibili settings 中的 CACHE_CONFIG，
+            可选 cache_dir（file）和 redis_url（redis）
+        name: 缓存名称，用于指标标签和默认目录
+
+    Returns:
+        ResponseCache，缓存未启用时返回None
+    """
+    if not config.get('enabled', True):
+        return None
+
+    cache_type = config.get('type', 'memory')
+    ttl = config.get('ttl', 3600)
+
+    if cache_type == 'memory':
+        backend = MemoryCache(max_size=config.get('max_size', 1000), ttl=ttl)
+    elif cache_type == 'file':
+        backend = FileCache(cache_dir=config.get('cache_dir', f'data/cache/{name}'), ttl=ttl)
+    elif cache_type == 'redis':
+        backend = RedisCache(
+            url=config.get('redis_url', 'redis://localhost:6379/0'),
+            ttl=ttl,
+            prefix=f'crawler:{name}:'
+        )
+    else:
+        raise ValueError(f"Unsupported cache type: {cache_type}")
+
+    logger.info(f"Cache initialized: {name} ({cache_type}, ttl={ttl}s)")
+    return ResponseCache(backend, config.get('cache_keys'), name=name)
@@ -0,0 +1,275 @@
+"""
+并发评论爬取
+
+一级评论按游标顺序翻页，每页返回后立即请求下一页，同时并发展开
+该页中有回复的评论楼层；所有请求共用一个预算（并发数 + 速率），
+不再在每页之间固定sleep。
+
+平台相关的部分（请求和解析）由调用方以 fetch_page / fetch_replies
+传入，两者都返回 CommentPage。
+"""
+
+import asyncio
+import heapq
+import inspect
+import itertools
+import logging
+from typing import (
+    Any, AsyncIterator, Awaitable, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+)
+
+logger = logging.getLogger(__name__)
+
+# 队列结束标记
+_DONE = object()
+
+
+class CommentPage(NamedTuple):
+    """
+    一页评论
+
+    comments: 本页评论（已解析）
+    cursor: 下一页游标
+    has_more: 是否还有下一页
+    threads: 需要展开回复的楼层 [(评论, 回复起始游标)]
+    """
+    comments: List[Dict]
+    cursor: Any = None
+    has_more: bool = False
+    threads: Sequence[Tuple[Dict, Any]] = ()
+
+
+FetchPage = Callable[[Any], Awaitable[Optional[CommentPage]]]
+FetchReplies = Callable[[Dict, Any], Awaitable[Optional[CommentPage]]]
+
+
+class CommentCrawler:
+    """
+    评论爬取器
+
+    用法：
+        crawler = CommentCrawler(fetch_page, fetch_replies, budget=get_host_budget(host))
+        async for batch in crawler.iter_batches(initial_cursor=0, limit=10000):
+            pipeline.process(batch)
+
+        # 只要点赞数最高的100条
+        top = await crawler.crawl(initial_cursor=0, top_n=100)
+    """
+
+    def __init__(
+        self,
+        fetch_page: FetchPage,
+        fetch_replies: FetchReplies = None,
+        budget=None,
+        name: str = 'default',
+        max_reply_pages: int = 50,
+        queue_size: int = 64
+    ):
+        """
+        Args:
+            fetch_page: 按游标请求一级评论页
+            fetch_replies: 按 (楼层评论, 游标) 请求回复页，为None时不展开回复
+            budget: 每个请求进入的异步上下文（如 HostBudget），控制并发和速率
+            name: 名称，用于日志
+            max_reply_pages: 单个楼层最多翻页数
+            queue_size: 待消费批次上限，消费慢时反压请求
+        """
+        self.fetch_page = fetch_page
+        self.fetch_replies = fetch_replies
+        self.budget = budget if budget is not None else asyncio.Semaphore(4)
+        self.name = name
+        self.max_reply_pages = max_reply_pages
+        self.queue_size = queue_size
+
+        self._top: List[Tuple[int, int, Dict]] = []
+        self._top_n: Optional[int] = None
+        self._seq = itertools.count()
+
+        self.stats = {
+            'pages': 0,
+            'reply_pages': 0,
+            'threads': 0,
+            'comments': 0,
+            'replies': 0,
+            'errors': 0
+        }
+
+    async def _fetch(self, fn: Callable[..., Awaitable[Optional[CommentPage]]], *args) -> Optional[CommentPage]:
+        """在预算内执行一次请求，异常记为失败"""
+        async with self.budget:
+            try:
+                return await fn(*args)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats['errors'] += 1
+                logger.error(f"[{self.name}] Error fetching comments: {str(e)}")
+                return None
+
+    def _offer(self, comments: List[Dict]) -> int:
+        """把评论放入点赞数Top-N堆，返回进入堆的数量"""
+        if self._top_n is None:
+            return len(comments)
+
+        entered = 0
+        for comment in comments:
+            entry = (comment.get('like_count') or 0, next(self._seq), comment)
+            if len(self._top) < self._top_n:
+                heapq.heappush(self._top, entry)
+                entered += 1
+            elif entry[0] > self._top[0][0]:
+                heapq.heapreplace(self._top, entry)
+                entered += 1
+        return entered
+
+    def _worth_expanding(self, comment: Dict) -> bool:
+        """Top-N 模式下只展开仍在堆中的楼层"""
+        if self._top_n is None or len(self._top) < self._top_n:
+            return True
+        return (comment.get('like_count') or 0) >= self._top[0][0]
+
+    async def _expand_thread(self, queue: asyncio.Queue, comment: Dict, cursor: Any):
+        """顺序翻完一个楼层的回复"""
+        self.stats['threads'] += 1
+        for _ in range(self.max_reply_pages):
+            page = await self._fetch(self.fetch_replies, comment, cursor)
+            if page is None:
+                return
+            self.stats['reply_pages'] += 1
+
+            if page.comments:
+                self.stats['replies'] += len(page.comments)
+                self._offer(page.comments)
+                await queue.put(page.comments)
+
+            if not page.has_more or not page.comments:
+                return
+            cursor = page.cursor
+
+    async def _produce(self, queue: asyncio.Queue, pending: set, cursor: Any, stale_pages: int):
+        """翻一级评论页，并为每页的楼层启动回复展开任务"""
+        stale = 0
+        try:
+            while True:
+                page = await self._fetch(self.fetch_page, cursor)
+                if page is None or not page.comments:
+                    break
+                self.stats['pages'] += 1
+                self.stats['comments'] += len(page.comments)
+
+                entered = self._offer(page.comments)
+                await queue.put(page.comments)
+
+                if self.fetch_replies is not None:
+                    for comment, reply_cursor in page.threads:
+                        if not self._worth_expanding(comment):
+                            continue
+                        task = asyncio.ensure_future(self._expand_thread(queue, comment, reply_cursor))
+                        pending.add(task)
+                        task.add_done_callback(pending.discard)
+
+                # Top-N：连续多页没有评论进入堆时认为后面不会再有高赞评论
+                if self._top_n is not None and len(self._top) >= self._top_n:
+                    stale = 0 if entered else stale + 1
+                    if stale >= stale_pages:
+                        logger.info(f"[{self.name}] Top-{self._top_n} stable for {stale} pages, stopping")
+                        break
+
+                if not page.has_more:
+                    break
+                cursor = page.cursor
+
+            while pending:
+                await asyncio.gather(*list(pending), return_exceptions=True)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.error(f"[{self.name}] Error crawling comments: {str(e)}")
+
+        await queue.put(_DONE)
+
+    async def iter_batches(
+        self,
+        initial_cursor: Any = None,
+        limit: int = None,
+        top_n: int = None,
+        stale_pages: int = 3
+    ) -> AsyncIterator[List[Dict]]:
+        """
+        流式返回评论批次（一级评论页和回复页混合，按到达顺序）
+
+        Args:
+            initial_cursor: 一级评论起始游标
+            limit: 最多返回评论数（含回复）
+            top_n: 维护点赞数Top-N，连续 stale_pages 页没有新评论进入时停止
+            stale_pages: Top-N 提前停止的页数
+        """
+        self._top = []
+        self._top_n = top_n
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        pending: set = set()
+        producer = asyncio.ensure_future(self._produce(queue, pending, initial_cursor, stale_pages))
+
+        emitted = 0
+        try:
+            while True:
+                batch = await queue.get()
+                if batch is _DONE:
+                    break
+
+                if limit is not None:
+                    batch = batch[:limit - emitted]
+                emitted += len(batch)
+                if batch:
+                    yield batch
+
+                if limit is not None and emitted >= limit:
+                    break
+        finally:
+            for task in [producer, *pending]:
+                task.cancel()
+            await asyncio.gather(producer, *list(pending), return_exceptions=True)
+
+    async def crawl(
+        self,
+        initial_cursor: Any = None,
+        limit: int = None,
+        top_n: int = None,
+        sink: Callable[[List[Dict]], Any] = None,
+        stale_pages: int = 3
+    ) -> List[Dict]:
+        """
+        爬取评论
+
+        Args:
+            initial_cursor: 一级评论起始游标
+            limit: 最多爬取评论数（含回复）
+            top_n: 只返回点赞数最高的N条（按点赞数降序）
+            sink: 每个批次到达时调用（可以是协程函数），用于流式写入管道
+            stale_pages: Top-N 提前停止的页数
+
+        Returns:
+            评论列表；指定 top_n 时为Top-N结果
+        """
+        results = []
+        batches = self.iter_batches(initial_cursor, limit=limit, top_n=top_n, stale_pages=stale_pages)
+        try:
+            async for batch in batches:
+                if sink is not None:
+                    outcome = sink(batch)
+                    if inspect.isawaitable(outcome):
+                        await outcome
+                if top_n is None:
+                    results.extend(batch)
+        finally:
+            await batches.aclose()
+
+        if top_n is not None:
+            return [comment for _, _, comment in sorted(self._top, key=lambda e: (-e[0], e[1]))]
+        return results
+
+    def get_stats(self) -> Dict:
+        """获取爬取统计"""
+        return dict(self.stats)
@@ -0,0 +1,268 @@
+"""
+多关键词并发搜索
+
+大量关键词的搜索分页在这里统一调度：
+- 多个关键词同时翻页，所有请求共用一个预算（并发数 + 速率），
+  按排队顺序交替占用，不再每页之间固定sleep
+- 一页返回后立即请求下一页，解析当前页时下一页已在路上
+- 多个关键词搜到的同一笔记只输出一次，重复的记录到对应关键词下
+- 每页解析完就按关键词输出一个批次
+
+平台相关的部分（请求和解析）由调用方以 fetch_page / parse_items 传入。
+"""
+
+import asyncio
+import inspect
+import logging
+from typing import (
+    Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, NamedTuple, Optional
+)
+
+logger = logging.getLogger(__name__)
+
+# 队列结束标记
+_DONE = object()
+
+
+class SearchPage(NamedTuple):
+    """
+    一页搜索结果
+
+    items: 接口返回的原始条目（由 parse_items 解析）
+    has_more: 是否还有下一页
+    """
+    items: List[Any]
+    has_more: bool = False
+
+
+class KeywordBatch(NamedTuple):
+    """
+    一个关键词一页的结果
+
+    keyword: 关键词
+    page: 页码
+    notes: 首次出现的笔记
+    duplicates: 已在其它关键词下输出过的笔记ID
+    """
+    keyword: str
+    page: int
+    notes: List[Dict]
+    duplicates: List[str]
+
+
+FetchPage = Callable[[str, int, int], Awaitable[Optional[SearchPage]]]
+ParseItems = Callable[[List[Any]], List[Dict]]
+
+
+class KeywordSearchEngine:
+    """
+    关键词搜索调度器
+
+    用法：
+        engine = KeywordSearchEngine(fetch_page, parse_items, budget=get_host_budget(host))
+        async for batch in engine.iter_batches(keywords, limit=100):
+            pipeline.process(batch.notes)
+
+        results = await engine.crawl(keywords, limit=100)   # {关键词: 笔记列表}
+    """
+
+    def __init__(
+        self,
+        fetch_page: FetchPage,
+        parse_items: ParseItems,
+        budget=None,
+        name: str = 'default',
+        page_size: int = 20,
+        max_pages: int = 50,
+        keyword_concurrency: int = 8,
+        queue_size: int = 64,
+        item_id: Callable[[Dict], str] = lambda note: note.get('platform_content_id')
+    ):
+        """
+        Args:
+            fetch_page: 按 (关键词, 页码, 每页数量) 请求一页，失败返回None
+            parse_items: 把一页原始条目解析为笔记
+            budget: 每个请求进入的异步上下文（如 HostBudget），控制并发和速率
+            name: 名称，用于日志
+            page_size: 每页数量
+            max_pages: 单个关键词最多翻页数
+            keyword_concurrency: 同时翻页的关键词数
+            queue_size: 待消费批次上限，消费慢时反压请求
+            item_id: 取笔记ID，用于跨关键词去重
+        """
+        self.fetch_page = fetch_page
+        self.parse_items = parse_items
+        self.budget = budget if budget is not None else asyncio.Semaphore(4)
+        self.name = name
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.keyword_concurrency = keyword_concurrency
+        self.queue_size = queue_size
+        self.item_id = item_id
+
+        # 笔记ID -> 搜到它的关键词
+        self.note_keywords: Dict[str, List[str]] = {}
+
+        self.stats = {
+            'keywords': 0,
+            'pages': 0,
+            'notes': 0,
+            'duplicates': 0,
+            'prefetch_discarded': 0,
+            'errors': 0
+        }
+
+    async def _fetch(self, keyword: str, page: int) -> Optional[SearchPage]:
+        """在预算内执行一次请求，异常记为失败"""
+        async with self.budget:
+            try:
+                return await self.fetch_page(keyword, page, self.page_size)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats['errors'] += 1
+                logger.error(f"[{self.name}] Error searching '{keyword}' page {page}: {str(e)}")
+                return None
+
+    def _dedup(self, keyword: str, notes: List[Dict]):
+        """拆分为首次出现的笔记和其它关键词已输出的笔记ID"""
+        new, duplicates = [], []
+        for note in notes:
+            note_id = self.item_id(note)
+            keywords = self.note_keywords.get(note_id)
+            if keywords is None:
+                self.note_keywords[note_id] = [keyword]
+                new.append(note)
+                continue
+            # 本关键词前几页已出现过的直接丢弃
+            if keyword not in keywords:
+                keywords.append(keyword)
+                duplicates.append(note_id)
+        return new, duplicates
+
+    async def _search_keyword(self, queue: asyncio.Queue, keyword: str, limit: int):
+        """翻完一个关键词：当前页返回后先发出下一页请求，再解析当前页"""
+        self.stats['keywords'] += 1
+        found = 0
+        page = 1
+        pending = asyncio.ensure_future(self._fetch(keyword, page))
+        try:
+            while pending is not None:
+                result = await pending
+                pending = None
+                if result is None or not result.items:
+                    break
+                self.stats['pages'] += 1
+
+                if result.has_more and page < self.max_pages and found + len(result.items) < limit:
+                    pending = asyncio.ensure_future(self._fetch(keyword, page + 1))
+                    # 让出一次，使下一页请求在解析当前页之前真正发出
+                    await asyncio.sleep(0)
+
+                notes = self.parse_items(result.items)[:limit - found]
+                found += len(notes)
+                new, duplicates = self._dedup(keyword, notes)
+                self.stats['notes'] += len(new)
+                self.stats['duplicates'] += len(duplicates)
+                await queue.put(KeywordBatch(keyword, page, new, duplicates))
+
+                if not notes or found >= limit:
+                    break
+                page += 1
+        finally:
+            if pending is not None:
+                self.stats['prefetch_discarded'] += 1
+                pending.cancel()
+                await asyncio.gather(pending, return_exceptions=True)
+
+        logger.info(f"[{self.name}] Keyword '{keyword}' done: {found} notes in {page} pages")
+
+    async def _produce(self, queue: asyncio.Queue, keywords: List[str], limit: int):
+        """keyword_concurrency 个任务依次领取关键词"""
+        remaining = iter(keywords)
+
+        async def worker():
+            for keyword in remaining:
+                try:
+                    await self._search_keyword(queue, keyword, limit)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self.stats['errors'] += 1
+                    logger.error(f"[{self.name}] Error searching keyword '{keyword}': {str(e)}")
+
+        workers = [asyncio.ensure_future(worker()) for _ in range(min(self.keyword_concurrency, len(keywords)))]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+        await queue.put(_DONE)
+
+    async def iter_batches(self, keywords: Iterable[str], limit: int = 100) -> AsyncIterator[KeywordBatch]:
+        """
+        流式返回各关键词的结果批次（按到达顺序，不同关键词交错）
+
+        Args:
+            keywords: 关键词（重复的只搜一次）
+            limit: 每个关键词最多取的笔记数（含重复笔记）
+        """
+        keywords = list(dict.fromkeys(keywords))
+        if not keywords:
+            return
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        producer = asyncio.ensure_future(self._produce(queue, keywords, limit))
+        try:
+            while True:
+                batch = await queue.get()
+                if batch is _DONE:
+                    break
+                yield batch
+        finally:
+            producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
+
+    async def crawl(
+        self,
+        keywords: Iterable[str],
+        limit: int = 100,
+        sink: Callable[[KeywordBatch], Any] = None
+    ) -> Dict[str, List[Dict]]:
+        """
+        搜索全部关键词
+
+        Args:
+            keywords: 关键词
+            limit: 每个关键词最多取的笔记数
+            sink: 每个批次到达时调用（可以是协程函数），用于流式写入管道
+
+        Returns:
+            关键词 -> 笔记列表（重复的笔记在每个关键词下都出现，为同一对象）
+        """
+        keywords = list(dict.fromkeys(keywords))
+        notes_by_id: Dict[str, Dict] = {}
+        results: Dict[str, List[Dict]] = {keyword: [] for keyword in keywords}
+
+        batches = self.iter_batches(keywords, limit=limit)
+        try:
+            async for batch in batches:
+                if sink is not None:
+                    outcome = sink(batch)
+                    if inspect.isawaitable(outcome):
+                        await outcome
+                for note in batch.notes:
+                    notes_by_id[self.item_id(note)] = note
+                results[batch.keyword].extend(batch.notes)
+                results[batch.keyword].extend(
+                    notes_by_id[note_id] for note_id in batch.duplicates if note_id in notes_by_id
+                )
+        finally:
+            await batches.aclose()
+        return results
+
+    def get_stats(self) -> Dict:
+        """获取搜索统计"""
+        return dict(self.stats)
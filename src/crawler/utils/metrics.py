@@ -0,0 +1,685 @@
+"""
+爬虫指标收集
+
+提供计数器、仪表盘和延迟直方图，以及定期导出快照（Prometheus文本格式）
+和基于阈值的实时告警。
+
+热路径上的自增操作不加锁：每个线程写入自己的计数单元，
+只有在导出快照时才汇总各线程的数值。
+"""
+
+import bisect
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 默认的延迟分桶（秒）
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class _Cell:
+    """单个线程持有的计数单元"""
+
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0.0
+
+
+class _HistogramCell:
+    """单个线程持有的直方图单元"""
+
+    __slots__ = ('counts', 'sum', 'count')
+
+    def __init__(self, size: int):
+        self.counts = [0] * size
+        self.sum = 0.0
+        self.count = 0
+
+
+class _ThreadCells:
+    """
+    按线程分配计数单元
+
+    每个线程第一次写入时创建自己的单元并登记，之后的写入只访问本线程的单元，
+    因此无需加锁；读取时汇总全部单元。
+    """
+
+    def __init__(self, factory: Callable):
+        self._factory = factory
+        self._local = threading.local()
+        self._cells = []
+        self._lock = threading.Lock()
+
+    def get(self):
+        cell = getattr(self._local, 'cell', None)
+        if cell is None:
+            cell = self._factory()
+            with self._lock:
+                self._cells.append(cell)
+            self._local.cell = cell
+        return cell
+
+    def all(self) -> List:
+        with self._lock:
+            return list(self._cells)
+
+
+class _CounterChild:
+    """带具体标签值的计数器"""
+
+    def __init__(self):
+        self._cells = _ThreadCells(_Cell)
+
+    def inc(self, amount: float = 1):
+        """自增（只允许非负数）"""
+        if amount < 0:
+            raise ValueError("Counter can only be incremented by non-negative amounts")
+        self._cells.get().value += amount
+
+    @property
+    def value(self) -> float:
+        return sum(cell.value for cell in self._cells.all())
+
+
+class _GaugeChild:
+    """带具体标签值的仪表盘"""
+
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def set(self, value: float):
+        self._value = float(value)
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1):
+        with self._lock:
+            self._value -= amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+
+class _HistogramChild:
+    """带具体标签值的直方图"""
+
+    def __init__(self, buckets: Sequence[float]):
+        self._buckets = tuple(buckets)
+        size = len(self._buckets) + 1
+        self._cells = _ThreadCells(lambda: _HistogramCell(size))
+
+    def observe(self, value: float):
+        cell = self._cells.get()
+        cell.counts[bisect.bisect_left(self._buckets, value)] += 1
+        cell.sum += value
+        cell.count += 1
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        """统计代码块耗时"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def snapshot(self) -> Tuple[List[int], float, int]:
+        """
+        汇总各线程数据
+
+        Returns:
+            (累计分桶计数, 总和, 总次数)，累计分桶最后一项对应 +Inf
+        """
+        counts = [0] * (len(self._buckets) + 1)
+        total_sum = 0.0
+        total_count = 0
+        for cell in self._cells.all():
+            for i, c in enumerate(cell.counts):
+                counts[i] += c
+            total_sum += cell.sum
+            total_count += cell.count
+
+        cumulative = []
+        running = 0
+        for c in counts:
+            running += c
+            cumulative.append(running)
+        return cumulative, total_sum, total_count
+
+    @property
+    def sum(self) -> float:
+        return sum(cell.sum for cell in self._cells.all())
+
+    @property
+    def count(self) -> int:
+        return sum(cell.count for cell in self._cells.all())
+
+
+class _Metric:
+    """指标基类，按标签值管理子指标"""
+
+    metric_type = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, **labels):
+        """
+        获取指定标签值的子指标
+
+        子指标创建后会被缓存，调用方可以持有返回值以避免重复查找。
+        """
+        try:
+            key = tuple(str(labels[name]) for name in self.labelnames)
+        except KeyError:
+            key = None
+        if key is None or len(labels) != len(self.labelnames):
+            raise ValueError(f"Expected labels {self.labelnames}, got {tuple(labels)}")
+
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.get(key)
+                if child is None:
+                    child = self._new_child()
+                    self._children[key] = child
+        return child
+
+    def _default(self):
+        if self.labelnames:
+            raise ValueError(f"Metric {self.name} requires labels {self.labelnames}")
+        return self.labels()
+
+    def children(self) -> List[Tuple[Dict[str, str], object]]:
+        with self._lock:
+            items = list(self._children.items())
+        return [(dict(zip(self.labelnames, key)), child) for key, child in items]
+
+
+class Counter(_Metric):
+    """单调递增计数器"""
+
+    metric_type = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1):
+        self._default().inc(amount)
+
+
+class Gauge(_Metric):
+    """可增可减的仪表盘"""
+
+    metric_type = 'gauge'
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self._default().set(value)
+
+    def inc(self, amount: float = 1):
+        self._default().inc(amount)
+
+    def dec(self, amount: float = 1):
+        self._default().dec(amount)
+
+
+class Histogram(_Metric):
+    """延迟直方图"""
+
+    metric_type = 'histogram'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self._default().observe(value)
+
+    def time(self):
+        return self._default().time()
+
+
+def _format_labels(labels: Dict[str, str], extra: Dict[str, str] = None) -> str:
+    """格式化Prometheus标签"""
+    if extra:
+        labels = {**labels, **extra}
+    if not labels:
+        return ''
+    parts = []
+    for key, value in labels.items():
+        value = value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+        parts.append(f'{key}="{value}"')
+    return '{' + ','.join(parts) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class MetricsRegistry:
+    """
+    指标注册表
+
+    同名指标只会创建一次，重复注册返回已有实例。
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name: str, documentation: str, labelnames: Sequence[str], **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, documentation, labelnames, **kwargs)
+                self._metrics[name] = metric
+            elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} already registered with a different type or labels")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def metrics(self) -> List[_Metric]:
+        with self._lock:
+            return list(self._metrics.values())
+
+    def render_prometheus(self) -> str:
+        """生成Prometheus文本格式快照"""
+        lines = []
+        for metric in self.metrics():
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.metric_type}')
+
+            for labels, child in metric.children():
+                if metric.metric_type == 'histogram':
+                    cumulative, total_sum, total_count = child.snapshot()
+                    bounds = list(metric.buckets) + [float('inf')]
+                    for bound, count in zip(bounds, cumulative):
+                        label_str = _format_labels(labels, {'le': _format_value(bound)})
+                        lines.append(f'{metric.name}_bucket{label_str} {count}')
+                    label_str = _format_labels(labels)
+                    lines.append(f'{metric.name}_sum{label_str} {_format_value(total_sum)}')
+                    lines.append(f'{metric.name}_count{label_str} {total_count}')
+                else:
+                    label_str = _format_labels(labels)
+                    lines.append(f'{metric.name}{label_str} {_format_value(child.value)}')
+
+        return '\n'.join(lines) + '\n'
+
+
+# 全局默认注册表
+_default_registry = MetricsRegistry()
+
+
+def get_registry() -> MetricsRegistry:
+    """获取全局默认注册表"""
+    return _default_registry
+
+
+# 各爬虫共用的标准指标
+REQUESTS = _default_registry.counter(
+    'crawler_requests_total',
+    'Number of crawler requests by outcome',
+    ('platform', 'endpoint', 'status')
+)
+REQUEST_LATENCY = _default_registry.histogram(
+    'crawler_request_duration_seconds',
+    'Crawler request latency in seconds',
+    ('platform', 'endpoint')
+)
+ITEMS = _default_registry.counter(
+    'crawler_items_total',
+    'Number of items crawled',
+    ('platform', 'type')
+)
+ERRORS = _default_registry.counter(
+    'crawler_errors_total',
+    'Number of crawler errors',
+    ('platform',)
+)
+PIPELINE_ITEMS = _default_registry.counter(
+    'pipeline_items_total',
+    'Number of items handled by data pipelines by result',
+    ('pipeline', 'type', 'result')
+)
+ALERT_ACTIVE = _default_registry.gauge(
+    'crawler_alert_active',
+    'Whether a monitoring threshold is currently breached',
+    ('platform', 'alert')
+)
+
+
+class RequestTracker:
+    """
+    单次请求的计时与结果记录
+
+    正常退出记为成功，调用 fail() 或抛出异常记为失败。
+    """
+
+    __slots__ = ('platform', 'endpoint', 'failed', '_start')
+
+    def __init__(self, platform: str, endpoint: str):
+        self.platform = platform
+        self.endpoint = endpoint
+        self.failed = False
+        self._start = 0.0
+
+    def fail(self):
+        self.failed = True
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self._start
+        REQUEST_LATENCY.labels(platform=self.platform, endpoint=self.endpoint).observe(elapsed)
+        status = 'error' if (exc_type is not None or self.failed) else 'success'
+        REQUESTS.labels(platform=self.platform, endpoint=self.endpoint, status=status).inc()
+        return False
+
+
+def track_request(platform: str, endpoint: str) -> RequestTracker:
+    """
+    记录请求耗时和结果
+
+    用法：
+        with track_request('bilibili', 'video_detail') as req:
+            ...
+            if response.status != 200:
+                req.fail()
+    """
+    return RequestTracker(platform, endpoint)
+
+
+class ThresholdAlerter:
+    """
+    基于阈值的告警
+
+    每次评估使用上次评估以来的增量计算成功率、错误率和平均响应时间，
+    超过阈值时记录告警日志并设置 crawler_alert_active 指标，恢复时清除。
+    """
+
+    def __init__(
+        self,
+        thresholds: Dict[str, float],
+        registry: MetricsRegistry = None,
+        on_alert: Callable[[str, str, float, float], None] = None
+    ):
+        """
+        Args:
+            thresholds: 阈值配置，支持 success_rate、error_rate、response_time
+            registry: 指标注册表
+            on_alert: 告警回调 (platform, alert, value, threshold)
+        """
+        self.thresholds = dict(thresholds)
+        self.registry = registry or _default_registry
+        self.on_alert = on_alert
+        self._last: Dict[str, Tuple[float, float, float, int]] = {}
+        self._active: Dict[Tuple[str, str], bool] = {}
+
+    def _totals(self) -> Dict[str, List[float]]:
+        """按平台汇总 [成功数, 失败数, 耗时总和, 耗时次数]"""
+        totals: Dict[str, List[float]] = {}
+
+        requests = self.registry.get('crawler_requests_total')
+        if requests is not None:
+            for labels, child in requests.children():
+                entry = totals.setdefault(labels['platform'], [0.0, 0.0, 0.0, 0])
+                if labels['status'] == 'success':
+                    entry[0] += child.value
+                else:
+                    entry[1] += child.value
+
+        latency = self.registry.get('crawler_request_duration_seconds')
+        if latency is not None:
+            for labels, child in latency.children():
+                entry = totals.setdefault(labels['platform'], [0.0, 0.0, 0.0, 0])
+                entry[2] += child.sum
+                entry[3] += child.count
+
+        return totals
+
+    def evaluate(self) -> List[Dict]:
+        """
+        评估一次阈值
+
+        Returns:
+            当前处于告警状态的列表
+        """
+        alerts = []
+
+        for platform, (success, failed, latency_sum, latency_count) in self._totals().items():
+            last = self._last.get(platform, (0.0, 0.0, 0.0, 0))
+            self._last[platform] = (success, failed, latency_sum, latency_count)
+
+            d_success = success - last[0]
+            d_failed = failed - last[1]
+            d_total = d_success + d_failed
+            d_latency_count = latency_count - last[3]
+
+            values = {}
+            if d_total > 0:
+                values['success_rate'] = d_success / d_total
+                values['error_rate'] = d_failed / d_total
+            if d_latency_count > 0:
+                values['response_time'] = (latency_sum - last[2]) / d_latency_count
+
+            for name, value in values.items():
+                threshold = self.thresholds.get(name)
+                if threshold is None:
+                    continue
+
+                # 成功率低于阈值告警，其余指标高于阈值告警
+                breached = value < threshold if name == 'success_rate' else value > threshold
+                key = (platform, name)
+
+                if breached:
+                    alerts.append({
+                        'platform': platform,
+                        'alert': name,
+                        'value': value,
+                        'threshold': threshold
+                    })
+                    if not self._active.get(key):
+                        logger.warning(
+                            f"[Metrics] Alert {name} on {platform}: "
+                            f"{value:.3f} (threshold {threshold})"
+                        )
+                        if self.on_alert:
+                            self.on_alert(platform, name, value, threshold)
+                elif self._active.get(key):
+                    logger.info(f"[Metrics] Alert {name} on {platform} resolved: {value:.3f}")
+
+                self._active[key] = breached
+                ALERT_ACTIVE.labels(platform=platform, alert=name).set(1 if breached else 0)
+
+        return alerts
+
+
+class MetricsExporter:
+    """
+    后台指标导出
+
+    定期把注册表快照写入文件，或在本地HTTP端口提供 /metrics；
+    如果配置了告警器，每个周期评估一次阈值。
+    """
+
+    def __init__(
+        self,
+        registry: MetricsRegistry = None,
+        interval: float = 60,
+        path: str = None,
+        port: int = None,
+        host: str = '127.0.0.1',
+        alerter: ThresholdAlerter = None
+    ):
+        self.registry = registry or _default_registry
+        self.interval = interval
+        self.path = Path(path) if path else None
+        self.port = port
+        self.host = host
+        self.alerter = alerter
+
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._server_thread: Optional[threading.Thread] = None
+
+    def write_snapshot(self):
+        """原子地写入一次快照文件"""
+        if not self.path:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+        tmp_path.write_text(self.registry.render_prometheus(), encoding='utf-8')
+        os.replace(tmp_path, self.path)
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            self._tick()
+
+    def _tick(self):
+        try:
+            if self.alerter:
+                self.alerter.evaluate()
+            self.write_snapshot()
+        except Exception as e:
+            logger.error(f"[Metrics] Export failed: {str(e)}")
+
+    def _start_server(self):
+        registry = self.registry
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = registry.render_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), MetricsHandler)
+        self._server_thread = threading.Thread(
+            target=self._server.serve_forever, name='metrics-http', daemon=True
+        )
+        self._server_thread.start()
+        logger.info(f"[Metrics] Serving on http://{self.host}:{self._server.server_port}/metrics")
+
+    @property
+    def server_port(self) -> Optional[int]:
+        return self._server.server_port if self._server else None
+
+    def start(self) -> 'MetricsExporter':
+        """启动后台导出线程"""
+        if self._thread and self._thread.is_alive():
+            return self
+
+        if self.port is not None:
+            self._start_server()
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='metrics-exporter', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """停止导出，并写入最后一次快照"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        self._tick()
+
+
+def start_exporter(
+    monitoring_config: Dict,
+    path: str = None,
+    port: int = None
+) -> Optional[MetricsExporter]:
+    """
+    按监控配置启动导出器
+
+    Args:
+        monitoring_config: 形如 bilibili settings 中的 MONITORING_CONFIG
+        path: 快照文件路径
+        port: HTTP端口
+
+    Returns:
+        已启动的导出器，监控未启用时返回None
+    """
+    if not monitoring_config.get('enabled', True):
+        return None
+
+    alerter = None
+    if monitoring_config.get('thresholds'):
+        alerter = ThresholdAlerter(monitoring_config['thresholds'])
+
+    exporter = MetricsExporter(
+        interval=monitoring_config.get('report_interval', 60),
+        path=path,
+        port=port,
+        alerter=alerter
+    )
+    return exporter.start()
@@ -0,0 +1,177 @@
+"""
+自适应请求节奏控制
+
+令牌桶（容量 burst_size）按当前间隔补充令牌，间隔随结果调整：
+- 被拦截（403/429、验证码页）时按 adaptive_decrease 放慢，并清空已攒的令牌
+- 连续 burst_size 次成功后按 adaptive_increase 加快
+- 间隔限制在 [min_delay, max_delay] 内
+
+同一平台的HTTP爬虫和浏览器爬虫共用一个实例（get_pacer），
+当前间隔和调整历史可通过 get_stats 和 crawler_pace_delay_seconds 指标导出。
+"""
+
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+from .metrics import get_registry
+
+logger = logging.getLogger(__name__)
+
+PACE_DELAY = get_registry().gauge(
+    'crawler_pace_delay_seconds',
+    'Current adaptive delay between requests',
+    ('platform',)
+)
+
+# 视为被拦截的状态码
+BLOCKED_STATUSES = (403, 429)
+
+DEFAULT_PACE_CONFIG = {
+    'enabled': True,
+    'adaptive': True,
+    'burst_size': 3,
+    'refill_rate': 1.0,
+    'adaptive_increase': 1.1,
+    'adaptive_decrease': 0.5,
+    'min_delay': 1.0,
+    'max_delay': 10.0,
+}
+
+
+class AdaptivePacer:
+    """
+    自适应节奏控制器
+
+    用法：
+        pacer = get_pacer('douyin', RATE_LIMIT_CONFIG)
+        await pacer.wait()
+        response = await session.get(url)
+        pacer.observe(response.status)
+    """
+
+    def __init__(self, name: str = 'default', config: Dict[str, Any] = None, history_size: int = 200):
+        """
+        Args:
+            name: 平台名称，用于日志和指标标签
+            config: 速率配置，键同 DEFAULT_PACE_CONFIG（多余的键忽略）
+            history_size: 保留的间隔调整记录数
+        """
+        config = {**DEFAULT_PACE_CONFIG, **(config or {})}
+        self.name = name
+        self.enabled = config['enabled']
+        self.adaptive = config['adaptive']
+        self.burst_size = max(1, int(config['burst_size']))
+        self.increase = config['adaptive_increase']
+        self.decrease = config['adaptive_decrease']
+        self.min_delay = config['min_delay']
+        self.max_delay = config['max_delay']
+
+        # 初始间隔取 1/refill_rate
+        self.delay = self._clamp(1.0 / config['refill_rate'])
+        self.tokens = float(self.burst_size)
+        self._last_refill = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+        self._streak = 0
+
+        self.history = deque(maxlen=history_size)
+        self.stats = {
+            'requests': 0,
+            'successes': 0,
+            'blocks': 0,
+            'waited_seconds': 0.0
+        }
+        self._record('init')
+
+    def _clamp(self, delay: float) -> float:
+        return min(self.max_delay, max(self.min_delay, delay))
+
+    def _record(self, reason: str):
+        self.history.append({'time': time.time(), 'delay': round(self.delay, 3), 'reason': reason})
+        PACE_DELAY.labels(platform=self.name).set(self.delay)
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst_size, self.tokens + (now - self._last_refill) / self.delay)
+        self._last_refill = now
+
+    async def wait(self):
+        """等待下一个请求名额"""
+        self.stats['requests'] += 1
+        if not self.enabled:
+            return
+
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            self._refill()
+            if self.tokens < 1:
+                # 加一点抖动，避免请求间隔过于规律
+                wait_time = (1 - self.tokens) * self.delay * random.uniform(1.0, 1.2)
+                self.stats['waited_seconds'] += wait_time
+                await asyncio.sleep(wait_time)
+                self._refill()
+            self.tokens = max(0.0, self.tokens - 1)
+
+    def success(self):
+        """记录一次成功，连续 burst_size 次成功后加快"""
+        self.stats['successes'] += 1
+        if not self.adaptive:
+            return
+
+        self._streak += 1
+        if self._streak >= self.burst_size:
+            self._streak = 0
+            delay = self._clamp(self.delay / self.increase)
+            if delay != self.delay:
+                self.delay = delay
+                self._record('success')
+
+    def blocked(self, reason: str = 'blocked'):
+        """记录一次拦截：放慢并清空令牌"""
+        self.stats['blocks'] += 1
+        self._streak = 0
+        self.tokens = 0.0
+        self._last_refill = time.monotonic()
+        if not self.adaptive:
+            return
+
+        self.delay = self._clamp(self.delay / self.decrease)
+        logger.warning(f"[{self.name}] Request blocked ({reason}), pace slowed to {self.delay:.2f}s")
+        self._record(reason)
+
+    def observe(self, status: int):
+        """按HTTP状态码记录结果；其它非200状态不影响节奏"""
+        if status in BLOCKED_STATUSES:
+            self.blocked(str(status))
+        elif status == 200:
+            self.success()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """当前间隔、统计和调整历史"""
+        return {
+            **self.stats,
+            'delay': self.delay,
+            'min_delay': self.min_delay,
+            'max_delay': self.max_delay,
+            'history': list(self.history)
+        }
+
+
+_pacers: Dict[str, AdaptivePacer] = {}
+
+
+def get_pacer(name: str, config: Dict[str, Any] = None) -> AdaptivePacer:
+    """
+    获取平台共享的节奏控制器
+
+    config 只在首次创建时生效。
+    """
+    pacer = _pacers.get(name)
+    if pacer is None:
+        pacer = _pacers[name] = AdaptivePacer(name, config)
+    return pacer
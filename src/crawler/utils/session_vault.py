@@ -0,0 +1,339 @@
+"""
+登录会话保险箱
+
+按 平台/账号 保存已验证的cookie，磁盘上用Fernet加密：
+- 每个账号一个文件 data/sessions/<平台>/<账号>.session
+- 记录创建、验证和过期时间，过期时间取cookie中最早的过期时间，
+  没有时按TTL计算；过期或无法解密的会话视为不存在
+- 同一进程内按文件修改时间缓存解密结果，进程启动时读取一次即可，
+  不再每次访问首页获取cookie
+
+密钥取环境变量 CRAWLER_VAULT_KEY，没有时在保险箱目录下生成 vault.key（仅本人可读）。
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass, field, replace
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+try:
+    from cryptography.fernet import Fernet, InvalidToken
+except ImportError:
+    Fernet = None
+    InvalidToken = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_VAULT_DIR = 'data/sessions'
+KEY_ENV = 'CRAWLER_VAULT_KEY'
+
+# 密钥文件为空时的重读次数和间隔（秒）
+KEY_READ_RETRIES = 20
+KEY_READ_INTERVAL = 0.05
+
+# 没有cookie过期时间时的默认有效期
+DEFAULT_SESSION_TTL = 7 * 86400
+
+CookieInput = Union[Dict[str, str], List[Dict[str, Any]], str]
+
+
+def normalize_cookies(cookies: CookieInput, domain: str = None) -> List[Dict[str, Any]]:
+    """
+    统一cookie格式为 [{'name', 'value', 'domain', 'path', 'expires'?, 'secure'?, 'httpOnly'?}]
+
+    支持 {name: value} 字典、"a=1; b=2" 字符串，以及 Selenium（expiry）、
+    CDP/Playwright（expires）格式的列表。
+    """
+    if isinstance(cookies, str):
+        cookies = dict(
+            part.strip().split('=', 1) for part in cookies.split(';') if '=' in part
+        )
+    if isinstance(cookies, dict):
+        cookies = [{'name': name, 'value': value} for name, value in cookies.items()]
+
+    result = []
+    for cookie in cookies:
+        item = {
+            'name': cookie['name'],
+            'value': str(cookie.get('value', '')),
+            'domain': cookie.get('domain') or domain,
+            'path': cookie.get('path', '/'),
+        }
+        expires = cookie.get('expires', cookie.get('expiry'))
+        # CDP 用 -1 表示会话cookie
+        if expires is not None and float(expires) > 0:
+            item['expires'] = float(expires)
+        for key in ('secure', 'httpOnly'):
+            if key in cookie:
+                item[key] = bool(cookie[key])
+        result.append(item)
+    return result
+
+
+@dataclass
+class Session:
+    """一个账号的登录会话"""
+
+    platform: str
+    account: str
+    cookies: List[Dict[str, Any]]
+    created_at: float
+    validated_at: Optional[float]
+    expires_at: float
+    user_agent: Optional[str] = None
+    meta: Dict[str, Any] = field(default_factory=dict)
+
+    def is_expired(self, now: float = None) -> bool:
+        return (now or time.time()) >= self.expires_at
+
+    def cookie_dict(self) -> Dict[str, str]:
+        return {cookie['name']: cookie['value'] for cookie in self.cookies}
+
+    def cookie_header(self) -> str:
+        """Cookie 请求头"""
+        return '; '.join(f"{cookie['name']}={cookie['value']}" for cookie in self.cookies)
+
+    def cdp_cookies(self) -> List[Dict[str, Any]]:
+        """Network.setCookies 参数格式"""
+        return [{k: v for k, v in cookie.items() if v is not None} for cookie in self.cookies]
+
+
+class SessionVault:
+    """
+    加密的会话保险箱
+
+    用法：
+        vault = get_session_vault()
+        session = vault.get('xiaohongshu')
+        if session is None:
+            cookies = login()              # 登录后验证可用
+            session = vault.save('xiaohongshu', cookies, domain='.xiaohongshu.com')
+
+        # 游客cookie以 validated=False 保存，只在显式要求时返回
+        guest = vault.get('xiaohongshu', include_unvalidated=True)
+        headers['Cookie'] = session.cookie_header()
+
+        # 请求返回未登录/被封时
+        vault.invalidate('xiaohongshu', session.account)
+    """
+
+    def __init__(self, vault_dir: str = DEFAULT_VAULT_DIR, key: Union[str, bytes] = None):
+        """
+        Args:
+            vault_dir: 保险箱目录
+            key: Fernet密钥，默认取 CRAWLER_VAULT_KEY 或 vault_dir/vault.key
+        """
+        if Fernet is None:
+            raise ImportError("cryptography is required for the session vault")
+
+        self.vault_dir = Path(vault_dir)
+        self.vault_dir.mkdir(parents=True, exist_ok=True)
+        self._fernet = Fernet(key or os.getenv(KEY_ENV) or self._load_or_create_key())
+
+        # 路径 -> (修改时间, 会话)
+        self._memo: Dict[Path, Tuple[float, Optional[Session]]] = {}
+        self._lock = threading.Lock()
+
+    def _load_or_create_key(self) -> bytes:
+        """
+        读取或生成 vault.key
+
+        多个进程可能同时启动：新密钥先完整写入临时文件，再用硬链接放到位置上，
+        读到的密钥文件总是完整的；链接时已存在说明其它进程先生成了，改为读取它的。
+        """
+        key_file = self.vault_dir / 'vault.key'
+
+        for _ in range(KEY_READ_RETRIES):
+            try:
+                key = key_file.read_bytes().strip()
+            except FileNotFoundError:
+                key = None
+
+            if key:
+                return key
+            if key is None:
+                self._create_key(key_file)
+                continue
+
+            # 空文件（旧版本写到一半的密钥），稍后重读
+            time.sleep(KEY_READ_INTERVAL)
+
+        raise ValueError(f"Session vault key file is empty: {key_file}")
+
+    @staticmethod
+    def _create_key(key_file: Path):
+        """生成新密钥并放到 key_file，已存在时保留已有的"""
+        tmp_path = key_file.with_name(f'{key_file.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(Fernet.generate_key())
+                f.flush()
+                os.fsync(f.fileno())
+            os.link(tmp_path, key_file)
+            logger.info(f"Created session vault key: {key_file}")
+        except FileExistsError:
+            pass
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    @staticmethod
+    def _safe_name(name: str) -> str:
+        return re.sub(r'[^A-Za-z0-9_.@-]', '_', name) or 'default'
+
+    def _path(self, platform: str, account: str) -> Path:
+        return self.vault_dir / self._safe_name(platform) / f"{self._safe_name(account)}.session"
+
+    def _read(self, path: Path) -> Optional[Session]:
+        """读取并解密会话文件，按修改时间缓存"""
+        try:
+            mtime = path.stat().st_mtime
+        except OSError:
+            return None
+
+        with self._lock:
+            memo = self._memo.get(path)
+            if memo is not None and memo[0] == mtime:
+                return memo[1]
+
+        try:
+            payload = self._fernet.decrypt(path.read_bytes())
+            session = Session(**json.loads(payload))
+        except (OSError, ValueError, TypeError, InvalidToken) as e:
+            logger.warning(f"Unreadable session file {path}: {e}")
+            session = None
+
+        with self._lock:
+            self._memo[path] = (mtime, session)
+        return session
+
+    def save(
+        self,
+        platform: str,
+        cookies: CookieInput,
+        account: str = 'default',
+        domain: str = None,
+        ttl: float = DEFAULT_SESSION_TTL,
+        validated: bool = True,
+        user_agent: str = None,
+        meta: Dict[str, Any] = None,
+        expiry_cookies: Sequence[str] = None
+    ) -> Session:
+        """
+        保存会话（覆盖同账号的旧会话）
+
+        Args:
+            platform: 平台
+            cookies: cookie，格式见 normalize_cookies
+            account: 账号名
+            domain: cookie没有domain时使用的域
+            ttl: cookie没有过期时间时的有效期（秒）
+            validated: 是否已验证可用
+            user_agent: 获取cookie时使用的UA
+            meta: 其它元数据
+            expiry_cookies: 只按这些cookie（如登录态cookie）计算过期时间，默认全部
+        """
+        now = time.time()
+        normalized = normalize_cookies(cookies, domain)
+        expiries = [
+            cookie['expires'] for cookie in normalized
+            if 'expires' in cookie and (expiry_cookies is None or cookie['name'] in expiry_cookies)
+        ]
+        expires_at = min([now + ttl, *expiries])
+
+        session = Session(
+            platform=platform,
+            account=account,
+            cookies=normalized,
+            created_at=now,
+            validated_at=now if validated else None,
+            expires_at=expires_at,
+            user_agent=user_agent,
+            meta=meta or {}
+        )
+
+        self._write(session)
+        logger.info(f"Saved {platform} session for {account}, expires {time.ctime(expires_at)}")
+        return session
+
+    def _write(self, session: Session):
+        """加密写入（先写临时文件再替换）"""
+        path = self._path(session.platform, session.account)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix('.tmp')
+        tmp_path.write_bytes(self._fernet.encrypt(json.dumps(asdict(session), ensure_ascii=False).encode('utf-8')))
+        os.chmod(tmp_path, 0o600)
+        tmp_path.replace(path)
+
+        with self._lock:
+            self._memo.pop(path, None)
+
+    def load(self, platform: str, account: str = 'default') -> Optional[Session]:
+        """读取指定账号的会话，不存在或已过期返回None"""
+        session = self._read(self._path(platform, account))
+        if session is None or session.is_expired():
+            return None
+        return session
+
+    def get(self, platform: str, account: str = None, include_unvalidated: bool = False) -> Optional[Session]:
+        """
+        取一个可用会话
+
+        默认只返回已验证的会话，游客cookie等未验证的会话需要 include_unvalidated=True
+        才会返回。指定账号时只取该账号；否则在未过期的会话中优先取已验证、最近验证的。
+        """
+        if account is not None:
+            sessions = [self.load(platform, account)]
+        else:
+            sessions = [session for session in self.sessions(platform) if not session.is_expired()]
+
+        sessions = [
+            session for session in sessions
+            if session is not None and (include_unvalidated or session.validated_at is not None)
+        ]
+        if not sessions:
+            return None
+        return max(sessions, key=lambda s: (s.validated_at is not None, s.validated_at or 0, s.created_at))
+
+    def sessions(self, platform: str) -> List[Session]:
+        """平台下的全部会话（含过期的），用于查看过期情况"""
+        platform_dir = self.vault_dir / self._safe_name(platform)
+        sessions = [self._read(path) for path in sorted(platform_dir.glob('*.session'))]
+        return [session for session in sessions if session is not None]
+
+    def mark_validated(self, platform: str, account: str = 'default') -> Optional[Session]:
+        """记录会话刚被验证可用"""
+        session = self.load(platform, account)
+        if session is None:
+            return None
+        session = replace(session, validated_at=time.time())
+        self._write(session)
+        return session
+
+    def invalidate(self, platform: str, account: str = 'default'):
+        """删除失效的会话"""
+        path = self._path(platform, account)
+        path.unlink(missing_ok=True)
+        with self._lock:
+            self._memo.pop(path, None)
+        logger.info(f"Invalidated {platform} session for {account}")
+
+
+_vault: Optional[SessionVault] = None
+
+
+def get_session_vault() -> Optional[SessionVault]:
+    """
+    获取进程内共享的会话保险箱
+
+    未安装 cryptography 时返回None，调用方按没有会话处理。
+    """
+    global _vault
+    if _vault is None and Fernet is not None:
+        _vault = SessionVault(os.getenv('CRAWLER_VAULT_DIR', DEFAULT_VAULT_DIR))
+    return _vault
@@ -0,0 +1,285 @@
+"""
+短链接解析
+
+v.douyin.com、xhslink.com、b23.tv 等短链接统一在这里解析：
+- 逐跳请求（先 HEAD，不支持时再 GET），一旦某一跳的地址里能识别出
+  平台ID就停止，不再跟随后面的跳转
+- 解析结果（短链接 -> 平台、类型、ID、落地地址）写入磁盘缓存，带TTL；
+  落地地址无法识别（如短链接服务直接返回的验证码页）只短时间缓存
+- 批量解析时去重并发请求，相同短链接只请求一次
+"""
+
+import asyncio
+import logging
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+
+from .cache import CacheBackend, FileCache, _MISSING
+from .metrics import track_request
+from .singleflight import SingleFlight
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+logger = logging.getLogger(__name__)
+
+# 短链接域名 -> 平台
+SHORT_LINK_HOSTS = {
+    'v.douyin.com': 'douyin',
+    'xhslink.com': 'xiaohongshu',
+    'b23.tv': 'bilibili',
+}
+
+# 可识别的落地地址：(平台, 类型, 正则)，按顺序匹配
+ID_PATTERNS: List[Tuple[str, str, str]] = [
+    ('douyin', 'video', r'douyin\.com/(?:share/)?(?:video|note)/(\d+)'),
+    ('douyin', 'video', r'douyin\.com/.*[?&](?:modal_id|item_ids)=(\d+)'),
+    ('douyin', 'user', r'douyin\.com/(?:share/)?user/([a-zA-Z0-9_-]+)'),
+    ('xiaohongshu', 'note', r'xiaohongshu\.com/(?:explore|discovery/item)/([a-zA-Z0-9]{24})'),
+    ('xiaohongshu', 'note', r'xiaohongshu\.com/user/profile/[a-zA-Z0-9]+/([a-zA-Z0-9]{24})'),
+    ('xiaohongshu', 'user', r'xiaohongshu\.com/user/profile/([a-zA-Z0-9]+)'),
+    ('bilibili', 'video', r'bilibili\.com/video/(BV[a-zA-Z0-9]{10})'),
+    ('bilibili', 'video', r'bilibili\.com/video/(av\d+)'),
+    ('bilibili', 'user', r'space\.bilibili\.com/(\d+)'),
+]
+
+_COMPILED_PATTERNS = [(platform, kind, re.compile(pattern)) for platform, kind, pattern in ID_PATTERNS]
+
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+
+# 落地地址无法识别时的缓存时间(秒)，过后重新解析
+UNRECOGNIZED_TTL = 600
+
+DEFAULT_USER_AGENT = (
+    'Mozilla/5.0 (iPhone; CPU iPhone OS 17_2 like Mac OS X) AppleWebKit/605.1.15 '
+    '(KHTML, like Gecko) Version/17.0 Mobile/15E148 Safari/604.1'
+)
+
+
+def is_short_link(url: str) -> bool:
+    """是否为已知平台的短链接"""
+    return urlparse(url if '://' in url else 'https://' + url).netloc.lower() in SHORT_LINK_HOSTS
+
+
+def match_id(url: str) -> Optional[Dict]:
+    """
+    从落地地址中识别平台ID
+
+    Returns:
+        {'platform', 'type', 'id', 'url'}，无法识别返回None
+    """
+    for platform, kind, pattern in _COMPILED_PATTERNS:
+        match = pattern.search(url)
+        if match:
+            return {'platform': platform, 'type': kind, 'id': match.group(1), 'url': url}
+    return None
+
+
+class ShortLinkResolver:
+    """
+    共享的短链接解析器
+
+    用法：
+        resolver = get_short_link_resolver()
+        info = await resolver.resolve('https://v.douyin.com/arLquTQPBYM/')
+        # {'platform': 'douyin', 'type': 'video', 'id': '73...', 'url': 'https://www.iesdouyin.com/share/video/73.../'}
+
+        results = await resolver.resolve_many(urls)
+    """
+
+    def __init__(
+        self,
+        cache: CacheBackend = None,
+        unrecognized_ttl: float = UNRECOGNIZED_TTL,
+        max_hops: int = 5,
+        concurrency: int = 20,
+        timeout: float = 10,
+        user_agent: str = DEFAULT_USER_AGENT
+    ):
+        """
+        Args:
+            cache: 缓存后端，默认 data/cache/short_links 下的磁盘缓存（30天）
+            unrecognized_ttl: 落地地址无法识别的结果的缓存时间(秒)
+            max_hops: 最多跟随的跳转次数
+            concurrency: 批量解析的并发请求数
+            timeout: 单次请求超时(秒)
+            user_agent: 请求使用的User-Agent
+        """
+        self.cache = cache if cache is not None else FileCache('data/cache/short_links', ttl=30 * 86400)
+        self.unrecognized_ttl = unrecognized_ttl
+        self.max_hops = max_hops
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.user_agent = user_agent
+
+        self._session = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._flight = SingleFlight('short_link')
+
+        self.stats = {
+            'cache_hits': 0,
+            'resolved': 0,
+            'unrecognized': 0,
+            'failed': 0,
+            'requests': 0
+        }
+
+    @staticmethod
+    def normalize(url: str) -> str:
+        """缓存键：去掉空白、协议差异和结尾斜杠"""
+        url = url.strip()
+        if '://' not in url:
+            url = 'https://' + url
+        parsed = urlparse(url)
+        return f"{parsed.netloc.lower()}{parsed.path.rstrip('/')}"
+
+    async def _get_session(self):
+        if aiohttp is None:
+            raise ImportError("aiohttp is required for short link resolution")
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                headers={'User-Agent': self.user_agent},
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                connector=aiohttp.TCPConnector(limit=self.concurrency)
+            )
+        return self._session
+
+    async def close(self):
+        if self._session and not self._session.closed:
+            await self._session.close()
+
+    async def _request(self, method: str, url: str) -> Tuple[int, Optional[str]]:
+        """
+        请求一跳，不跟随跳转
+
+        Returns:
+            (状态码, Location)
+        """
+        session = await self._get_session()
+        self.stats['requests'] += 1
+        async with session.request(method, url, allow_redirects=False) as response:
+            return response.status, response.headers.get('Location')
+
+    async def _follow(self, url: str) -> Optional[str]:
+        """
+        逐跳跟随跳转，直到落地地址可识别或不再跳转
+
+        Returns:
+            最后一跳的地址，失败返回None
+        """
+        platform = SHORT_LINK_HOSTS.get(urlparse(url).netloc.lower(), 'short_link')
+
+        with track_request(platform, 'short_link') as req:
+            for _ in range(self.max_hops):
+                status, location = await self._request('HEAD', url)
+                if status not in REDIRECT_STATUSES and status != 200:
+                    # 部分服务不支持HEAD
+                    status, location = await self._request('GET', url)
+
+                if status in REDIRECT_STATUSES and location:
+                    url = urljoin(url, location)
+                    if match_id(url):
+                        return url
+                    continue
+
+                if status == 200:
+                    return url
+
+                req.fail()
+                logger.warning(f"Short link resolution failed: {status} {url}")
+                return None
+
+        return url
+
+    async def resolve(self, short_url: str) -> Optional[Dict]:
+        """
+        解析短链接
+
+        Args:
+            short_url: 短链接（也可以是普通链接，可识别时直接返回）
+
+        Returns:
+            {'platform', 'type', 'id', 'url'}；落地地址无法识别时 platform/type/id 为None，
+            请求失败返回None
+        """
+        direct = match_id(short_url)
+        if direct:
+            return direct
+
+        key = self.normalize(short_url)
+        cached = self.cache.get(key)
+        if cached is not _MISSING:
+            self.stats['cache_hits'] += 1
+            return cached
+
+        return await self._flight.do(key, lambda: self._resolve_uncached(key, short_url))
+
+    async def _resolve_uncached(self, key: str, short_url: str) -> Optional[Dict]:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+
+        url = short_url.strip()
+        if '://' not in url:
+            url = 'https://' + url
+
+        async with self._semaphore:
+            try:
+                final_url = await self._follow(url)
+            except Exception as e:
+                logger.error(f"Error resolving short link {short_url}: {str(e)}")
+                final_url = None
+
+        if final_url is None:
+            self.stats['failed'] += 1
+            return None
+
+        result = match_id(final_url)
+        if result is None:
+            # 可能是验证码/风控页，不能按正常结果缓存30天
+            logger.warning(f"Unrecognized short link target: {short_url} -> {final_url}")
+            result = {'platform': None, 'type': None, 'id': None, 'url': final_url}
+            self.cache.set(key, result, ttl=self.unrecognized_ttl)
+            self.stats['unrecognized'] += 1
+            return result
+
+        self.cache.set(key, result)
+        self.stats['resolved'] += 1
+        return result
+
+    async def resolve_many(self, urls: Iterable[str]) -> Dict[str, Optional[Dict]]:
+        """
+        批量解析短链接
+
+        重复链接只解析一次，请求并发受 concurrency 限制。
+
+        Returns:
+            {原始链接: resolve结果}
+        """
+        unique = list(dict.fromkeys(url.strip() for url in urls if url and url.strip()))
+        results = await asyncio.gather(*[self.resolve(url) for url in unique])
+        return dict(zip(unique, results))
+
+    def get_stats(self) -> Dict:
+        """获取解析统计"""
+        total = (
+            self.stats['cache_hits'] + self.stats['resolved']
+            + self.stats['unrecognized'] + self.stats['failed']
+        )
+        return {
+            **self.stats,
+            'hit_rate': self.stats['cache_hits'] / total if total else 0.0
+        }
+
+
+_resolver: Optional[ShortLinkResolver] = None
+
+
+def get_short_link_resolver() -> ShortLinkResolver:
+    """获取进程内共享的短链接解析器"""
+    global _resolver
+    if _resolver is None:
+        _resolver = ShortLinkResolver()
+    return _resolver
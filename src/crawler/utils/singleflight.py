@@ -0,0 +1,112 @@
+"""
+请求合并（single-flight）
+
+同一时刻对同一个 (endpoint, params) 的多个请求只发出一次，
+其余调用方等待并共享这次请求的结果或异常。
+只合并进行中的请求，不缓存已完成的结果。
+发起请求的调用方被取消时，等待者不会收到 CancelledError，而是由其中一个重新发起请求。
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, Mapping, Optional
+
+from .metrics import get_registry
+
+logger = logging.getLogger(__name__)
+
+SINGLEFLIGHT_CALLS = get_registry().counter(
+    'crawler_singleflight_calls_total',
+    'Calls through single-flight groups by result (executed, shared)',
+    ('group', 'result')
+)
+
+
+class _LeaderCancelled(Exception):
+    """发起请求的调用方被取消，等待者应重新发起"""
+
+
+class SingleFlight:
+    """
+    进行中请求的合并组
+
+    用法：
+        flight = SingleFlight('bilibili_user')
+        data = await flight.do(
+            SingleFlight.make_key(url, params),
+            lambda: self._do_api_request(url, params)
+        )
+    """
+
+    def __init__(self, name: str = 'default'):
+        self.name = name
+        self.executed = 0
+        self.shared = 0
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+        self._executed_counter = SINGLEFLIGHT_CALLS.labels(group=name, result='executed')
+        self._shared_counter = SINGLEFLIGHT_CALLS.labels(group=name, result='shared')
+
+    @staticmethod
+    def make_key(endpoint: str, params: Optional[Mapping] = None) -> Hashable:
+        """由接口地址和参数生成合并键，参数顺序不影响结果"""
+        if not params:
+            return (endpoint,)
+        return (endpoint, tuple(sorted((str(k), str(v)) for k, v in params.items())))
+
+    def in_flight(self, key: Hashable) -> bool:
+        """该键是否有进行中的请求"""
+        return key in self._inflight
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        执行或加入同一个键的请求
+
+        Args:
+            key: 合并键
+            fn: 实际发起请求的协程函数
+
+        Returns:
+            请求结果；请求抛出的异常会传给所有等待者
+        """
+        inflight = self._inflight.get(key)
+        while inflight is not None:
+            self.shared += 1
+            self._shared_counter.inc()
+            try:
+                # shield 避免某个等待者被取消时连带取消共享的请求
+                return await asyncio.shield(inflight)
+            except _LeaderCancelled:
+                # 第一个醒来的等待者重新发起，其余的加入它的请求
+                inflight = self._inflight.get(key)
+
+        self.executed += 1
+        self._executed_counter.inc()
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.set_exception(_LeaderCancelled())
+            future.exception()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # 没有等待者时避免 "exception was never retrieved" 警告
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
+
+    def get_stats(self) -> Dict:
+        """获取合并统计"""
+        total = self.executed + self.shared
+        return {
+            'executed': self.executed,
+            'shared': self.shared,
+            'saved_ratio': self.shared / total if total else 0.0
+        }
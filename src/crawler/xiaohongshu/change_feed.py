@@ -0,0 +1,239 @@
+"""
+小红书用户变更流
+
+按用户保存上次看到的状态，每次抓取主页后只输出变化：
+- 每篇笔记只存一个短摘要（标题、正文、封面等内容字段）和计数
+- 没见过的笔记作为新笔记输出，后续只需为它们抓详情
+- 内容摘要变化的笔记记为已编辑
+- 用户和笔记的计数（粉丝、点赞、收藏、评论等）输出增量，未变化的不输出
+
+状态以SQLite文件保存，数千个用户每天检查一次时每个用户只读写少量行。
+主页只返回最近一页笔记，列表中消失的笔记不视为删除。
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from .extraction import parse_count
+
+logger = logging.getLogger(__name__)
+
+# 本地爬虫 parse_user_state 的字段名
+DEFAULT_NOTE_CONTENT_FIELDS = ('title', 'desc', 'type', 'cover_url')
+DEFAULT_NOTE_COUNTERS = ('liked_count', 'collected_count', 'comment_count')
+DEFAULT_USER_COUNTERS = ('fans_count', 'follows_count')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    user_id TEXT PRIMARY KEY,
+    counters TEXT NOT NULL,
+    checked_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS notes (
+    user_id TEXT NOT NULL,
+    note_id TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    counters TEXT NOT NULL,
+    PRIMARY KEY (user_id, note_id)
+) WITHOUT ROWID;
+"""
+
+
+def note_digest(note: Dict[str, Any], fields: Sequence[str]) -> str:
+    """笔记内容的短摘要（16位十六进制）"""
+    values = [note.get(name) for name in fields]
+    payload = json.dumps(values, ensure_ascii=False, default=str).encode('utf-8')
+    return hashlib.blake2b(payload, digest_size=8).hexdigest()
+
+
+def read_counters(data: Dict[str, Any], names: Sequence[str]) -> Dict[str, int]:
+    """取计数字段（支持 1.2万 这类文本），缺失或无法解析的跳过"""
+    counters = {}
+    for name in names:
+        value = parse_count(data.get(name)) if data.get(name) is not None else None
+        if value is not None:
+            counters[name] = value
+    return counters
+
+
+def counter_deltas(previous: Dict[str, int], current: Dict[str, int]) -> Dict[str, int]:
+    """两次计数的非零差值（上次没有的字段不计）"""
+    return {
+        name: value - previous[name]
+        for name, value in current.items()
+        if name in previous and value != previous[name]
+    }
+
+
+@dataclass
+class UserChange:
+    """
+    一个用户一次检查的变化
+
+    first_seen: 首次检查（此时所有笔记都是新笔记，没有计数增量）
+    new_notes: 没见过的笔记（原样返回）
+    edited_note_ids: 内容摘要变化的笔记ID
+    user_deltas: 用户计数增量，如 {'fans_count': 12}
+    note_deltas: 笔记ID -> 计数增量
+    """
+    user_id: str
+    first_seen: bool = False
+    new_notes: List[Dict] = field(default_factory=list)
+    edited_note_ids: List[str] = field(default_factory=list)
+    user_deltas: Dict[str, int] = field(default_factory=dict)
+    note_deltas: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    checked_at: float = 0.0
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.new_notes or self.edited_note_ids or self.user_deltas or self.note_deltas)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), 'changed': self.changed}
+
+
+class ChangeFeed:
+    """
+    用户变更检测
+
+    用法：
+        feed = ChangeFeed('data/xiaohongshu/change_feed.db')
+        change = feed.diff(user_id, result['user_info'], result['notes'])
+        for note in change.new_notes:
+            ...
+    """
+
+    def __init__(
+        self,
+        path: str,
+        note_id_key: str = 'note_id',
+        note_content_fields: Sequence[str] = DEFAULT_NOTE_CONTENT_FIELDS,
+        note_counters: Sequence[str] = DEFAULT_NOTE_COUNTERS,
+        user_counters: Sequence[str] = DEFAULT_USER_COUNTERS
+    ):
+        """
+        Args:
+            path: SQLite文件路径
+            note_id_key: 笔记字典中ID的字段名
+            note_content_fields: 计算笔记内容摘要的字段
+            note_counters: 笔记计数字段
+            user_counters: 用户计数字段
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.note_id_key = note_id_key
+        self.note_content_fields = tuple(note_content_fields)
+        self.note_counters = tuple(note_counters)
+        self.user_counters = tuple(user_counters)
+
+        # 本地爬虫的多个工作线程共用一个实例
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), isolation_level=None, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.executescript(SCHEMA)
+
+        self.stats = {'checks': 0, 'first_seen': 0, 'new_notes': 0, 'edited_notes': 0, 'unchanged_users': 0}
+
+    def diff(
+        self,
+        user_id: str,
+        user_info: Optional[Dict[str, Any]],
+        notes: Iterable[Dict[str, Any]],
+        now: float = None
+    ) -> UserChange:
+        """
+        与上次状态比较并保存本次状态
+
+        Args:
+            user_id: 用户ID
+            user_info: 用户资料（取 user_counters 计数），抓取失败时传None
+            notes: 主页笔记列表
+            now: 检查时间，默认当前时间
+
+        Returns:
+            UserChange
+        """
+        user_id = str(user_id)
+        now = time.time() if now is None else now
+        current_user = read_counters(user_info or {}, self.user_counters)
+        change = UserChange(user_id=user_id, checked_at=now)
+
+        with self._lock:
+            self._db.execute('BEGIN IMMEDIATE')
+            try:
+                row = self._db.execute('SELECT counters FROM users WHERE user_id = ?', (user_id,)).fetchone()
+                previous_user = json.loads(row[0]) if row else {}
+                change.first_seen = row is None
+                change.user_deltas = counter_deltas(previous_user, current_user)
+
+                known = {
+                    note_id: (digest, json.loads(counters))
+                    for note_id, digest, counters in self._db.execute(
+                        'SELECT note_id, hash, counters FROM notes WHERE user_id = ?', (user_id,)
+                    )
+                }
+
+                updates = []
+                for note in notes:
+                    note_id = str(note.get(self.note_id_key) or '')
+                    if not note_id:
+                        continue
+                    digest = note_digest(note, self.note_content_fields)
+                    counters = read_counters(note, self.note_counters)
+
+                    if note_id not in known:
+                        change.new_notes.append(note)
+                    else:
+                        previous_digest, previous_counters = known[note_id]
+                        if digest != previous_digest:
+                            change.edited_note_ids.append(note_id)
+                        deltas = counter_deltas(previous_counters, counters)
+                        if deltas:
+                            change.note_deltas[note_id] = deltas
+                        if digest == previous_digest and not deltas and counters.keys() <= previous_counters.keys():
+                            continue
+                        # 本次没有的计数保留上次的值
+                        counters = {**previous_counters, **counters}
+                    known[note_id] = (digest, counters)
+                    updates.append((user_id, note_id, digest, json.dumps(counters)))
+
+                self._db.executemany('INSERT OR REPLACE INTO notes VALUES (?, ?, ?, ?)', updates)
+                self._db.execute(
+                    'INSERT OR REPLACE INTO users VALUES (?, ?, ?)',
+                    (user_id, json.dumps({**previous_user, **current_user}), now)
+                )
+                self._db.execute('COMMIT')
+            except Exception:
+                self._db.execute('ROLLBACK')
+                raise
+
+        self.stats['checks'] += 1
+        self.stats['first_seen'] += change.first_seen
+        self.stats['new_notes'] += len(change.new_notes)
+        self.stats['edited_notes'] += len(change.edited_note_ids)
+        if not change.changed:
+            self.stats['unchanged_users'] += 1
+        return change
+
+    def last_checked(self, user_id: str) -> Optional[float]:
+        """上次检查时间，没检查过返回None"""
+        with self._lock:
+            row = self._db.execute('SELECT checked_at FROM users WHERE user_id = ?', (str(user_id),)).fetchone()
+        return row[0] if row else None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """检查统计"""
+        with self._lock:
+            users = self._db.execute('SELECT COUNT(*) FROM users').fetchone()[0]
+        return {**self.stats, 'tracked_users': users}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,541 @@
+"""
+小红书页面字段提取
+
+笔记/用户爬虫的字段都由一组备选来源按顺序提取：
+- 先查页面内嵌的 window.__INITIAL_STATE__ JSON（每个响应只解析一次），
+  再依次尝试CSS/XPath选择器
+- 备选链在爬虫类定义时编译一次（拆分状态路径、解析选择器类型并去重）
+- 同一响应中每个选择器只执行一次，多个字段共用同一选择器时复用结果
+- 记录每个来源的命中/未命中次数，长期不命中的备选可以删掉
+
+用法：
+    class XiaohongshuNoteSpider(BaseCrawler):
+        extractor = FieldExtractor('xiaohongshu_note', NOTE_FIELDS)
+
+        def parse_note_detail(self, response):
+            data = self.extractor.extract(response)
+"""
+
+import json
+import logging
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from ..utils.metrics import get_registry
+
+logger = logging.getLogger(__name__)
+
+SELECTOR_RESULTS = get_registry().counter(
+    'extraction_selector_total',
+    'Field extraction attempts by source and result',
+    ('spider', 'field', 'source', 'result')
+)
+
+INITIAL_STATE_RE = re.compile(r'window\.__INITIAL_STATE__\s*=\s*(\{.*?\})\s*;?\s*</script>', re.S)
+# __INITIAL_STATE__ 不是严格JSON，其中的 undefined 需要替换
+UNDEFINED_RE = re.compile(r'(?<=[:\[,])\s*undefined\s*(?=[,\]}])')
+
+# 状态路径中的通配段：取字典的第一个值（如 noteDetailMap 中的当前笔记）
+WILDCARD = '*'
+FILTER_RE = re.compile(r'^(\w+)\[(\w+)=([^\]]+)\]$')
+
+_MISSING = object()
+
+
+def parse_count(value) -> Optional[int]:
+    """解析数量：支持 1.2万、3.5k、10+、1,234；无法解析返回None"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    text = str(value).strip().lower().replace(',', '').rstrip('+')
+    try:
+        if text.endswith('万') or text.endswith('w'):
+            return int(float(text[:-1]) * 10000)
+        if text.endswith('k'):
+            return int(float(text[:-1]) * 1000)
+        return int(float(text))
+    except ValueError:
+        return None
+
+
+def parse_text(value) -> Optional[str]:
+    """去除首尾空白，空字符串视为未命中"""
+    if value is None or isinstance(value, (dict, list)):
+        return None
+    text = str(value).strip()
+    return text or None
+
+
+def parse_time(value) -> Optional[str]:
+    """毫秒/秒时间戳转为 YYYY-MM-DD HH:MM:SS，其它按文本处理"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool) and value > 0:
+        seconds = value / 1000 if value > 1e11 else value
+        return datetime.fromtimestamp(seconds).strftime('%Y-%m-%d %H:%M:%S')
+    return parse_text(value)
+
+
+def parse_url(value) -> Optional[str]:
+    """补全协议相对地址"""
+    url = parse_text(value)
+    if url and url.startswith('//'):
+        url = 'https:' + url
+    return url
+
+
+def parse_http_url(value) -> Optional[str]:
+    """只保留 http(s) 地址"""
+    url = parse_url(value)
+    return url if url and url.startswith('http') else None
+
+
+def parse_verified(value) -> Optional[bool]:
+    """认证状态：状态里的布尔值，或页面文本中的 verified/认证"""
+    if isinstance(value, bool):
+        return value
+    text = parse_text(value)
+    if text is None:
+        return None
+    return 'verified' in text.lower() or '认证' in text
+
+
+@dataclass(frozen=True)
+class Field:
+    """
+    字段定义
+
+    Attributes:
+        name: 字段名
+        state_paths: __INITIAL_STATE__ 中的路径，如 'note.noteDetailMap.*.note.title'；
+            '*' 取字典第一个值，'interactions[type=fans]' 取列表中匹配的元素，
+            经过列表时对每个元素取值
+        selectors: 选择器，默认CSS，'xpath:' 开头为XPath
+        parse: 值转换函数，返回None视为未命中
+        default: 全部未命中时的值
+        many: 是否为列表字段；列表字段合并所有选择器的结果
+    """
+
+    name: str
+    state_paths: Tuple[str, ...] = ()
+    selectors: Tuple[str, ...] = ()
+    parse: Callable[[Any], Any] = parse_text
+    default: Any = None
+    many: bool = False
+
+
+def _compile_path(path: str) -> Tuple:
+    segments = []
+    for part in path.split('.'):
+        match = FILTER_RE.match(part)
+        if match:
+            segments.append((match.group(1), (match.group(2), match.group(3))))
+        else:
+            segments.append((part, None))
+    return tuple(segments)
+
+
+def _compile_selector(selector: str) -> Tuple[str, str]:
+    if selector.startswith('xpath:'):
+        return 'xpath', selector[len('xpath:'):]
+    return 'css', selector
+
+
+def _resolve(node, segments: Tuple) -> Any:
+    """按编译后的路径取值，经过列表时对每个元素取值"""
+    for index, (key, condition) in enumerate(segments):
+        if isinstance(node, list):
+            values = []
+            for element in node:
+                value = _resolve(element, segments[index:])
+                if isinstance(value, list):
+                    values.extend(value)
+                elif value is not _MISSING:
+                    values.append(value)
+            return values
+        if not isinstance(node, dict):
+            return _MISSING
+
+        if key == WILDCARD:
+            node = next(iter(node.values()), _MISSING)
+        else:
+            node = node.get(key, _MISSING)
+
+        if condition is not None and isinstance(node, list):
+            name, expected = condition
+            node = next(
+                (element for element in node if isinstance(element, dict) and str(element.get(name)) == expected),
+                _MISSING
+            )
+        if node is _MISSING or node is None:
+            return _MISSING
+    return node
+
+
+class _CompiledField:
+    """编译后的字段：状态路径拆分为段，选择器换成共享表中的下标"""
+
+    __slots__ = ('field', 'paths', 'selectors')
+
+    def __init__(self, field: Field, paths: List[Tuple[str, Tuple]], selectors: List[Tuple[str, int]]):
+        self.field = field
+        self.paths = paths
+        self.selectors = selectors
+
+
+class Extraction:
+    """单个响应的提取上下文：状态JSON和选择器结果都只计算一次"""
+
+    def __init__(self, response):
+        self.response = response
+        self._state = _MISSING
+        self._selector_results: Dict[int, List[str]] = {}
+        self.evaluations = 0
+
+    @property
+    def state(self) -> Optional[Dict[str, Any]]:
+        """页面内嵌的 __INITIAL_STATE__，没有或解析失败时为None"""
+        if self._state is _MISSING:
+            self._state = None
+            match = INITIAL_STATE_RE.search(self.response.text or '')
+            if match:
+                try:
+                    self._state = json.loads(UNDEFINED_RE.sub('null', match.group(1)))
+                except ValueError as e:
+                    logger.debug(f"Invalid __INITIAL_STATE__ on {self.response.url}: {e}")
+        return self._state
+
+    def select(self, index: int, kind: str, query: str) -> List[str]:
+        """执行选择器（同一响应内按下标记忆）"""
+        values = self._selector_results.get(index)
+        if values is None:
+            self.evaluations += 1
+            try:
+                values = getattr(self.response, kind)(query).getall()
+            except Exception as e:
+                logger.debug(f"Selector {kind}:{query} failed: {e}")
+                values = []
+            self._selector_results[index] = values
+        return values
+
+
+class FieldExtractor:
+    """
+    字段提取引擎
+
+    在爬虫类上作为类属性创建，备选链只编译一次；extract() 对每个响应
+    按字段顺序取第一个命中的来源。
+    """
+
+    def __init__(self, name: str, fields: Sequence[Field]):
+        """
+        Args:
+            name: 爬虫名，用于统计
+            fields: 字段定义
+        """
+        self.name = name
+        self._selectors: List[Tuple[str, str]] = []
+        selector_index: Dict[Tuple[str, str], int] = {}
+
+        self.fields: List[_CompiledField] = []
+        for field in fields:
+            paths = [(path, _compile_path(path)) for path in field.state_paths]
+            selectors = []
+            for selector in field.selectors:
+                compiled = _compile_selector(selector)
+                if compiled not in selector_index:
+                    selector_index[compiled] = len(self._selectors)
+                    self._selectors.append(compiled)
+                selectors.append((selector, selector_index[compiled]))
+            self.fields.append(_CompiledField(field, paths, selectors))
+
+        # 字段名 -> 来源 -> {'hit', 'miss'}
+        self.stats: Dict[str, Dict[str, Dict[str, int]]] = {
+            compiled.field.name: {
+                source: {'hit': 0, 'miss': 0}
+                for source in [f"state:{path}" for path, _ in compiled.paths] +
+                              [selector for selector, _ in compiled.selectors]
+            }
+            for compiled in self.fields
+        }
+
+    def _record(self, field: str, source: str, hit: bool):
+        result = 'hit' if hit else 'miss'
+        self.stats[field][source][result] += 1
+        SELECTOR_RESULTS.labels(spider=self.name, field=field, source=source, result=result).inc()
+
+    def _parse_values(self, field: Field, values) -> List[Any]:
+        if not isinstance(values, list):
+            values = [values]
+        parsed = []
+        for value in values:
+            value = field.parse(value)
+            if value is not None and value not in parsed:
+                parsed.append(value)
+        return parsed
+
+    def _extract_field(self, compiled: _CompiledField, extraction: Extraction) -> Any:
+        field = compiled.field
+
+        state = extraction.state
+        for path, segments in compiled.paths:
+            value = _resolve(state, segments) if state is not None else _MISSING
+            parsed = self._parse_values(field, value) if value is not _MISSING else []
+            self._record(field.name, f"state:{path}", bool(parsed))
+            if parsed:
+                return parsed if field.many else parsed[0]
+
+        # 列表字段合并所有选择器的结果，单值字段取第一个命中的
+        merged = []
+        for selector, index in compiled.selectors:
+            kind, query = self._selectors[index]
+            parsed = self._parse_values(field, extraction.select(index, kind, query))
+            self._record(field.name, selector, bool(parsed))
+            if not parsed:
+                continue
+            if not field.many:
+                return parsed[0]
+            merged.extend(value for value in parsed if value not in merged)
+
+        if field.many:
+            return merged
+        return field.default
+
+    def extract(self, response) -> Dict[str, Any]:
+        """
+        提取全部字段
+
+        Args:
+            response: Scrapy响应（需要 text、url 以及 css()/xpath()）
+
+        Returns:
+            字段名 -> 值
+        """
+        extraction = Extraction(response)
+        return {compiled.field.name: self._extract_field(compiled, extraction) for compiled in self.fields}
+
+    def get_stats(self) -> Dict[str, Dict[str, Dict[str, int]]]:
+        """每个字段各来源的命中/未命中次数"""
+        return {field: {source: dict(counts) for source, counts in sources.items()}
+                for field, sources in self.stats.items()}
+
+    def dead_sources(self, min_attempts: int = 100) -> List[Tuple[str, str]]:
+        """尝试过至少 min_attempts 次但从未命中的来源 (字段, 来源)"""
+        return [
+            (field, source)
+            for field, sources in self.stats.items()
+            for source, counts in sources.items()
+            if counts['hit'] == 0 and counts['miss'] >= min_attempts
+        ]
+
+
+# 笔记详情页 __INITIAL_STATE__ 中当前笔记的位置
+NOTE_STATE = 'note.noteDetailMap.*.note'
+# 用户主页 __INITIAL_STATE__ 中用户数据的位置
+USER_STATE = 'user.userPageData'
+
+NOTE_FIELDS = (
+    Field(
+        'title',
+        state_paths=(f'{NOTE_STATE}.title',),
+        selectors=(
+            'h1.note-title::text',
+            'h1.title::text',
+            'h1.explore-feed-card-title::text',
+            'meta[property="og:title"]::attr(content)',
+            'title::text',
+        ),
+        default=''
+    ),
+    Field(
+        'content',
+        state_paths=(f'{NOTE_STATE}.desc',),
+        selectors=(
+            'div.note-content::text',
+            'div.content::text',
+            'div.note-detail-content::text',
+            'div.explore-feed-card-desc::text',
+        ),
+        default=''
+    ),
+    Field(
+        'author',
+        state_paths=(f'{NOTE_STATE}.user.nickname',),
+        selectors=(
+            'span.author-name::text',
+            'div.author-info a::text',
+            'div.nickname::text',
+            'meta[property="og:title"]::attr(content)',
+        ),
+        default=''
+    ),
+    Field(
+        'author_id',
+        state_paths=(f'{NOTE_STATE}.user.userId',),
+        selectors=(
+            'span.author-id::text',
+            'div.author-info::attr(data-user-id)',
+            'meta[property="og:description"]::attr(content)',
+        ),
+        default=''
+    ),
+    Field(
+        'publish_time',
+        state_paths=(f'{NOTE_STATE}.time',),
+        selectors=(
+            'span.publish-time::text',
+            'div.publish-time::text',
+            'meta[property="og:published_time"]::attr(content)',
+        ),
+        parse=parse_time,
+        default=''
+    ),
+    Field(
+        'likes',
+        state_paths=(f'{NOTE_STATE}.interactInfo.likedCount',),
+        selectors=(
+            'span.like-count::text',
+            'div.like-count::text',
+            'div.interaction-bar .likes::text',
+        ),
+        parse=parse_count,
+        default=0
+    ),
+    Field(
+        'comments',
+        state_paths=(f'{NOTE_STATE}.interactInfo.commentCount',),
+        selectors=(
+            'span.comment-count::text',
+            'div.comment-count::text',
+            'div.interaction-bar .comments::text',
+        ),
+        parse=parse_count,
+        default=0
+    ),
+    Field(
+        'shares',
+        state_paths=(f'{NOTE_STATE}.interactInfo.shareCount',),
+        selectors=(
+            'span.share-count::text',
+            'div.share-count::text',
+            'div.interaction-bar .shares::text',
+        ),
+        parse=parse_count,
+        default=0
+    ),
+    Field(
+        'tags',
+        state_paths=(f'{NOTE_STATE}.tagList.name',),
+        selectors=(
+            'div.tags a::text',
+            'div.tag-list span::text',
+            'div.note-tags a::text',
+        ),
+        many=True
+    ),
+    Field(
+        'images',
+        state_paths=(f'{NOTE_STATE}.imageList.urlDefault',),
+        selectors=(
+            'div.note-content img::attr(src)',
+            'div.explore-feed-card img::attr(src)',
+            'img.note-image::attr(src)',
+        ),
+        parse=parse_http_url,
+        many=True
+    ),
+)
+
+USER_FIELDS = (
+    Field(
+        'username',
+        state_paths=(f'{USER_STATE}.basicInfo.nickname',),
+        selectors=(
+            'span.username::text',
+            'div.nickname::text',
+            'div.user-name::text',
+            'h1.user-title::text',
+            'meta[property="og:title"]::attr(content)',
+        ),
+        default=''
+    ),
+    Field(
+        'bio',
+        state_paths=(f'{USER_STATE}.basicInfo.desc',),
+        selectors=(
+            'div.user-bio::text',
+            'div.bio::text',
+            'div.user-desc::text',
+            'meta[name="description"]::attr(content)',
+        ),
+        default=''
+    ),
+    Field(
+        'avatar',
+        state_paths=(f'{USER_STATE}.basicInfo.imageb', f'{USER_STATE}.basicInfo.images'),
+        selectors=(
+            'img.user-avatar::attr(src)',
+            'div.avatar img::attr(src)',
+            'meta[property="og:image"]::attr(content)',
+        ),
+        parse=parse_url,
+        default=''
+    ),
+    Field(
+        'cover_image',
+        selectors=(
+            'div.cover-image img::attr(src)',
+            'div.user-cover img::attr(src)',
+            'meta[property="og:image"]::attr(content)',
+        ),
+        parse=parse_url,
+        default=''
+    ),
+    Field(
+        'is_verified',
+        state_paths=(f'{USER_STATE}.verifyInfo.redOfficialVerified',),
+        selectors=(
+            'span.verified-badge::text',
+            'div.verified::text',
+            'meta[name="verified"]::attr(content)',
+        ),
+        parse=parse_verified,
+        default=False
+    ),
+    Field(
+        'followers',
+        state_paths=(f'{USER_STATE}.interactions[type=fans].count',),
+        selectors=(
+            'span.follower-count::text',
+            'div.followers::text',
+            'div.stat-item:contains("粉丝")::text',
+            'div.user-stats span::text',
+        ),
+        parse=parse_count,
+        default=0
+    ),
+    Field(
+        'following',
+        state_paths=(f'{USER_STATE}.interactions[type=follows].count',),
+        selectors=(
+            'span.following-count::text',
+            'div.following::text',
+            'div.stat-item:contains("关注")::text',
+            'div.user-stats span::text',
+        ),
+        parse=parse_count,
+        default=0
+    ),
+    Field(
+        'notes_count',
+        selectors=(
+            'span.notes-count::text',
+            'div.notes::text',
+            'div.stat-item:contains("笔记")::text',
+            'div.user-stats span::text',
+        ),
+        parse=parse_count,
+        default=0
+    ),
+)
@@ -0,0 +1,364 @@
+"""
+小红书URL调度队列（frontier）
+
+笔记/用户爬虫发现的链接先进入这里，再按优先级取出交给Scrapy：
+- 以SQLite文件保存在 JOBDIR（未设置时为 data/frontier/<爬虫名>），
+  中断后重新运行会接着抓，上次未完成的请求重新排队
+- 按实体指纹去重：同一笔记/用户的不同URL（/explore/、/discovery/item/、
+  带不同查询参数）只抓一次
+- 从未抓过的链接优先，其次按优先级（来源页面的互动数据）
+- 抓过的实体按类型设定重访间隔；内容没有变化时间隔翻倍，直到上限
+- 失败的链接退避重试，超过次数后不再抓取
+"""
+
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# 各实体类型的默认重访间隔（秒），None 表示不重访
+DEFAULT_REVISIT_INTERVALS = {
+    'note': 7 * 86400,
+    'user': 86400,
+    'page': None,
+}
+# 内容不变时重访间隔翻倍的上限（相对基础间隔的倍数）
+MAX_REVISIT_BACKOFF = 8
+
+# 失败重试
+RETRY_DELAY = 300
+MAX_FAILURES = 3
+
+# 没有来源互动数据时的优先级
+DEFAULT_PRIORITY = 1.0
+
+NEVER = 1e18
+
+PENDING, IN_FLIGHT, DONE = 0, 1, 2
+
+ENTITY_PATTERNS = (
+    ('note', re.compile(r'^/(?:explore|discovery/item)/([a-zA-Z0-9]+)')),
+    ('user', re.compile(r'^/user/(?:profile/)?(?!profile/?$)([a-zA-Z0-9]+)')),
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS frontier (
+    fingerprint TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    entity TEXT NOT NULL,
+    priority REAL NOT NULL,
+    state INTEGER NOT NULL,
+    due_at REAL NOT NULL,
+    fetched_at REAL,
+    fetch_count INTEGER NOT NULL DEFAULT 0,
+    failures INTEGER NOT NULL DEFAULT 0,
+    interval REAL,
+    content_hash TEXT
+);
+CREATE INDEX IF NOT EXISTS frontier_due ON frontier (state, due_at);
+"""
+
+
+def url_fingerprint(url: str) -> Tuple[str, str]:
+    """
+    URL指纹
+
+    Returns:
+        (实体类型, 指纹)；笔记/用户为 'note:<id>' / 'user:<id>'，
+        其它页面为去掉查询参数和锚点后的地址
+    """
+    parsed = urlparse(url)
+    for entity, pattern in ENTITY_PATTERNS:
+        match = pattern.match(parsed.path)
+        if match:
+            return entity, f"{entity}:{match.group(1)}"
+    return 'page', f"{parsed.netloc}{parsed.path.rstrip('/')}"
+
+
+def engagement_priority(likes: int = 0, comments: int = 0, shares: int = 0, followers: int = 0) -> float:
+    """按来源页面的互动数据计算优先级（对数缩放，评论和分享权重更高）"""
+    score = (likes or 0) + 2 * (comments or 0) + 3 * (shares or 0) + (followers or 0) / 10
+    return DEFAULT_PRIORITY + math.log10(1 + max(score, 0))
+
+
+def content_hash(data: Dict[str, Any], fields: Sequence[str]) -> str:
+    """判断内容是否变化的摘要"""
+    values = [data.get(field) for field in fields]
+    return hashlib.md5(json.dumps(values, ensure_ascii=False, default=str).encode('utf-8')).hexdigest()
+
+
+@dataclass
+class FrontierEntry:
+    """取出待抓取的链接"""
+
+    fingerprint: str
+    url: str
+    entity: str
+    priority: float
+    fetch_count: int
+
+
+class UrlFrontier:
+    """
+    磁盘URL队列
+
+    用法：
+        frontier = UrlFrontier('data/frontier/xiaohongshu_note')
+        frontier.add_many(links, priority=engagement_priority(likes=1200))
+        for entry in frontier.pop(16):
+            ...
+            frontier.done(entry.url, content_hash=...)   # 或 frontier.failed(entry.url)
+    """
+
+    def __init__(self, job_dir: str, revisit_intervals: Dict[str, Optional[float]] = None):
+        """
+        Args:
+            job_dir: 状态目录
+            revisit_intervals: 各实体类型的重访间隔（秒），覆盖默认值
+        """
+        self.job_dir = Path(job_dir)
+        self.job_dir.mkdir(parents=True, exist_ok=True)
+        self.revisit_intervals = {**DEFAULT_REVISIT_INTERVALS, **(revisit_intervals or {})}
+
+        self._db = sqlite3.connect(str(self.job_dir / 'frontier.db'), isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.executescript(SCHEMA)
+
+        # 上次运行中断时已取出未完成的链接重新排队
+        resumed = self._db.execute('UPDATE frontier SET state = ? WHERE state = ?', (PENDING, IN_FLIGHT)).rowcount
+        if resumed:
+            logger.info(f"Frontier {self.job_dir}: requeued {resumed} unfinished requests")
+
+        self.stats = {'added': 0, 'duplicates': 0, 'popped': 0, 'completed': 0, 'unchanged': 0, 'failed': 0}
+
+    def add(self, url: str, priority: float = DEFAULT_PRIORITY) -> bool:
+        """
+        加入链接
+
+        已存在的实体不会重复加入；仍在排队时提高到较大的优先级。
+
+        Returns:
+            是否为新链接
+        """
+        entity, fingerprint = url_fingerprint(url)
+        cursor = self._db.execute(
+            'INSERT OR IGNORE INTO frontier (fingerprint, url, entity, priority, state, due_at) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            (fingerprint, url, entity, priority, PENDING, time.time())
+        )
+        if cursor.rowcount:
+            self.stats['added'] += 1
+            return True
+
+        self._db.execute(
+            'UPDATE frontier SET priority = ? WHERE fingerprint = ? AND priority < ? AND state != ?',
+            (priority, fingerprint, priority, IN_FLIGHT)
+        )
+        self.stats['duplicates'] += 1
+        return False
+
+    def add_many(self, urls: Iterable[str], priority: float = DEFAULT_PRIORITY) -> int:
+        """批量加入，返回新链接数"""
+        self._db.execute('BEGIN')
+        try:
+            added = sum(self.add(url, priority) for url in urls)
+            self._db.execute('COMMIT')
+        except Exception:
+            self._db.execute('ROLLBACK')
+            raise
+        return added
+
+    def pop(self, count: int, now: float = None) -> List[FrontierEntry]:
+        """
+        取出到期的链接并标记为抓取中
+
+        从未抓过的优先，其次按优先级从高到低。
+        """
+        if count <= 0:
+            return []
+        now = time.time() if now is None else now
+
+        self._db.execute('BEGIN IMMEDIATE')
+        try:
+            rows = self._db.execute(
+                'SELECT fingerprint, url, entity, priority, fetch_count FROM frontier '
+                'WHERE state != ? AND due_at <= ? '
+                'ORDER BY fetch_count > 0, priority DESC, due_at LIMIT ?',
+                (IN_FLIGHT, now, count)
+            ).fetchall()
+            self._db.executemany(
+                'UPDATE frontier SET state = ? WHERE fingerprint = ?',
+                [(IN_FLIGHT, row[0]) for row in rows]
+            )
+            self._db.execute('COMMIT')
+        except Exception:
+            self._db.execute('ROLLBACK')
+            raise
+
+        self.stats['popped'] += len(rows)
+        return [FrontierEntry(*row) for row in rows]
+
+    def _row(self, url: str) -> Tuple[str, Optional[tuple]]:
+        _, fingerprint = url_fingerprint(url)
+        row = self._db.execute(
+            'SELECT entity, interval, content_hash, failures FROM frontier WHERE fingerprint = ?',
+            (fingerprint,)
+        ).fetchone()
+        return fingerprint, row
+
+    def done(self, url: str, content_hash: str = None, now: float = None):
+        """
+        记录抓取成功并安排下次重访
+
+        Args:
+            url: 链接
+            content_hash: 内容摘要；与上次相同时重访间隔翻倍
+        """
+        now = time.time() if now is None else now
+        fingerprint, row = self._row(url)
+        if row is None:
+            return
+        entity, interval, previous_hash, _ = row
+
+        base = self.revisit_intervals.get(entity)
+        if not base:
+            interval = None
+        elif content_hash is not None and content_hash == previous_hash and interval:
+            interval = min(interval * 2, base * MAX_REVISIT_BACKOFF)
+            self.stats['unchanged'] += 1
+        else:
+            interval = base
+
+        self._db.execute(
+            'UPDATE frontier SET state = ?, fetched_at = ?, fetch_count = fetch_count + 1, failures = 0, '
+            'interval = ?, due_at = ?, content_hash = COALESCE(?, content_hash) WHERE fingerprint = ?',
+            (DONE, now, interval, now + interval if interval else NEVER, content_hash, fingerprint)
+        )
+        self.stats['completed'] += 1
+
+    def failed(self, url: str, now: float = None):
+        """记录抓取失败：退避后重试，超过 MAX_FAILURES 次不再抓取"""
+        now = time.time() if now is None else now
+        fingerprint, row = self._row(url)
+        if row is None:
+            return
+        failures = row[3] + 1
+
+        if failures >= MAX_FAILURES:
+            state, due_at = DONE, NEVER
+        else:
+            state, due_at = PENDING, now + RETRY_DELAY * 2 ** (failures - 1)
+        self._db.execute(
+            'UPDATE frontier SET state = ?, failures = ?, due_at = ? WHERE fingerprint = ?',
+            (state, failures, due_at, fingerprint)
+        )
+        self.stats['failed'] += 1
+
+    def in_flight(self) -> int:
+        """已取出未完成的数量"""
+        return self._db.execute('SELECT COUNT(*) FROM frontier WHERE state = ?', (IN_FLIGHT,)).fetchone()[0]
+
+    def due(self, now: float = None) -> int:
+        """当前可取出的数量"""
+        now = time.time() if now is None else now
+        return self._db.execute(
+            'SELECT COUNT(*) FROM frontier WHERE state != ? AND due_at <= ?', (IN_FLIGHT, now)
+        ).fetchone()[0]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """队列统计"""
+        counts = dict(self._db.execute('SELECT state, COUNT(*) FROM frontier GROUP BY state').fetchall())
+        return {
+            **self.stats,
+            'pending': counts.get(PENDING, 0),
+            'in_flight': counts.get(IN_FLIGHT, 0),
+            'done': counts.get(DONE, 0),
+            'due': self.due(),
+        }
+
+    def close(self):
+        self._db.close()
+
+
+def frontier_dir(settings, spider_name: str) -> str:
+    """状态目录：优先 JOBDIR，其次 FRONTIER_DIR/<爬虫名>"""
+    job_dir = settings.get('JOBDIR')
+    if job_dir:
+        return os.path.join(job_dir, 'frontier')
+    return os.path.join(settings.get('FRONTIER_DIR') or 'data/frontier', spider_name)
+
+
+class FrontierSpiderMixin:
+    """
+    Scrapy爬虫接入frontier
+
+    发现的链接用 frontier.add/add_many 加入，再通过 frontier_requests() 按批取出；
+    Scrapy空闲时自动补充下一批。子类在 frontier_callbacks 中为每种实体指定回调，
+    并在解析成功后调用 frontier.done()。
+    """
+
+    # 实体类型 -> 回调方法名
+    frontier_callbacks: Dict[str, str] = {}
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        from scrapy import signals
+
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        settings = crawler.settings
+        spider.frontier = UrlFrontier(
+            frontier_dir(settings, spider.name),
+            revisit_intervals=settings.getdict('FRONTIER_REVISIT_INTERVALS') or None
+        )
+        spider.frontier_batch_size = settings.getint('FRONTIER_BATCH_SIZE', 16)
+        crawler.signals.connect(spider._frontier_idle, signal=signals.spider_idle)
+        crawler.signals.connect(spider._frontier_closed, signal=signals.spider_closed)
+        return spider
+
+    def frontier_add(self, urls: Iterable[str], priority: float = DEFAULT_PRIORITY) -> int:
+        """加入本爬虫处理的实体链接（frontier_callbacks 中的类型），返回新链接数"""
+        urls = [url for url in urls if url_fingerprint(url)[0] in self.frontier_callbacks]
+        return self.frontier.add_many(urls, priority=priority)
+
+    def frontier_requests(self):
+        """把in-flight补到 FRONTIER_BATCH_SIZE 个，生成对应请求"""
+        free = self.frontier_batch_size - self.frontier.in_flight()
+        for entry in self.frontier.pop(free):
+            callback = getattr(self, self.frontier_callbacks[entry.entity])
+            yield self._make_request(
+                entry.url,
+                callback=callback,
+                priority=int(entry.priority * 10),
+                errback=self._frontier_errback,
+                meta={'frontier_url': entry.url}
+            )
+
+    def _frontier_errback(self, failure):
+        request = failure.request
+        self.frontier.failed(request.meta.get('frontier_url', request.url))
+        self.handle_error(failure, request)
+
+    def _frontier_idle(self):
+        from scrapy.exceptions import DontCloseSpider
+
+        scheduled = 0
+        for request in self.frontier_requests():
+            self.crawler.engine.crawl(request)
+            scheduled += 1
+        # 空闲时仍处于抓取中的链接已不会再回调，留给下次运行重新排队
+        if scheduled:
+            raise DontCloseSpider
+
+    def _frontier_closed(self, spider):
+        logger.info(f"Frontier stats for {spider.name}: {self.frontier.get_stats()}")
+        self.frontier.close()
@@ -0,0 +1,343 @@
+"""
+小红书共享HTTP客户端
+
+XiaohongshuSpider 和 XiaohongshuCrawler 的请求都经过这里：
+- 进程内共用一个长连接池（keep-alive），不再各自创建 ClientSession
+- 统一的请求头；cookie由调用方按请求传入，客户端不保存
+- 按接口的重试预算：每个请求存入一部分令牌，每次重试取出一个，
+  接口持续出错时重试次数受限，不会把请求量放大几倍
+- 响应体大小上限，超过的直接丢弃
+- 直接从响应字节解析JSON（安装了 orjson 时优先使用），不再先解码成文本
+- 注册了签名函数时（见 signing.py），每次发送前计算签名请求头
+- 接口主机（edith.xiaohongshu.com）的请求预算只在这里定义（get_api_budget）
+"""
+
+import asyncio
+import json
+import logging
+import random
+from typing import Any, Dict, Optional
+
+from ..base.rate_limiter import HostBudget, get_host_budget
+from ..utils.metrics import get_registry, track_request
+from .signing import sign_headers
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+RETRIES = get_registry().counter(
+    'crawler_http_retries_total',
+    'HTTP retries by endpoint and outcome (retried, budget_exhausted)',
+    ('platform', 'endpoint', 'result')
+)
+
+DEFAULT_HEADERS = {
+    'User-Agent': (
+        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+        '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+    ),
+    'Accept': 'application/json, text/plain, */*',
+    'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
+    'Referer': 'https://www.xiaohongshu.com/',
+    'Origin': 'https://www.xiaohongshu.com',
+    'Sec-Fetch-Dest': 'empty',
+    'Sec-Fetch-Mode': 'cors',
+    'Sec-Fetch-Site': 'same-site',
+}
+
+# 接口主机及其共享请求预算：每秒请求数和并发数（所有入口共用）
+API_HOST = 'edith.xiaohongshu.com'
+API_RATE = 2
+API_CONCURRENCY = 4
+
+# 可重试的状态码
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# 接口JSON一般在几百KB以内
+DEFAULT_MAX_RESPONSE_BYTES = 8 * 1024 * 1024
+
+
+class XhsHttpError(Exception):
+    """请求失败（状态码非200或网络错误）"""
+
+    def __init__(self, message: str, status: int = None):
+        super().__init__(message)
+        self.status = status
+
+
+class ResponseTooLarge(XhsHttpError):
+    """响应体超过大小上限"""
+
+
+def loads(body: bytes) -> Any:
+    """从字节解析JSON"""
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+class RetryBudget:
+    """
+    重试预算
+
+    每个请求存入 ratio 个令牌，每次重试取出1个；令牌不超过 max_tokens。
+    初始的 initial 个令牌保证请求量小时也能重试。
+    """
+
+    def __init__(self, ratio: float = 0.2, initial: float = 10, max_tokens: float = 100):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = min(initial, max_tokens)
+
+    def deposit(self):
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        """取出一个令牌，不足时返回False"""
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class XhsHttpClient:
+    """
+    小红书HTTP客户端
+
+    用法：
+        client = get_xhs_client()
+        client.retain()
+        try:
+            data = await client.get_json(url, 'note_feed', params=params, headers={'Cookie': cookie})
+        finally:
+            await client.release()
+    """
+
+    def __init__(
+        self,
+        timeout: float = 15,
+        max_response_bytes: int = DEFAULT_MAX_RESPONSE_BYTES,
+        limit: int = 50,
+        limit_per_host: int = 8,
+        keepalive_timeout: float = 60,
+        max_attempts: int = 3,
+        retry_ratio: float = 0.2,
+        retry_backoff: float = 1.0,
+        platform: str = 'xiaohongshu'
+    ):
+        """
+        Args:
+            timeout: 单次请求超时（秒）
+            max_response_bytes: 响应体大小上限
+            limit: 连接池总连接数
+            limit_per_host: 每个主机的连接数
+            keepalive_timeout: 空闲连接保持时间（秒）
+            max_attempts: 单个请求最多尝试次数
+            retry_ratio: 重试预算，每个请求允许的平均重试次数
+            retry_backoff: 首次重试等待（秒），之后翻倍
+            platform: 指标中的平台名
+        """
+        self.timeout = timeout
+        self.max_response_bytes = max_response_bytes
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.max_attempts = max_attempts
+        self.retry_ratio = retry_ratio
+        self.retry_backoff = retry_backoff
+        self.platform = platform
+
+        self._session = None
+        self._users = 0
+        self._budgets: Dict[str, RetryBudget] = {}
+
+        self.stats = {
+            'requests': 0,
+            'retries': 0,
+            'budget_exhausted': 0,
+            'too_large': 0,
+            'errors': 0
+        }
+
+    async def _get_session(self):
+        if self._session is None or self._session.closed:
+            if aiohttp is None:
+                raise ImportError("aiohttp is required for the Xiaohongshu HTTP client")
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=300
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers=DEFAULT_HEADERS,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                cookie_jar=aiohttp.DummyCookieJar()
+            )
+        return self._session
+
+    def retain(self):
+        """登记一个使用者"""
+        self._users += 1
+
+    async def release(self):
+        """注销使用者，最后一个使用者注销时关闭连接池"""
+        self._users = max(0, self._users - 1)
+        if self._users == 0:
+            await self.close()
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    def _budget(self, endpoint: str) -> RetryBudget:
+        budget = self._budgets.get(endpoint)
+        if budget is None:
+            budget = self._budgets[endpoint] = RetryBudget(self.retry_ratio)
+        return budget
+
+    async def _read_json(self, response) -> Any:
+        """检查大小后从响应字节解析JSON"""
+        if response.content_length is not None and response.content_length > self.max_response_bytes:
+            raise ResponseTooLarge(f"Response too large: {response.content_length} bytes")
+
+        body = await response.read()
+        if len(body) > self.max_response_bytes:
+            raise ResponseTooLarge(f"Response too large: {len(body)} bytes")
+        return loads(body)
+
+    async def _attempt(self, method: str, url: str, endpoint: str, **kwargs) -> Any:
+        session = await self._get_session()
+        with track_request(self.platform, endpoint) as req:
+            async with session.request(method, url, **kwargs) as response:
+                if response.status != 200:
+                    req.fail()
+                    raise XhsHttpError(f"{endpoint} returned {response.status}", status=response.status)
+                try:
+                    return await self._read_json(response)
+                except ValueError as e:
+                    req.fail()
+                    raise XhsHttpError(f"{endpoint} returned invalid JSON: {e}", status=response.status)
+
+    @staticmethod
+    def _retryable(error: Exception) -> bool:
+        if isinstance(error, ResponseTooLarge):
+            return False
+        if isinstance(error, XhsHttpError):
+            return error.status in RETRY_STATUSES
+        if aiohttp is not None and isinstance(error, aiohttp.ClientError):
+            return True
+        return isinstance(error, asyncio.TimeoutError)
+
+    @staticmethod
+    def _as_http_error(endpoint: str, error: Exception) -> XhsHttpError:
+        if isinstance(error, XhsHttpError):
+            return error
+        wrapped = XhsHttpError(f"{endpoint} failed: {error!r}")
+        wrapped.__cause__ = error
+        return wrapped
+
+    async def request_json(
+        self,
+        method: str,
+        url: str,
+        endpoint: str,
+        params: Dict = None,
+        json: Any = None,
+        headers: Dict[str, str] = None,
+        cookies: Dict[str, str] = None
+    ) -> Any:
+        """
+        发起请求并返回JSON
+
+        网络错误、超时和 429/5xx 在重试预算内退避重试，每次发送前重新签名。
+
+        Args:
+            method: GET/POST
+            url: 请求地址
+            endpoint: 接口名，用于指标和重试预算
+            params: 查询参数
+            json: POST的JSON数据
+            headers: 附加请求头（如 Cookie）
+            cookies: 本次请求的cookie
+
+        Raises:
+            XhsHttpError: 状态码非200、响应过大或重试后仍失败
+        """
+        budget = self._budget(endpoint)
+        budget.deposit()
+        self.stats['requests'] += 1
+
+        for attempt in range(self.max_attempts):
+            signature = sign_headers(url, params=params, data=json, cookies=cookies, headers=headers)
+            try:
+                return await self._attempt(
+                    method, url, endpoint,
+                    params=params, json=json, cookies=cookies,
+                    headers={**(headers or {}), **signature} or None
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if isinstance(e, ResponseTooLarge):
+                    self.stats['too_large'] += 1
+                if not self._retryable(e) or attempt + 1 >= self.max_attempts:
+                    self.stats['errors'] += 1
+                    raise self._as_http_error(endpoint, e)
+                if not budget.withdraw():
+                    self.stats['budget_exhausted'] += 1
+                    self.stats['errors'] += 1
+                    RETRIES.labels(platform=self.platform, endpoint=endpoint, result='budget_exhausted').inc()
+                    raise self._as_http_error(endpoint, e)
+
+                self.stats['retries'] += 1
+                RETRIES.labels(platform=self.platform, endpoint=endpoint, result='retried').inc()
+                delay = self.retry_backoff * 2 ** attempt * random.uniform(0.8, 1.2)
+                logger.debug(f"Retrying {endpoint} in {delay:.1f}s: {e}")
+                await asyncio.sleep(delay)
+
+    async def get_json(self, url: str, endpoint: str, **kwargs) -> Any:
+        return await self.request_json('GET', url, endpoint, **kwargs)
+
+    async def post_json(self, url: str, endpoint: str, json: Any = None, **kwargs) -> Any:
+        return await self.request_json('POST', url, endpoint, json=json, **kwargs)
+
+    async def fetch_cookies(self, url: str, headers: Dict[str, str] = None) -> Dict[str, str]:
+        """请求页面，返回响应设置的cookie（用于获取游客cookie）"""
+        session = await self._get_session()
+        with track_request(self.platform, 'homepage'):
+            async with session.get(url, headers=headers) as response:
+                return {name: morsel.value for name, morsel in response.cookies.items()}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """请求统计和各接口剩余的重试令牌"""
+        return {
+            **self.stats,
+            'retry_tokens': {endpoint: round(budget.tokens, 2) for endpoint, budget in self._budgets.items()}
+        }
+
+
+_client: Optional[XhsHttpClient] = None
+
+
+def get_xhs_client() -> XhsHttpClient:
+    """获取进程内共享的小红书HTTP客户端"""
+    global _client
+    if _client is None:
+        _client = XhsHttpClient()
+    return _client
+
+
+def get_api_budget() -> HostBudget:
+    """小红书接口主机的共享请求预算（XiaohongshuSpider 和 XiaohongshuCrawler 共用）"""
+    return get_host_budget(API_HOST, rate=API_RATE, concurrency=API_CONCURRENCY)
@@ -48,6 +48,14 @@ class XiaohongshuSettings:
     LOG_LEVEL = 'INFO'
     LOG_FILE = './logs/xiaohongshu.log'
     
+    # URL调度（frontier）：设置 JOBDIR 时状态保存在 JOBDIR/frontier
+    FRONTIER_DIR = os.getenv('FRONTIER_DIR', 'data/frontier')
+    FRONTIER_BATCH_SIZE = 16
+    FRONTIER_REVISIT_INTERVALS = {
+        'note': 7 * 86400,
+        'user': 86400,
+    }
+    
     # 代理配置
     PROXY_ENABLED = os.getenv('PROXY_ENABLED', 'false').lower() == 'true'
     PROXY_LIST = os.getenv('PROXY_LIST', '').split(',') if os.getenv('PROXY_LIST') else []
@@ -0,0 +1,107 @@
+"""
+小红书请求签名
+
+小红书Web接口要求 x-s / x-t 等签名请求头。签名算法是平台私有的混淆JS，
+且经常变动，这里不内置实现，只提供接入点：
+- 用 set_xhs_signer() 或环境变量 XHS_SIGNER=包.模块:函数 注册签名函数
+- 签名函数形如 sign(uri, data, cookies) -> 请求头字典，
+  uri 为路径加查询串，data 为POST数据，cookies 为本次请求的cookie
+- 共享HTTP客户端每次发送（含重试）前调用；签名含时间戳，结果不缓存
+
+未注册签名函数时请求不带签名头。
+"""
+
+import importlib
+import logging
+import os
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import urlencode, urlsplit
+
+logger = logging.getLogger(__name__)
+
+SIGNER_ENV = 'XHS_SIGNER'
+
+Signer = Callable[[str, Optional[Any], Dict[str, str]], Dict[str, str]]
+
+_signer: Optional[Signer] = None
+_loaded = False
+
+
+def load_signer(spec: str) -> Signer:
+    """按 '包.模块:函数' 加载签名函数"""
+    module_name, _, attr = spec.partition(':')
+    if not attr:
+        raise ValueError(f"Invalid signer spec (expected 'module:function'): {spec}")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+def set_xhs_signer(signer: Optional[Signer]):
+    """注册签名函数，传 None 取消签名"""
+    global _signer, _loaded
+    _signer = signer
+    _loaded = True
+
+
+def get_xhs_signer() -> Optional[Signer]:
+    """获取签名函数，首次调用时按环境变量加载"""
+    global _signer, _loaded
+    if not _loaded:
+        _loaded = True
+        spec = os.getenv(SIGNER_ENV)
+        if spec:
+            try:
+                _signer = load_signer(spec)
+                logger.info(f"Loaded Xiaohongshu signer: {spec}")
+            except (ImportError, AttributeError, ValueError) as e:
+                logger.error(f"Failed to load Xiaohongshu signer {spec}: {str(e)}")
+    return _signer
+
+
+def parse_cookie_header(cookie: str) -> Dict[str, str]:
+    """解析 Cookie 请求头"""
+    cookies = {}
+    for part in cookie.split(';'):
+        name, sep, value = part.strip().partition('=')
+        if sep and name:
+            cookies[name] = value
+    return cookies
+
+
+def sign_headers(
+    url: str,
+    params: Dict = None,
+    data: Any = None,
+    cookies: Dict[str, str] = None,
+    headers: Dict[str, str] = None
+) -> Dict[str, str]:
+    """
+    计算签名请求头
+
+    Args:
+        url: 请求地址
+        params: 查询参数
+        data: POST数据
+        cookies: 本次请求的cookie
+        headers: 本次请求的附加请求头（未传 cookies 时从其中的 Cookie 取）
+
+    Returns:
+        签名请求头，未注册签名函数或签名失败时为空字典
+    """
+    signer = get_xhs_signer()
+    if signer is None:
+        return {}
+
+    parts = urlsplit(url)
+    uri = parts.path
+    query = urlencode(params) if params else parts.query
+    if query:
+        uri = f"{uri}?{query}"
+
+    if cookies is None:
+        cookies = parse_cookie_header((headers or {}).get('Cookie', ''))
+
+    try:
+        return dict(signer(uri, data, cookies) or {})
+    except Exception as e:
+        logger.warning(f"Xiaohongshu signer failed for {parts.path}: {str(e)}")
+        return {}
@@ -3,16 +3,17 @@
 负责爬取小红书笔记、用户、搜索等数据
 """
 
-import asyncio
 import re
-import json
 from dataclasses import dataclass
 from typing import Dict, List, Optional, Any
 from datetime import datetime
 from urllib.parse import quote
 
-import aiohttp
-from tenacity import retry, stop_after_attempt, wait_exponential
+from ..utils.session_vault import get_session_vault
+from .http_client import XhsHttpError, get_api_budget, get_xhs_client
+
+# 访问首页得到的游客cookie的有效期
+GUEST_SESSION_TTL = 86400
 
 
 @dataclass
@@ -20,7 +21,6 @@ class CrawlerConfig:
     """爬虫配置"""
     timeout: int = 30
     retry_count: int = 3
-    delay: float = 2.0  # 小红书反爬严格，延迟更长
     proxy: Optional[str] = None
 
 
@@ -49,31 +49,15 @@ class XiaohongshuSpider:
             config: 爬虫配置对象
         """
         self.config = config or CrawlerConfig()
-        self.session: Optional[aiohttp.ClientSession] = None
-        self._headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'application/json, text/plain, */*',
-            'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Referer': 'https://www.xiaohongshu.com',
-            'Origin': 'https://www.xiaohongshu.com',
-            'Connection': 'keep-alive',
-            'Sec-Fetch-Dest': 'empty',
-            'Sec-Fetch-Mode': 'cors',
-            'Sec-Fetch-Site': 'same-site',
-        }
+        # 连接池、请求头和重试由共享客户端负责
+        self.client = get_xhs_client()
         self._cookies = {}
+        self._entered = False
     
     async def __aenter__(self):
         """异步上下文管理器入口"""
-        timeout = aiohttp.ClientTimeout(total=self.config.timeout)
-        connector = aiohttp.TCPConnector(limit=50, limit_per_host=5)
-        
-        self.session = aiohttp.ClientSession(
-            timeout=timeout,
-            connector=connector,
-            headers=self._headers
-        )
+        self.client.retain()
+        self._entered = True
         
         # 先访问首页获取必要的cookie
         await self._init_session()
@@ -82,19 +66,39 @@ class XiaohongshuSpider:
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """异步上下文管理器出口"""
-        if self.session:
-            await self.session.close()
+        if self._entered:
+            self._entered = False
+            await self.client.release()
+    
+    def _budget(self):
+        """API主机的共享请求预算（速率和并发见 http_client.API_RATE / API_CONCURRENCY）"""
+        return get_api_budget()
     
     async def _init_session(self):
-        """初始化会话，获取必要cookie"""
+        """
+        初始化会话，获取必要cookie
+        
+        优先使用会话保险箱中未过期的会话（含未验证的游客会话）；没有时才访问首页，
+        并把得到的游客cookie以未验证状态存入保险箱供后续进程复用。
+        """
+        vault = get_session_vault()
+        session = vault.get('xiaohongshu', include_unvalidated=True) if vault is not None else None
+        if session is not None:
+            self._cookies = session.cookie_dict()
+            return
+        
         try:
-            async with self.session.get(self.BASE_URL) as response:
-                # 提取cookie
-                self._cookies = {k: v.value for k, v in response.cookies.items()}
-                # 更新session的cookie
-                self.session.cookie_jar.update_cookies(self._cookies)
+            self._cookies = await self.client.fetch_cookies(self.BASE_URL)
         except Exception as e:
             print(f"Init session error: {e}")
+            return
+        
+        if vault is not None and self._cookies:
+            vault.save(
+                'xiaohongshu', self._cookies,
+                account='guest', domain='.xiaohongshu.com',
+                ttl=GUEST_SESSION_TTL, validated=False
+            )
     
     def _validate_note_id(self, note_id: str) -> bool:
         """
@@ -120,11 +124,6 @@ class XiaohongshuSpider:
         """
         return bool(re.match(r'^[a-f0-9]{24}$', user_id))
     
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=2, min=2, max=10),
-        reraise=True
-    )
     async def _fetch(self, url: str, params: Optional[Dict] = None, data: Optional[Dict] = None) -> Dict:
         """
         发送HTTP请求
@@ -137,29 +136,18 @@ class XiaohongshuSpider:
         Returns:
             JSON响应数据
         """
-        if not self.session:
+        if not self._entered:
             raise RuntimeError("Session not initialized. Use async context manager.")
         
-        # 添加随机延迟，模拟人类行为
-        await asyncio.sleep(self.config.delay + (asyncio.get_event_loop().time() % 1))
-        
-        method = 'POST' if data else 'GET'
+        endpoint = url.rsplit('/api/', 1)[-1]
         
         try:
-            if method == 'GET':
-                async with self.session.get(url, params=params) as response:
-                    response.raise_for_status()
-                    text = await response.text()
-                    return json.loads(text)
-            else:
-                async with self.session.post(url, json=data) as response:
-                    response.raise_for_status()
-                    text = await response.text()
-                    return json.loads(text)
-        except aiohttp.ClientError as e:
-            raise Exception(f"Network error: {e}")
-        except json.JSONDecodeError as e:
-            raise Exception(f"JSON decode error: {e}")
+            async with self._budget():
+                if data:
+                    return await self.client.post_json(url, endpoint, json=data, params=params, cookies=self._cookies)
+                return await self.client.get_json(url, endpoint, params=params, cookies=self._cookies)
+        except XhsHttpError as e:
+            raise Exception(f"Request failed: {e}")
     
     async def fetch_note(self, note_id: str) -> Dict[str, Any]:
         """
@@ -1,19 +1,28 @@
 import scrapy
 import re
-import json
 from datetime import datetime
 from urllib.parse import urljoin
 
 from ..base.base_crawler import BaseCrawler
 from ..utils.logger import logger
 from ..items import XiaohongshuUserItem
+from ..extraction import USER_FIELDS, FieldExtractor
+from ..frontier import FrontierSpiderMixin, content_hash, engagement_priority
 
-class XiaohongshuUserSpider(BaseCrawler):
+class XiaohongshuUserSpider(FrontierSpiderMixin, BaseCrawler):
     """小红书用户爬虫"""
     
     name = "xiaohongshu_user"
     platform = "xiaohongshu"
     
+    # 字段提取的备选链，随类编译一次
+    extractor = FieldExtractor(name, USER_FIELDS)
+    
+    # 用户链接经frontier去重、排序后抓取
+    frontier_callbacks = {'user': 'parse_user_detail'}
+    # 这些字段不变时视为用户没有更新，重访间隔加倍
+    change_fields = ('username', 'bio', 'followers', 'following', 'notes_count')
+    
     # 用户URL模式
     user_url_patterns = [
         r'https://www\.xiaohongshu\.com/user/profile/[a-zA-Z0-9]+',
@@ -42,20 +51,25 @@ class XiaohongshuUserSpider(BaseCrawler):
         """开始请求"""
         for url in self.start_urls:
             yield self._make_request(url, callback=self.parse_main_page)
+        
+        # 上次运行留下的待抓取用户
+        yield from self.frontier_requests()
     
     def parse_main_page(self, response):
         """解析主页面，提取用户链接"""
         logger.info(f"解析主页面: {response.url}")
         
-        # 提取用户链接
+        # 提取用户链接，交给frontier去重排序
         user_links = self._extract_user_links(response)
+        added = self.frontier_add(user_links)
+        logger.info(f"新用户链接 {added}/{len(user_links)} 个")
         
-        for link in user_links:
-            yield self._make_request(link, callback=self.parse_user_detail)
+        yield from self.frontier_requests()
     
     def parse_user_detail(self, response):
         """解析用户详情"""
         logger.info(f"解析用户详情: {response.url}")
+        frontier_url = response.meta.get('frontier_url', response.url)
         
         try:
             # 创建用户item
@@ -64,24 +78,26 @@ class XiaohongshuUserSpider(BaseCrawler):
             # 提取基本信息
             item['url'] = response.url
             item['user_id'] = self._extract_user_id(response.url)
-            item['username'] = self._extract_username(response)
-            item['bio'] = self._extract_bio(response)
-            item['avatar'] = self._extract_avatar(response)
-            item['cover_image'] = self._extract_cover_image(response)
-            item['is_verified'] = self._extract_verified_status(response)
             item['crawl_time'] = datetime.now()
             
-            # 提取统计数据
-            item['followers'] = self._extract_followers(response)
-            item['following'] = self._extract_following(response)
-            item['notes_count'] = self._extract_notes_count(response)
+            # 资料和统计数据（优先取 __INITIAL_STATE__）
+            for field, value in self.extractor.extract(response).items():
+                item[field] = value
             
             logger.info(f"解析到用户: {item['username']} (ID: {item['user_id']})")
-            yield item
             
         except Exception as e:
             logger.error(f"解析用户详情失败: {response.url} - {str(e)}")
+            self.frontier.failed(frontier_url)
             raise
+        
+        self.frontier.done(frontier_url, content_hash=content_hash(item, self.change_fields))
+        
+        # 页面上的其他用户按本用户的粉丝数排优先级
+        self.frontier_add(self._extract_user_links(response), priority=engagement_priority(followers=item['followers']))
+        
+        yield item
+        yield from self.frontier_requests()
     
     def _extract_user_links(self, response) -> list:
         """提取用户链接"""
@@ -132,175 +148,3 @@ class XiaohongshuUserSpider(BaseCrawler):
             return url.split('/')[-1]
         else:
             return ""
-    
-    def _extract_username(self, response) -> str:
-        """提取用户名"""
-        # 尝试多种选择器
-        selectors = [
-            'span.username::text',
-            'div.nickname::text',
-            'div.user-name::text',
-            'h1.user-title::text',
-            'meta[property="og:title"]::attr(content)',
-        ]
-        
-        for selector in selectors:
-            username = response.css(selector).get()
-            if username and username.strip():
-                return username.strip()
-        
-        return ""
-    
-    def _extract_bio(self, response) -> str:
-        """提取个人简介"""
-        selectors = [
-            'div.user-bio::text',
-            'div.bio::text',
-            'div.user-desc::text',
-            'meta[name="description"]::attr(content)',
-        ]
-        
-        for selector in selectors:
-            bio = response.css(selector).get()
-            if bio and bio.strip():
-                return bio.strip()
-        
-        # 如果找不到简介，尝试从脚本标签中提取
-        script_content = response.css('script[type="text/javascript"]::text').get()
-        if script_content:
-            # 尝试从JSON数据中提取简介
-            try:
-                data = json.loads(script_content)
-                if 'user' in data:
-                    return data['user'].get('bio', '')
-            except:
-                pass
-        
-        return ""
-    
-    def _extract_avatar(self, response) -> str:
-        """提取头像链接"""
-        selectors = [
-            'img.user-avatar::attr(src)',
-            'div.avatar img::attr(src)',
-            'meta[property="og:image"]::attr(content)',
-        ]
-        
-        for selector in selectors:
-            avatar = response.css(selector).get()
-            if avatar and avatar.strip():
-                # 确保是完整的URL
-                avatar = avatar.strip()
-                if avatar.startswith('//'):
-                    avatar = 'https:' + avatar
-                return avatar
-        
-        return ""
-    
-    def _extract_cover_image(self, response) -> str:
-        """提取封面图片"""
-        selectors = [
-            'div.cover-image img::attr(src)',
-            'div.user-cover img::attr(src)',
-            'meta[property="og:image"]::attr(content)',
-        ]
-        
-        for selector in selectors:
-            cover = response.css(selector).get()
-            if cover and cover.strip():
-                # 确保是完整的URL
-                cover = cover.strip()
-                if cover.startswith('//'):
-                    cover = 'https:' + cover
-                return cover
-        
-        return ""
-    
-    def _extract_verified_status(self, response) -> bool:
-        """提取认证状态"""
-        selectors = [
-            'span.verified-badge::text',
-            'div.verified::text',
-            'meta[name="verified"]::attr(content)',
-        ]
-        
-        for selector in selectors:
-            verified = response.css(selector).get()
-            if verified and verified.strip():
-                return 'verified' in verified.lower() or '认证' in verified
-        
-        # 尝试从脚本标签中提取
-        script_content = response.css('script[type="text/javascript"]::text').get()
-        if script_content:
-            try:
-                data = json.loads(script_content)
-                if 'user' in data:
-                    return data['user'].get('is_verified', False)
-            except:
-                pass
-        
-        return False
-    
-    def _extract_followers(self, response) -> int:
-        """提取粉丝数"""
-        selectors = [
-            'span.follower-count::text',
-            'div.followers::text',
-            'div.stat-item:contains("粉丝")::text',
-            'div.user-stats span::text',
-        ]
-        
-        for selector in selectors:
-            followers_str = response.css(selector).get()
-            if followers_str and followers_str.strip():
-                try:
-                    # 处理带单位的数据 (如 1.2万)
-                    followers_str = followers_str.strip()
-                    if '万' in followers_str:
-                        return int(float(followers_str.replace('万', '')) * 10000)
-                    elif 'k' in followers_str.lower():
-                        return int(float(followers_str.lower().replace('k', '')) * 1000)
-                    else:
-                        return int(followers_str)
-                except:
-                    continue
-        
-        return 0
-    
-    def _extract_following(self, response) -> int:
-        """提取关注数"""
-        selectors = [
-            'span.following-count::text',
-            'div.following::text',
-            'div.stat-item:contains("关注")::text',
-            'div.user-stats span::text',
-        ]
-        
-        for selector in selectors:
-            following_str = response.css(selector).get()
-            if following_str and following_str.strip():
-                try:
-                    return int(following_str.strip())
-                except:
-                    continue
-        
-        return 0
-    
-    def _extract_notes_count(self, response) -> int:
-        """提取笔记数"""
-        selectors = [
-            'span.notes-count::text',
-            'div.notes::text',
-            'div.stat-item:contains("笔记")::text',
-            'div.user-stats span::text',
-        ]
-        
-        for selector in selectors:
-            notes_str = response.css(selector).get()
-            if notes_str and notes_str.strip():
-                try:
-                    return int(notes_str.strip())
-                except:
-                    continue
-        
-        return 0
\ No newline at end of file
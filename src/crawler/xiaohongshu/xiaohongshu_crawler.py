@@ -5,14 +5,21 @@
 """
 
 import asyncio
+import inspect
 import json
 import re
-import aiohttp
-from typing import Dict, List, Optional
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
 from datetime import datetime
 import logging
 
 from ..base.base_crawler import BaseCrawler, ParseError
+from ..utils.comment_crawler import CommentCrawler, CommentPage
+from ..utils.keyword_search import KeywordBatch, KeywordSearchEngine, SearchPage
+from ..utils.metrics import ITEMS
+from ..utils.session_vault import get_session_vault
+from ..utils.short_link import get_short_link_resolver
+from .change_feed import ChangeFeed, UserChange
+from .http_client import XhsHttpError, get_api_budget, get_xhs_client
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +34,7 @@ class XiaohongshuCrawler(BaseCrawler):
     - 爬取笔记详情
     - 爬取用户信息
     - 爬取笔记评论
+    - 用户更新检测（只输出新笔记和计数增量）
     """
 
     name = 'xiaohongshu'
@@ -39,6 +47,14 @@ class XiaohongshuCrawler(BaseCrawler):
     rate_limit = 5
     request_timeout = 15
     
+    # 关键词搜索：同时翻页的关键词数和每页数量（请求共用主机预算）
+    keyword_concurrency = 8
+    search_page_size = 20
+    
+    # 用户更新检测：状态文件和同时检查的用户数
+    change_feed_path = 'data/xiaohongshu/change_feed.db'
+    user_check_concurrency = 4
+    
     user_agents = [
         'Mozilla/5.0 (iPhone; CPU iPhone OS 17_2 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Mobile/15E148 MicroMessenger/8.0.4720(0x28002d30) NetType/WIFI Language/zh_CN',
         'Mozilla/5.0 (Linux; Android 14; 23127PN0CC Build/UKQ1.230917.001; wv) AppleWebKit/537.36 (KHTML, like Gecko) Version/4.0 Chrome/120.0.6099.43 Mobile Safari/537.36',
@@ -47,7 +63,6 @@ class XiaohongshuCrawler(BaseCrawler):
     
     URL_PATTERNS = {
         'note': [
-            r'xhslink\.com/([a-zA-Z0-9]+)',
             r'xiaohongshu\.com/explore/([a-zA-Z0-9]+)',
             r'xiaohongshu\.com/discovery/item/([a-zA-Z0-9]+)',
             r'xiaohongshu\.com/user/profile/[^/]+/([a-zA-Z0-9]+)',
@@ -69,25 +84,57 @@ class XiaohongshuCrawler(BaseCrawler):
             'Referer': 'https://www.xiaohongshu.com/',
             'Origin': 'https://www.xiaohongshu.com',
         }
-        self._session = None
-    
-    async def _get_session(self):
-        if self._session is None or self._session.closed:
-            self._session = aiohttp.ClientSession(
-                headers={'User-Agent': self.user_agents[0]},
-                timeout=aiohttp.ClientTimeout(total=self.request_timeout)
-            )
-        return self._session
+        
+        # 共享HTTP客户端（长连接池、重试预算、响应大小上限）
+        self.client = get_xhs_client()
+        self.client.retain()
+        self._closed = False
+        
+        # 短链接解析（各平台共享，带磁盘缓存）
+        self.short_links = get_short_link_resolver()
+        
+        # 加密保存的登录会话（各入口共享）
+        self.vault = get_session_vault()
+        self.session_account = None
+        
+        # 用户变更流（首次检查更新时创建）
+        self._change_feed = None
     
     async def close(self):
-        if self._session and not self._session.closed:
-            await self._session.close()
+        if not self._closed:
+            self._closed = True
+            await self.client.release()
+        if self._change_feed is not None:
+            self._change_feed.close()
+            self._change_feed = None
     
-    def set_cookie(self, cookie: str):
+    def set_cookie(self, cookie: str, account: str = None):
+        """
+        设置cookie
+        
+        Args:
+            cookie: Cookie请求头
+            account: 指定时同时存入会话保险箱，供其它进程复用
+        """
         self._cookie = cookie
         self._common_headers['Cookie'] = cookie
+        if account and self.vault is not None:
+            self.vault.save(self.platform, cookie, account=account, domain='.xiaohongshu.com', validated=False)
+            self.session_account = account
         logger.info("Cookie set successfully")
     
+    def _load_vault_session(self):
+        """从会话保险箱取一个未过期的会话"""
+        if self.vault is None:
+            return
+        session = self.vault.get(self.platform)
+        if session is None:
+            return
+        self._cookie = session.cookie_header()
+        self._common_headers['Cookie'] = self._cookie
+        self.session_account = session.account
+        logger.info(f"[{self.platform}] Using vault session: {session.account}")
+    
     def parse_url(self, url: str) -> Dict:
         """
         解析小红书URL，提取类型和ID
@@ -134,32 +181,16 @@ class XiaohongshuCrawler(BaseCrawler):
         """
         解析短链接，获取真实URL
         
+        使用进程内共享的短链接解析器（带磁盘缓存）。
+        
         Args:
             short_url: xhslink短链接
             
         Returns:
             真实URL或None
         """
-        try:
-            session = await self._get_session()
-            
-            async with session.get(
-                short_url,
-                allow_redirects=False,
-                headers=self._common_headers
-            ) as response:
-                if response.status in [301, 302]:
-                    location = response.headers.get('Location', '')
-                    return location
-                elif response.status == 200:
-                    return str(response.url)
-                else:
-                    logger.warning(f"Short link resolution failed: {response.status}")
-                    return None
-                    
-        except Exception as e:
-            logger.error(f"Error resolving short link: {str(e)}")
-            return None
+        info = await self.short_links.resolve(short_url)
+        return info['url'] if info else None
     
     async def crawl_by_url(self, url: str) -> Optional[Dict]:
         """
@@ -176,9 +207,11 @@ class XiaohongshuCrawler(BaseCrawler):
         parsed = self.parse_url(url)
         
         if parsed['type'] == 'short_link':
-            real_url = await self.resolve_short_link(url)
-            if real_url:
-                parsed = self.parse_url(real_url)
+            info = await self.short_links.resolve(url)
+            if info and info['platform'] == self.platform:
+                parsed = {'type': info['type'], 'id': info['id'], 'keyword': None, 'url': info['url']}
+            elif info:
+                parsed = self.parse_url(info['url'])
         
         if parsed['type'] == 'note':
             return await self.crawl_note(parsed['id'])
@@ -233,22 +266,14 @@ class XiaohongshuCrawler(BaseCrawler):
                 'image_formats': 'jpg,webp,avif'
             }
             
-            session = await self._get_session()
-            
-            async with session.get(
-                url,
-                params=params,
-                headers={**self._common_headers, 'User-Agent': self.user_agents[0]}
-            ) as response:
-                if response.status != 200:
-                    logger.error(f"API request failed: {response.status}")
-                    return None
-                
-                data = await response.json()
+            data = await self._get_api_json('note_feed', url, params)
+            if data is None:
+                return None
             
             note_data = self._parse_note_from_api(data, note_id)
             
             if note_data:
+                ITEMS.labels(platform=self.platform, type='note').inc()
                 logger.info(f"Successfully crawled note: {note_id}")
                 return note_data
             else:
@@ -343,17 +368,9 @@ class XiaohongshuCrawler(BaseCrawler):
         try:
             url = f"{self.api_base}/sns/web/v1/user/{user_id}/info"
             
-            session = await self._get_session()
-            
-            async with session.get(
-                url,
-                headers={**self._common_headers, 'User-Agent': self.user_agents[0]}
-            ) as response:
-                if response.status != 200:
-                    logger.error(f"User API request failed: {response.status}")
-                    return None
-                
-                data = await response.json()
+            data = await self._get_api_json('user_info', url)
+            if data is None:
+                return None
             
             user_data = data.get('data', {}).get('user', {})
             
@@ -376,6 +393,7 @@ class XiaohongshuCrawler(BaseCrawler):
                 'crawled_at': datetime.now().isoformat()
             }
             
+            ITEMS.labels(platform=self.platform, type='user').inc()
             logger.info(f"Successfully crawled user: {user_id}")
             return user
             
@@ -383,6 +401,155 @@ class XiaohongshuCrawler(BaseCrawler):
             logger.error(f"Error crawling user {user_id}: {str(e)}")
             return None
     
+    async def crawl_user_notes(self, user_id: str, cursor: str = '', num: int = 30) -> Optional[List[Dict]]:
+        """
+        爬取用户主页的一页笔记
+        
+        Args:
+            user_id: 用户ID
+            cursor: 翻页游标，第一页为空
+            num: 每页数量
+            
+        Returns:
+            笔记列表，请求失败返回None
+        """
+        url = f"{self.api_base}/sns/web/v1/user_posted"
+        params = {
+            'user_id': user_id,
+            'cursor': cursor,
+            'num': num,
+            'image_formats': 'jpg,webp,avif'
+        }
+        
+        data = await self._get_api_json('user_posted', url, params)
+        if data is None:
+            return None
+        
+        return self._parse_user_notes(data.get('data', {}).get('notes', []), user_id)
+    
+    def _parse_user_notes(self, items: List[dict], user_id: str) -> List[Dict]:
+        """
+        解析用户主页笔记列表
+        """
+        notes = []
+        for item in items:
+            note_id = item.get('note_id', '')
+            if not note_id:
+                continue
+            
+            interact_info = item.get('interact_info', {})
+            notes.append({
+                'platform': 'xiaohongshu',
+                'platform_content_id': note_id,
+                'title': item.get('display_title', ''),
+                'type': item.get('type', ''),
+                'author_id': user_id,
+                'cover_url': item.get('cover', {}).get('url_default', ''),
+                'like_count': interact_info.get('liked_count', 0),
+                'sticky': bool(interact_info.get('sticky')),
+                'url': f"https://www.xiaohongshu.com/explore/{note_id}",
+                'crawled_at': datetime.now().isoformat()
+            })
+        
+        return notes
+    
+    @property
+    def change_feed(self) -> ChangeFeed:
+        """用户变更流（按本爬虫输出的字段名比较）"""
+        if self._change_feed is None:
+            self._change_feed = ChangeFeed(
+                self.change_feed_path,
+                note_id_key='platform_content_id',
+                note_content_fields=('title', 'type', 'cover_url'),
+                note_counters=('like_count',),
+                user_counters=('follower_count', 'following_count', 'note_count', 'liked_count')
+            )
+        return self._change_feed
+    
+    async def check_user_updates(
+        self,
+        user_id: str,
+        fetch_new_notes: bool = True,
+        fetch_first_seen: bool = False
+    ) -> Optional[UserChange]:
+        """
+        检查用户更新
+        
+        请求用户资料和主页第一页笔记，与上次状态比较；
+        只为新笔记抓取详情，已见过的笔记只输出计数增量。
+        首次检查时列表中的笔记都算新笔记，默认只记录基线、不抓详情。
+        
+        Args:
+            user_id: 用户ID
+            fetch_new_notes: 是否抓取新笔记的详情（失败时保留列表中的摘要）
+            fetch_first_seen: 首次检查时是否也抓取全部笔记的详情
+            
+        Returns:
+            UserChange，两个请求都失败时返回None
+        """
+        async with self._api_budget():
+            user = await self.crawl_user(user_id)
+        async with self._api_budget():
+            notes = await self.crawl_user_notes(user_id)
+        
+        if user is None and notes is None:
+            return None
+        
+        change = self.change_feed.diff(user_id, user, notes or [])
+        
+        if fetch_new_notes and change.new_notes and (fetch_first_seen or not change.first_seen):
+            async def fetch(note: Dict) -> Dict:
+                async with self._api_budget():
+                    detail = await self.crawl_note(note['platform_content_id'])
+                return detail or note
+            
+            change.new_notes = list(await asyncio.gather(*[fetch(note) for note in change.new_notes]))
+        
+        if change.changed:
+            logger.info(
+                f"[{self.platform}] User {user_id}: {len(change.new_notes)} new notes, "
+                f"{len(change.note_deltas)} notes with counter changes"
+            )
+        return change
+    
+    async def check_users_updates(
+        self,
+        user_ids: List[str],
+        fetch_new_notes: bool = True,
+        fetch_first_seen: bool = False
+    ) -> Dict[str, UserChange]:
+        """
+        批量检查用户更新
+        
+        同时检查 user_check_concurrency 个用户，请求速率受主机预算限制
+        
+        Args:
+            user_ids: 用户ID列表
+            fetch_new_notes: 是否抓取新笔记的详情
+            fetch_first_seen: 首次检查的用户是否也抓取全部笔记的详情
+            
+        Returns:
+            {用户ID: UserChange}，检查失败的用户不在结果中
+        """
+        semaphore = asyncio.Semaphore(max(1, self.user_check_concurrency))
+        
+        async def check_one(user_id: str) -> Optional[UserChange]:
+            async with semaphore:
+                try:
+                    return await self.check_user_updates(
+                        user_id, fetch_new_notes=fetch_new_notes, fetch_first_seen=fetch_first_seen
+                    )
+                except Exception as e:
+                    logger.error(f"Error checking user {user_id}: {str(e)}")
+                    return None
+        
+        results = await asyncio.gather(*[check_one(user_id) for user_id in dict.fromkeys(user_ids)])
+        changes = {change.user_id: change for change in results if change is not None}
+        
+        new_count = sum(len(change.new_notes) for change in changes.values())
+        logger.info(f"[{self.platform}] Update check completed: {len(changes)} users, {new_count} new notes")
+        return changes
+    
     async def crawl_by_keyword(
         self,
         keyword: str,
@@ -400,63 +567,117 @@ class XiaohongshuCrawler(BaseCrawler):
         Returns:
             笔记列表
         """
-        logger.info(f"[{self.platform}] Searching keyword: {keyword}")
+        results = await self.crawl_keywords([keyword], limit=limit, sort=sort)
+        return results[keyword]
+    
+    async def crawl_keywords(
+        self,
+        keywords: List[str],
+        limit: int = 100,
+        sort: str = 'general',
+        sink: Callable[[KeywordBatch], Any] = None
+    ) -> Dict[str, List[Dict]]:
+        """
+        批量搜索关键词
         
-        results = []
-        page = 1
+        多个关键词交替翻页，共用 api_base 主机的请求预算；
+        同一笔记在多个关键词下只解析输出一次。
         
-        while len(results) < limit:
-            try:
-                url = f"{self.api_base}/sns/web/v1/search/notes"
-                params = {
-                    'keyword': keyword,
-                    'page': page,
-                    'page_size': min(20, limit - len(results)),
-                    'sort': sort
-                }
-                
-                session = await self._get_session()
-                
-                async with session.get(
-                    url,
-                    params=params,
-                    headers={**self._common_headers, 'User-Agent': self.user_agents[0]}
-                ) as response:
-                    if response.status != 200:
-                        logger.warning(f"Search API failed: {response.status}")
-                        break
-                    
-                    data = await response.json()
-                
-                notes = self._parse_search_result(data)
-                
-                if not notes:
-                    logger.info(f"No more notes found for keyword '{keyword}'")
-                    break
-                
-                results.extend(notes)
-                logger.info(f"Crawled {len(notes)} notes from page {page}")
-                
-                if len(notes) < 20:
-                    break
-                
-                page += 1
-                await asyncio.sleep(2)
-                
-            except Exception as e:
-                logger.error(f"Error searching keyword '{keyword}': {str(e)}")
-                break
+        Args:
+            keywords: 搜索关键词
+            limit: 每个关键词最大爬取数量
+            sort: 排序方式
+            sink: 每个关键词的每页结果到达时调用，用于流式写入管道
+            
+        Returns:
+            关键词 -> 笔记列表
+        """
+        logger.info(f"[{self.platform}] Searching {len(keywords)} keywords")
+        
+        engine = self._search_engine(sort)
+        counter = ITEMS.labels(platform=self.platform, type='search_note')
+        
+        async def count_batch(batch: KeywordBatch):
+            counter.inc(len(batch.notes))
+            if sink is not None:
+                outcome = sink(batch)
+                if inspect.isawaitable(outcome):
+                    await outcome
+        
+        results = await engine.crawl(keywords, limit=limit, sink=count_batch)
+        
+        logger.info(f"[{self.platform}] Keyword search completed: {engine.get_stats()}")
+        return results
+    
+    async def iter_keywords(
+        self,
+        keywords: List[str],
+        limit: int = 100,
+        sort: str = 'general'
+    ) -> AsyncIterator[KeywordBatch]:
+        """
+        流式批量搜索关键词，按到达顺序返回各关键词的结果批次
+        
+        Args:
+            keywords: 搜索关键词
+            limit: 每个关键词最大爬取数量
+            sort: 排序方式
+        """
+        counter = ITEMS.labels(platform=self.platform, type='search_note')
+        batches = self._search_engine(sort).iter_batches(keywords, limit=limit)
+        try:
+            async for batch in batches:
+                counter.inc(len(batch.notes))
+                yield batch
+        finally:
+            await batches.aclose()
+    
+    def _api_budget(self):
+        """api_base 主机的共享请求预算（与 XiaohongshuSpider 共用）"""
+        return get_api_budget()
+    
+    def _search_engine(self, sort: str) -> KeywordSearchEngine:
+        """创建关键词搜索调度器"""
+        return KeywordSearchEngine(
+            fetch_page=lambda keyword, page, page_size: self._fetch_search_page(keyword, page, page_size, sort),
+            parse_items=self._parse_search_items,
+            budget=self._api_budget(),
+            name=f'{self.platform}:search',
+            page_size=self.search_page_size,
+            keyword_concurrency=self.keyword_concurrency
+        )
+    
+    async def _fetch_search_page(self, keyword: str, page: int, page_size: int, sort: str) -> Optional[SearchPage]:
+        """
+        请求一页搜索结果，非200返回None
+        """
+        url = f"{self.api_base}/sns/web/v1/search/notes"
+        params = {
+            'keyword': keyword,
+            'page': page,
+            'page_size': page_size,
+            'sort': sort
+        }
+        
+        data = await self._get_api_json('search_notes', url, params)
+        if data is None:
+            return None
         
-        logger.info(f"[{self.platform}] Keyword search completed: {len(results)} notes")
-        return results[:limit]
+        page_data = data.get('data') or {}
+        items = page_data.get('items') or []
+        return SearchPage(items=items, has_more=bool(page_data.get('has_more', len(items) >= page_size)))
     
     def _parse_search_result(self, data: dict) -> List[Dict]:
         """
         解析搜索结果
         """
+        return self._parse_search_items(data.get('data', {}).get('items', []))
+    
+    def _parse_search_items(self, items: List[dict]) -> List[Dict]:
+        """
+        解析搜索结果条目
+        """
         try:
-            items = data.get('data', {}).get('items', [])
-            
             notes = []
             for item in items:
                 note_data = item.get('model', {}).get('note_card', {})
@@ -498,97 +719,202 @@ class XiaohongshuCrawler(BaseCrawler):
     async def crawl_comments(
         self,
         note_id: str,
-        limit: int = 100
+        limit: int = 100,
+        expand_replies: bool = True,
+        top_n: int = None,
+        sink: Callable[[List[Dict]], Any] = None
     ) -> List[Dict]:
         """
         爬取笔记评论
         
+        一级评论翻页和子评论展开并发进行，共用 api_base 主机的请求预算。
+        
         Args:
             note_id: 笔记ID
-            limit: 最大评论数量
+            limit: 最大评论数量（含子评论）
+            expand_replies: 是否展开子评论
+            top_n: 只返回点赞数最高的N条，排名稳定后提前停止
+            sink: 每批评论到达时调用，用于流式写入管道
             
         Returns:
             评论列表
         """
         logger.info(f"[{self.platform}] Crawling comments for: {note_id}")
         
-        results = []
-        cursor = ''
-        
-        while len(results) < limit:
-            try:
-                url = f"{self.api_base}/sns/web/v2/comment/page"
-                params = {
-                    'note_id': note_id,
-                    'cursor': cursor,
-                    'top_comment_id': '',
-                    'image_formats': 'jpg,webp,avif'
-                }
-                
-                session = await self._get_session()
-                
-                async with session.get(
-                    url,
-                    params=params,
-                    headers={**self._common_headers, 'User-Agent': self.user_agents[0]}
-                ) as response:
-                    if response.status != 200:
-                        break
-                    
-                    data = await response.json()
-                
-                comments = self._parse_comments(data)
-                
-                if not comments:
-                    break
-                
-                results.extend(comments)
-                
-                cursor = data.get('data', {}).get('cursor', '')
-                if not cursor:
-                    break
-                
-                await asyncio.sleep(1)
-                
-            except Exception as e:
-                logger.error(f"Error crawling comments: {str(e)}")
-                break
+        counter = ITEMS.labels(platform=self.platform, type='comment')
+        crawled = 0
+        
+        async def count_batch(batch: List[Dict]):
+            nonlocal crawled
+            crawled += len(batch)
+            counter.inc(len(batch))
+            if sink is not None:
+                outcome = sink(batch)
+                if inspect.isawaitable(outcome):
+                    await outcome
         
-        logger.info(f"[{self.platform}] Comment crawling completed: {len(results)} comments")
-        return results[:limit]
+        crawler = self._comment_crawler(note_id, expand_replies)
+        results = await crawler.crawl(initial_cursor='', limit=limit, top_n=top_n, sink=count_batch)
+        
+        logger.info(f"[{self.platform}] Comment crawling completed: {crawled} comments ({crawler.get_stats()})")
+        return results
+    
+    async def iter_comments(
+        self,
+        note_id: str,
+        limit: int = None,
+        expand_replies: bool = True
+    ) -> AsyncIterator[List[Dict]]:
+        """
+        流式爬取笔记评论，按到达顺序返回评论批次
+        
+        Args:
+            note_id: 笔记ID
+            limit: 最大评论数量（含子评论）
+            expand_replies: 是否展开子评论
+        """
+        counter = ITEMS.labels(platform=self.platform, type='comment')
+        crawler = self._comment_crawler(note_id, expand_replies)
+        batches = crawler.iter_batches(initial_cursor='', limit=limit)
+        try:
+            async for batch in batches:
+                counter.inc(len(batch))
+                yield batch
+        finally:
+            await batches.aclose()
+    
+    def _comment_crawler(self, note_id: str, expand_replies: bool) -> CommentCrawler:
+        """创建笔记的评论爬取器"""
+        return CommentCrawler(
+            fetch_page=lambda cursor: self._fetch_comment_page(note_id, cursor),
+            fetch_replies=(
+                (lambda comment, cursor: self._fetch_sub_comments(note_id, comment, cursor))
+                if expand_replies else None
+            ),
+            budget=self._api_budget(),
+            name=f'{self.platform}:{note_id}'
+        )
+    
+    async def _fetch_comment_page(self, note_id: str, cursor: str) -> Optional[CommentPage]:
+        """
+        请求一页一级评论
+        
+        接口随一级评论返回前几条子评论，这些子评论直接放入本页，
+        剩余的子评论从 sub_comment_cursor 开始展开。
+        """
+        url = f"{self.api_base}/sns/web/v2/comment/page"
+        params = {
+            'note_id': note_id,
+            'cursor': cursor,
+            'top_comment_id': '',
+            'image_formats': 'jpg,webp,avif'
+        }
+        
+        data = await self._get_api_json('comment_page', url, params)
+        if data is None:
+            return None
+        
+        page = data.get('data', {})
+        comments = []
+        threads = []
+        for comment_data in page.get('comments', []):
+            comment = self._parse_comment(comment_data)
+            comments.append(comment)
+            
+            for sub_data in comment_data.get('sub_comments') or []:
+                sub_comment = self._parse_comment(sub_data)
+                sub_comment['parent_comment_id'] = comment['platform_comment_id']
+                comments.append(sub_comment)
+            
+            if comment_data.get('sub_comment_has_more'):
+                threads.append((comment, comment_data.get('sub_comment_cursor', '')))
+        
+        return CommentPage(
+            comments=comments,
+            cursor=page.get('cursor', ''),
+            has_more=bool(page.get('has_more', page.get('cursor'))),
+            threads=threads
+        )
+    
+    async def _fetch_sub_comments(self, note_id: str, comment: Dict, cursor: str) -> Optional[CommentPage]:
+        """
+        请求一页子评论
+        """
+        url = f"{self.api_base}/sns/web/v2/comment/sub/page"
+        params = {
+            'note_id': note_id,
+            'root_comment_id': comment['platform_comment_id'],
+            'num': 10,
+            'cursor': cursor,
+            'image_formats': 'jpg,webp,avif'
+        }
+        
+        data = await self._get_api_json('sub_comment_page', url, params)
+        if data is None:
+            return None
+        
+        page = data.get('data', {})
+        replies = []
+        for sub_data in page.get('comments', []):
+            reply = self._parse_comment(sub_data)
+            reply['parent_comment_id'] = comment['platform_comment_id']
+            replies.append(reply)
+        
+        return CommentPage(
+            comments=replies,
+            cursor=page.get('cursor', ''),
+            has_more=bool(page.get('has_more'))
+        )
+    
+    async def _get_api_json(self, endpoint: str, url: str, params: Dict = None) -> Optional[Dict]:
+        """经共享客户端发起接口请求，失败返回None"""
+        if self._cookie is None:
+            self._load_vault_session()
+        
+        try:
+            return await self.client.get_json(
+                url, endpoint,
+                params=params,
+                headers={**self._common_headers, 'User-Agent': self.user_agents[0]}
+            )
+        except XhsHttpError as e:
+            logger.warning(f"[{self.platform}] {endpoint} request failed: {str(e)}")
+            return None
     
     def _parse_comments(self, data: dict) -> List[Dict]:
         """
         解析评论数据
         """
         try:
-            comments_data = data.get('data', {}).get('comments', [])
-            
-            comments = []
-            for comment_data in comments_data:
-                user_info = comment_data.get('user_info', {})
-                
-                comment = {
-                    'platform': 'xiaohongshu',
-                    'platform_comment_id': comment_data.get('id', ''),
-                    'content': comment_data.get('content', ''),
-                    'user_id': user_info.get('user_id', ''),
-                    'username': user_info.get('nick_name', ''),
-                    'user_avatar': user_info.get('avatar', ''),
-                    'like_count': comment_data.get('like_count', 0),
-                    'created_at': datetime.fromtimestamp(
-                        comment_data.get('create_time', 0) / 1000
-                    ).isoformat() if comment_data.get('create_time') else None,
-                    'ip_location': comment_data.get('ip_location', '')
-                }
-                
-                comments.append(comment)
-            
-            return comments
+            return [
+                self._parse_comment(comment_data)
+                for comment_data in data.get('data', {}).get('comments', [])
+            ]
             
         except Exception as e:
             logger.error(f"Error parsing comments: {str(e)}")
             return []
+    
+    def _parse_comment(self, comment_data: dict) -> Dict:
+        """
+        解析单条评论
+        """
+        user_info = comment_data.get('user_info', {})
+        
+        return {
+            'platform': 'xiaohongshu',
+            'platform_comment_id': comment_data.get('id', ''),
+            'content': comment_data.get('content', ''),
+            'user_id': user_info.get('user_id', ''),
+            'username': user_info.get('nick_name', ''),
+            'user_avatar': user_info.get('avatar', ''),
+            'like_count': comment_data.get('like_count', 0),
+            'created_at': datetime.fromtimestamp(
+                comment_data.get('create_time', 0) / 1000
+            ).isoformat() if comment_data.get('create_time') else None,
+            'ip_location': comment_data.get('ip_location', ''),
+            'reply_count': int(comment_data.get('sub_comment_count') or 0)
+        }
 
 
 async def main():
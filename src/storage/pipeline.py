@@ -11,9 +11,16 @@ import logging
 
 from ..storage.dao import content_dao, crawler_job_dao
 from ..storage.mongodb import get_mongo_manager
+from ..crawler.utils.metrics import PIPELINE_ITEMS, get_registry
 
 logger = logging.getLogger(__name__)
 
+STORE_LATENCY = get_registry().histogram(
+    'pipeline_store_duration_seconds',
+    'Time spent writing content to PostgreSQL',
+    ('platform',)
+)
+
 
 class DataPipeline:
     """
@@ -47,14 +54,16 @@ class DataPipeline:
             内容ID，失败返回None
         """
         self.stats['total_processed'] += 1
+        platform = content.get('platform', 'xiaohongshu')
+        data_type = content.get('content_type', 'note')
         
         try:
             # 1. 保存原始数据到MongoDB（可选）
             if save_raw:
                 await self.mongo.insert_raw_data(
                     collection='raw_crawler_data',
-                    platform=content.get('platform', 'xiaohongshu'),
-                    data_type=content.get('content_type', 'note'),
+                    platform=platform,
+                    data_type=data_type,
                     raw_json=content,
                     metadata={
                         'crawled_at': content.get('crawled_at'),
@@ -63,15 +72,18 @@ class DataPipeline:
                 )
             
             # 2. 插入到PostgreSQL
-            content_id = await content_dao.insert_content(content)
+            with STORE_LATENCY.labels(platform=platform).time():
+                content_id = await content_dao.insert_content(content)
             
             self.stats['success_count'] += 1
+            PIPELINE_ITEMS.labels(pipeline='storage', type=data_type, result='processed').inc()
             logger.info(f"Content processed successfully: {content_id}")
             
             return content_id
             
         except Exception as e:
             self.stats['failed_count'] += 1
+            PIPELINE_ITEMS.labels(pipeline='storage', type=data_type, result='error').inc()
             logger.error(f"Failed to process content: {str(e)}")
             return None
     
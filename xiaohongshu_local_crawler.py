@@ -6,24 +6,50 @@
 1. 确保已安装Chrome浏览器
 2. 安装依赖：pip install selenium webdriver-manager
 3. 在浏览器中登录小红书
-4. 运行此脚本
-5. 数据将保存到JSON文件
+4. 运行此脚本：python xiaohongshu_local_crawler.py <用户ID> [<用户ID> ...]
+5. 数据将追加到JSONL文件（默认 xiaohongshu_users.jsonl）
+
+批量模式：
+    python xiaohongshu_local_crawler.py --input user_ids.txt --workers 4
+    多个Chrome实例共享同一份cookie并行抓取，进度记录在断点文件中，
+    中断后重新运行会跳过已完成的用户
+
+会话复用：
+    安装 cryptography 后，验证可用的cookie会加密保存到 data/sessions，
+    之后的运行（包括其它小红书入口）直接复用，过期后才重新读取cookie文件
 
 > 开发者: 智宝 (AI助手) 🌸
 """
 
+import argparse
 import json
+import queue
+import random
 import re
+import threading
 import time
 from pathlib import Path
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from webdriver_manager.chrome import ChromeDriverManager
 
+try:
+    from src.crawler.utils.session_vault import get_session_vault
+except ImportError:
+    get_session_vault = None
+
+try:
+    from src.crawler.xiaohongshu.change_feed import ChangeFeed
+except ImportError:
+    ChangeFeed = None
+
+XHS_DOMAIN = '.xiaohongshu.com'
+# ChromeDriverManager().install() 会下载/改写驱动文件，多个线程同时调用要串行
+_DRIVER_INSTALL_LOCK = threading.Lock()
+# 登录态cookie，会话过期时间按它计算
+LOGIN_COOKIES = ('web_session',)
+
 
 def setup_driver(headless=False):
     """
@@ -55,7 +81,9 @@ def setup_driver(headless=False):
 
     # 自动下载并使用ChromeDriver
     print("🔧 正在设置Chrome WebDriver...")
-    service = Service(ChromeDriverManager().install())
+    with _DRIVER_INSTALL_LOCK:
+        driver_path = ChromeDriverManager().install()
+    service = Service(driver_path)
     driver = webdriver.Chrome(service=service, options=chrome_options)
 
     return driver
@@ -73,10 +101,8 @@ def load_cookies_from_pycookiecheat():
     try:
         import pycookiecheat
     except ImportError:
-        print("❌ 未安装pycookiecheat，正在安装...")
-        import subprocess
-        subprocess.run(['pip', 'install', 'pycookiecheat'], check=True)
-        import pycookiecheat
+        print("❌ 未安装pycookiecheat，请先运行: pip install pycookiecheat")
+        return None
 
     print("🍪 从Chrome浏览器提取cookie...")
 
@@ -123,30 +149,82 @@ def load_cookies_from_file(filepath):
     return data
 
 
+def get_vault():
+    """获取会话保险箱，未安装 cryptography 时返回None"""
+    if get_session_vault is None:
+        return None
+    try:
+        return get_session_vault()
+    except Exception as e:
+        print(f"⚠️  会话保险箱不可用: {e}")
+        return None
+
+
+def cookie_list(cookie_data):
+    """把各种格式的cookie数据统一为 [{'name', 'value', ...}] 列表"""
+    if isinstance(cookie_data, dict) and 'cookies' in cookie_data:
+        cookies = cookie_data['cookies']
+    else:
+        cookies = cookie_data
+
+    # 如果是字典格式，转换为列表
+    if isinstance(cookies, dict):
+        cookies = [{'name': k, 'value': v} for k, v in cookies.items()]
+    return cookies
+
+
+def inject_cookies_cdp(driver, cookies):
+    """
+    通过CDP在导航前直接写入cookie，不需要先打开首页
+
+    Returns:
+        是否成功
+    """
+    params = []
+    for cookie in cookies:
+        item = {
+            'name': cookie['name'],
+            'value': str(cookie.get('value', '')),
+            'domain': cookie.get('domain') or XHS_DOMAIN,
+            'path': cookie.get('path', '/'),
+        }
+        expires = cookie.get('expires', cookie.get('expiry'))
+        if expires is not None and float(expires) > 0:
+            item['expires'] = float(expires)
+        for key in ('secure', 'httpOnly'):
+            if key in cookie:
+                item[key] = bool(cookie[key])
+        params.append(item)
+
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setCookies', {'cookies': params})
+    except Exception as e:
+        print(f"⚠️  CDP注入cookie失败，改用页面注入: {e}")
+        return False
+
+    print(f"✅ 成功注入{len(params)}个cookie")
+    return True
+
+
 def inject_cookies(driver, cookie_data):
     """
     将cookie注入到浏览器
 
+    优先用CDP在导航前写入；不支持时退回到先打开首页再 add_cookie。
+
     Args:
         driver: WebDriver实例
         cookie_data: Cookie数据
     """
+    cookies = cookie_list(cookie_data)
+    if inject_cookies_cdp(driver, cookies):
+        return
+
     # 先访问小红书首页
     driver.get('https://www.xiaohongshu.com/')
     time.sleep(2)
 
-    # 获取cookies
-    if isinstance(cookie_data, dict) and 'cookies' in cookie_data:
-        cookies = cookie_data['cookies']
-    elif isinstance(cookie_data, dict):
-        cookies = cookie_data
-    else:
-        cookies = cookie_data
-
-    # 如果是字典格式，转换为列表
-    if isinstance(cookies, dict):
-        cookies = [{'name': k, 'value': v} for k, v in cookies.items()]
-
     # 添加cookies
     added_count = 0
     for cookie in cookies:
@@ -154,7 +232,7 @@ def inject_cookies(driver, cookie_data):
             cookie_dict = {
                 'name': cookie.get('name', cookie.get('name', '')),
                 'value': cookie.get('value', cookie.get('value', '')),
-                'domain': cookie.get('domain', '.xiaohongshu.com'),
+                'domain': cookie.get('domain', XHS_DOMAIN),
                 'path': cookie.get('path', '/'),
             }
 
@@ -178,40 +256,173 @@ def inject_cookies(driver, cookie_data):
     time.sleep(2)
 
 
-def fetch_user_page(driver, user_id: str):
+# 判断 __INITIAL_STATE__ 中用户主页数据是否已就绪（兼容Vue ref包装的 _value）
+USER_STATE_READY_JS = """
+const unwrap = (x) => (x && typeof x === 'object' && '_value' in x) ? x._value : x;
+const state = window.__INITIAL_STATE__;
+const user = state && unwrap(state.user);
+const info = user && unwrap(user.userPageInfo);
+return !!(info && typeof info === 'object' && Object.keys(info).length > 0);
+"""
+
+
+def wait_for_user_state(driver, timeout=15.0, first_interval=0.05, max_interval=1.0):
     """
-    获取用户主页数据
+    等待用户主页数据就绪
+
+    通过 execute_script 轮询 window.__INITIAL_STATE__.user.userPageInfo，
+    轮询间隔从 first_interval 开始指数增长，不超过 max_interval；
+    数据一出现就返回，总等待不超过 timeout。
 
     Args:
         driver: WebDriver实例
-        user_id: 用户ID（24位十六进制字符串）
+        timeout: 最长等待时间（秒）
+        first_interval: 首次轮询间隔（秒）
+        max_interval: 最大轮询间隔（秒）
 
     Returns:
-        HTML内容
+        (是否就绪, 等待耗时秒数)
     """
-    url = f"https://www.xiaohongshu.com/user/profile/{user_id}"
-    print(f"🌐 正在访问: {url}")
+    start = time.monotonic()
+    deadline = start + timeout
+    interval = first_interval
+
+    while True:
+        try:
+            if driver.execute_script(USER_STATE_READY_JS):
+                return True, time.monotonic() - start
+        except Exception:
+            # 页面跳转过程中脚本可能执行失败，继续轮询
+            pass
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False, time.monotonic() - start
+
+        time.sleep(min(interval, remaining))
+        interval = min(interval * 2, max_interval)
+
+
+# 在浏览器内只序列化 user.userPageInfo 和 user.notes：
+# 解开Vue ref，undefined/NaN/Infinity 转为null，跳过函数；
+# 只丢弃真正的循环引用（祖先链上的对象），被多处共享的对象每处都完整输出
+EXTRACT_USER_STATE_JS = """
+const unwrap = (x) => (x && typeof x === 'object' && '_value' in x) ? x._value : x;
+const state = window.__INITIAL_STATE__;
+const user = state && unwrap(state.user);
+if (!user) return null;
+const ancestors = new Set();
+const plain = (value) => {
+    value = unwrap(value);
+    if (value === undefined) return null;
+    if (typeof value === 'number' && !isFinite(value)) return null;
+    if (typeof value === 'function') return undefined;
+    if (!value || typeof value !== 'object') return value;
+    if (typeof value.toJSON === 'function') return value.toJSON();
+    if (ancestors.has(value)) return undefined;
+    ancestors.add(value);
+    let out;
+    if (Array.isArray(value)) {
+        out = value.map((item) => {
+            const converted = plain(item);
+            return converted === undefined ? null : converted;
+        });
+    } else {
+        out = {};
+        for (const key of Object.keys(value)) {
+            const converted = plain(value[key]);
+            if (converted !== undefined) out[key] = converted;
+        }
+    }
+    ancestors.delete(value);
+    return out;
+};
+return JSON.stringify({userPageInfo: plain(user.userPageInfo), notes: plain(user.notes)});
+"""
 
-    driver.get(url)
 
-    # 等待页面加载
-    print("⏳ 等待页面加载（10秒）...")
-    time.sleep(10)
+def extract_user_state(driver):
+    """
+    在浏览器内提取用户主页数据
 
-    # 尝试等待特定元素加载
+    只返回 user.userPageInfo 和 user.notes 两棵子树的紧凑JSON，
+    不读取整页HTML。
+
+    Args:
+        driver: WebDriver实例
+
+    Returns:
+        {'userPageInfo': ..., 'notes': ...}，页面中没有数据时返回None
+    """
     try:
-        WebDriverWait(driver, 15).until(
-            EC.presence_of_element_located((By.TAG_NAME, "body"))
-        )
-        print("✅ 页面加载完成")
-    except:
-        print("⚠️  页面加载超时，继续获取HTML...")
+        payload = driver.execute_script(EXTRACT_USER_STATE_JS)
+    except Exception as e:
+        print(f"⚠️  浏览器内提取数据失败: {e}")
+        return None
 
-    # 获取HTML
-    html = driver.page_source
-    print(f"📊 HTML长度: {len(html):,} 字符")
+    if not payload:
+        return None
+
+    print(f"✅ 提取用户数据，JSON长度: {len(payload):,}")
+    return json.loads(payload)
+
+
+class UserPacer:
+    """
+    用户之间的自适应间隔
+
+    页面顺利就绪时逐步缩短间隔，等不到数据（可能被限流或触发验证）时加倍，
+    实际等待时间带随机抖动。
+    """
+
+    def __init__(self, delay=3.0, min_delay=1.0, max_delay=60.0, speedup=0.8, backoff=2.0):
+        self.delay = delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.speedup = speedup
+        self.backoff = backoff
+
+    def record(self, ready: bool):
+        """记录一次抓取结果，调整间隔"""
+        if ready:
+            self.delay = max(self.min_delay, self.delay * self.speedup)
+        else:
+            self.delay = min(self.max_delay, self.delay * self.backoff)
+
+    def wait(self):
+        """等待到下一个用户"""
+        delay = self.delay * random.uniform(0.8, 1.2)
+        print(f"\n⏳ 等待{delay:.1f}秒后继续...")
+        time.sleep(delay)
+
+
+def crawl_users(driver, users, pacer=None, timeout=15.0):
+    """
+    批量模式：在同一个浏览器会话中依次抓取多个用户
+
+    Args:
+        driver: 已注入cookie的WebDriver实例
+        users: [{"id": 用户ID, "name": 名称}]
+        pacer: 用户之间的间隔控制，默认 UserPacer()
+        timeout: 单个用户等待数据就绪的最长时间（秒）
+
+    Yields:
+        (用户, 解析结果, 数据是否就绪)
+    """
+    pacer = pacer or UserPacer()
+
+    for index, user in enumerate(users):
+        if index > 0:
+            pacer.wait()
+
+        print("\n" + "=" * 70)
+        print(f"👤 抓取用户: {user['name']} (ID: {user['id']}) [{index + 1}/{len(users)}]")
+        print("=" * 70)
+
+        result, ready = crawl_user_data(driver, user['id'], timeout=timeout)
+        pacer.record(ready)
 
-    return html
+        yield user, result, ready
 
 
 def parse_user_page(html: str):
@@ -252,83 +463,433 @@ def parse_user_page(html: str):
 
     try:
         data = json.loads(json_str)
-        result['raw_data'] = data
-
-        # 提取用户信息
-        user_data = data.get('user', {})
-        if 'userPageInfo' in user_data:
-            user_page = user_data['userPageInfo']
-            if 'userPageUser' in user_page:
-                user_info = user_page['userPageUser']
-                result['user_info'] = {
-                    'user_id': user_info.get('user_id', ''),
-                    'nickname': user_info.get('nickname', ''),
-                    'desc': user_info.get('desc', ''),
-                    'fans_count': user_info.get('fans', 0),
-                    'follows_count': user_info.get('follows', 0),
-                    'interaction': user_info.get('interaction', ''),
-                    'gender': user_info.get('gender', ''),
-                }
-
-        # 提取笔记列表
-        note_data = data.get('user', {}).get('notes', [])
-        for note in note_data:
-            if note.get('model_type') == 'note':
-                note_card = note.get('note_card', {})
-                result['notes'].append({
-                    'note_id': note_card.get('id', ''),
-                    'title': note_card.get('display_title', ''),
-                    'desc': note_card.get('desc', ''),
-                    'type': note_card.get('type', 'normal'),
-                    'liked_count': note_card.get('liked_count', 0),
-                    'collected_count': note_card.get('collected_count', 0),
-                    'comment_count': note_card.get('comment_count', 0),
-                    'cover_url': note_card.get('cover', {}).get('url_default', ''),
-                    'time': note_card.get('time', ''),
-                })
-
-        print(f"✅ 成功解析数据")
-        print(f"   用户信息: {'✓' if result['user_info'] else '✗'}")
-        print(f"   笔记数量: {len(result['notes'])}")
-
-        return result
-
     except json.JSONDecodeError as e:
         print(f"❌ JSON解析失败: {e}")
         return result
 
+    result = parse_user_state(data.get('user') or {})
+    result['raw_data'] = data
+    return result
+
+
+def parse_user_state(user_data):
+    """
+    从 user 子树（userPageInfo 和 notes）提取用户信息和笔记列表
+
+    Args:
+        user_data: extract_user_state 的返回值，或 __INITIAL_STATE__['user']
+
+    Returns:
+        解析结果字典
+    """
+    result = {
+        'user_info': None,
+        'notes': [],
+        'raw_data': user_data
+    }
+
+    # 提取用户信息
+    user_page = user_data.get('userPageInfo') or {}
+    if 'userPageUser' in user_page:
+        user_info = user_page['userPageUser']
+        result['user_info'] = {
+            'user_id': user_info.get('user_id', ''),
+            'nickname': user_info.get('nickname', ''),
+            'desc': user_info.get('desc', ''),
+            'fans_count': user_info.get('fans', 0),
+            'follows_count': user_info.get('follows', 0),
+            'interaction': user_info.get('interaction', ''),
+            'gender': user_info.get('gender', ''),
+        }
+
+    # 提取笔记列表
+    for note in user_data.get('notes') or []:
+        if isinstance(note, dict) and note.get('model_type') == 'note':
+            note_card = note.get('note_card', {})
+            result['notes'].append({
+                'note_id': note_card.get('id', ''),
+                'title': note_card.get('display_title', ''),
+                'desc': note_card.get('desc', ''),
+                'type': note_card.get('type', 'normal'),
+                'liked_count': note_card.get('liked_count', 0),
+                'collected_count': note_card.get('collected_count', 0),
+                'comment_count': note_card.get('comment_count', 0),
+                'cover_url': (note_card.get('cover') or {}).get('url_default', ''),
+                'time': note_card.get('time', ''),
+            })
+
+    print(f"✅ 成功解析数据")
+    print(f"   用户信息: {'✓' if result['user_info'] else '✗'}")
+    print(f"   笔记数量: {len(result['notes'])}")
+
+    return result
+
+
+def crawl_user_data(driver, user_id: str, timeout=15.0, dump_dir='.'):
+    """
+    抓取并解析单个用户主页
+
+    优先在浏览器内提取数据；提取不到时退回解析整页HTML，
+    仍然解析失败才把HTML写入 dump_dir 便于排查。
+
+    Args:
+        driver: WebDriver实例
+        user_id: 用户ID
+        timeout: 等待数据就绪的最长时间（秒）
+        dump_dir: 解析失败时HTML的保存目录
+
+    Returns:
+        (解析结果, 数据是否就绪)
+    """
+    url = f"https://www.xiaohongshu.com/user/profile/{user_id}"
+    print(f"🌐 正在访问: {url}")
+
+    driver.get(url)
+
+    ready, elapsed = wait_for_user_state(driver, timeout=timeout)
+    if ready:
+        print(f"✅ 页面数据就绪（{elapsed:.2f}秒）")
+    else:
+        print(f"⚠️  {elapsed:.0f}秒内未等到用户数据")
+
+    state = extract_user_state(driver) if ready else None
+    if state is not None:
+        result = parse_user_state(state)
+        if result['user_info'] or result['notes']:
+            return result, ready
+
+    # 退回HTML解析
+    html = driver.page_source
+    result = parse_user_page(html)
+    if not (result['user_info'] or result['notes']):
+        html_file = Path(dump_dir) / f'xiaohongshu_user_{user_id}.html'
+        html_file.write_text(html, encoding='utf-8')
+        print(f"💾 解析失败，HTML已保存到: {html_file}")
+
+    return result, ready
+
+
+def load_cookies(cookie_file='xhs_cookies.json'):
+    """
+    加载cookie：优先使用会话保险箱中未过期的会话，其次读取cookie文件，
+    都没有时用pycookiecheat从浏览器提取并保存
+
+    Returns:
+        Cookie数据，获取失败返回None
+    """
+    print("\n🍪 加载cookie...")
+
+    # 方式1：复用保险箱中的会话
+    vault = get_vault()
+    session = vault.get('xiaohongshu') if vault is not None else None
+    if session is not None:
+        print(f"✅ 复用已保存的会话: {session.account}（{time.ctime(session.expires_at)} 过期）")
+        return {'cookies': session.cookies, 'account': session.account}
+
+    # 方式2：从文件加载
+    cookie_file = Path(cookie_file)
+    if cookie_file.exists():
+        print(f"✅ 找到cookie文件: {cookie_file}")
+        return load_cookies_from_file(cookie_file)
+
+    # 方式3：使用pycookiecheat提取
+    print(f"⚠️  未找到cookie文件，尝试从浏览器提取...")
+    cookie_data = load_cookies_from_pycookiecheat()
+
+    if cookie_data:
+        # 保存到文件
+        with open(cookie_file, 'w', encoding='utf-8') as f:
+            json.dump(cookie_data, f, ensure_ascii=False, indent=2)
+        print(f"💾 Cookie已保存到: {cookie_file}")
+
+    return cookie_data
+
+
+def remember_session(cookie_data, account='local'):
+    """抓取成功说明cookie可用，存入会话保险箱供之后的运行复用"""
+    vault = get_vault()
+    if vault is None:
+        return
+
+    account = cookie_data.get('account', account) if isinstance(cookie_data, dict) else account
+    if vault.mark_validated('xiaohongshu', account) is None:
+        vault.save(
+            'xiaohongshu', cookie_list(cookie_data),
+            account=account, domain=XHS_DOMAIN,
+            expiry_cookies=LOGIN_COOKIES
+        )
+
+
+def load_user_ids(filepath):
+    """
+    读取用户ID文件：每行一个ID，空行和 # 开头的行忽略，重复ID只保留一次
+
+    Returns:
+        用户ID列表
+    """
+    user_ids = []
+    with open(filepath, 'r', encoding='utf-8') as f:
+        for line in f:
+            user_id = line.strip().split(',')[0].strip()
+            if user_id and not user_id.startswith('#'):
+                user_ids.append(user_id)
+    return list(dict.fromkeys(user_ids))
+
+
+class ResultWriter:
+    """
+    线程安全的结果输出
+
+    结果追加到一个JSONL文件；每处理完一个用户在断点文件中追加一行
+    "用户ID\t状态"，重新运行时跳过状态为ok的用户。
+
+    指定 change_feed 时只输出变化：新笔记、已编辑的笔记ID和计数增量。
+    """
+
+    def __init__(self, output_file, checkpoint_file, change_feed=None):
+        self.output_file = Path(output_file)
+        self.checkpoint_file = Path(checkpoint_file)
+        self.change_feed = change_feed
+        self._lock = threading.Lock()
+        self.counts = {'ok': 0, 'failed': 0}
+
+    def completed(self):
+        """断点文件中已成功的用户ID"""
+        done = set()
+        if self.checkpoint_file.exists():
+            with open(self.checkpoint_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    parts = line.rstrip('\n').split('\t')
+                    if len(parts) == 2 and parts[1] == 'ok':
+                        done.add(parts[0])
+        return done
+
+    def __enter__(self):
+        self._output = open(self.output_file, 'a', encoding='utf-8')
+        self._checkpoint = open(self.checkpoint_file, 'a', encoding='utf-8')
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._output.close()
+        self._checkpoint.close()
+
+    def write(self, user_id, result, ready):
+        """写入一个用户的结果并记录断点"""
+        ok = bool(result['user_info'] or result['notes'])
+        with self._lock:
+            if ok:
+                if self.change_feed is not None:
+                    change = self.change_feed.diff(user_id, result['user_info'], result['notes'])
+                    record = {**change.to_dict(), 'user_info': result['user_info']}
+                else:
+                    record = {'user_id': user_id, 'user_info': result['user_info'], 'notes': result['notes']}
+                record['ready'] = ready
+                record['crawled_at'] = time.strftime('%Y-%m-%d %H:%M:%S')
+                self._output.write(json.dumps(record, ensure_ascii=False) + '\n')
+                self._output.flush()
+
+            # 结果落盘后再记断点，崩溃时最多重复抓取一个用户
+            status = 'ok' if ok else 'failed'
+            self._checkpoint.write(f"{user_id}\t{status}\n")
+            self._checkpoint.flush()
+            self.counts[status] += 1
+            return self.counts['ok'] + self.counts['failed']
+
+
+# 并行模式下单个浏览器连续出错多少次后重启
+MAX_WORKER_ERRORS = 3
+
+
+def run_worker_pool(user_ids, cookie_data, writer, workers=3, headless=True, timeout=15.0):
+    """
+    多浏览器并行抓取
+
+    启动 workers 个Chrome实例并注入同一份cookie，各自从共享队列取用户ID，
+    每个实例有自己的 UserPacer；结果统一交给 writer。
+
+    Args:
+        user_ids: 待抓取的用户ID
+        cookie_data: Cookie数据
+        writer: ResultWriter
+        workers: Chrome实例数
+        headless: 是否无头模式
+        timeout: 单个用户等待数据就绪的最长时间（秒）
+    """
+    tasks = queue.Queue()
+    for user_id in user_ids:
+        tasks.put(user_id)
+
+    total = len(user_ids)
+    workers = max(1, min(workers, total))
+
+    # 启动时 ChromeDriver 的下载和启动放在主线程里依次进行；
+    # 出错重启在工作线程中进行，驱动下载由 setup_driver 内的锁串行化
+    drivers = []
+    for index in range(workers):
+        print(f"\n🔧 启动浏览器 {index + 1}/{workers}...")
+        driver = setup_driver(headless=headless)
+        inject_cookies(driver, cookie_data)
+        drivers.append(driver)
+
+    def work(index):
+        pacer = UserPacer()
+        first = True
+        errors = 0
+        while True:
+            try:
+                user_id = tasks.get_nowait()
+            except queue.Empty:
+                return
+
+            if not first:
+                pacer.wait()
+            first = False
+
+            try:
+                result, ready = crawl_user_data(drivers[index], user_id, timeout=timeout)
+                errors = 0
+            except Exception as e:
+                print(f"❌ 抓取用户失败 {user_id}: {e}")
+                result, ready = {'user_info': None, 'notes': []}, False
+                errors += 1
+            pacer.record(ready)
+
+            done = writer.write(user_id, result, ready)
+            print(f"📈 进度: {done}/{total}")
+
+            # 连续出错时浏览器可能已经崩溃，重启该实例
+            if errors >= MAX_WORKER_ERRORS:
+                print(f"🔄 浏览器 {index + 1} 连续出错，重新启动...")
+                try:
+                    drivers[index].quit()
+                except Exception:
+                    pass
+                try:
+                    drivers[index] = setup_driver(headless=headless)
+                    inject_cookies(drivers[index], cookie_data)
+                except Exception as e:
+                    # 重启失败时结束该实例，剩余用户由其它实例继续，未完成的下次运行时续抓
+                    print(f"❌ 浏览器 {index + 1} 重启失败，停止该实例: {e}")
+                    return
+                errors = 0
+
+    threads = [threading.Thread(target=work, args=(index,), daemon=True) for index in range(workers)]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+
+def show_result(result):
+    """打印解析结果摘要"""
+    if result['user_info']:
+        print("\n✅ 用户信息:")
+        info = result['user_info']
+        print(f"  昵称: {info['nickname']}")
+        print(f"  简介: {info['desc'][:100]}...")
+        print(f"  粉丝: {info['fans_count']:,}")
+        print(f"  关注: {info['follows_count']:,}")
+
+    if result['notes']:
+        print(f"\n✅ 笔记列表 (共{len(result['notes'])}条):")
+        for i, note in enumerate(result['notes'][:5], 1):
+            print(f"\n  [{i}] {note['title']}")
+            print(f"      ID: {note['note_id']}")
+            print(f"      点赞: {note['liked_count']:,}  收藏: {note['collected_count']:,}  评论: {note['comment_count']:,}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='小红书本地爬虫')
+    parser.add_argument('user_ids', nargs='*', help='用户ID（不指定 --input 时使用）')
+    parser.add_argument('--input', '-i', help='用户ID文件，每行一个ID；指定后以多浏览器并行模式运行')
+    parser.add_argument('--output', '-o', default='xiaohongshu_users.jsonl', help='结果JSONL文件')
+    parser.add_argument('--checkpoint', help='断点文件，默认为 <output>.progress')
+    parser.add_argument('--workers', '-w', type=int, default=3, help='并行的Chrome实例数')
+    parser.add_argument('--cookies', default='xhs_cookies.json', help='cookie文件')
+    parser.add_argument('--timeout', type=float, default=15.0, help='单个用户等待数据就绪的最长时间（秒）')
+    parser.add_argument('--show-browser', action='store_true', help='并行模式下显示浏览器窗口')
+    parser.add_argument('--change-feed', help='用户状态文件；指定后只输出新笔记和计数增量')
+    return parser.parse_args()
+
+
+def open_change_feed(path):
+    """打开用户状态文件，未指定或模块不可用时返回None"""
+    if not path:
+        return None
+    if ChangeFeed is None:
+        print("⚠️  变更检测模块不可用，输出完整结果")
+        return None
+    return ChangeFeed(path)
+
+
+def run_batch_job(args):
+    """并行模式：从文件读取用户ID，跳过断点中已完成的用户"""
+    writer = ResultWriter(
+        args.output,
+        args.checkpoint or f"{args.output}.progress",
+        change_feed=open_change_feed(args.change_feed)
+    )
+
+    user_ids = load_user_ids(args.input)
+    done = writer.completed()
+    pending = [user_id for user_id in user_ids if user_id not in done]
+    print(f"📋 共{len(user_ids)}个用户，已完成{len(user_ids) - len(pending)}个，待抓取{len(pending)}个")
+
+    if not pending:
+        print("✅ 没有待抓取的用户")
+        return
+
+    cookie_data = load_cookies(args.cookies)
+    if not cookie_data:
+        print("\n❌ 无法获取cookie，程序退出")
+        return
+
+    start = time.monotonic()
+    with writer:
+        run_worker_pool(
+            pending,
+            cookie_data,
+            writer,
+            workers=args.workers,
+            headless=not args.show_browser,
+            timeout=args.timeout
+        )
+    if writer.counts['ok']:
+        remember_session(cookie_data)
+
+    elapsed = time.monotonic() - start
+    print("\n" + "=" * 70)
+    print(f"✅ 完成 {writer.counts['ok']} 个，失败 {writer.counts['failed']} 个，耗时 {elapsed:.0f} 秒")
+    print(f"💾 结果: {args.output}")
+    print("=" * 70)
+
 
 def main():
     """主函数"""
+    args = parse_args()
+
     print("=" * 70)
     print("小红书本地爬虫")
     print("=" * 70)
 
+    if args.input:
+        run_batch_job(args)
+        return
+
     # 设置WebDriver
     print("\n🔧 设置Chrome WebDriver...")
     print("💡 首次运行会自动下载ChromeDriver，请耐心等待...")
     driver = setup_driver(headless=False)  # 显示浏览器窗口
 
     try:
-        # 加载cookie
-        print("\n🍪 加载cookie...")
-
-        # 方式1：从文件加载
-        cookie_file = Path('xhs_cookies.json')
-        if cookie_file.exists():
-            print(f"✅ 找到cookie文件: {cookie_file}")
-            cookie_data = load_cookies_from_file(cookie_file)
-        else:
-            # 方式2：使用pycookiecheat提取
-            print(f"⚠️  未找到cookie文件，尝试从浏览器提取...")
-            cookie_data = load_cookies_from_pycookiecheat()
-
-            if cookie_data:
-                # 保存到文件
-                with open('xhs_cookies.json', 'w', encoding='utf-8') as f:
-                    json.dump(cookie_data, f, ensure_ascii=False, indent=2)
-                print(f"💾 Cookie已保存到: xhs_cookies.json")
-
+        cookie_data = load_cookies(args.cookies)
         if not cookie_data:
             print("\n❌ 无法获取cookie，程序退出")
             print("💡 请手动登录小红书后重试")
@@ -344,65 +905,24 @@ def main():
             {"id": "5f9d2e3e00000000108035f12ab", "name": "测试用户"},
         ]
 
-        # 也可以从命令行参数获取
-        import sys
-        if len(sys.argv) > 1:
-            user_id = sys.argv[1]
-            test_users = [{"id": user_id, "name": f"用户{user_id}"}]
-
-        for user in test_users:
-            print("\n" + "=" * 70)
-            print(f"👤 抓取用户: {user['name']} (ID: {user['id']})")
-            print("=" * 70)
-
-            # 获取用户主页
-            html = fetch_user_page(driver, user['id'])
-
-            # 保存HTML（用于调试）
-            html_file = f'xiaohongshu_user_{user["id"]}.html'
-            with open(html_file, 'w', encoding='utf-8') as f:
-                f.write(html)
-            print(f"💾 HTML已保存到: {html_file}")
-
-            # 解析数据
-            print("\n📊 解析页面数据...")
-            result = parse_user_page(html)
-
-            # 显示结果
-            if result['user_info']:
-                print("\n✅ 用户信息:")
-                info = result['user_info']
-                print(f"  昵称: {info['nickname']}")
-                print(f"  简介: {info['desc'][:100]}...")
-                print(f"  粉丝: {info['fans_count']:,}")
-                print(f"  关注: {info['follows_count']:,}")
-
-            if result['notes']:
-                print(f"\n✅ 笔记列表 (共{len(result['notes'])}条):")
-                for i, note in enumerate(result['notes'][:5], 1):
-                    print(f"\n  [{i}] {note['title']}")
-                    print(f"      ID: {note['note_id']}")
-                    print(f"      点赞: {note['liked_count']:,}  收藏: {note['collected_count']:,}  评论: {note['comment_count']:,}")
-
-            # 保存解析结果
-            if result['user_info'] or result['notes']:
-                output_file = f'xiaohongshu_user_{user["id"]}_data.json'
-                save_data = {
-                    'user_info': result['user_info'],
-                    'notes': result['notes'],
-                    'crawled_at': time.strftime('%Y-%m-%d %H:%M:%S')
-                }
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    json.dump(save_data, f, ensure_ascii=False, indent=2)
-                print(f"\n💾 数据已保存到: {output_file}")
-
-            # 等待一段时间再访问下一个用户
-            if user != test_users[-1]:
-                print("\n⏳ 等待5秒后继续...")
-                time.sleep(5)
+        # 也可以从命令行参数获取（可传多个用户ID）
+        if args.user_ids:
+            test_users = [{"id": user_id, "name": f"用户{user_id}"} for user_id in args.user_ids]
+
+        writer = ResultWriter(
+            args.output,
+            args.checkpoint or f"{args.output}.progress",
+            change_feed=open_change_feed(args.change_feed)
+        )
+        with writer:
+            for user, result, ready in crawl_users(driver, test_users, timeout=args.timeout):
+                show_result(result)
+                writer.write(user['id'], result, ready)
+        if writer.counts['ok']:
+            remember_session(cookie_data)
 
         print("\n" + "=" * 70)
-        print("✅ 所有任务完成！")
+        print(f"✅ 所有任务完成！结果已追加到: {args.output}")
         print("=" * 70)
 
         input("\n按回车键关闭浏览器...")